@@ -0,0 +1,110 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+
+import os
+from datetime import datetime
+from decimal import Decimal
+
+ARROW_EXTENSIONS = ('.arrow', '.feather')
+
+
+def is_arrow_file(filename):
+    """Returns True for Arrow IPC (Feather v2) files and directories of rolled Arrow files"""
+    if not filename or filename == '-':
+        return False
+    if filename.endswith(ARROW_EXTENSIONS):
+        return True
+    return os.path.isdir(filename) and len(list_arrow_files(filename)) > 0
+
+
+def list_arrow_files(filename):
+    if not os.path.isdir(filename):
+        return [filename]
+    # rolled files are named in the order they are written, see RollingParquetWriter
+    return [
+        os.path.join(filename, basename) for basename in sorted(os.listdir(filename))
+        if basename.endswith(ARROW_EXTENSIONS) and not basename.startswith('.')
+    ]
+
+
+def iterate_arrow_batches(filename, columns=None):
+    """Yields the record batches of Arrow files, memory mapped, so that columns are read without a copy.
+
+    If columns are given, batches only hold the ones of them which are in the files.
+    """
+    pa = import_pyarrow()
+    for arrow_filename in list_arrow_files(filename):
+        with pa.memory_map(arrow_filename, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            names = None
+            if columns is not None:
+                names = [column for column in columns if column in reader.schema.names]
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                yield batch if names is None else batch.select(names)
+
+
+def iterate_arrow_items(filename, columns=None):
+    """Yields the rows of Arrow files as item dicts with the values of JSON lines outputs"""
+    for batch in iterate_arrow_batches(filename, columns):
+        names = batch.schema.names
+        values = [column_to_pylist(batch.column(index)) for index in range(batch.num_columns)]
+        for row in zip(*values):
+            yield dict(zip(names, row))
+
+
+def iterate_arrow_column(filename, column):
+    """Yields the values of one column of Arrow files, reading no other column"""
+    for batch in iterate_arrow_batches(filename, [column]):
+        if batch.num_columns == 0:
+            raise ValueError('Column {} is not found in {}'.format(column, filename))
+        yield from column_to_pylist(batch.column(0))
+
+
+def column_to_pylist(column):
+    pa = import_pyarrow()
+    values = column.to_pylist()
+    # timestamps and decimals are exported as ISO 8601 strings and integers in JSON lines
+    if pa.types.is_timestamp(column.type) or pa.types.is_decimal(column.type):
+        return [to_json_value(value) for value in values]
+    return values
+
+
+def to_json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value)
+    return value
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError('pyarrow is required to read Arrow files, install it with "pip install pyarrow"')
+    return pyarrow
@@ -20,16 +20,21 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import itertools
+import threading
 
 
-# https://stackoverflow.com/a/27062830/1580227
 class AtomicCounter:
     def __init__(self):
-        self._counter = itertools.count()
-        # init to 0
-        next(self._counter)
+        self._value = 0
+        self._lock = threading.Lock()
 
     def increment(self, increment=1):
         assert increment > 0
-        return [next(self._counter) for _ in range(0, increment)][-1]
+        with self._lock:
+            self._value += increment
+            return self._value
+
+    def get(self):
+        """Returns the current value without incrementing it"""
+        with self._lock:
+            return self._value
@@ -0,0 +1,281 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import io
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+DEFAULT_COMPRESSION_LEVELS = {GZIP: 6, ZSTD: 3}
+MAX_COMPRESSION_LEVELS = {GZIP: 9, ZSTD: 22}
+COMPRESSION_EXTENSIONS = {GZIP: '.gz', ZSTD: '.zst'}
+DEFAULT_COMPRESS_THREADS = os.cpu_count() or 1
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+ZSTD_DICT_EXTENSION = '.dict'
+ZSTD_FRAME_HEADER_SIZE_MAX = 18
+DEFAULT_ZSTD_DICT_SIZE = 112640
+
+_pools = {}
+_pools_lock = threading.Lock()
+_compressors = threading.local()
+
+
+def get_compressor_pool(threads):
+    """Returns the pool of background compressors shared by all compressed files of the process"""
+    with _pools_lock:
+        pool = _pools.get(threads)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='compressor')
+            _pools[threads] = pool
+        return pool
+
+
+def import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('zstandard is required to read or write zstd files, install it with "pip install zstandard"')
+    return zstandard
+
+
+def get_compression_extension(compression):
+    return COMPRESSION_EXTENSIONS[compression]
+
+
+def get_zstd_compressor(level, dictionary=None):
+    # compressors are reused per thread, preparing a dictionary for every chunk is costly
+    cache = getattr(_compressors, 'cache', None)
+    if cache is None:
+        cache = _compressors.cache = {}
+    key = (level, dictionary.dict_id() if dictionary is not None else None)
+    compressor = cache.get(key)
+    if compressor is None:
+        compressor = import_zstandard().ZstdCompressor(level=level, dict_data=dictionary)
+        cache[key] = compressor
+    return compressor
+
+
+def compress_chunk(compression, level, data, dictionary=None):
+    if compression == GZIP:
+        # mtime is fixed, so that the same input is compressed to the same output
+        # (gzip.compress only takes mtime since Python 3.8)
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=level, mtime=0) as file:
+            file.write(data)
+        return buffer.getvalue()
+    if compression == ZSTD:
+        return get_zstd_compressor(level, dictionary).compress(data)
+    raise ValueError('Unknown compression {}'.format(compression))
+
+
+def decompress_chunk(compression, data, zstd_dicts=None):
+    """Decompresses one gzip member or zstd frame written by ParallelCompressedFile"""
+    if compression == GZIP:
+        return gzip.decompress(data)
+    if compression == ZSTD:
+        zstandard = import_zstandard()
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        dictionary = None
+        if dict_id:
+            dictionary = next((d for d in (zstd_dicts or {}).values() if d.dict_id() == dict_id), None)
+            if dictionary is None:
+                raise LookupError('Dictionary {} is not found'.format(dict_id))
+        return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data)
+    raise ValueError('Unknown compression {}'.format(compression))
+
+
+class ParallelCompressedFile(io.RawIOBase):
+    """Binary file compressing written data in chunks of chunk_size bytes on a pool of background threads,
+    like pigz. Every chunk is compressed as an independent gzip member or zstd frame and the compressed
+    chunks are written in order, so the output is still a standard gzip or zstd file.
+    zstd frames compressed with a dictionary carry its ID, see train_zstd_dictionary.
+
+    If frame_rows is given, rows written with write_row are never split between chunks, a chunk is cut every
+    frame_rows rows, and frames lists the offset, length, row count and block range of every written chunk,
+    so that readers can decompress the frames of a block range only (see frame_index).
+    """
+
+    def __init__(self, file, compression=GZIP, level=None, threads=DEFAULT_COMPRESS_THREADS,
+                 chunk_size=DEFAULT_CHUNK_SIZE, zstd_dict=None, frame_rows=None):
+        if compression not in DEFAULT_COMPRESSION_LEVELS:
+            raise ValueError('Unknown compression {}'.format(compression))
+        if level is not None and not 1 <= level <= MAX_COMPRESSION_LEVELS[compression]:
+            raise ValueError('Level of {} compression must be between 1 and {}'.format(
+                compression, MAX_COMPRESSION_LEVELS[compression]))
+        if zstd_dict is not None and compression != ZSTD:
+            raise ValueError('Dictionaries are only supported with zstd compression')
+        if frame_rows is not None and frame_rows <= 0:
+            raise ValueError('frame_rows must be greater than 0')
+        if compression == ZSTD:
+            import_zstandard()
+        self.file = file
+        self.compression = compression
+        self.level = level if level is not None else DEFAULT_COMPRESSION_LEVELS[compression]
+        self.chunk_size = chunk_size
+        self.zstd_dict = zstd_dict
+        self.frame_rows = frame_rows
+        self.frames = [] if frame_rows is not None else None
+        self.max_pending = 2 * threads
+
+        self._pool = get_compressor_pool(threads)
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._chunks = 0
+        self._offset = 0
+        self._rows = 0
+        self._start_block = None
+        self._end_block = None
+        self._lock = threading.Lock()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        with self._lock:
+            self._buffer += data
+            if len(self._buffer) >= self.chunk_size:
+                self._submit()
+        return len(data)
+
+    def write_row(self, data, block_number):
+        """Writes one row of the given block, a chunk is only cut after a complete row.
+        Returns the number of the frame the row is written to, its position in frames once the file is closed."""
+        with self._lock:
+            frame_number = self._chunks
+            self._buffer += data
+            self._rows += 1
+            if self._start_block is None or block_number < self._start_block:
+                self._start_block = block_number
+            if self._end_block is None or block_number > self._end_block:
+                self._end_block = block_number
+            if len(self._buffer) >= self.chunk_size or (
+                    self.frame_rows is not None and self._rows >= self.frame_rows):
+                self._submit()
+        return frame_number
+
+    def end_frame(self):
+        """Compresses the data written so far as a chunk of its own, e.g. the headers of CSV files"""
+        with self._lock:
+            if self._buffer:
+                self._submit()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            with self._lock:
+                if self._buffer or self._chunks == 0:
+                    # an empty file still gets one member, so that it can be decompressed
+                    self._submit()
+                while self._pending:
+                    self._write_pending()
+        finally:
+            self.file.close()
+            super().close()
+
+    def _submit(self):
+        data = bytes(self._buffer)
+        frame = {'rows': self._rows, 'start_block': self._start_block, 'end_block': self._end_block}
+        self._buffer = bytearray()
+        self._rows = 0
+        self._start_block = None
+        self._end_block = None
+        future = self._pool.submit(compress_chunk, self.compression, self.level, data, self.zstd_dict)
+        self._pending.append((future, frame))
+        self._chunks += 1
+        # compressed chunks are written in order, waiting for the oldest one keeps memory bounded
+        while len(self._pending) > self.max_pending or (self._pending and self._pending[0][0].done()):
+            self._write_pending()
+
+    def _write_pending(self):
+        future, frame = self._pending.popleft()
+        compressed = future.result()
+        self.file.write(compressed)
+        if self.frames is not None:
+            self.frames.append(dict(offset=self._offset, length=len(compressed), **frame))
+        self._offset += len(compressed)
+
+
+def train_zstd_dictionary(samples, dict_size=DEFAULT_ZSTD_DICT_SIZE):
+    """Trains a zstd dictionary from samples, e.g. lines of an existing output, and returns it as bytes"""
+    zstandard = import_zstandard()
+    return zstandard.train_dictionary(dict_size, samples).as_bytes()
+
+
+def get_zstd_dictionary_path(dict_dir, item_type):
+    return os.path.join(dict_dir, item_type + ZSTD_DICT_EXTENSION)
+
+
+def load_zstd_dictionaries(dict_dir):
+    """Loads dictionaries written by train_dict from dict_dir, keyed by item type"""
+    zstandard = import_zstandard()
+    dictionaries = {}
+    for file_name in sorted(os.listdir(dict_dir)):
+        if file_name.endswith(ZSTD_DICT_EXTENSION):
+            with open(os.path.join(dict_dir, file_name), 'rb') as file:
+                item_type = file_name[:-len(ZSTD_DICT_EXTENSION)]
+                dictionaries[item_type] = zstandard.ZstdCompressionDict(file.read())
+    return dictionaries
+
+
+def open_compressed(filename, mode='rt', zstd_dicts=None):
+    """Opens a plain, gzip or zstd file for reading, chosen by the file extension.
+    zstd frames compressed with a dictionary are decompressed with the one of zstd_dicts with the same ID."""
+    if filename.endswith(COMPRESSION_EXTENSIONS[GZIP]):
+        return gzip.open(filename, mode)
+    if not filename.endswith(COMPRESSION_EXTENSIONS[ZSTD]):
+        return open(filename, mode)
+
+    zstandard = import_zstandard()
+    file = open(filename, 'rb')
+    try:
+        header = file.read(ZSTD_FRAME_HEADER_SIZE_MAX)
+        file.seek(0)
+        dict_id = zstandard.get_frame_parameters(header).dict_id if header else 0
+        dictionary = None
+        if dict_id:
+            dictionary = next((d for d in (zstd_dicts or {}).values() if d.dict_id() == dict_id), None)
+            if dictionary is None:
+                raise LookupError('Dictionary {} of {} is not found'.format(dict_id, filename))
+        reader = zstandard.ZstdDecompressor(dict_data=dictionary).stream_reader(file, read_across_frames=True)
+    except Exception:
+        file.close()
+        raise
+    return io.BufferedReader(reader) if 'b' in mode else io.TextIOWrapper(reader, encoding='utf-8')
+
+
+def get_decompression_errors():
+    """Returns the errors raised while reading a truncated or corrupt file opened with open_compressed"""
+    errors = (EOFError, OSError, ValueError)
+    try:
+        import zstandard
+    except ImportError:
+        return errors
+    return errors + (zstandard.ZstdError,)
@@ -39,6 +39,8 @@ from json import JSONEncoder
 import decimal
 import six
 
+from blockchainetl.row import Row
+
 
 class BaseItemExporter(object):
 
@@ -77,7 +79,7 @@ class BaseItemExporter(object):
         if include_empty is None:
             include_empty = self.export_empty_fields
         if self.fields_to_export is None:
-            if include_empty and not isinstance(item, dict):
+            if include_empty and not isinstance(item, (dict, Row)):
                 field_iter = six.iterkeys(item.fields)
             else:
                 field_iter = six.iterkeys(item)
@@ -89,7 +91,7 @@ class BaseItemExporter(object):
 
         for field_name in field_iter:
             if field_name in item:
-                field = {} if isinstance(item, dict) else item.fields[field_name]
+                field = {} if isinstance(item, (dict, Row)) else item.fields[field_name]
                 value = self.serialize_field(field, field_name, item[field_name])
             else:
                 value = default_value
@@ -104,16 +106,22 @@ class CsvItemExporter(BaseItemExporter):
         if not self.encoding:
             self.encoding = 'utf-8'
         self.include_headers_line = include_headers_line
-        self.stream = io.TextIOWrapper(
-            file,
-            line_buffering=False,
-            write_through=True,
-            encoding=self.encoding
-        ) if six.PY3 else file
-        self.csv_writer = csv.writer(self.stream, **kwargs)
+        # file may be None if items are only encoded with encode_item
+        if file is not None:
+            self.stream = io.TextIOWrapper(
+                file,
+                line_buffering=False,
+                write_through=True,
+                encoding=self.encoding
+            ) if six.PY3 else file
+            self.csv_writer = csv.writer(self.stream, **kwargs)
+        self._csv_writer_options = kwargs
         self._headers_not_written = True
         self._join_multivalued = join_multivalued
         self._write_headers_lock = threading.Lock()
+        self._row_builder = None
+        self._row_builders = {}
+        self._row_buffers = threading.local()
 
     def serialize_field(self, field, name, value):
         serializer = field.get('serializer', self._join_if_needed)
@@ -135,10 +143,58 @@ class CsvItemExporter(BaseItemExporter):
                     self._write_headers_and_set_fields_to_export(item)
                     self._headers_not_written = False
 
+        self.csv_writer.writerow(self._get_row(item))
+
+    def encode_item(self, item):
+        """Returns the CSV row of the item as bytes, without writing it"""
+        return self._encode_row(self._get_row(item))
+
+    def _get_row(self, item):
+        row_builder = self._row_builder
+        if row_builder is None and self.fields_to_export and isinstance(item, (dict, Row)) \
+                and type(self).serialize_field is CsvItemExporter.serialize_field:
+            # fields are known once headers are written, the row builder is compiled for them
+            row_builder = self._row_builder = compile_row_builder(self.fields_to_export, self._serialize_value)
+        if row_builder is not None and isinstance(item, dict):
+            return row_builder(item)
+        if row_builder is not None and isinstance(item, Row):
+            # rows are built from the slots of the row type, without looking up the fields by name
+            row_type_builder = self._row_builders.get(type(item))
+            if row_type_builder is None:
+                row_type_builder = self._row_builders[type(item)] = compile_row_builder(
+                    self.fields_to_export, self._serialize_value, row_type=type(item))
+            return row_type_builder(item)
         fields = self._get_serialized_fields(item, default_value='',
                                              include_empty=True)
-        values = list(self._build_row(x for _, x in fields))
-        self.csv_writer.writerow(values)
+        return list(self._build_row(x for _, x in fields))
+
+    def _serialize_value(self, value):
+        # same as _build_row of serialize_field of a single value: only lists, tuples and bytes are changed
+        if isinstance(value, (list, tuple)):
+            value = self._join_if_needed(value)
+        if isinstance(value, bytes):
+            return to_native_str(value, self.encoding)
+        return value
+
+    def encode_headers(self, item):
+        """Returns the headers line as bytes, fields of the item are used if fields_to_export is not set"""
+        if not self.include_headers_line:
+            return b''
+        if not self.fields_to_export:
+            self.fields_to_export = list(item.keys()) if isinstance(item, (dict, Row)) else list(item.fields.keys())
+        return self._encode_row(self._build_row(self.fields_to_export))
+
+    def _encode_row(self, values):
+        # a buffer and writer per thread, items may be encoded by several threads at once
+        buffers = self._row_buffers
+        buffer = getattr(buffers, 'buffer', None)
+        if buffer is None:
+            buffer = buffers.buffer = io.StringIO()
+            buffers.csv_writer = csv.writer(buffer, **self._csv_writer_options)
+        buffer.seek(0)
+        buffer.truncate()
+        buffers.csv_writer.writerow(list(values))
+        return buffer.getvalue().encode(self.encoding)
 
     def _build_row(self, values):
         for s in values:
@@ -150,7 +206,7 @@ class CsvItemExporter(BaseItemExporter):
     def _write_headers_and_set_fields_to_export(self, item):
         if self.include_headers_line:
             if not self.fields_to_export:
-                if isinstance(item, dict):
+                if isinstance(item, (dict, Row)):
                     # for dicts try using fields of the first item
                     self.fields_to_export = list(item.keys())
                 else:
@@ -164,6 +220,8 @@ def EncodeCustom(o):
         return float(round(o, 8))
     elif isinstance(o, datetime.datetime):
         return str(o)
+    elif isinstance(o, Row):
+        return o.to_dict()
     raise TypeError(repr(o) + " is not JSON serializable")
 
 class JsonLinesItemExporter(BaseItemExporter):
@@ -174,11 +232,76 @@ class JsonLinesItemExporter(BaseItemExporter):
         kwargs.setdefault('ensure_ascii', not self.encoding)
         # kwargs.setdefault('default', EncodeDecimal)
         self.encoder = JSONEncoder(default=EncodeCustom, **kwargs)
+        self._select_fields = None
+        self._row_selectors = {}
+        if self.fields_to_export is not None and not self.export_empty_fields \
+                and type(self).serialize_field is BaseItemExporter.serialize_field:
+            self._select_fields = compile_field_selector(self.fields_to_export)
 
     def export_item(self, item):
-        itemdict = dict(self._get_serialized_fields(item))
+        self.file.write(self.encode_item(item))
+
+    def encode_item(self, item):
+        """Returns the JSON line of the item as bytes, without writing it"""
+        if self._select_fields is not None and isinstance(item, dict):
+            itemdict = self._select_fields(item)
+        elif self._select_fields is not None and isinstance(item, Row):
+            select_fields = self._row_selectors.get(type(item))
+            if select_fields is None:
+                select_fields = self._row_selectors[type(item)] = compile_field_selector(
+                    self.fields_to_export, row_type=type(item))
+            itemdict = select_fields(item)
+        else:
+            itemdict = dict(self._get_serialized_fields(item))
         data = self.encoder.encode(itemdict) + '\n'
-        self.file.write(to_bytes(data, self.encoding))
+        return data.encode(self.encoding or 'utf-8')
+
+
+# The functions below compile code specialized for a list of fields once per exporter. The compiled code
+# gives the same output as _get_serialized_fields, without a generator and a serialize_field call per field.
+
+def compile_field_selector(fields, row_type=None):
+    """Returns a function selecting the fields present in a dict item, in the order of fields.
+    With row_type, the function selects the fields from rows of that type, fields of its schema are always present.
+    """
+    if row_type is not None:
+        values = ['{0!r}: {1}'.format(field, get_row_value_expression(field, row_type))
+                  for field in fields if is_row_field(field, row_type)]
+        lines = ['def select_fields(item):', '    return {{{}}}'.format(', '.join(values))]
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        return namespace['select_fields']
+
+    lines = ['def select_fields(item):', '    selected = {}']
+    for field in fields:
+        lines.append('    if {0!r} in item:'.format(field))
+        lines.append('        selected[{0!r}] = item[{0!r}]'.format(field))
+    lines.append('    return selected')
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+    return namespace['select_fields']
+
+
+def compile_row_builder(fields, serialize_value, default_value='', row_type=None):
+    """Returns a function building the row of serialized values of fields of a dict item, or of rows of row_type"""
+    if row_type is not None:
+        values = ', '.join(
+            'serialize_value({})'.format(get_row_value_expression(field, row_type))
+            if is_row_field(field, row_type) else 'default_value' for field in fields)
+    else:
+        values = ', '.join(
+            'serialize_value(item[{0!r}]) if {0!r} in item else default_value'.format(field) for field in fields)
+    namespace = {'serialize_value': serialize_value, 'default_value': default_value}
+    exec('def build_row(item):\n    return [{}]'.format(values), namespace)
+    return namespace['build_row']
+
+
+def is_row_field(field, row_type):
+    return field == 'type' or field in row_type._field_set
+
+
+def get_row_value_expression(field, row_type):
+    return repr(row_type.type) if field == 'type' else 'item.{}'.format(field)
 
 
 def to_native_str(text, encoding=None, errors='strict'):
@@ -27,6 +27,8 @@ import pathlib
 import sys
 import gzip
 
+from blockchainetl.compression import DEFAULT_COMPRESS_THREADS, GZIP, ParallelCompressedFile
+
 
 # https://stackoverflow.com/questions/17602878/how-to-handle-both-with-open-and-sys-stdout-nicely
 @contextlib.contextmanager
@@ -39,14 +41,19 @@ def smart_open(filename=None, mode='w', binary=False, create_parent_dirs=True):
         fh.close()
 
 
-def get_file_handle(filename, mode='w', binary=False, create_parent_dirs=True, compress=False):
+def get_file_handle(filename, mode='w', binary=False, create_parent_dirs=True, compress=False, compress_level=None,
+                    compress_threads=DEFAULT_COMPRESS_THREADS, compression=GZIP, zstd_dict=None, frame_rows=None):
     if create_parent_dirs and filename is not None:
         dirname = os.path.dirname(filename)
         pathlib.Path(dirname).mkdir(parents=True, exist_ok=True)
     full_mode = mode + ('b' if binary else '')
     is_file = filename and filename != '-'
     if is_file:
-        if compress:
+        if compress and mode == 'w' and binary:
+            # compressed by background threads, see ParallelCompressedFile
+            fh = ParallelCompressedFile(open(filename, full_mode), compression=compression, level=compress_level,
+                                        threads=compress_threads, zstd_dict=zstd_dict, frame_rows=frame_rows)
+        elif compress:
             fh = gzip.open(filename, full_mode)
         else:
             fh = open(filename, full_mode)
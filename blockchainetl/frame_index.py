@@ -0,0 +1,127 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+
+import csv
+import io
+import json
+import os
+
+from blockchainetl.compression import COMPRESSION_EXTENSIONS, decompress_chunk
+from blockchainetl.csv_utils import set_max_field_size_limit
+
+FRAME_INDEX_EXTENSION = '.idx'
+
+
+def get_frame_index_filename(filename):
+    """Returns the name of the sidecar index of a compressed file written with frame_rows, e.g. data.json.gz.idx"""
+    return filename + FRAME_INDEX_EXTENSION
+
+
+def is_framed(file):
+    """Returns True for files written by a ParallelCompressedFile with frame_rows"""
+    return getattr(file, 'frames', None) is not None
+
+
+def write_frame_index(filename, file):
+    """Writes the sidecar index of the closed file, which was written to filename by a ParallelCompressedFile
+    with frame_rows, and returns the name of the index. Returns None for other files."""
+    if not is_framed(file):
+        return None
+    frames = file.frames
+    index_filename = get_frame_index_filename(filename)
+    temp_filename = os.path.join(os.path.dirname(index_filename), '.{}.tmp'.format(os.path.basename(index_filename)))
+    with open(temp_filename, 'w') as index_file:
+        json.dump({'compression': file.compression, 'frames': frames}, index_file)
+        index_file.write('\n')
+    os.replace(temp_filename, index_filename)
+    return index_filename
+
+
+def read_frame_index(filename):
+    """Returns the sidecar index of filename, or None if there is none"""
+    try:
+        with open(get_frame_index_filename(filename)) as index_file:
+            return json.load(index_file)
+    except FileNotFoundError:
+        return None
+
+
+def read_frames(filename, start_block=None, end_block=None, zstd_dicts=None, frame_index=None):
+    """Yields the decompressed frames of filename which hold rows of blocks from start_block to end_block,
+    seeking to each of them with the sidecar index. Frames without rows, like the headers of CSV files,
+    are always yielded."""
+    frame_index = frame_index or read_frame_index(filename)
+    if frame_index is None:
+        raise ValueError('Frame index of {} is not found'.format(filename))
+    with open(filename, 'rb') as file:
+        for frame in frame_index['frames']:
+            if frame['rows'] > 0 and not overlaps_block_range(
+                    frame['start_block'], frame['end_block'], start_block, end_block):
+                continue
+            file.seek(frame['offset'])
+            yield decompress_chunk(frame_index['compression'], file.read(frame['length']), zstd_dicts)
+
+
+def iterate_items_in_block_range(filename, start_block=None, end_block=None, zstd_dicts=None):
+    """Returns the items of blocks from start_block to end_block of a JSON lines or CSV file with a sidecar index,
+    decompressing only the frames holding them"""
+    lines = (line for data in read_frames(filename, start_block, end_block, zstd_dicts)
+             for line in io.StringIO(data.decode('utf-8')))
+    if strip_compression_extension(filename).endswith('.csv'):
+        set_max_field_size_limit()
+        items = csv.DictReader(lines)
+    else:
+        items = (json.loads(line) for line in lines)
+    return filter_block_range(items, start_block, end_block)
+
+
+def strip_compression_extension(filename):
+    for extension in COMPRESSION_EXTENSIONS.values():
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return filename
+
+
+def overlaps_block_range(frame_start_block, frame_end_block, start_block, end_block):
+    if start_block is not None and frame_end_block < start_block:
+        return False
+    return end_block is None or frame_start_block <= end_block
+
+
+def filter_block_range(items, start_block=None, end_block=None):
+    if start_block is None and end_block is None:
+        return items
+    return (item for item in items if is_in_block_range(item, start_block, end_block))
+
+
+def is_in_block_range(item, start_block=None, end_block=None):
+    """Returns True if the item belongs to a block from start_block to end_block, block numbers of CSV items
+    are strings"""
+    block_number = item.get('block_number', item.get('number') if item.get('type', 'block') == 'block' else None)
+    if block_number is None or block_number == '':
+        return False
+    block_number = int(block_number)
+    return (start_block is None or block_number >= start_block) and (end_block is None or block_number <= end_block)
@@ -20,73 +20,110 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import json
+import bisect
+import collections
+import hashlib
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from json import JSONEncoder
 
-import boto3
-from timeout_decorator import timeout_decorator
+from blockchainetl.exporters import EncodeCustom
+from blockchainetl.jobs.exporters.kinesis_aggregation import MAX_RECORD_SIZE, aggregate_records
+
+DEFAULT_REGION_NAME = 'ap-northeast-2'
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 8
+DEFAULT_RETRY_BACKOFF_SECONDS = 0.1
+DEFAULT_MAX_RETRY_BACKOFF_SECONDS = 5
+DEFAULT_EXPORT_TIMEOUT_SECONDS = 300
+DEFAULT_SHARD_MAP_TTL_SECONDS = 60
+
+# Limits of a PutRecords request
+MAX_RECORDS_PER_REQUEST = 500
+MAX_REQUEST_SIZE = 5 * 1024 * 1024
+
+THROTTLING_ERROR_CODE = 'ProvisionedThroughputExceededException'
+RETRYABLE_ERROR_CODES = (THROTTLING_ERROR_CODE, 'InternalFailure', 'ServiceUnavailable', 'ThrottlingException',
+                         'LimitExceededException', 'KMSThrottlingException')
 
 
 class AwsKinesisItemExporter:
+    """Puts items as JSON records to a stream per item type.
 
-    def __init__(self, item_type_to_topic_mapping, message_attributes=('item_id',)):
+    Records are grouped by the shard their partition key hashes to and every shard is fed by its own sequence of
+    PutRecords requests, running in parallel. With aggregate=True records of a shard are packed into KPL aggregated
+    records. Entries rejected in a response are retried alone with exponential backoff, export_items raises once
+    retries are exhausted so a caller saving its progress afterwards never skips items.
+    """
+
+    def __init__(self, item_type_to_topic_mapping, message_attributes=('item_id',), region_name=None,
+                 endpoint_url=None, aggregate=False, max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_backoff_seconds=DEFAULT_RETRY_BACKOFF_SECONDS,
+                 max_retry_backoff_seconds=DEFAULT_MAX_RETRY_BACKOFF_SECONDS,
+                 export_timeout_seconds=DEFAULT_EXPORT_TIMEOUT_SECONDS,
+                 shard_map_ttl_seconds=DEFAULT_SHARD_MAP_TTL_SECONDS, client=None):
         self.item_type_to_topic_mapping = item_type_to_topic_mapping
-        self.publisher = boto3.client('kinesis', region_name='ap-northeast-2')
         self.message_attributes = message_attributes
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.aggregate = aggregate
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_backoff_seconds = max_retry_backoff_seconds
+        self.export_timeout_seconds = export_timeout_seconds
+        self.shard_map_ttl_seconds = shard_map_ttl_seconds
+        self.encoder = JSONEncoder(default=EncodeCustom)
+
+        # client may be given to run against a stand-in of the service
+        self.publisher = client if client is not None else create_kinesis_client(region_name, endpoint_url)
+        self.executor = None
+        self.shard_maps = {}
+
+        self.counters = collections.Counter()
+        self._counters_lock = threading.Lock()
+        self.logger = logging.getLogger('AwsKinesisItemExporter')
 
     def open(self):
-        pass
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
 
     def export_items(self, items):
-        try:
-            self._export_items_with_timeout(items)            
-        except timeout_decorator.TimeoutError as e:
-            logging.info('Recreating AWS Kinesis publisher.')
-            self.publisher = boto3.client('kinesis', region_name='ap-northeast-2')
-            raise e
-    
-    def chunks(self, it, n):
-        chunk = []
-        for i in it:
-            chunk.append(i)
-            if len(chunk) >= n:
-                yield chunk
-                chunk = []
-        if len(chunk) > 0:
-            yield chunk
-
-    @timeout_decorator.timeout(300)
-    def _export_items_with_timeout(self, items):
-        records_mapping = {}
+        if self.executor is None:
+            self.open()
 
+        start_time = time.monotonic()
+        records_by_shard = collections.defaultdict(list)
         for item in items:
-            item_type = item.get('type')
-            if item_type is not None and item_type in self.item_type_to_topic_mapping:
-                topic_path = self.item_type_to_topic_mapping.get(item_type)
-                data = json.dumps(item).encode('utf-8')
-
-            records_mapping[topic_path] = records_mapping.get(topic_path, [])
-            records_mapping[topic_path].append(dict(
-                Data=data,
-                PartitionKey=item.get('item_id')
-            ))
-
-        for topic_path, records in records_mapping.items():
-            # PutRecordBatch takes only 500 records per scall
-            for records_chunk in self.chunks(records, 500):
-                self.publisher.put_records(Records=records_chunk, StreamName=topic_path)
+            record = self._build_record(item)
+            if record is not None:
+                stream_name, partition_key, data = record
+                shard = self._get_shard(stream_name, partition_key)
+                records_by_shard[(stream_name, shard)].append((partition_key, data))
 
-    def export_item(self, item):
-        item_type = item.get('type')
-        if item_type is not None and item_type in self.item_type_to_topic_mapping:
-            topic_path = self.item_type_to_topic_mapping.get(item_type)
-            data = json.dumps(item).encode('utf-8')
+        futures = [self.executor.submit(self._put_shard_records, stream_name, records)
+                   for (stream_name, _), records in records_by_shard.items()]
+        done, not_done = wait(futures, timeout=self.export_timeout_seconds, return_when=FIRST_EXCEPTION)
+        if not_done and not any(future.exception() is not None for future in done):
+            for future in not_done:
+                future.cancel()
+            self.logger.info('Recreating AWS Kinesis publisher.')
+            self.publisher = create_kinesis_client(self.region_name, self.endpoint_url)
+            raise TimeoutError('Records are not put after {} seconds'.format(self.export_timeout_seconds))
+        for future in done:
+            future.result()
+        self._increment(send_seconds=time.monotonic() - start_time)
 
-            message_future = self.publisher.put_record(StreamName=topic_path, Data=data, PartitionKey=item.get('item_id'))
+    def export_item(self, item):
+        self.export_items([item])
 
-            return message_future
-        else:
-            logging.warning('Topic for item type "{}" is not configured.'.format(item_type))
+    def get_partition_key(self, item):
+        item_id = item.get('item_id')
+        if item_id is not None:
+            return item_id
+        return str(item.get('block_number', item.get('number', item.get('type'))))
 
     def get_message_attributes(self, item):
         attributes = {}
@@ -97,5 +134,150 @@ class AwsKinesisItemExporter:
 
         return attributes
 
+    def get_counters(self):
+        """Returns a snapshot of items, records, bytes and requests sent, and of throttled and retried entries"""
+        with self._counters_lock:
+            counters = dict(self.counters)
+        send_seconds = counters.pop('send_seconds', 0)
+        counters['items_per_second'] = counters.get('items', 0) / send_seconds if send_seconds > 0 else 0
+        counters['bytes_per_second'] = counters.get('bytes', 0) / send_seconds if send_seconds > 0 else 0
+        return counters
+
     def close(self):
-        pass
\ No newline at end of file
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        counters = self.get_counters()
+        self.logger.info('Put {} items in {} records of {} bytes ({:.0f} items/s), {} entries throttled, '
+                         '{} entries retried.'.format(counters.get('items', 0), counters.get('records', 0),
+                                                      counters.get('bytes', 0), counters['items_per_second'],
+                                                      counters.get('throttled', 0), counters.get('retried', 0)))
+
+    def _build_record(self, item):
+        item_type = item.get('type')
+        if item_type is None or item_type not in self.item_type_to_topic_mapping:
+            self.logger.warning('Topic for item type "{}" is not configured.'.format(item_type))
+            return None
+
+        partition_key = self.get_partition_key(item)
+        data = self.encoder.encode(item).encode('utf-8')
+        if len(partition_key.encode('utf-8')) + len(data) > MAX_RECORD_SIZE:
+            raise ValueError('Item {} of {} bytes exceeds the Kinesis record size limit'.format(
+                partition_key, len(data)))
+        return self.item_type_to_topic_mapping[item_type], partition_key, data
+
+    def _get_shard(self, stream_name, partition_key):
+        hash_key = int.from_bytes(hashlib.md5(partition_key.encode('utf-8')).digest(), 'big')
+        shard_map = self._get_shard_map(stream_name)
+        if shard_map is None:
+            # without a shard map, records with the same partition key still go in order through one worker
+            return hash_key % self.max_workers
+        starting_hash_keys, shard_ids = shard_map
+        return shard_ids[bisect.bisect_right(starting_hash_keys, hash_key) - 1]
+
+    def _get_shard_map(self, stream_name):
+        shard_map, expires_at = self.shard_maps.get(stream_name, (None, 0))
+        if time.monotonic() < expires_at:
+            return shard_map
+
+        try:
+            shard_map = list_open_shards(self.publisher, stream_name)
+        except Exception as e:
+            self.logger.warning('Unable to list shards of stream {}, records are not grouped by shard: {}'.format(
+                stream_name, repr(e)))
+            shard_map = None
+        self.shard_maps[stream_name] = (shard_map, time.monotonic() + self.shard_map_ttl_seconds)
+        return shard_map
+
+    def _put_shard_records(self, stream_name, records):
+        if self.aggregate:
+            entries = aggregate_records(records)
+        else:
+            entries = ((partition_key, data, 1) for partition_key, data in records)
+
+        request = []
+        request_size = 0
+        for partition_key, data, count in entries:
+            size = len(partition_key.encode('utf-8')) + len(data)
+            if request and (len(request) >= MAX_RECORDS_PER_REQUEST or request_size + size > MAX_REQUEST_SIZE):
+                self._put_records_with_retry(stream_name, request)
+                request = []
+                request_size = 0
+            request.append((dict(Data=data, PartitionKey=partition_key), size, count))
+            request_size += size
+        if request:
+            self._put_records_with_retry(stream_name, request)
+
+    def _put_records_with_retry(self, stream_name, request):
+        pending = request
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                self._increment(retried=len(pending))
+                backoff = min(self.max_retry_backoff_seconds, self.retry_backoff_seconds * 2 ** (attempt - 1))
+                time.sleep(backoff * random.uniform(0.5, 1))
+
+            try:
+                response = self.publisher.put_records(
+                    Records=[record for record, _, _ in pending], StreamName=stream_name)
+            except Exception as e:
+                error_code = get_error_code(e)
+                if error_code not in RETRYABLE_ERROR_CODES:
+                    raise
+                self._increment(requests=1, throttled=len(pending) if error_code == THROTTLING_ERROR_CODE else 0)
+                error = e
+                continue
+
+            failed = []
+            throttled_count = 0
+            for entry, result in zip(pending, response['Records']):
+                if result.get('ErrorCode') is not None:
+                    failed.append(entry)
+                    throttled_count += result['ErrorCode'] == THROTTLING_ERROR_CODE
+                    error = result
+            put = [entry for entry, result in zip(pending, response['Records']) if result.get('ErrorCode') is None]
+            self._increment(requests=1, records=len(put), items=sum(count for _, _, count in put),
+                            bytes=sum(size for _, size, _ in put), throttled=throttled_count,
+                            failed=len(failed) - throttled_count)
+            if not failed:
+                return
+            pending = failed
+
+        raise RuntimeError('{} records are not put to stream {} after {} retries, the last error: {}'.format(
+            len(pending), stream_name, self.max_retries, error))
+
+    def _increment(self, **counts):
+        with self._counters_lock:
+            self.counters.update(counts)
+
+
+def create_kinesis_client(region_name=None, endpoint_url=None):
+    import boto3
+
+    session = boto3.session.Session()
+    return session.client('kinesis', region_name=region_name or session.region_name or DEFAULT_REGION_NAME,
+                          endpoint_url=endpoint_url)
+
+
+def list_open_shards(client, stream_name):
+    """Returns sorted starting hash keys of open shards of the stream and ids of the shards"""
+    shards = []
+    response = client.list_shards(StreamName=stream_name)
+    shards.extend(response['Shards'])
+    while response.get('NextToken'):
+        response = client.list_shards(NextToken=response['NextToken'])
+        shards.extend(response['Shards'])
+
+    # closed parents of split and merged shards keep their hash key ranges but take no records
+    open_shards = sorted(
+        (int(shard['HashKeyRange']['StartingHashKey']), shard['ShardId']) for shard in shards
+        if 'EndingSequenceNumber' not in shard.get('SequenceNumberRange', {}))
+    if not open_shards:
+        return None
+    return [starting_hash_key for starting_hash_key, _ in open_shards], [shard_id for _, shard_id in open_shards]
+
+
+def get_error_code(exception):
+    response = getattr(exception, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
@@ -0,0 +1,159 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from blockchainetl.atomic_counter import AtomicCounter
+
+DEFAULT_DEDUP_WINDOW_SIZE = 1000000
+
+
+class RecentKeyWindow:
+    """Remembers the most recently exported idempotency keys, the oldest key is forgotten first.
+
+    Retried batches only repeat blocks which are still in flight, so the window has to cover the items
+    of max_workers batches to drop all of the duplicates. Keys are kept as 16 byte digests.
+    """
+
+    def __init__(self, size=DEFAULT_DEDUP_WINDOW_SIZE):
+        if size <= 0:
+            raise ValueError('size must be greater than 0')
+        self.size = size
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        digest = _digest(key)
+        with self._lock:
+            return digest in self._keys
+
+    def add(self, key):
+        digest = _digest(key)
+        with self._lock:
+            self._keys[digest] = None
+            self._keys.move_to_end(digest)
+            while len(self._keys) > self.size:
+                self._keys.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+class DeduplicatingItemExporter:
+    """Drops items whose idempotency key was already exported, then hands the rest to item_exporter.
+
+    export_items hands the items left to a single export_items call of the wrapped exporter. Keys are
+    remembered only after it accepted the items, so items which failed to export are exported again by
+    the retry instead of being lost. While an item is being exported,
+    other threads drop items with the same key.
+    Items without a key are always exported. Items of reset_item_types (e.g. retractions of
+    reorganized blocks) are exported and clear the window, as blocks may be exported again after them.
+    """
+
+    def __init__(self, item_exporter, key_calculator, key_window=None, reset_item_types=()):
+        self.item_exporter = item_exporter
+        self.key_calculator = key_calculator
+        self.key_window = key_window if key_window is not None else RecentKeyWindow()
+        self.reset_item_types = set(reset_item_types)
+
+        self.duplicate_counter = AtomicCounter()
+        self._in_flight_keys = set()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('DeduplicatingItemExporter')
+
+    def open(self):
+        self.item_exporter.open()
+
+    def export_items(self, items):
+        batch = []
+        for item in items:
+            if item.get('type') in self.reset_item_types:
+                # items before the reset are deduplicated against the window it clears
+                self._export_batch(batch, self._export_items)
+                batch = []
+                self.key_window.clear()
+            batch.append(item)
+        self._export_batch(batch, self._export_items)
+
+    def export_item(self, item):
+        if item.get('type') in self.reset_item_types:
+            self.key_window.clear()
+        self._export_batch([item], lambda items: self.item_exporter.export_item(items[0]))
+
+    def _export_batch(self, items, export):
+        keys = [None if item.get('type') in self.reset_item_types else self.key_calculator(item) for item in items]
+        digests = [None if key is None else _digest(key) for key in keys]
+
+        kept_items = []
+        kept_keys = []
+        claimed_digests = []
+        duplicates = 0
+        # checking and claiming the keys is atomic, so that concurrent copies of an item are exported once
+        with self._lock:
+            for item, key, digest in zip(items, keys, digests):
+                if key is not None:
+                    if digest in self._in_flight_keys or key in self.key_window:
+                        duplicates += 1
+                        continue
+                    self._in_flight_keys.add(digest)
+                    claimed_digests.append(digest)
+                    kept_keys.append(key)
+                kept_items.append(item)
+        if duplicates > 0:
+            self.duplicate_counter.increment(duplicates)
+        if not kept_items:
+            return
+
+        try:
+            # the wrapped exporter gets the whole batch, so that it can flush it and raise its errors at once
+            export(kept_items)
+            for key in kept_keys:
+                self.key_window.add(key)
+        finally:
+            with self._lock:
+                self._in_flight_keys.difference_update(claimed_digests)
+
+    def _export_items(self, items):
+        if hasattr(self.item_exporter, 'export_items'):
+            self.item_exporter.export_items(items)
+        else:
+            for item in items:
+                self.item_exporter.export_item(item)
+
+    def close(self):
+        duplicates = self.duplicate_counter.get()
+        if duplicates > 0:
+            self.logger.info('{} duplicate items were dropped'.format(duplicates))
+        self.item_exporter.close()
+
+
+def _digest(key):
+    return hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
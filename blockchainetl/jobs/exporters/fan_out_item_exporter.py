@@ -0,0 +1,245 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import copy
+import logging
+import os
+import queue
+import threading
+from json import JSONEncoder
+
+from blockchainetl.exporters import EncodeCustom
+
+# the producer waits for room in the queue of the sink, errors of the sink fail the export
+FAILURE_POLICY_BLOCK = 'block'
+# items are dropped and counted when the queue of the sink is full or the sink fails
+FAILURE_POLICY_DROP = 'drop'
+# items are appended to a JSON lines spill file of the sink when its queue is full or the sink fails
+FAILURE_POLICY_SPILL = 'spill'
+FAILURE_POLICIES = (FAILURE_POLICY_BLOCK, FAILURE_POLICY_DROP, FAILURE_POLICY_SPILL)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+
+_CLOSE = object()
+
+
+class FanOutSink:
+    """A sink of FanOutItemExporter, writing to item_exporter from its own thread."""
+
+    def __init__(self, item_exporter, name=None, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 failure_policy=FAILURE_POLICY_BLOCK, spill_filename=None):
+        if failure_policy not in FAILURE_POLICIES:
+            raise ValueError('failure_policy must be one of {}'.format(', '.join(FAILURE_POLICIES)))
+        if failure_policy == FAILURE_POLICY_SPILL and spill_filename is None:
+            raise ValueError('spill_filename is required for the spill failure policy')
+        if queue_size <= 0 or batch_size <= 0:
+            raise ValueError('queue_size and batch_size must be greater than 0')
+        self.item_exporter = item_exporter
+        self.name = name or type(item_exporter).__name__
+        self.batch_size = batch_size
+        self.failure_policy = failure_policy
+        self.spill_filename = spill_filename
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counters = {'exported': 0, 'dropped': 0, 'spilled': 0}
+        self._counters_lock = threading.Lock()
+        self.error = None
+
+        self._thread = None
+        self._spill_file = None
+        self._spill_lock = threading.Lock()
+        self._encoder = JSONEncoder(default=EncodeCustom)
+        self.logger = logging.getLogger('FanOutSink')
+
+    def open(self):
+        self.item_exporter.open()
+        self._thread = threading.Thread(target=self._run, name='fan-out-{}'.format(self.name), daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        # every sink gets its own copy, so that converters of a sink changing fields don't affect the other sinks
+        item = copy.copy(item)
+        if self.failure_policy == FAILURE_POLICY_BLOCK:
+            self.queue.put(item)
+            return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self._handle_failed([item])
+
+    def flush(self):
+        """Waits until the sink exported all of the queued items."""
+        self.queue.join()
+
+    def stop(self):
+        self.queue.put(_CLOSE)
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        try:
+            self.item_exporter.close()
+        finally:
+            if self._spill_file is not None:
+                self._spill_file.close()
+        counters = self.get_counters()
+        for name in ('dropped', 'spilled'):
+            if counters[name] > 0:
+                self.logger.warning('{} items were {} by sink {}'.format(counters[name], name, self.name))
+
+    def get_counters(self):
+        """Returns a snapshot of items exported, dropped and spilled by the sink"""
+        with self._counters_lock:
+            return dict(self.counters)
+
+    def _run(self):
+        closed = False
+        while not closed:
+            batch = []
+            item = self.queue.get()
+            while True:
+                if item is _CLOSE:
+                    closed = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._export_batch(batch)
+            finally:
+                for _ in range(len(batch) + (1 if closed else 0)):
+                    self.queue.task_done()
+
+    def _export_batch(self, batch):
+        if self.error is not None:
+            # a failed blocking sink keeps draining its queue, so that producers are not stuck on it
+            return
+        try:
+            if hasattr(self.item_exporter, 'export_items'):
+                self.item_exporter.export_items(batch)
+            else:
+                for item in batch:
+                    self.item_exporter.export_item(item)
+            self._count('exported', len(batch))
+        except Exception as e:
+            if self.failure_policy == FAILURE_POLICY_BLOCK:
+                self.logger.exception('Sink {} failed, its remaining items are discarded.'.format(self.name))
+                self.error = e
+            else:
+                self.logger.exception('Sink {} failed to export a batch of {} items.'.format(self.name, len(batch)))
+                self._handle_failed(batch)
+
+    def _handle_failed(self, items):
+        if self.failure_policy == FAILURE_POLICY_DROP:
+            self._count('dropped', len(items))
+            return
+        with self._spill_lock:
+            if self._spill_file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.spill_filename)), exist_ok=True)
+                self._spill_file = open(self.spill_filename, 'a')
+            for item in items:
+                self._spill_file.write(self._encoder.encode(item) + '\n')
+            self._spill_file.flush()
+        self._count('spilled', len(items))
+
+    def _count(self, name, count):
+        with self._counters_lock:
+            self.counters[name] += count
+
+
+class FanOutItemExporter:
+    """Exports the same items to several sinks in parallel.
+
+    Every sink has a bounded queue and a writer thread exporting batches of up to batch_size items,
+    so a slow sink does not hold back the others while its queue has room. Once the queue of a sink
+    is full, its failure policy decides: block waits for room, drop and spill give up on the items
+    without slowing down the producer. The same policies apply to items of a failed batch.
+
+    export_items returns once blocking sinks exported all of the items and raises if any of them failed,
+    so a caller saving its progress afterwards never skips items of those sinks. A failed sink discards
+    its items until the error was raised, then it exports again, so a caller retrying the items delivers them.
+    """
+
+    def __init__(self, sinks):
+        if not sinks:
+            raise ValueError('At least one sink must be provided')
+        self.sinks = [sink if isinstance(sink, FanOutSink) else FanOutSink(sink) for sink in sinks]
+        self.logger = logging.getLogger('FanOutItemExporter')
+
+    def open(self):
+        for sink in self.sinks:
+            sink.open()
+
+    def export_items(self, items):
+        for item in items:
+            self._put(item)
+        self.flush()
+
+    def export_item(self, item):
+        self._put(item)
+
+    def flush(self):
+        for sink in self.sinks:
+            if sink.failure_policy == FAILURE_POLICY_BLOCK:
+                sink.flush()
+        self._raise_errors()
+
+    def close(self):
+        # all of the sinks drain their queues at the same time, then they are closed one by one
+        for sink in self.sinks:
+            sink.stop()
+        for sink in self.sinks:
+            sink.join()
+        errors = []
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                self.logger.exception('Failed to close sink {}.'.format(sink.name))
+                errors.append(e)
+        self._raise_errors()
+        if errors:
+            raise errors[0]
+
+    def _put(self, item):
+        self._raise_errors()
+        for sink in self.sinks:
+            sink.put(item)
+
+    def _raise_errors(self):
+        failed_sinks = [sink for sink in self.sinks if sink.error is not None]
+        if not failed_sinks:
+            return
+        sink, error = failed_sinks[0], failed_sinks[0].error
+        for failed_sink in failed_sinks:
+            failed_sink.error = None
+        raise RuntimeError('Sink {} failed: {}'.format(sink.name, repr(error))) from error
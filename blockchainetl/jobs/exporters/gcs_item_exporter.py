@@ -22,65 +22,127 @@
 
 import json
 import logging
-from collections import defaultdict
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from google.cloud import storage
+import requests
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RETRY_BACKOFF_SECONDS = 0.5
+DEFAULT_MAX_RETRY_BACKOFF_SECONDS = 30
+
+# HTTP statuses of transient GCS errors
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+# item type: field of block bundle
+BLOCK_BUNDLE_FIELDS = {
+    'transaction': 'transactions',
+    'log': 'logs',
+    'token_transfer': 'token_transfers',
+    'trace': 'traces',
+}
 
 
 def build_block_bundles(items):
-    blocks = defaultdict(list)
-    transactions = defaultdict(list)
-    logs = defaultdict(list)
-    token_transfers = defaultdict(list)
-    traces = defaultdict(list)
+    bundles = {}
+
+    def get_bundle(block_number):
+        bundle = bundles.get(block_number)
+        if bundle is None:
+            bundle = bundles[block_number] = {'block': None, 'transactions': [], 'logs': [], 'token_transfers': [],
+                                              'traces': []}
+        return bundle
+
     for item in items:
         item_type = item.get('type')
         if item_type == 'block':
-            blocks[item.get('number')].append(item)
-        elif item_type == 'transaction':
-            transactions[item.get('block_number')].append(item)
-        elif item_type == 'log':
-            logs[item.get('block_number')].append(item)
-        elif item_type == 'token_transfer':
-            token_transfers[item.get('block_number')].append(item)
-        elif item_type == 'trace':
-            traces[item.get('block_number')].append(item)
+            bundle = get_bundle(item.get('number'))
+            if bundle['block'] is not None:
+                raise ValueError(f'There must be a single block for a given block number, was more than 1 '
+                                 f'for block number {item.get("number")}')
+            bundle['block'] = item
+        elif item_type in BLOCK_BUNDLE_FIELDS:
+            get_bundle(item.get('block_number'))[BLOCK_BUNDLE_FIELDS[item_type]].append(item)
         else:
             logging.info(f'Skipping item with type {item_type}')
 
-    block_bundles = []
-    for block_number in sorted(blocks.keys()):
-        if len(blocks[block_number]) != 1:
-            raise ValueError(f'There must be a single block for a given block number, was {len(blocks[block_number])} for block number {block_number}')
-        block_bundles.append({
-            'block': blocks[block_number][0],
-            'transactions': transactions[block_number],
-            'logs': logs[block_number],
-            'token_transfers': token_transfers[block_number],
-            'traces': traces[block_number],
-        })
-
-    return block_bundles
+    # items of blocks missing from the batch are skipped
+    return [bundles[block_number] for block_number in sorted(bundles.keys())
+            if bundles[block_number]['block'] is not None]
 
 
 class GcsItemExporter:
+    """Uploads block bundles as JSON objects, {path}/{block_number}.json per block by default.
+
+    With blocks_per_object > 1 consecutive bundles of a batch are uploaded together as newline delimited JSON to
+    {path}/{first_block_number}-{last_block_number}.json. Uploads run on max_workers threads with at most
+    max_in_flight objects waiting, and transient errors are retried with exponential backoff. Set the
+    STORAGE_EMULATOR_HOST environment variable to upload to a local GCS emulator.
+    """
 
     def __init__(
             self,
             bucket,
             path='blocks',
-            build_block_bundles_func=build_block_bundles):
+            build_block_bundles_func=build_block_bundles,
+            blocks_per_object=1,
+            max_workers=DEFAULT_MAX_WORKERS,
+            max_in_flight=None,
+            max_retries=DEFAULT_MAX_RETRIES,
+            retry_backoff_seconds=DEFAULT_RETRY_BACKOFF_SECONDS,
+            max_retry_backoff_seconds=DEFAULT_MAX_RETRY_BACKOFF_SECONDS,
+            storage_client=None):
+        if blocks_per_object < 1:
+            raise ValueError('blocks_per_object must be greater than 0')
         self.bucket = bucket
         self.path = normalize_path(path)
         self.build_block_bundles_func = build_block_bundles_func
-        self.storage_client = storage.Client()
+        self.blocks_per_object = blocks_per_object
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight if max_in_flight is not None else max_workers * 2
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_backoff_seconds = max_retry_backoff_seconds
+
+        # storage_client may be given to run against a stand-in of GCS
+        self.storage_client = storage_client if storage_client is not None else create_storage_client()
+        self.storage_bucket = self.storage_client.bucket(self.bucket)
+        self.executor = None
+        self.in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self.logger = logging.getLogger('GcsItemExporter')
 
     def open(self):
-        pass
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
 
     def export_items(self, items):
+        if self.executor is None:
+            self.open()
+
         block_bundles = self.build_block_bundles_func(items)
 
+        futures = []
+        try:
+            for start in range(0, len(block_bundles), self.blocks_per_object):
+                bundles = block_bundles[start:start + self.blocks_per_object]
+                destination_blob_name, data = self.build_object(bundles)
+                # blocks the producer while max_in_flight objects wait for upload
+                self.in_flight.acquire()
+                future = self.executor.submit(self.upload_with_retry, destination_blob_name, data)
+                future.add_done_callback(lambda _: self.in_flight.release())
+                futures.append(future)
+        finally:
+            # wait for all uploads before raising, so no object is uploaded after export_items returns
+            errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def build_object(self, block_bundles):
+        block_numbers = []
         for block_bundle in block_bundles:
             block = block_bundle.get('block')
             if block is None:
@@ -88,16 +150,51 @@ class GcsItemExporter:
             block_number = block.get('number')
             if block_number is None:
                 raise ValueError('block_bundle must include the block.number field')
+            block_numbers.append(block_number)
+
+        if self.blocks_per_object == 1:
+            return f'{self.path}/{block_numbers[0]}.json', json.dumps(block_bundles[0])
+        data = ''.join(json.dumps(block_bundle) + '\n' for block_bundle in block_bundles)
+        return f'{self.path}/{block_numbers[0]}-{block_numbers[-1]}.json', data
+
+    def upload_with_retry(self, destination_blob_name, data):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.storage_bucket.blob(destination_blob_name).upload_from_string(
+                    data, content_type='application/json')
+                logging.info(f'Uploaded file gs://{self.bucket}/{destination_blob_name}')
+                return
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                backoff = min(self.max_retry_backoff_seconds, self.retry_backoff_seconds * 2 ** attempt)
+                self.logger.warning(f'Failed to upload gs://{self.bucket}/{destination_blob_name}, '
+                                    f'retrying in {backoff:.1f} seconds: {repr(e)}')
+                time.sleep(backoff * random.uniform(0.5, 1))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
 
-            destination_blob_name = f'{self.path}/{block_number}.json'
 
-            bucket = self.storage_client.bucket(self.bucket)
-            blob = bucket.blob(destination_blob_name)
-            blob.upload_from_string(json.dumps(block_bundle))
-            logging.info(f'Uploaded file gs://{self.bucket}/{destination_blob_name}')
+def create_storage_client():
+    from google.cloud import storage
 
-    def close(self):
-        pass
+    if os.environ.get('STORAGE_EMULATOR_HOST'):
+        from google.auth.credentials import AnonymousCredentials
+
+        return storage.Client(project=os.environ.get('GOOGLE_CLOUD_PROJECT', 'test'),
+                              credentials=AnonymousCredentials())
+    return storage.Client()
+
+
+def is_retryable_error(exception):
+    if isinstance(exception, (ConnectionError, TimeoutError, requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout)):
+        return True
+    # google.api_core exceptions carry the HTTP status as code
+    return getattr(exception, 'code', None) in RETRYABLE_STATUS_CODES
 
 
 def normalize_path(p):
@@ -1,26 +1,62 @@
 import collections
-import json
 import logging
+import threading
+from json import JSONEncoder
 
-from kafka import KafkaProducer
-
+from blockchainetl.exporters import EncodeCustom
 from blockchainetl.jobs.exporters.converters.composite_item_converter import CompositeItemConverter
 
+DEFAULT_LINGER_MS = 100
+DEFAULT_BATCH_SIZE = 1024 * 1024
+DEFAULT_COMPRESSION_TYPE = 'lz4'
+DEFAULT_MAX_IN_FLIGHT_BYTES = 64 * 1024 * 1024
+DEFAULT_FLUSH_TIMEOUT_SECONDS = 300
+
+# Messages of a block land on a single partition and keep their order there
+PARTITION_KEY_BLOCK_NUMBER = 'block_number'
+# Messages of a transaction land on a single partition, blocks are spread across partitions
+PARTITION_KEY_TRANSACTION_HASH = 'transaction_hash'
+PARTITION_KEYS = (PARTITION_KEY_BLOCK_NUMBER, PARTITION_KEY_TRANSACTION_HASH)
+
 
 class KafkaItemExporter:
+    """Produces items as JSON messages to a topic per item type.
 
-    def __init__(self, output, item_type_to_topic_mapping, converters=()):
+    Messages are batched by the producer (linger_ms, batch_size) and compressed. The producer is idempotent,
+    so retried sends are not duplicated. export_items returns once all messages are delivered and raises if any
+    of them failed, so a caller saving its progress afterwards never skips items. Bytes waiting for delivery are
+    bounded by max_in_flight_bytes.
+    """
+
+    def __init__(self, output, item_type_to_topic_mapping, converters=(), partition_key=PARTITION_KEY_BLOCK_NUMBER,
+                 linger_ms=DEFAULT_LINGER_MS, batch_size=DEFAULT_BATCH_SIZE, compression_type=DEFAULT_COMPRESSION_TYPE,
+                 max_in_flight_bytes=DEFAULT_MAX_IN_FLIGHT_BYTES, flush_timeout_seconds=DEFAULT_FLUSH_TIMEOUT_SECONDS,
+                 producer=None):
+        if partition_key not in PARTITION_KEYS:
+            raise ValueError('partition_key must be one of {}'.format(', '.join(PARTITION_KEYS)))
         self.item_type_to_topic_mapping = item_type_to_topic_mapping
         self.converter = CompositeItemConverter(converters)
         self.connection_url = self.get_connection_url(output)
-        print(self.connection_url)
-        self.producer = KafkaProducer(bootstrap_servers=self.connection_url)
+        self.partition_key = partition_key
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.flush_timeout_seconds = flush_timeout_seconds
+        self.encoder = JSONEncoder(default=EncodeCustom)
+
+        # producer may be given to run against a stand-in of the broker
+        self.producer = producer if producer is not None else create_producer(
+            self.connection_url, linger_ms=linger_ms, batch_size=batch_size, compression_type=compression_type)
+
+        self._in_flight_bytes = 0
+        self._in_flight = threading.Condition()
+        self._errors = []
+        self.delivered_count = 0
+        self.logger = logging.getLogger('KafkaItemExporter')
 
     def get_connection_url(self, output):
         try:
             return output.split('/')[1]
-        except KeyError:
-            raise Exception('Invalid kafka output param, It should be in format of "kafka/127.0.0.1:9092"')
+        except IndexError:
+            raise ValueError('Invalid kafka output param, It should be in format of "kafka/127.0.0.1:9092"')
 
     def open(self):
         pass
@@ -28,22 +64,88 @@ class KafkaItemExporter:
     def export_items(self, items):
         for item in items:
             self.export_item(item)
+        self.flush()
 
     def export_item(self, item):
         item_type = item.get('type')
         if item_type is not None and item_type in self.item_type_to_topic_mapping:
-            data = json.dumps(item).encode('utf-8')
-            print(data)
-            return self.producer.send(self.item_type_to_topic_mapping[item_type], value=data)
+            item = self.converter.convert_item(item)
+            data = self.encoder.encode(item).encode('utf-8')
+            key = self.get_message_key(item)
+
+            with self._in_flight:
+                while self._in_flight_bytes > 0 and self._in_flight_bytes + len(data) > self.max_in_flight_bytes:
+                    self._in_flight.wait()
+                self._in_flight_bytes += len(data)
+
+            future = self.producer.send(self.item_type_to_topic_mapping[item_type], key=key, value=data)
+            future.add_callback(self._on_delivered, len(data))
+            future.add_errback(self._on_failed, len(data), item_type, key)
+            return future
         else:
             logging.warning('Topic for item type "{}" is not configured.'.format(item_type))
 
+    def get_message_key(self, item):
+        if self.partition_key == PARTITION_KEY_TRANSACTION_HASH:
+            transaction_hash = item.get('transaction_hash') or (
+                item.get('hash') if item.get('type') == 'transaction' else None)
+            if transaction_hash is not None:
+                return transaction_hash.encode('utf-8')
+        block_number = item.get('block_number', item.get('number') if item.get('type') == 'block' else None)
+        return str(block_number).encode('utf-8') if block_number is not None else None
+
+    def flush(self):
+        """Waits until all sent messages are delivered, raises if any of them failed"""
+        self.producer.flush(timeout=self.flush_timeout_seconds)
+        with self._in_flight:
+            errors = self._errors
+            self._errors = []
+            if self._in_flight_bytes > 0:
+                errors.append(TimeoutError('{} bytes are not delivered after {} seconds'.format(
+                    self._in_flight_bytes, self.flush_timeout_seconds)))
+        if errors:
+            raise RuntimeError('{} Kafka messages are not delivered, the first error: {}'.format(
+                len(errors), repr(errors[0])))
+
     def convert_items(self, items):
         for item in items:
             yield self.converter.convert_item(item)
 
     def close(self):
-        pass
+        try:
+            self.flush()
+        finally:
+            self.producer.close(timeout=self.flush_timeout_seconds)
+            self.logger.info('{} Kafka messages delivered.'.format(self.delivered_count))
+
+    def _on_delivered(self, size, record_metadata):
+        with self._in_flight:
+            self._in_flight_bytes -= size
+            self.delivered_count += 1
+            self._in_flight.notify_all()
+
+    def _on_failed(self, size, item_type, key, exception):
+        self.logger.error('Failed to deliver {} message with key {}: {}'.format(item_type, key, repr(exception)))
+        with self._in_flight:
+            self._in_flight_bytes -= size
+            self._errors.append(exception)
+            self._in_flight.notify_all()
+
+
+def create_producer(connection_url, linger_ms=DEFAULT_LINGER_MS, batch_size=DEFAULT_BATCH_SIZE,
+                    compression_type=DEFAULT_COMPRESSION_TYPE):
+    from kafka import KafkaProducer
+
+    return KafkaProducer(
+        bootstrap_servers=connection_url,
+        linger_ms=linger_ms,
+        batch_size=batch_size,
+        compression_type=compression_type,
+        # idempotent production requires acks from all in-sync replicas and at most 5 requests in flight
+        enable_idempotence=True,
+        acks='all',
+        max_in_flight_requests_per_connection=5,
+    )
 
 
 def group_by_item_type(items):
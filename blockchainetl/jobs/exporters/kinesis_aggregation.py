@@ -0,0 +1,172 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+
+# Records aggregated by the Kinesis Producer Library (KPL) are a protobuf AggregatedRecord message framed by these
+# magic bytes and an MD5 digest of the message. KCL and aws-kinesis-agg consumers deaggregate them transparently.
+KPL_MAGIC = b'\xf3\x89\x9a\xc2'
+KPL_DIGEST_SIZE = 16
+
+# Data and partition key of a single Kinesis record
+MAX_RECORD_SIZE = 1024 * 1024
+
+# Protobuf wire types
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_LENGTH_DELIMITED = 2
+
+# Fields of AggregatedRecord in messages.proto of the KPL: repeated string partition_key_table = 1;
+# repeated string explicit_hash_key_table = 2; repeated Record records = 3;
+# Fields of Record: required uint64 partition_key_index = 1; optional uint64 explicit_hash_key_index = 2;
+# required bytes data = 3; repeated Tag tags = 4;
+PARTITION_KEY_TABLE_TAG = bytes([1 << 3 | WIRE_TYPE_LENGTH_DELIMITED])
+RECORDS_TAG = bytes([3 << 3 | WIRE_TYPE_LENGTH_DELIMITED])
+PARTITION_KEY_INDEX_TAG = bytes([1 << 3 | WIRE_TYPE_VARINT])
+DATA_TAG = bytes([3 << 3 | WIRE_TYPE_LENGTH_DELIMITED])
+
+
+def aggregate_records(records, max_size=MAX_RECORD_SIZE):
+    """Packs (partition_key, data) pairs into KPL aggregated records of at most max_size bytes.
+
+    Yields (partition_key, data, count) tuples where partition_key is the key of the first packed record.
+    A record packed alone is yielded as is, like the KPL does.
+    """
+    aggregator = _RecordAggregator(max_size)
+    for partition_key, data in records:
+        if not aggregator.add(partition_key, data):
+            if aggregator.count > 0:
+                yield aggregator.build()
+                aggregator = _RecordAggregator(max_size)
+            if not aggregator.add(partition_key, data):
+                if len(partition_key.encode('utf-8')) + len(data) > max_size:
+                    raise ValueError('Record with partition key {} of {} bytes exceeds {} bytes'.format(
+                        partition_key, len(data), max_size))
+                # fits only without the aggregation overhead
+                yield partition_key, data, 1
+    if aggregator.count > 0:
+        yield aggregator.build()
+
+
+def deaggregate_record(partition_key, data):
+    """Returns (partition_key, data) pairs packed in a Kinesis record, the record itself if it is not aggregated"""
+    if not data.startswith(KPL_MAGIC) or len(data) < len(KPL_MAGIC) + KPL_DIGEST_SIZE:
+        return [(partition_key, data)]
+
+    message = data[len(KPL_MAGIC):-KPL_DIGEST_SIZE]
+    if hashlib.md5(message).digest() != data[-KPL_DIGEST_SIZE:]:
+        raise ValueError('Digest of aggregated record with partition key {} does not match'.format(partition_key))
+
+    partition_keys = []
+    records = []
+    for field_number, value in _decode_fields(message):
+        if field_number == 1:
+            partition_keys.append(value.decode('utf-8'))
+        elif field_number == 3:
+            fields = dict(_decode_fields(value))
+            records.append((fields[1], fields[3]))
+    return [(partition_keys[index], record_data) for index, record_data in records]
+
+
+class _RecordAggregator:
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.partition_key_indexes = {}
+        self.partition_key_table = bytearray()
+        self.records = bytearray()
+        self.first_partition_key = None
+        self.first_data = None
+        self.count = 0
+
+    def add(self, partition_key, data):
+        """Packs the record if the aggregated record stays within max_size, returns whether it was packed"""
+        index = self.partition_key_indexes.get(partition_key)
+        partition_key_entry = b''
+        if index is None:
+            encoded_partition_key = partition_key.encode('utf-8')
+            index = len(self.partition_key_indexes)
+            partition_key_entry = PARTITION_KEY_TABLE_TAG + encode_varint(len(encoded_partition_key)) + \
+                encoded_partition_key
+
+        record = PARTITION_KEY_INDEX_TAG + encode_varint(index) + DATA_TAG + encode_varint(len(data)) + data
+        record_entry = RECORDS_TAG + encode_varint(len(record)) + record
+
+        first_partition_key = self.first_partition_key if self.first_partition_key is not None else partition_key
+        size = len(KPL_MAGIC) + len(self.partition_key_table) + len(partition_key_entry) + len(self.records) + \
+            len(record_entry) + KPL_DIGEST_SIZE + len(first_partition_key.encode('utf-8'))
+        if size > self.max_size:
+            return False
+
+        if partition_key_entry:
+            self.partition_key_indexes[partition_key] = index
+            self.partition_key_table += partition_key_entry
+        self.records += record_entry
+        if self.count == 0:
+            self.first_partition_key = partition_key
+            self.first_data = data
+        self.count += 1
+        return True
+
+    def build(self):
+        if self.count == 1:
+            return self.first_partition_key, self.first_data, 1
+        message = bytes(self.partition_key_table + self.records)
+        return self.first_partition_key, KPL_MAGIC + message + hashlib.md5(message).digest(), self.count
+
+
+def encode_varint(value):
+    result = bytearray()
+    while value > 0x7f:
+        result.append(value & 0x7f | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+
+def _decode_varint(buffer, position):
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+def _decode_fields(message):
+    position = 0
+    while position < len(message):
+        key, position = _decode_varint(message, position)
+        field_number, wire_type = key >> 3, key & 0x7
+        if wire_type == WIRE_TYPE_VARINT:
+            value, position = _decode_varint(message, position)
+        elif wire_type == WIRE_TYPE_LENGTH_DELIMITED:
+            length, position = _decode_varint(message, position)
+            value = message[position:position + length]
+            position += length
+        else:
+            raise ValueError('Unexpected protobuf wire type {} in aggregated record'.format(wire_type))
+        yield field_number, value
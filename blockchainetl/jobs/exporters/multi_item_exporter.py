@@ -24,13 +24,13 @@ import logging
 from typing import List, Dict, Any
 
 from blockchainetl.atomic_counter import AtomicCounter
-from blockchainetl.jobs.exporters.buffered_item_exporter import BufferedItemExporter
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import RollingFileItemExporter
 from blockchainetl.exporters import CsvItemExporter, JsonLinesItemExporter
 from blockchainetl.file_utils import get_file_handle, close_silently
 
 class MultifileItemExporter:
     def __init__(self, dirname_mapping, field_mapping=None, **kwargs):
-        self.exporter_mapping: Dict[str, BufferedItemExporter] = {}
+        self.exporter_mapping: Dict[str, RollingFileItemExporter] = {}
         self.counter_mapping: List[str, AtomicCounter] = {}
 
         self.dirname_mapping:Dict[str, str] = dirname_mapping
@@ -42,7 +42,7 @@ class MultifileItemExporter:
     def open(self):
         for item_type, dirname in self.dirname_mapping.items():
             fields = self.field_mapping.get(item_type)
-            self.exporter_mapping[item_type] = BufferedItemExporter(
+            self.exporter_mapping[item_type] = RollingFileItemExporter(
                 dirname=dirname, fields=fields, **self.exporter_options) if dirname is not None else None
             self.counter_mapping[item_type] = AtomicCounter()
 
@@ -55,7 +55,7 @@ class MultifileItemExporter:
         if item_type is None:
             raise ValueError('"type" key is not found in item {}'.format(repr(item)))
 
-        # get buffer and append item
+        # get exporter of the item type and write item
         exporter = self.exporter_mapping.get(item_type)
         if exporter is None:
             raise ValueError(
@@ -24,26 +24,45 @@ import logging
 from typing import List, Dict, Any
 
 from blockchainetl.atomic_counter import AtomicCounter
-from blockchainetl.jobs.exporters.buffered_item_exporter import BufferedItemExporter
+from blockchainetl.compression import ZSTD, load_zstd_dictionaries
+from blockchainetl.jobs.exporters.partitioned_file_item_exporter import PartitionedFileItemExporter
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import RollingFileItemExporter
 from blockchainetl.exporters import CsvItemExporter, JsonLinesItemExporter
 from blockchainetl.file_utils import get_file_handle, close_silently
 
 class MultifileItemExporter:
-    def __init__(self, dirname_mapping, field_mapping=None, **kwargs):
-        self.exporter_mapping: Dict[str, BufferedItemExporter] = {}
+    def __init__(self, dirname_mapping, field_mapping=None, zstd_dict_dir=None, partition_by=None,
+                 lookup_field_mapping=None, **kwargs):
+        self.exporter_mapping: Dict[str, RollingFileItemExporter] = {}
         self.counter_mapping: List[str, AtomicCounter] = {}
 
         self.dirname_mapping:Dict[str, str] = dirname_mapping
         self.field_mapping: Dict[str, List[str]] = field_mapping or {}
+        self.zstd_dict_dir: str = zstd_dict_dir
+        self.partition_by: str = partition_by
+        self.lookup_field_mapping: Dict[str, List[str]] = lookup_field_mapping or {}
 
         self.exporter_options = kwargs
         self.logger = logging.getLogger('MultifileItemExporter')
 
     def open(self):
+        zstd_dicts = {}
+        options = self.exporter_options
+        if options.get('compress') and options.get('compression') == ZSTD and self.zstd_dict_dir is not None:
+            zstd_dicts = load_zstd_dictionaries(self.zstd_dict_dir)
         for item_type, dirname in self.dirname_mapping.items():
             fields = self.field_mapping.get(item_type)
-            self.exporter_mapping[item_type] = BufferedItemExporter(
-                dirname=dirname, fields=fields, **self.exporter_options) if dirname is not None else None
+            if dirname is None:
+                self.exporter_mapping[item_type] = None
+            elif self.partition_by is not None:
+                self.exporter_mapping[item_type] = PartitionedFileItemExporter(
+                    dirname=dirname, fields=fields, partition_by=self.partition_by,
+                    zstd_dict=zstd_dicts.get(item_type), lookup_fields=self.lookup_field_mapping.get(item_type),
+                    **self.exporter_options)
+            else:
+                self.exporter_mapping[item_type] = RollingFileItemExporter(
+                    dirname=dirname, fields=fields, zstd_dict=zstd_dicts.get(item_type),
+                    lookup_fields=self.lookup_field_mapping.get(item_type), **self.exporter_options)
             self.counter_mapping[item_type] = AtomicCounter()
 
     def export_items(self, items):
@@ -55,7 +74,7 @@ class MultifileItemExporter:
         if item_type is None:
             raise ValueError('"type" key is not found in item {}'.format(repr(item)))
 
-        # get buffer and append item
+        # get exporter of the item type and write item
         exporter = self.exporter_mapping.get(item_type)
         if exporter is None:
             raise ValueError(
@@ -0,0 +1,323 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from blockchainetl.atomic_counter import AtomicCounter
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import is_rolling_output, positive_or_none
+
+PARQUET = 'parquet'
+# Arrow IPC files, also known as Feather v2
+ARROW = 'arrow'
+COLUMNAR_FILE_FORMATS = (PARQUET, ARROW)
+
+DEFAULT_ROW_GROUP_SIZE = 50000
+DEFAULT_PARQUET_COMPRESSION = 'snappy'
+
+DECIMAL_PRECISION = 38
+
+
+class ParquetItemExporter:
+    """Writes items as Parquet files, one per item type, with typed columns.
+    If file_maxlines, file_maxbytes or file_maxseconds is given, outputs are directories of rolled files
+    named like the ones of MultifileItemExporter, otherwise single files. Files are rolled between row groups.
+
+    With file_format ARROW, files are uncompressed Arrow IPC (Feather v2) files with one record batch per row
+    group instead, which re-processing commands memory map and read column by column (see arrow_files).
+    """
+
+    def __init__(self, filename_mapping, field_mapping=None, column_type_mapping=None, file_maxlines=None,
+                 file_maxbytes=None, file_maxseconds=None, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 parquet_compression=DEFAULT_PARQUET_COMPRESSION, file_format=PARQUET, on_file_closed=None,
+                 **kwargs):
+        if file_format not in COLUMNAR_FILE_FORMATS:
+            raise ValueError('File format {} is not a columnar file format'.format(file_format))
+        self.filename_mapping = filename_mapping
+        self.field_mapping = field_mapping or {}
+        self.column_type_mapping = column_type_mapping or {}
+        self.file_maxlines = positive_or_none(file_maxlines)
+        self.file_maxbytes = positive_or_none(file_maxbytes)
+        self.file_maxseconds = positive_or_none(file_maxseconds)
+        self.row_group_size = row_group_size
+        self.parquet_compression = parquet_compression
+        self.file_format = file_format
+        self.on_file_closed = on_file_closed
+
+        if self.file_maxlines is not None and self.row_group_size > self.file_maxlines:
+            self.row_group_size = self.file_maxlines
+
+        self.writer_mapping = {}
+        self.counter_mapping = {}
+
+        self.logger = logging.getLogger('ParquetItemExporter')
+
+    def open(self):
+        for item_type, filename in self.filename_mapping.items():
+            if filename is None:
+                continue
+            fields = self.field_mapping.get(item_type)
+            if fields is None:
+                raise ValueError('Fields of item type {} are required to build Parquet columns'.format(item_type))
+            self.writer_mapping[item_type] = RollingParquetWriter(
+                path=filename,
+                fields=fields,
+                column_types=self.column_type_mapping.get(item_type, {}),
+                is_single_file=not is_rolling_output(self.file_maxlines, self.file_maxbytes, self.file_maxseconds),
+                file_maxlines=self.file_maxlines,
+                file_maxbytes=self.file_maxbytes,
+                file_maxseconds=self.file_maxseconds,
+                row_group_size=self.row_group_size,
+                compression=self.parquet_compression,
+                file_format=self.file_format,
+                on_file_closed=self.on_file_closed,
+            )
+            self.counter_mapping[item_type] = AtomicCounter()
+
+    def export_items(self, items):
+        for item in items:
+            self.export_item(item)
+
+    def export_item(self, item):
+        item_type = item.get('type')
+        if item_type is None:
+            raise ValueError('"type" key is not found in item {}'.format(repr(item)))
+
+        writer = self.writer_mapping.get(item_type)
+        if writer is None:
+            if item_type not in self.filename_mapping:
+                raise ValueError('Exporter for item type {} not found'.format(item_type))
+            # output of the item type is not requested
+            return
+        writer.write(item)
+        self.counter_mapping[item_type].increment()
+
+    def close(self):
+        for item_type, writer in self.writer_mapping.items():
+            writer.close()
+            counter = self.counter_mapping.get(item_type)
+            if counter is not None:
+                self.logger.info('{} items exported: {}'.format(item_type, counter.increment() - 1))
+
+
+class RollingParquetWriter:
+    def __init__(self, path, fields, column_types, is_single_file, file_maxlines=None, file_maxbytes=None,
+                 file_maxseconds=None, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 compression=DEFAULT_PARQUET_COMPRESSION, file_format=PARQUET, on_file_closed=None,
+                 clock=time.monotonic):
+        pa, pq = import_pyarrow()
+        self._pa = pa
+        self._pq = pq
+
+        self.path = path
+        self.fields = fields
+        self.column_types = [column_types.get(field, 'STRING') for field in fields]
+        self.schema = build_arrow_schema(fields, column_types)
+        self.is_single_file = is_single_file
+        self.file_maxlines = file_maxlines
+        self.file_maxbytes = file_maxbytes
+        self.file_maxseconds = file_maxseconds
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.file_format = file_format
+        self.on_file_closed = on_file_closed
+        self.clock = clock
+
+        self._rows = []
+        self._file = None
+        self._filename = None
+        self._temp_filename = None
+        self._writer = None
+        self._file_index = 0
+        self._file_rows = 0
+        self._file_opened_at = None
+        self._lock = threading.Lock()
+
+    def write(self, item):
+        row = [item.get(field) for field in self.fields]
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) >= self.row_group_size:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._writer is None and self._file_index == 0:
+                # write an empty file, so that every requested output exists
+                self._open_file()
+            self._close_file()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        rows = self._rows
+        self._rows = []
+        while rows:
+            if self._writer is None:
+                self._open_file()
+            size = len(rows)
+            if self.file_maxlines is not None:
+                size = min(size, self.file_maxlines - self._file_rows)
+            record_batch = self._to_record_batch(rows[:size])
+            if self.file_format == ARROW:
+                self._writer.write_batch(record_batch)
+            else:
+                self._writer.write_batch(record_batch, row_group_size=self.row_group_size)
+            self._file_rows += size
+            rows = rows[size:]
+            if self._should_roll():
+                self._close_file()
+
+    def _should_roll(self):
+        if self.is_single_file:
+            return False
+        if self.file_maxlines is not None and self._file_rows >= self.file_maxlines:
+            return True
+        if self.file_maxseconds is not None and self.clock() - self._file_opened_at >= self.file_maxseconds:
+            return True
+        # row groups are written to the file as soon as they are complete
+        return self.file_maxbytes is not None and self._file.tell() >= self.file_maxbytes
+
+    def _to_record_batch(self, rows):
+        columns = [
+            self._pa.array([convert_value(column_type, row[i]) for row in rows], type=self.schema.field(i).type)
+            for i, column_type in enumerate(self.column_types)
+        ]
+        return self._pa.RecordBatch.from_arrays(columns, schema=self.schema)
+
+    def _open_file(self):
+        if self.is_single_file:
+            self._filename = self.path
+            self._temp_filename = self.path
+        else:
+            basename = 'data-{:012}.{}'.format(self._file_index, self.file_format)
+            self._filename = os.path.join(self.path, basename)
+            # rolled files are renamed when they are complete, like the ones of RollingFileItemExporter
+            self._temp_filename = os.path.join(self.path, '.{}.tmp'.format(basename))
+        dirname = os.path.dirname(self._filename)
+        if dirname:
+            pathlib.Path(dirname).mkdir(parents=True, exist_ok=True)
+        self._file = open(self._temp_filename, 'wb')
+        if self.file_format == ARROW:
+            # uncompressed, so that columns of memory mapped files are read without a copy
+            self._writer = self._pa.ipc.new_file(self._file, self.schema)
+        else:
+            self._writer = self._pq.ParquetWriter(self._file, self.schema, compression=self.compression)
+        self._file_index += 1
+        self._file_rows = 0
+        self._file_opened_at = self.clock()
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._file.close()
+            if self._temp_filename != self._filename:
+                os.replace(self._temp_filename, self._filename)
+            self._writer = None
+            self._file = None
+            if self.on_file_closed is not None:
+                self.on_file_closed(self._filename)
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is required to export Parquet or Arrow files, install it with "pip install pyarrow"')
+    return pyarrow, pyarrow.parquet
+
+
+def build_arrow_schema(fields, column_types):
+    pa, _ = import_pyarrow()
+    return pa.schema([pa.field(field, to_arrow_type(column_types.get(field, 'STRING'))) for field in fields])
+
+
+# Column types follow the type names of schemas/*.py: a list stands for a REPEATED column
+# and a dict for a STRUCT column, e.g. [{'V': 'STRING', 'R': 'STRING', 'S': 'STRING'}].
+def to_arrow_type(column_type):
+    pa, _ = import_pyarrow()
+    if isinstance(column_type, list):
+        return pa.list_(to_arrow_type(column_type[0]))
+    if isinstance(column_type, dict):
+        return pa.struct([pa.field(name, to_arrow_type(field_type)) for name, field_type in column_type.items()])
+    if column_type == 'INT64':
+        return pa.int64()
+    if column_type == 'FLOAT64':
+        return pa.float64()
+    if column_type in ('BOOL', 'BOOLEAN'):
+        return pa.bool_()
+    if column_type == 'DECIMAL':
+        return pa.decimal128(DECIMAL_PRECISION, 0)
+    if column_type == 'TIMESTAMP':
+        return pa.timestamp('ms', tz='UTC')
+    if column_type == 'STRING':
+        return pa.string()
+    raise ValueError('Unknown column type {}'.format(column_type))
+
+
+def convert_value(column_type, value):
+    if value is None:
+        return None
+    if isinstance(column_type, list):
+        if isinstance(value, str):
+            value = json.loads(value)
+        return [convert_value(column_type[0], element) for element in value]
+    if isinstance(column_type, dict):
+        if isinstance(value, str):
+            value = json.loads(value)
+        return {name: convert_value(field_type, value.get(name)) for name, field_type in column_type.items()}
+    if column_type == 'INT64':
+        return to_int(value)
+    if column_type == 'FLOAT64':
+        return float(value)
+    if column_type in ('BOOL', 'BOOLEAN'):
+        return bool(value)
+    if column_type == 'DECIMAL':
+        return Decimal(to_int(value))
+    if column_type == 'TIMESTAMP':
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def to_int(value):
+    if isinstance(value, str):
+        return int(value, 16) if value.startswith('0x') else int(value)
+    return int(value)
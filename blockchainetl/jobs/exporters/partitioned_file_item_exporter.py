@@ -0,0 +1,193 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import collections
+import datetime
+import os
+import pathlib
+import threading
+
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import RollingFileItemExporter
+
+PARTITION_BY_DATE = 'date'
+PARTITION_BY_HOUR = 'hour'
+PARTITION_BY_BLOCK_RANGE = 'block_range'
+PARTITION_SCHEMES = (PARTITION_BY_DATE, PARTITION_BY_HOUR, PARTITION_BY_BLOCK_RANGE)
+
+DEFAULT_BLOCK_RANGE_SIZE = 100000
+DEFAULT_MAX_OPEN_PARTITIONS = 32
+
+
+class PartitionedFileItemExporter:
+    """Writes items of one type to Hive style partitions of a directory, each a directory of rolled files
+    written by RollingFileItemExporter:
+
+    - date: dirname/date=2023-01-31/data-000000000000.json, by the block timestamp in UTC
+    - hour: dirname/date=2023-01-31/hour=05/data-000000000000.json
+    - block_range: dirname/start_block=000115000000/data-000000000000.json, block_range_size blocks per partition
+
+    At most max_open_partitions partitions have an open file, the least recently used one is closed when another
+    one is opened. A partition opened again continues with the next file index.
+    Items are encoded and written outside of the exporter lock, which is only held to look up or open the writer
+    of a partition. Writers count their in-flight writes, an evicted writer is closed by its last write.
+    """
+
+    def __init__(self, dirname, fields, partition_by=PARTITION_BY_DATE, block_range_size=DEFAULT_BLOCK_RANGE_SIZE,
+                 max_open_partitions=DEFAULT_MAX_OPEN_PARTITIONS, **kwargs):
+        if partition_by not in PARTITION_SCHEMES:
+            raise ValueError('partition_by must be one of {}'.format(', '.join(PARTITION_SCHEMES)))
+        self.dirname = dirname
+        self.fields = fields
+        self.partition_by = partition_by
+        self.block_range_size = block_range_size
+        self.max_open_partitions = max(max_open_partitions, 1)
+        self.exporter_options = kwargs
+
+        self._writers = collections.OrderedDict()
+        # writers evicted from _writers which are not closed yet
+        self._evicted_writers = {}
+        self._next_file_indexes = {}
+        self._lock = threading.Lock()
+        self._writer_closed = threading.Condition(self._lock)
+
+    def export_item(self, item):
+        partition = get_partition(item, self.partition_by, self.block_range_size)
+        with self._lock:
+            writer, evicted_writer = self._get_writer(partition)
+            writer.in_flight += 1
+        if evicted_writer is not None:
+            self._close_writer(evicted_writer)
+
+        try:
+            writer.exporter.export_item(item)
+        finally:
+            with self._lock:
+                writer.in_flight -= 1
+                is_last_write = writer.is_evicted and writer.in_flight == 0 and not writer.is_closing
+                if is_last_write:
+                    writer.is_closing = True
+            if is_last_write:
+                self._close_writer(writer)
+
+    def close(self):
+        with self._lock:
+            writers_to_close = []
+            while self._writers:
+                writer = self._evict(next(iter(self._writers)))
+                if writer is not None:
+                    writers_to_close.append(writer)
+        for writer in writers_to_close:
+            self._close_writer(writer)
+        with self._lock:
+            # writers with writes in flight are closed by their last write
+            while self._evicted_writers:
+                self._writer_closed.wait()
+        # the requested output exists even if there are no items
+        pathlib.Path(self.dirname).mkdir(parents=True, exist_ok=True)
+
+    def _get_writer(self, partition):
+        """Returns the writer of the partition and a writer evicted for it which has to be closed, if any.
+        Called with the lock held."""
+        while partition in self._evicted_writers:
+            writer = self._evicted_writers[partition]
+            if not writer.is_closing:
+                # evicted while writes were in flight, it is taken back instead of being closed
+                del self._evicted_writers[partition]
+                writer.is_evicted = False
+                self._writers[partition] = writer
+                break
+            # the next file index of the partition is known once it is closed
+            self._writer_closed.wait()
+
+        writer = self._writers.get(partition)
+        if writer is None:
+            writer = _PartitionWriter(partition, RollingFileItemExporter(
+                dirname=os.path.join(self.dirname, partition), fields=self.fields,
+                first_file_index=self._next_file_indexes.get(partition, 0), **self.exporter_options))
+            self._writers[partition] = writer
+        else:
+            self._writers.move_to_end(partition)
+
+        evicted_writer = None
+        if len(self._writers) > self.max_open_partitions:
+            evicted_writer = self._evict(next(iter(self._writers)))
+        return writer, evicted_writer
+
+    def _evict(self, partition):
+        """Returns the writer of the partition if it has to be closed now, None if a write is in flight"""
+        writer = self._writers.pop(partition)
+        writer.is_evicted = True
+        self._evicted_writers[partition] = writer
+        if writer.in_flight > 0:
+            return None
+        writer.is_closing = True
+        return writer
+
+    def _close_writer(self, writer):
+        try:
+            writer.exporter.close()
+        finally:
+            with self._lock:
+                self._next_file_indexes[writer.partition] = writer.exporter.next_file_index
+                del self._evicted_writers[writer.partition]
+                self._writer_closed.notify_all()
+
+
+class _PartitionWriter:
+    def __init__(self, partition, exporter):
+        self.partition = partition
+        self.exporter = exporter
+        self.in_flight = 0
+        self.is_evicted = False
+        self.is_closing = False
+
+
+def get_partition(item, partition_by, block_range_size=DEFAULT_BLOCK_RANGE_SIZE):
+    """Returns the partition directory of the item, like date=2023-01-31 or start_block=000115000000"""
+    if partition_by == PARTITION_BY_BLOCK_RANGE:
+        block_number = item.get('block_number', item.get('number') if item.get('type') == 'block' else None)
+        if block_number is None:
+            raise ValueError('block_number is required to partition item {} by block range'.format(repr(item)))
+        return 'start_block={:012}'.format(block_number // block_range_size * block_range_size)
+
+    block_timestamp = get_block_datetime(item)
+    partition = 'date={}'.format(block_timestamp.strftime('%Y-%m-%d'))
+    if partition_by == PARTITION_BY_HOUR:
+        partition = os.path.join(partition, 'hour={}'.format(block_timestamp.strftime('%H')))
+    return partition
+
+
+def get_block_datetime(item):
+    block_unix_timestamp = item.get('block_unix_timestamp')
+    if block_unix_timestamp is not None:
+        return datetime.datetime.fromtimestamp(float(block_unix_timestamp), tz=datetime.timezone.utc)
+    block_timestamp = item.get('block_timestamp')
+    if isinstance(block_timestamp, str):
+        block_timestamp = datetime.datetime.fromisoformat(block_timestamp)
+    if isinstance(block_timestamp, datetime.datetime):
+        if block_timestamp.tzinfo is None:
+            return block_timestamp.replace(tzinfo=datetime.timezone.utc)
+        return block_timestamp.astimezone(datetime.timezone.utc)
+    raise ValueError('Block timestamp is required to partition item {} by date, '
+                     'export enriched items or partition by block range'.format(repr(item)))
@@ -21,45 +21,227 @@
 # SOFTWARE.
 
 import collections
+import datetime
+import decimal
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql.dml import OnConflictDoUpdate
 
 from blockchainetl.jobs.exporters.converters.composite_item_converter import CompositeItemConverter
 
+LOAD_METHOD_COPY = 'copy'
+LOAD_METHOD_INSERT = 'insert'
+LOAD_METHODS = (LOAD_METHOD_COPY, LOAD_METHOD_INSERT)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_ROWS_PER_TRANSACTION = 100000
 
-class PostgresItemExporter:
 
-    def __init__(self, connection_url, item_type_to_insert_stmt_mapping, converters=(), print_sql=True):
+class PostgresItemExporter:
+    """Loads items to a table per item type.
+
+    With load_method='copy' rows are streamed with COPY ... FROM STDIN (CSV) into a temporary staging table and
+    merged into the target table with INSERT ... ON CONFLICT on its primary key. Existing rows are updated if upsert
+    is set and kept otherwise, by default upsert follows the insert statement of the item type: rows are updated
+    if it is an on_conflict_do_update statement and kept otherwise. Every chunk of rows_per_transaction rows of a table is loaded in its own
+    transaction on a pooled connection, chunks of all tables are loaded in parallel by max_workers loaders.
+    Loading is idempotent, so a failed batch can be exported again.
+
+    Values of item_type_to_insert_stmt_mapping are SQLAlchemy insert statements or tables.
+    """
+
+    def __init__(self, connection_url, item_type_to_insert_stmt_mapping, converters=(), print_sql=True,
+                 load_method=LOAD_METHOD_COPY, upsert=None, max_workers=DEFAULT_MAX_WORKERS,
+                 rows_per_transaction=DEFAULT_ROWS_PER_TRANSACTION):
+        if load_method not in LOAD_METHODS:
+            raise ValueError('load_method must be one of {}'.format(', '.join(LOAD_METHODS)))
         self.connection_url = connection_url
         self.item_type_to_insert_stmt_mapping = item_type_to_insert_stmt_mapping
         self.converter = CompositeItemConverter(converters)
         self.print_sql = print_sql
+        self.load_method = load_method
+        self.upsert = upsert
+        self.max_workers = max_workers
+        self.rows_per_transaction = rows_per_transaction
 
         self.engine = self.create_engine()
+        self.executor = None
+        self.logger = logging.getLogger('PostgresItemExporter')
 
     def open(self):
-        pass
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
 
     def export_items(self, items):
+        if self.executor is None:
+            self.open()
+
         items_grouped_by_type = group_by_item_type(items)
 
+        futures = []
         for item_type, insert_stmt in self.item_type_to_insert_stmt_mapping.items():
             item_group = items_grouped_by_type.get(item_type)
             if item_group:
-                connection = self.engine.connect()
                 converted_items = list(self.convert_items(item_group))
-                connection.execute(insert_stmt, converted_items)
+                for start in range(0, len(converted_items), self.rows_per_transaction):
+                    chunk = converted_items[start:start + self.rows_per_transaction]
+                    if self.load_method == LOAD_METHOD_COPY:
+                        futures.append(self.executor.submit(self.copy_items, insert_stmt, chunk))
+                    else:
+                        futures.append(self.executor.submit(self.insert_items, insert_stmt, chunk))
+
+        # wait for all loaders before raising, so no chunk is loaded after export_items returns
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def insert_items(self, insert_stmt, items):
+        with self.engine.begin() as connection:
+            connection.execute(insert_stmt, items)
+
+    def copy_items(self, insert_stmt, items):
+        table = get_table(insert_stmt)
+        upsert = self.upsert if self.upsert is not None else is_upsert(insert_stmt)
+        columns = [column.name for column in table.columns]
+        primary_key = [column.name for column in table.primary_key.columns]
+        if primary_key and upsert:
+            # ON CONFLICT DO UPDATE must not meet a key twice in a statement, the last item wins
+            items = list({tuple(item.get(name) for name in primary_key): item for item in items}.values())
+
+        buffer = io.StringIO()
+        for item in items:
+            buffer.write(encode_csv_row(item.get(name) for name in columns))
+        buffer.seek(0)
+
+        preparer = self.engine.dialect.identifier_preparer
+        staging_table = preparer.quote('staging_' + table.name)
+        statements = build_copy_statements(
+            preparer.format_table(table), staging_table, [preparer.quote(name) for name in columns],
+            [preparer.quote(name) for name in primary_key], upsert)
+
+        # raw DBAPI connection is checked out of the engine pool and returned to it on close
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(statements.create_staging_table)
+            copy_expert(cursor, statements.copy, buffer)
+            cursor.execute(statements.merge)
+            cursor.close()
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        if self.print_sql:
+            self.logger.info('Loaded {} rows to {}.'.format(len(items), table.name))
 
     def convert_items(self, items):
         for item in items:
             yield self.converter.convert_item(item)
 
     def create_engine(self):
-        engine = create_engine(self.connection_url, echo=self.print_sql, pool_recycle=3600)
+        # a pooled connection per loader
+        engine = create_engine(self.connection_url, echo=self.print_sql, pool_recycle=3600, pool_pre_ping=True,
+                               pool_size=self.max_workers, max_overflow=0)
         return engine
 
     def close(self):
-        pass
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.engine.dispose()
+
+
+CopyStatements = collections.namedtuple('CopyStatements', ['create_staging_table', 'copy', 'merge'])
+
+
+def build_copy_statements(table, staging_table, columns, primary_key, upsert=False):
+    column_list = ', '.join(columns)
+    if not primary_key:
+        on_conflict = ''
+    elif upsert and len(columns) > len(primary_key):
+        on_conflict = ' ON CONFLICT ({}) DO UPDATE SET {}'.format(', '.join(primary_key), ', '.join(
+            '{0} = EXCLUDED.{0}'.format(column) for column in columns if column not in primary_key))
+    else:
+        on_conflict = ' ON CONFLICT ({}) DO NOTHING'.format(', '.join(primary_key))
+
+    return CopyStatements(
+        create_staging_table='CREATE TEMPORARY TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP'.format(
+            staging_table, table),
+        copy='COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(staging_table, column_list),
+        merge='INSERT INTO {0} ({1}) SELECT {1} FROM {2}{3}'.format(table, column_list, staging_table, on_conflict),
+    )
+
+
+def copy_expert(cursor, sql, buffer):
+    if hasattr(cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.read())
+
+
+def encode_csv_row(values):
+    return ','.join(encode_csv_value(value) for value in values) + '\n'
+
+
+def encode_csv_value(value):
+    """Encodes a value for COPY ... WITH (FORMAT csv), an unquoted empty value is NULL"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    return quote_csv(encode_text(value))
+
+
+def encode_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return encode_array(value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, (bytes, bytearray)):
+        return '\\x' + value.hex()
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_array(values):
+    elements = []
+    for value in values:
+        if value is None:
+            elements.append('NULL')
+        elif isinstance(value, bool):
+            elements.append('t' if value else 'f')
+        elif isinstance(value, (int, float, decimal.Decimal)):
+            elements.append(str(value))
+        else:
+            elements.append('"' + encode_text(value).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(elements) + '}'
+
+
+def quote_csv(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def is_upsert(insert_stmt_or_table):
+    """Returns True if the insert statement updates existing rows, i.e. it is an on_conflict_do_update statement"""
+    return isinstance(getattr(insert_stmt_or_table, '_post_values_clause', None), OnConflictDoUpdate)
+
+
+def get_table(insert_stmt_or_table):
+    return getattr(insert_stmt_or_table, 'table', insert_stmt_or_table)
 
 
 def group_by_item_type(items):
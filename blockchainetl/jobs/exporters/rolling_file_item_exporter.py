@@ -0,0 +1,177 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import threading
+import time
+
+from blockchainetl.compression import DEFAULT_COMPRESS_THREADS, GZIP, get_compression_extension
+from blockchainetl.exporters import CsvItemExporter, JsonLinesItemExporter
+from blockchainetl.file_utils import get_file_handle
+from blockchainetl.frame_index import write_frame_index
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import get_block_number
+from blockchainetl.lookup_index import LookupIndexBuilder
+
+
+class RollingFileItemExporter:
+    """Writes items of one type to a directory of files named data-000000000000.json, data-000000000001.json, ...
+    Items are encoded on arrival and appended to the open file, which is rotated once it has file_maxlines lines,
+    file_maxbytes bytes (before compression) or has been open for file_maxseconds seconds.
+    Files are written under a hidden temporary name and renamed when they are complete, on_file_closed is then
+    called with the name of the file.
+    Compressed files written with frame_rows get a sidecar index of their frames, see frame_index.
+    If lookup_fields is given, every file also gets a lookup index of the hashes and addresses in these fields,
+    see lookup_index.
+    """
+
+    def __init__(self, dirname, fields, file_format='json', file_maxlines=None, file_maxbytes=None,
+                 file_maxseconds=None, compress=False, compress_level=None, compress_threads=DEFAULT_COMPRESS_THREADS,
+                 compression=GZIP, zstd_dict=None, frame_rows=None, lookup_fields=None, on_file_closed=None,
+                 first_file_index=0, clock=time.monotonic, **kwargs):
+        self.dirname = os.path.relpath(dirname)
+        self.fields = fields
+        self.file_format = file_format
+        self.file_maxlines = positive_or_none(file_maxlines)
+        self.file_maxbytes = positive_or_none(file_maxbytes)
+        self.file_maxseconds = positive_or_none(file_maxseconds)
+        self.compress = compress
+        self.compress_level = compress_level
+        self.compress_threads = compress_threads
+        self.compression = compression
+        self.zstd_dict = zstd_dict
+        self.frame_rows = positive_or_none(frame_rows) if compress else None
+        if lookup_fields and compress and self.frame_rows is None:
+            raise ValueError('Lookup indexes of compressed files require frame_rows')
+        self.lookup_fields = lookup_fields or None
+        self.on_file_closed = on_file_closed
+        self.clock = clock
+
+        if self.file_format == 'json':
+            self.encoder = JsonLinesItemExporter(None, fields_to_export=fields)
+        else:
+            self.encoder = CsvItemExporter(None, fields_to_export=fields)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._filename = None
+        self._temp_filename = None
+        self._lookup_index = None
+        self.first_file_index = first_file_index
+        self._file_index = first_file_index
+        self._file_lines = 0
+        self._file_bytes = 0
+        self._file_opened_at = None
+
+    def export_item(self, item):
+        # items are encoded by the calling thread, only writes to the file are serialized
+        data = self.encoder.encode_item(item)
+        with self._lock:
+            if self._file is not None and self._is_expired():
+                self._close_file()
+            if self._file is None:
+                self._open_file(item)
+            if self.frame_rows is not None:
+                position = self._file.write_row(data, get_block_number(item))
+            else:
+                position = self._file_bytes
+                self._file.write(data)
+            if self._lookup_index is not None:
+                self._lookup_index.add(item, position)
+            self._file_lines += 1
+            self._file_bytes += len(data)
+            if self._is_full():
+                self._close_file()
+
+    def close(self):
+        with self._lock:
+            if self._file is None and self._file_index == self.first_file_index:
+                # write an empty file, so that every requested output exists
+                self._open_file(None)
+            self._close_file()
+
+    @property
+    def next_file_index(self):
+        return self._file_index
+
+    def _is_full(self):
+        if self.file_maxlines is not None and self._file_lines >= self.file_maxlines:
+            return True
+        return self.file_maxbytes is not None and self._file_bytes >= self.file_maxbytes
+
+    def _is_expired(self):
+        return self.file_maxseconds is not None and self.clock() - self._file_opened_at >= self.file_maxseconds
+
+    def _open_file(self, item):
+        extension = get_compression_extension(self.compression) if self.compress else ''
+        basename = 'data-{:012}.{}{}'.format(self._file_index, self.file_format, extension)
+        self._filename = os.path.join(self.dirname, basename)
+        # hidden, so that incomplete files are skipped by readers listing the directory
+        self._temp_filename = os.path.join(self.dirname, '.{}.tmp'.format(basename))
+        self._file = get_file_handle(self._temp_filename, binary=True, compress=self.compress,
+                                     compress_level=self.compress_level, compress_threads=self.compress_threads,
+                                     compression=self.compression, zstd_dict=self.zstd_dict,
+                                     frame_rows=self.frame_rows)
+        self._file_index += 1
+        self._file_lines = 0
+        self._file_bytes = 0
+        self._file_opened_at = self.clock()
+        self._lookup_index = LookupIndexBuilder(self.lookup_fields) if self.lookup_fields else None
+
+        if self.file_format != 'json' and item is not None:
+            headers = self.encoder.encode_headers(item)
+            self._file.write(headers)
+            self._file_bytes += len(headers)
+            if self.frame_rows is not None:
+                self._file.end_frame()
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        self._file.close()
+        # the index is complete before the file shows up under its name
+        index_filenames = [write_frame_index(self._filename, self._file)]
+        if self._lookup_index is not None:
+            index_filenames.append(self._lookup_index.write(self._filename, frames=self._file_frames()))
+        os.replace(self._temp_filename, self._filename)
+        self._file = None
+        self._lookup_index = None
+        if self.on_file_closed is not None:
+            for index_filename in index_filenames:
+                if index_filename is not None:
+                    self.on_file_closed(index_filename)
+            self.on_file_closed(self._filename)
+
+    def _file_frames(self):
+        return self._file.frames if self.frame_rows is not None else None
+
+
+def positive_or_none(value):
+    return value if value is not None and value > 0 else None
+
+
+def is_rolling_output(file_maxlines=None, file_maxbytes=None, file_maxseconds=None, partition_by=None, **kwargs):
+    """Returns True if outputs are directories of rolled or partitioned files rather than single files"""
+    if partition_by is not None:
+        return True
+    return any(positive_or_none(value) is not None for value in (file_maxlines, file_maxbytes, file_maxseconds))
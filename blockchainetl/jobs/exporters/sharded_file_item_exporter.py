@@ -0,0 +1,251 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import itertools
+import json
+import logging
+import os
+import pathlib
+import threading
+
+from blockchainetl.atomic_counter import AtomicCounter
+from blockchainetl.compression import (
+    DEFAULT_COMPRESS_THREADS, GZIP, ZSTD, get_compression_extension, load_zstd_dictionaries)
+from blockchainetl.exporters import CsvItemExporter, JsonLinesItemExporter
+from blockchainetl.file_utils import get_file_handle
+from blockchainetl.frame_index import write_frame_index
+from blockchainetl.lookup_index import LookupIndexBuilder
+
+DEFAULT_SHARD_SIZE = 100
+MANIFEST_FILENAME = 'manifest.json'
+
+
+class ShardedFileItemExporter:
+    """Writes items to a directory of part files per item type, without sharing files between threads:
+
+        blocks/part-000000.json.gz, blocks/part-000001.json.gz, ..., blocks/manifest.json
+
+    Every thread writes to its own part, which is completed once the thread moves on to an item of another shard
+    of shard_size blocks, so a part holds the items of one worker for one block range. Parts are written under
+    a hidden temporary name and renamed when they are complete, on_file_closed is then called with the name.
+    On close, manifest.json lists the parts with their block range and item count, ordered by block.
+    """
+
+    def __init__(self, dirname_mapping, field_mapping=None, shard_size=DEFAULT_SHARD_SIZE, file_format='json',
+                 compress=False, compress_level=None, compress_threads=DEFAULT_COMPRESS_THREADS, compression=GZIP,
+                 zstd_dict_dir=None, frame_rows=None, lookup_field_mapping=None, on_file_closed=None, **kwargs):
+        if shard_size <= 0:
+            raise ValueError('shard_size must be greater than 0')
+        self.dirname_mapping = {item_type: dirname for item_type, dirname in dirname_mapping.items()
+                                if dirname is not None}
+        self.field_mapping = field_mapping or {}
+        self.shard_size = shard_size
+        self.file_format = file_format
+        self.compress = compress
+        self.compress_level = compress_level
+        self.compress_threads = compress_threads
+        self.compression = compression
+        self.zstd_dict_dir = zstd_dict_dir
+        self.frame_rows = frame_rows if compress and frame_rows is not None and frame_rows > 0 else None
+        self.lookup_field_mapping = lookup_field_mapping or {}
+        if self.lookup_field_mapping and compress and self.frame_rows is None:
+            raise ValueError('Lookup indexes of compressed files require frame_rows')
+        self.on_file_closed = on_file_closed
+
+        self.zstd_dicts = {}
+        self.counter_mapping = {}
+        self.part_indexes = itertools.count()
+        self._local = threading.local()
+        self._open_parts = set()
+        self._completed_parts = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('ShardedFileItemExporter')
+
+    def open(self):
+        if self.compress and self.compression == ZSTD and self.zstd_dict_dir is not None:
+            self.zstd_dicts = load_zstd_dictionaries(self.zstd_dict_dir)
+        for item_type, dirname in self.dirname_mapping.items():
+            pathlib.Path(dirname).mkdir(parents=True, exist_ok=True)
+            self._completed_parts[item_type] = []
+            self.counter_mapping[item_type] = AtomicCounter()
+
+    def export_items(self, items):
+        for item in items:
+            self.export_item(item)
+
+    def export_item(self, item):
+        item_type = item.get('type')
+        if item_type is None:
+            raise ValueError('"type" key is not found in item {}'.format(repr(item)))
+        if item_type not in self.dirname_mapping:
+            raise ValueError('Exporter for item type {} not found'.format(item_type))
+
+        block_number = get_block_number(item)
+        shard = block_number // self.shard_size
+
+        parts = getattr(self._local, 'parts', None)
+        if parts is None:
+            parts = self._local.parts = {}
+        part = parts.get(item_type)
+        if part is not None and part.shard != shard:
+            self._complete_part(part)
+            part = None
+        if part is None:
+            part = parts[item_type] = self._open_part(item_type, shard, item)
+
+        part.write(item, block_number)
+        self.counter_mapping[item_type].increment()
+
+    def close(self):
+        # called once the workers are done, their parts are completed here
+        with self._lock:
+            open_parts = list(self._open_parts)
+        for part in open_parts:
+            self._complete_part(part)
+        self._local = threading.local()
+
+        for item_type, dirname in self.dirname_mapping.items():
+            filename = os.path.join(dirname, MANIFEST_FILENAME)
+            write_manifest(filename, self._completed_parts[item_type])
+            if self.on_file_closed is not None:
+                self.on_file_closed(filename)
+            self.logger.info('{} items exported: {} in {} parts'.format(
+                item_type, self.counter_mapping[item_type].increment() - 1, len(self._completed_parts[item_type])))
+
+    def _open_part(self, item_type, shard, item):
+        extension = get_compression_extension(self.compression) if self.compress else ''
+        with self._lock:
+            basename = 'part-{:06}.{}{}'.format(next(self.part_indexes), self.file_format, extension)
+        part = _Part(
+            dirname=self.dirname_mapping[item_type], basename=basename, item_type=item_type, shard=shard,
+            fields=self.field_mapping.get(item_type), file_format=self.file_format,
+            lookup_fields=self.lookup_field_mapping.get(item_type),
+            file_options=dict(compress=self.compress, compress_level=self.compress_level,
+                              compress_threads=self.compress_threads, compression=self.compression,
+                              zstd_dict=self.zstd_dicts.get(item_type), frame_rows=self.frame_rows))
+        part.open(item)
+        with self._lock:
+            self._open_parts.add(part)
+        return part
+
+    def _complete_part(self, part):
+        part.close()
+        with self._lock:
+            self._open_parts.discard(part)
+            self._completed_parts[part.item_type].append(part)
+        if self.on_file_closed is not None:
+            for index_filename in part.index_filenames:
+                self.on_file_closed(index_filename)
+            self.on_file_closed(part.filename)
+
+
+class _Part:
+    def __init__(self, dirname, basename, item_type, shard, fields, file_format, file_options, lookup_fields=None):
+        self.filename = os.path.join(dirname, basename)
+        self.temp_filename = os.path.join(dirname, '.{}.tmp'.format(basename))
+        self.basename = basename
+        self.item_type = item_type
+        self.shard = shard
+        self.file_options = file_options
+        # every part has its own encoder, so that threads don't share the header lock of CSV encoders
+        if file_format == 'json':
+            self.encoder = JsonLinesItemExporter(None, fields_to_export=fields)
+        else:
+            self.encoder = CsvItemExporter(None, fields_to_export=fields)
+        self.is_framed = file_options.get('frame_rows') is not None
+        self.lookup_index = LookupIndexBuilder(lookup_fields) if lookup_fields else None
+        self.file = None
+        self.file_bytes = 0
+        self.index_filenames = []
+        self.start_block = None
+        self.end_block = None
+        self.item_count = 0
+
+    def open(self, item):
+        self.file = get_file_handle(self.temp_filename, binary=True, **self.file_options)
+        if isinstance(self.encoder, CsvItemExporter):
+            headers = self.encoder.encode_headers(item)
+            self.file.write(headers)
+            self.file_bytes += len(headers)
+            if self.is_framed:
+                self.file.end_frame()
+
+    def write(self, item, block_number):
+        data = self.encoder.encode_item(item)
+        if self.is_framed:
+            position = self.file.write_row(data, block_number)
+        else:
+            position = self.file_bytes
+            self.file.write(data)
+        self.file_bytes += len(data)
+        if self.lookup_index is not None:
+            self.lookup_index.add(item, position)
+        self.item_count += 1
+        if self.start_block is None or block_number < self.start_block:
+            self.start_block = block_number
+        if self.end_block is None or block_number > self.end_block:
+            self.end_block = block_number
+
+    def close(self):
+        self.file.close()
+        index_filename = write_frame_index(self.filename, self.file)
+        if index_filename is not None:
+            self.index_filenames.append(index_filename)
+        if self.lookup_index is not None:
+            frames = self.file.frames if self.is_framed else None
+            self.index_filenames.append(self.lookup_index.write(self.filename, frames=frames))
+        os.replace(self.temp_filename, self.filename)
+
+    def to_manifest_entry(self):
+        return {
+            'path': self.basename,
+            'start_block': self.start_block,
+            'end_block': self.end_block,
+            'item_count': self.item_count,
+        }
+
+
+def get_block_number(item):
+    block_number = item.get('block_number', item.get('number') if item.get('type') == 'block' else None)
+    if block_number is None:
+        raise ValueError('block_number is required to shard item {}'.format(repr(item)))
+    return block_number
+
+
+def write_manifest(filename, parts):
+    entries = sorted((part.to_manifest_entry() for part in parts),
+                     key=lambda entry: (entry['start_block'], entry['end_block'], entry['path']))
+    temp_filename = os.path.join(os.path.dirname(filename), '.{}.tmp'.format(os.path.basename(filename)))
+    with open(temp_filename, 'w') as manifest_file:
+        json.dump({'parts': entries}, manifest_file, indent=2)
+        manifest_file.write('\n')
+    os.replace(temp_filename, filename)
+
+
+def read_manifest(filename):
+    """Returns the paths of the parts listed in the manifest, in block order"""
+    with open(filename) as manifest_file:
+        manifest = json.load(manifest_file)
+    dirname = os.path.dirname(filename)
+    return [os.path.join(dirname, entry['path']) for entry in manifest['parts']]
@@ -21,35 +21,78 @@
 # SOFTWARE.
 import logging
 import os
+import threading
 
 from blockchainetl.atomic_counter import AtomicCounter
+from blockchainetl.compression import DEFAULT_COMPRESS_THREADS, GZIP, ZSTD, load_zstd_dictionaries
 from blockchainetl.exporters import CsvItemExporter, JsonLinesItemExporter
 from blockchainetl.file_utils import get_file_handle, close_silently
+from blockchainetl.frame_index import is_framed, write_frame_index
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import get_block_number
+from blockchainetl.lookup_index import LookupIndexBuilder
 
 
 class SinglefileItemExporter:
-    def __init__(self, filename_mapping, field_mapping=None, file_format='json', compress=False, **kwargs):
+    def __init__(self, filename_mapping, field_mapping=None, file_format='json', compress=False, compress_level=None,
+                 compress_threads=DEFAULT_COMPRESS_THREADS, compression=GZIP, zstd_dict_dir=None, frame_rows=None,
+                 lookup_field_mapping=None, on_file_closed=None, **kwargs):
         self.filename_mapping = filename_mapping
         self.field_mapping = field_mapping or {}
 
         self.file_mapping = {}
+        self.framed_item_types = set()
+        self.lookup_index_mapping = {}
+        self.offset_mapping = {}
         self.exporter_mapping = {}
         self.counter_mapping = {}
 
         self.file_format = file_format
         self.compress = compress
+        self.compress_level = compress_level
+        self.compress_threads = compress_threads
+        self.compression = compression
+        self.zstd_dict_dir = zstd_dict_dir
+        # compressed files are written in frames of rows with a sidecar index, see frame_index
+        self.frame_rows = frame_rows if compress and frame_rows is not None and frame_rows > 0 else None
+        # hashes and addresses of the rows are indexed by file offset, see lookup_index
+        self.lookup_field_mapping = lookup_field_mapping or {}
+        if self.lookup_field_mapping and compress and self.frame_rows is None:
+            raise ValueError('Lookup indexes of compressed files require frame_rows')
+        self.on_file_closed = on_file_closed
+        self._lock = threading.Lock()
 
         self.logger = logging.getLogger('SinglefileItemExporter')
 
     def open(self):
+        zstd_dicts = {}
+        if self.compress and self.compression == ZSTD and self.zstd_dict_dir is not None:
+            zstd_dicts = load_zstd_dictionaries(self.zstd_dict_dir)
         for item_type, filename in self.filename_mapping.items():
-            file = get_file_handle(filename, binary=True, compress=self.compress)
+            file = get_file_handle(filename, binary=True, compress=self.compress, compress_level=self.compress_level,
+                                   compress_threads=self.compress_threads, compression=self.compression,
+                                   zstd_dict=zstd_dicts.get(item_type), frame_rows=self.frame_rows)
             fields = self.field_mapping.get(item_type)
             self.file_mapping[item_type] = file
+            if is_framed(file):
+                self.framed_item_types.add(item_type)
+            if self.lookup_field_mapping.get(item_type) and filename and filename != '-':
+                self.lookup_index_mapping[item_type] = LookupIndexBuilder(self.lookup_field_mapping[item_type])
+                self.offset_mapping[item_type] = 0
             if self.file_format == 'json':
                 item_exporter = JsonLinesItemExporter(file, fields_to_export=fields)
             else:
                 item_exporter = CsvItemExporter(file, fields_to_export=fields)
+                if item_type in self.framed_item_types or item_type in self.lookup_index_mapping:
+                    # headers are written upfront, in framed files as a frame of their own which readers of
+                    # any block range decompress
+                    if fields is None:
+                        raise ValueError('Fields of item type {} are required to write framed or indexed CSV '
+                                         'files'.format(item_type))
+                    headers = item_exporter.encode_headers(None)
+                    file.write(headers)
+                    self.offset_mapping[item_type] = len(headers)
+                    if item_type in self.framed_item_types:
+                        file.end_frame()
             self.exporter_mapping[item_type] = item_exporter
 
             self.counter_mapping[item_type] = AtomicCounter()
@@ -66,7 +109,20 @@ class SinglefileItemExporter:
         exporter = self.exporter_mapping.get(item_type)
         if exporter is None:
             raise ValueError('Exporter for item type {} not found'.format(item_type))
-        exporter.export_item(item)
+        lookup_index = self.lookup_index_mapping.get(item_type)
+        if item_type in self.framed_item_types:
+            # rows are written whole, frames must not split them
+            position = self.file_mapping[item_type].write_row(exporter.encode_item(item), get_block_number(item))
+        elif lookup_index is not None:
+            data = exporter.encode_item(item)
+            with self._lock:
+                position = self.offset_mapping[item_type]
+                self.file_mapping[item_type].write(data)
+                self.offset_mapping[item_type] += len(data)
+        else:
+            exporter.export_item(item)
+        if lookup_index is not None:
+            lookup_index.add(item, position)
 
         counter = self.counter_mapping.get(item_type)
         if counter is not None:
@@ -75,6 +131,17 @@ class SinglefileItemExporter:
     def close(self):
         for item_type, file in self.file_mapping.items():
             close_silently(file)
+            filename = self.filename_mapping[item_type]
+            index_filenames = [write_frame_index(filename, file)]
+            lookup_index = self.lookup_index_mapping.get(item_type)
+            if lookup_index is not None:
+                frames = file.frames if item_type in self.framed_item_types else None
+                index_filenames.append(lookup_index.write(filename, frames=frames))
+            if self.on_file_closed is not None and filename and filename != '-':
+                for index_filename in index_filenames:
+                    if index_filename is not None:
+                        self.on_file_closed(index_filename)
+                self.on_file_closed(filename)
             counter = self.counter_mapping.get(item_type)
             if counter is not None:
                 self.logger.info('{} items exported: {}'.format(item_type, counter.increment() - 1))
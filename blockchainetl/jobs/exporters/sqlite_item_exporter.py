@@ -0,0 +1,267 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from blockchainetl.atomic_counter import AtomicCounter
+
+SQLITE_URL_PREFIX = 'sqlite://'
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_QUEUE_SIZE = 100000
+
+# Columns indexed after the load if a table has them
+INDEXED_COLUMNS = ('number', 'hash', 'block_number', 'transaction_hash', 'address', 'from_address', 'to_address',
+                   'token_address', 'contract_address', 'creator_address')
+
+# Column types follow the ones of parquet_column_types.py. Decimals may exceed 64 bits and are kept exact as TEXT,
+# repeated and struct columns are JSON TEXT.
+SQLITE_TYPES = {
+    'INT64': 'INTEGER',
+    'FLOAT64': 'REAL',
+    'BOOL': 'INTEGER',
+    'BOOLEAN': 'INTEGER',
+    'DECIMAL': 'TEXT',
+    'TIMESTAMP': 'TEXT',
+    'STRING': 'TEXT',
+}
+
+_STOP = object()
+
+
+class SqliteItemExporter:
+    """Inserts items to a table per item type of a SQLite database, e.g. blocks and transactions tables.
+
+    Tables are created with typed columns and a primary key, rows are inserted with INSERT OR REPLACE so that
+    exporting a range again appends or overwrites rows. Rows are converted by the exporting threads and inserted
+    by a single writer thread in transactions of batch_size rows, in WAL mode. Secondary indexes are dropped
+    while loading and built once the exporter is closed.
+    """
+
+    def __init__(self, output_mapping, field_mapping, column_type_mapping=None, primary_key_mapping=None,
+                 batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE, **kwargs):
+        self.path = get_sqlite_path(output_mapping)
+        self.item_types = [item_type for item_type, output in output_mapping.items() if output is not None]
+        self.field_mapping = field_mapping
+        self.column_type_mapping = column_type_mapping or {}
+        self.primary_key_mapping = primary_key_mapping or {}
+        self.batch_size = batch_size
+
+        self.tables = {item_type: SqliteTable(
+            get_table_name(item_type), field_mapping[item_type], self.column_type_mapping.get(item_type, {}),
+            self.primary_key_mapping.get(item_type, ())) for item_type in self.item_types}
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._error = None
+        self.counter_mapping = {item_type: AtomicCounter() for item_type in self.item_types}
+        self.logger = logging.getLogger('SqliteItemExporter')
+
+    def open(self):
+        connection = self._connect()
+        try:
+            for table in self.tables.values():
+                connection.execute(table.create_table_statement())
+                for statement in table.drop_index_statements():
+                    connection.execute(statement)
+        finally:
+            connection.close()
+        self._writer = threading.Thread(target=self._write, name='SqliteItemExporter', daemon=True)
+        self._writer.start()
+
+    def export_items(self, items):
+        for item in items:
+            self.export_item(item)
+
+    def export_item(self, item):
+        item_type = item.get('type')
+        if item_type is None:
+            raise ValueError('"type" key is not found in item {}'.format(repr(item)))
+        table = self.tables.get(item_type)
+        if table is None:
+            raise ValueError('Exporter for item type {} not found'.format(item_type))
+        if self._error is not None:
+            raise self._error
+        self._queue.put((table, table.to_row(item)))
+        self.counter_mapping[item_type].increment()
+
+    def close(self):
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        if self._error is not None:
+            raise self._error
+
+        connection = self._connect()
+        try:
+            for table in self.tables.values():
+                for statement in table.create_index_statements():
+                    connection.execute(statement)
+            connection.execute('PRAGMA optimize')
+        finally:
+            connection.close()
+        for item_type, counter in self.counter_mapping.items():
+            self.logger.info('{} items exported: {}'.format(item_type, counter.increment() - 1))
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _write(self):
+        connection = self._connect()
+        stopped = False
+        try:
+            while not stopped:
+                # waits for the first row of a batch and takes whatever else is queued, up to batch_size rows
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                rows_mapping = {}
+                for entry in batch:
+                    if entry is _STOP:
+                        stopped = True
+                    else:
+                        table, row = entry
+                        rows_mapping.setdefault(table, []).append(row)
+                if rows_mapping:
+                    connection.execute('BEGIN')
+                    for table, rows in rows_mapping.items():
+                        connection.executemany(table.insert_statement(), rows)
+                    connection.execute('COMMIT')
+        except Exception as e:
+            self.logger.exception('Failed to write items to {}'.format(self.path))
+            self._error = e
+            # keeps the queue moving, so that exporting threads are not blocked and raise the error instead
+            while not stopped:
+                stopped = self._queue.get() is _STOP
+        finally:
+            connection.close()
+
+
+class SqliteTable:
+
+    def __init__(self, name, fields, column_types, primary_key=()):
+        self.name = name
+        self.fields = fields
+        self.column_types = [column_types.get(field, 'STRING') for field in fields]
+        # a primary key is only usable if all of its columns are exported
+        self.primary_key = tuple(primary_key) if all(column in fields for column in primary_key) else ()
+        self._insert_statement = 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+            quote_identifier(name), ', '.join(quote_identifier(field) for field in fields),
+            ', '.join('?' for _ in fields))
+
+    def create_table_statement(self):
+        columns = ['{} {}'.format(quote_identifier(field), to_sqlite_type(column_type))
+                   for field, column_type in zip(self.fields, self.column_types)]
+        if self.primary_key:
+            columns.append('PRIMARY KEY ({})'.format(', '.join(quote_identifier(c) for c in self.primary_key)))
+        return 'CREATE TABLE IF NOT EXISTS {} ({})'.format(quote_identifier(self.name), ', '.join(columns))
+
+    def insert_statement(self):
+        return self._insert_statement
+
+    def indexed_columns(self):
+        # the first column of the primary key is already indexed by it
+        return [column for column in INDEXED_COLUMNS
+                if column in self.fields and self.primary_key[:1] != (column,)]
+
+    def create_index_statements(self):
+        return ['CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(
+            quote_identifier('{}_{}_idx'.format(self.name, column)), quote_identifier(self.name),
+            quote_identifier(column)) for column in self.indexed_columns()]
+
+    def drop_index_statements(self):
+        return ['DROP INDEX IF EXISTS {}'.format(quote_identifier('{}_{}_idx'.format(self.name, column)))
+                for column in self.indexed_columns()]
+
+    def to_row(self, item):
+        return tuple(to_sqlite_value(column_type, item.get(field))
+                     for field, column_type in zip(self.fields, self.column_types))
+
+
+def to_sqlite_type(column_type):
+    if isinstance(column_type, (list, dict)):
+        return 'TEXT'
+    return SQLITE_TYPES.get(column_type, 'TEXT')
+
+
+def to_sqlite_value(column_type, value):
+    if value is None:
+        return None
+    if isinstance(column_type, (list, dict)):
+        return value if isinstance(value, str) else json.dumps(value)
+    if column_type == 'INT64':
+        return int(value, 16) if isinstance(value, str) and value.startswith('0x') else int(value)
+    if column_type == 'FLOAT64':
+        return float(value)
+    if column_type in ('BOOL', 'BOOLEAN'):
+        return int(bool(value))
+    if column_type == 'DECIMAL':
+        return str(int(value, 16) if isinstance(value, str) and value.startswith('0x') else int(value))
+    if column_type == 'TIMESTAMP':
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def get_table_name(item_type):
+    return item_type + 's'
+
+
+def quote_identifier(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def is_sqlite_output(*outputs):
+    """Returns True if outputs are sqlite://path.db URLs, raises if only some of them are"""
+    outputs = [output for output in outputs if output is not None]
+    sqlite_outputs = [output for output in outputs if output.startswith(SQLITE_URL_PREFIX)]
+    if sqlite_outputs and len(sqlite_outputs) != len(outputs):
+        raise ValueError('Outputs must be either all files or all {}path.db databases'.format(SQLITE_URL_PREFIX))
+    return len(sqlite_outputs) > 0
+
+
+def get_sqlite_path(output_mapping):
+    paths = {output[len(SQLITE_URL_PREFIX):] for output in output_mapping.values() if output is not None}
+    if len(paths) != 1:
+        raise ValueError('Outputs must be a single {}path.db database, got {}'.format(
+            SQLITE_URL_PREFIX, ', '.join(sorted(paths))))
+    return paths.pop()
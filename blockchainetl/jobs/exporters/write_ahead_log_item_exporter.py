@@ -0,0 +1,146 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+import threading
+import time
+from json import JSONEncoder
+
+from blockchainetl.exporters import EncodeCustom
+from blockchainetl.write_ahead_log import DEFAULT_SEGMENT_MAX_BYTES, WriteAheadLog
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_RETRY_BACKOFF_SECONDS = 1
+DEFAULT_MAX_RETRY_BACKOFF_SECONDS = 60
+
+
+class WriteAheadLogItemExporter:
+    """Appends items to a local write-ahead log and exports them to item_exporter from a drainer thread.
+
+    export_items returns as soon as the items are in the log, so a slow or unavailable sink doesn't hold back
+    the caller. The drainer exports batches of up to batch_size items, retries a failed batch with exponential
+    backoff until it is exported and acknowledges it afterwards. Items not acknowledged before a crash or
+    a close timing out are exported after the next open, at least once.
+    close waits up to drain_timeout_seconds (forever if None) for the sink to catch up.
+    export_items and close raise once the drainer stopped on an error, instead of filling the log forever.
+    """
+
+    def __init__(self, item_exporter, dirname, batch_size=DEFAULT_BATCH_SIZE,
+                 segment_max_bytes=DEFAULT_SEGMENT_MAX_BYTES, fsync=False,
+                 retry_backoff_seconds=DEFAULT_RETRY_BACKOFF_SECONDS,
+                 max_retry_backoff_seconds=DEFAULT_MAX_RETRY_BACKOFF_SECONDS, drain_timeout_seconds=None):
+        if batch_size <= 0:
+            raise ValueError('batch_size must be greater than 0')
+        self.item_exporter = item_exporter
+        self.write_ahead_log = WriteAheadLog(dirname, segment_max_bytes=segment_max_bytes, fsync=fsync)
+        self.batch_size = batch_size
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_backoff_seconds = max_retry_backoff_seconds
+        self.drain_timeout_seconds = drain_timeout_seconds
+
+        self.encoder = JSONEncoder(default=EncodeCustom)
+        self.delivered_count = 0
+        self._closing = threading.Event()
+        self._drain_deadline = None
+        self._drainer = None
+        self._caught_up = False
+        self._drainer_error = None
+        self.logger = logging.getLogger('WriteAheadLogItemExporter')
+
+    def open(self):
+        self.write_ahead_log.open()
+        self.item_exporter.open()
+        self._closing.clear()
+        self._caught_up = False
+        self._drainer_error = None
+        self._drainer = threading.Thread(target=self._drain, name='wal-drainer', daemon=True)
+        self._drainer.start()
+
+    def export_items(self, items):
+        self._raise_if_drainer_failed()
+        self.write_ahead_log.append([self.encoder.encode(item).encode('utf-8') for item in items])
+
+    def export_item(self, item):
+        self.export_items([item])
+
+    def close(self):
+        if self.drain_timeout_seconds is not None:
+            self._drain_deadline = time.monotonic() + self.drain_timeout_seconds
+        self._closing.set()
+        try:
+            self._drainer.join()
+            self._raise_if_drainer_failed()
+            if not self._caught_up:
+                self.logger.warning('The sink did not catch up in {} seconds, the rest of the items are exported '
+                                    'after the next start.'.format(self.drain_timeout_seconds))
+        finally:
+            try:
+                self.write_ahead_log.close()
+            finally:
+                self.item_exporter.close()
+        self.logger.info('{} items delivered'.format(self.delivered_count))
+
+    def _raise_if_drainer_failed(self):
+        if self._drainer_error is not None:
+            raise RuntimeError('The write-ahead log drainer stopped: {}'.format(
+                repr(self._drainer_error))) from self._drainer_error
+
+    def _drain(self):
+        try:
+            self._drain_log()
+        except Exception as e:
+            self.logger.exception('The write-ahead log drainer stopped, the items stay in the log.')
+            self._drainer_error = e
+
+    def _drain_log(self):
+        while not self._is_drain_expired(0):
+            records, position = self.write_ahead_log.read(self.batch_size, timeout=0.5)
+            if not records:
+                if self._closing.is_set():
+                    self._caught_up = True
+                    return
+                continue
+            if not self._export_with_retries([json.loads(record) for record in records]):
+                return
+            self.write_ahead_log.ack(position)
+            self.delivered_count += len(records)
+
+    def _export_with_retries(self, items):
+        backoff_seconds = self.retry_backoff_seconds
+        while True:
+            try:
+                self.item_exporter.export_items(items)
+                return True
+            except Exception:
+                self.logger.exception('Failed to export {} items, retrying in {} seconds.'.format(
+                    len(items), backoff_seconds))
+            if self._is_drain_expired(backoff_seconds):
+                return False
+            time.sleep(backoff_seconds)
+            backoff_seconds = min(backoff_seconds * 2, self.max_retry_backoff_seconds)
+
+    def _is_drain_expired(self, backoff_seconds):
+        return self._closing.is_set() and self._drain_deadline is not None and \
+            time.monotonic() + backoff_seconds > self._drain_deadline
@@ -0,0 +1,206 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+
+import csv
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+
+from blockchainetl.compression import COMPRESSION_EXTENSIONS, decompress_chunk
+from blockchainetl.frame_index import read_frame_index, strip_compression_extension
+
+LOOKUP_INDEX_EXTENSION = '.lookup'
+LOOKUP_INDEX_MAGIC = b'KETLLKP1'
+
+# positions of records are byte offsets of rows in plain files, or offsets of the frames holding them
+# in compressed files written with frame_rows
+POSITION_ROW = 0
+POSITION_FRAME = 1
+
+KEY_SIZE = 32
+HEADER = struct.Struct('>8sB7x')
+RECORD = struct.Struct('>{}sQ'.format(KEY_SIZE))
+
+
+def get_lookup_index_filename(filename):
+    """Returns the name of the lookup index of an output file, e.g. transactions.json.lookup"""
+    return filename + LOOKUP_INDEX_EXTENSION
+
+
+def to_lookup_key(value):
+    """Returns the fixed width key of a hash or address, left padded with zeros like an EVM word,
+    or None if value is not a hex string of at most 32 bytes"""
+    if not isinstance(value, str) or not value.startswith(('0x', '0X')):
+        return None
+    try:
+        data = bytes.fromhex(value[2:])
+    except ValueError:
+        return None
+    if not data or len(data) > KEY_SIZE:
+        return None
+    return data.rjust(KEY_SIZE, b'\0')
+
+
+class LookupIndexBuilder:
+    """Collects the hashes and addresses of the rows written to one output file and writes them as a lookup index:
+    a header and fixed width records of (key, position), sorted, so that readers binary search the memory mapped
+    file (see lookup_positions)."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add(self, item, position):
+        records = []
+        for field in self.fields:
+            key = to_lookup_key(item.get(field))
+            if key is not None:
+                records.append((key, position))
+        with self._lock:
+            self._records.extend(records)
+
+    def write(self, filename, frames=None):
+        """Writes the index of filename and returns its name. If frames of the file are given, positions are
+        numbers of frames, which are turned into their offsets."""
+        if frames is not None:
+            records = {(key, frames[position]['offset']) for key, position in self._records}
+            position_type = POSITION_FRAME
+        else:
+            records = set(self._records)
+            position_type = POSITION_ROW
+        index_filename = get_lookup_index_filename(filename)
+        temp_filename = os.path.join(os.path.dirname(index_filename), '.{}.tmp'.format(
+            os.path.basename(index_filename)))
+        with open(temp_filename, 'wb') as index_file:
+            index_file.write(HEADER.pack(LOOKUP_INDEX_MAGIC, position_type))
+            for key, position in sorted(records):
+                index_file.write(RECORD.pack(key, position))
+        os.replace(temp_filename, index_filename)
+        return index_filename
+
+
+def read_lookup_header(index_file):
+    magic, position_type = HEADER.unpack(index_file.read(HEADER.size))
+    if magic != LOOKUP_INDEX_MAGIC:
+        raise ValueError('{} is not a lookup index'.format(index_file.name))
+    return position_type
+
+
+def lookup_positions(index_filename, value):
+    """Returns the position type of the index and the sorted positions of the rows holding value"""
+    key = to_lookup_key(value)
+    if key is None:
+        raise ValueError('{} is not a hash or an address'.format(value))
+    with open(index_filename, 'rb') as index_file:
+        position_type = read_lookup_header(index_file)
+        count = (os.fstat(index_file.fileno()).st_size - HEADER.size) // RECORD.size
+        if count == 0:
+            return position_type, []
+        with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # the first record with a key that is not less than key
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                offset = HEADER.size + middle * RECORD.size
+                if data[offset:offset + KEY_SIZE] < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            positions = []
+            for index in range(low, count):
+                record_key, position = RECORD.unpack_from(data, HEADER.size + index * RECORD.size)
+                if record_key != key:
+                    break
+                positions.append(position)
+    return position_type, positions
+
+
+def lookup_items(filename, value, zstd_dicts=None):
+    """Yields the items of an output file with a lookup index which hold value in any field, reading only
+    the rows (or frames of compressed files) the index points to"""
+    position_type, positions = lookup_positions(get_lookup_index_filename(filename), value)
+    if not positions:
+        return
+    is_csv = strip_compression_extension(filename).endswith('.csv')
+    if position_type == POSITION_FRAME:
+        lines = read_frame_lines(filename, positions, zstd_dicts)
+    else:
+        lines = read_row_lines(filename, positions, is_csv)
+    if is_csv:
+        items = csv.DictReader(lines)
+    else:
+        items = (json.loads(line) for line in lines)
+    value = value.lower()
+    for item in items:
+        if any(isinstance(field_value, str) and field_value.lower() == value for field_value in item.values()):
+            yield item
+
+
+def list_indexed_files(path):
+    """Lists the files with a lookup index in path, a file or a directory of outputs, e.g. rolled,
+    sharded or partitioned files"""
+    if os.path.isfile(path):
+        return [path] if os.path.isfile(get_lookup_index_filename(path)) else []
+    filenames = []
+    for dirpath, dirnames, file_names in os.walk(path):
+        # hidden files and directories are incomplete outputs
+        dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith('.'))
+        for file_name in sorted(file_names):
+            filename = os.path.join(dirpath, file_name)
+            if not file_name.startswith('.') and os.path.isfile(get_lookup_index_filename(filename)):
+                filenames.append(filename)
+    return filenames
+
+
+def read_row_lines(filename, positions, is_csv):
+    if filename.endswith(tuple(COMPRESSION_EXTENSIONS.values())):
+        raise ValueError('Rows of {} are not addressable, it was not written with frame_rows'.format(filename))
+    with open(filename, 'rb') as file:
+        if is_csv:
+            yield file.readline().decode('utf-8')
+        for position in positions:
+            file.seek(position)
+            yield file.readline().decode('utf-8')
+
+
+def read_frame_lines(filename, positions, zstd_dicts=None):
+    frame_index = read_frame_index(filename)
+    if frame_index is None:
+        raise ValueError('Frame index of {} is not found'.format(filename))
+    frames = frame_index['frames']
+    offsets = set(positions)
+    with open(filename, 'rb') as file:
+        for frame in frames:
+            # frames without rows are CSV headers
+            if frame['rows'] > 0 and frame['offset'] not in offsets:
+                continue
+            file.seek(frame['offset'])
+            data = decompress_chunk(frame_index['compression'], file.read(frame['length']), zstd_dicts)
+            yield from io.StringIO(data.decode('utf-8'))
@@ -0,0 +1,169 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import base64
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CONCURRENCY = 4
+
+
+class ObjectStoreUploader:
+    """Uploads files to an object store as soon as they are complete, keyed by their path relative to local_root.
+
+    submit is meant to be the on_file_closed callback of file exporters. Files are uploaded on max_workers threads
+    and deleted once the upload is verified, so local disk only holds files being written or waiting for upload.
+    submit blocks while max_pending_files files wait, and raises once an upload failed.
+    """
+
+    def __init__(self, object_store, local_root, prefix='', max_workers=DEFAULT_UPLOAD_WORKERS,
+                 max_pending_files=None, delete_uploaded=True):
+        self.object_store = object_store
+        self.local_root = local_root
+        self.prefix = prefix.strip('/')
+        self.delete_uploaded = delete_uploaded
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.pending = threading.BoundedSemaphore(max_pending_files or max_workers * 2)
+        self.error = None
+        self.uploaded_count = 0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('ObjectStoreUploader')
+
+    def submit(self, filename):
+        self._raise_error()
+        relative_filename = os.path.relpath(filename, self.local_root)
+        if relative_filename == os.pardir or relative_filename.startswith(os.pardir + os.sep):
+            raise ValueError('{} is outside of {}, it has no object key'.format(filename, self.local_root))
+        key = '/'.join(filter(None, [self.prefix] + relative_filename.split(os.sep)))
+        self.pending.acquire()
+        future = self.executor.submit(self._upload, filename, key)
+        future.add_done_callback(lambda _: self.pending.release())
+
+    def close(self):
+        """Waits for all uploads, raises if any of them failed"""
+        self.executor.shutdown(wait=True)
+        self.logger.info('{} files uploaded.'.format(self.uploaded_count))
+        self._raise_error()
+
+    def _upload(self, filename, key):
+        try:
+            self.object_store.upload(filename, key)
+            self.logger.info('Transfer {} --> {}'.format(filename, self.object_store.get_url(key)))
+            if self.delete_uploaded:
+                os.remove(filename)
+            with self._lock:
+                self.uploaded_count += 1
+        except Exception as e:
+            self.logger.error('Failed to upload {}: {}'.format(filename, repr(e)))
+            with self._lock:
+                if self.error is None:
+                    self.error = e
+            raise
+
+    def _raise_error(self):
+        with self._lock:
+            error = self.error
+        if error is not None:
+            raise error
+
+
+class S3ObjectStore:
+    """Uploads files with concurrent multipart uploads and verifies their SHA-256 checksums"""
+
+    def __init__(self, bucket, multipart_chunksize=DEFAULT_MULTIPART_CHUNKSIZE,
+                 multipart_concurrency=DEFAULT_MULTIPART_CONCURRENCY, client=None):
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_chunksize,
+                                              multipart_chunksize=multipart_chunksize,
+                                              max_concurrency=multipart_concurrency)
+        self.client = client if client is not None else create_s3_client()
+
+    def upload(self, filename, key):
+        self.client.upload_file(filename, self.bucket, key, ExtraArgs={'ChecksumAlgorithm': 'SHA256'},
+                                Config=self.transfer_config)
+        response = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode='ENABLED')
+        expected_checksum = compute_s3_sha256_checksum(
+            filename, self.transfer_config.multipart_threshold, self.transfer_config.multipart_chunksize)
+        if response.get('ChecksumSHA256') != expected_checksum:
+            raise IOError('Checksum of {} is {}, expected {}'.format(
+                self.get_url(key), response.get('ChecksumSHA256'), expected_checksum))
+
+    def get_url(self, key):
+        return 's3://{}/{}'.format(self.bucket, key)
+
+
+class GcsObjectStore:
+    """Uploads files with chunked resumable uploads, verified by their CRC32C checksums"""
+
+    def __init__(self, bucket, chunk_size=DEFAULT_MULTIPART_CHUNKSIZE, client=None):
+        self.bucket_name = bucket
+        self.chunk_size = chunk_size
+        self.client = client if client is not None else create_gcs_client()
+        self.bucket = self.client.bucket(bucket)
+
+    def upload(self, filename, key):
+        # raises DataCorruption and deletes the object if checksums do not match
+        blob = self.bucket.blob(key, chunk_size=self.chunk_size)
+        blob.upload_from_filename(filename, checksum='crc32c')
+
+    def get_url(self, key):
+        return 'gs://{}/{}'.format(self.bucket_name, key)
+
+
+def compute_s3_sha256_checksum(filename, multipart_threshold, multipart_chunksize):
+    """Returns the ChecksumSHA256 S3 reports for the file, composed of the checksums of parts if it is multipart"""
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as file:
+        if size < multipart_threshold:
+            return base64.b64encode(hashlib.sha256(file.read()).digest()).decode('ascii')
+
+        from s3transfer.utils import ChunksizeAdjuster
+
+        # parts are sized like the ones of the upload
+        chunksize = ChunksizeAdjuster().adjust_chunksize(multipart_chunksize, size)
+        part_digests = []
+        for part in iter(lambda: file.read(chunksize), b''):
+            part_digests.append(hashlib.sha256(part).digest())
+    checksum = base64.b64encode(hashlib.sha256(b''.join(part_digests)).digest()).decode('ascii')
+    return '{}-{}'.format(checksum, len(part_digests))
+
+
+def create_s3_client():
+    import boto3
+
+    return boto3.client('s3')
+
+
+def create_gcs_client():
+    from google.cloud import storage
+
+    return storage.Client()
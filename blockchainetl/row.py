@@ -0,0 +1,124 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import keyword
+
+
+class Row:
+    """A compact record of an item, holding the values of a fixed schema of fields in slots instead of a dict.
+
+    Row types are made once per item type and schema with row_type. Rows support the read-only part of the dict
+    interface exporters use (get, [], in, keys, items), so they can be exported like item dicts. to_dict builds
+    the item dict for consumers which need one, e.g. to add fields or to send the item as JSON.
+    """
+
+    __slots__ = ()
+
+    type = None
+    _fields = ()
+    _field_set = frozenset()
+
+    def get(self, name, default=None):
+        if name in self._field_set:
+            return getattr(self, name)
+        if name == 'type':
+            return self.type
+        return default
+
+    def __getitem__(self, name):
+        if name in self._field_set:
+            return getattr(self, name)
+        if name == 'type':
+            return self.type
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in self._field_set or name == 'type'
+
+    def keys(self):
+        return ('type',) + self._fields
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._fields) + 1
+
+    def values(self):
+        return [self.type] + [getattr(self, field) for field in self._fields]
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def to_dict(self):
+        return dict(zip(self.keys(), self.values()))
+
+    def copy(self):
+        return self.to_dict()
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self.type == other.type and self.items() == other.items()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.to_dict())
+
+
+def row_type(item_type, fields, name=None):
+    """Returns a Row subclass for items of item_type with the given fields, in the order of the item dict.
+
+    Fields are keyword arguments of the constructor and default to None.
+    """
+    fields = tuple(fields)
+    for field in fields:
+        if not field.isidentifier() or keyword.iskeyword(field) or field == 'type' or hasattr(Row, field):
+            raise ValueError('{} can not be a field of a row'.format(field))
+    if len(set(fields)) != len(fields):
+        raise ValueError('Fields of a row must be unique')
+
+    # __init__ is compiled for the fields, like the field selectors of exporters
+    lines = ['def __init__(self{}):'.format(''.join(', {}=None'.format(field) for field in fields))]
+    lines.extend('    self.{0} = {0}'.format(field) for field in fields)
+    if not fields:
+        lines.append('    pass')
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+
+    return type(name or '{}Row'.format(''.join(part.title() for part in item_type.split('_'))), (Row,), {
+        '__slots__': fields,
+        '__init__': namespace['__init__'],
+        'type': item_type,
+        '_fields': fields,
+        '_field_set': frozenset(fields),
+    })
+
+
+def to_dict(item):
+    """Returns the item dict of a row, other items are returned as they are"""
+    return item.to_dict() if isinstance(item, Row) else item
@@ -0,0 +1,60 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+from collections import OrderedDict
+
+
+class BlockHashWindow:
+    """Keeps hashes of the most recently synced blocks to detect chain reorganizations."""
+
+    def __init__(self, size=128):
+        if size <= 0:
+            raise ValueError('size must be greater than 0')
+        self.size = size
+        self._hashes = OrderedDict()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def get(self, block_number):
+        return self._hashes.get(block_number)
+
+    def block_numbers(self):
+        return list(self._hashes.keys())
+
+    def add(self, block_number, block_hash):
+        last_block_number = next(reversed(self._hashes), None)
+        if last_block_number is not None and block_number != last_block_number + 1:
+            # a gap in the window, older hashes can not be linked to the new block anymore
+            self._hashes.clear()
+        self._hashes[block_number] = block_hash
+        while len(self._hashes) > self.size:
+            self._hashes.popitem(last=False)
+
+    def remove_after(self, block_number):
+        """Removes and returns (block_number, block_hash) of all blocks after block_number."""
+        removed = []
+        while self._hashes and next(reversed(self._hashes)) > block_number:
+            removed.append(self._hashes.popitem(last=True))
+        return list(reversed(removed))
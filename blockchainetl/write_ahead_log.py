@@ -0,0 +1,188 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import os
+import re
+import threading
+
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+CHECKPOINT_FILENAME = 'checkpoint'
+SEGMENT_FILENAME_FORMAT = 'segment-{:012}.wal'
+SEGMENT_FILENAME_PATTERN = re.compile(r'^segment-(\d{12})\.wal$')
+
+
+class WriteAheadLog:
+    """A local append-only log of records in a directory of segment files, read back in order by a single reader.
+
+    Records are bytes without newlines, appended as lines to the newest segment, which is rolled once it has
+    segment_max_bytes bytes. read returns the records after the read position together with the position after
+    them; once they are processed, ack persists that position in the checkpoint file and deletes segments before it.
+    On open, reading resumes from the checkpoint, so records read but not acknowledged before a crash are read
+    again. Appends are flushed to the OS, with fsync they are also synced to disk.
+    """
+
+    def __init__(self, dirname, segment_max_bytes=DEFAULT_SEGMENT_MAX_BYTES, fsync=False):
+        if segment_max_bytes <= 0:
+            raise ValueError('segment_max_bytes must be greater than 0')
+        self.dirname = dirname
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+
+        self._condition = threading.Condition()
+        self._closed = False
+        self._writer = None
+        self._write_segment_index = None
+        self._write_segment_bytes = 0
+        self._reader = None
+        self._read_segment_index = None
+        self._read_offset = 0
+        self.logger = logging.getLogger('WriteAheadLog')
+
+    def open(self):
+        os.makedirs(self.dirname, exist_ok=True)
+        segment_indexes = self.list_segment_indexes()
+        checkpoint = read_checkpoint(os.path.join(self.dirname, CHECKPOINT_FILENAME))
+
+        if checkpoint is not None and checkpoint[0] in segment_indexes:
+            self._read_segment_index, self._read_offset = checkpoint
+        else:
+            pending_indexes = [index for index in segment_indexes if checkpoint is None or index > checkpoint[0]]
+            self._read_segment_index = pending_indexes[0] if pending_indexes else None
+            self._read_offset = 0
+        self._delete_segments_before(self._read_segment_index)
+
+        # a new segment is started on every open, the tail of the last one may be torn by a crash
+        self._open_segment(segment_indexes[-1] + 1 if segment_indexes else 0)
+        if self._read_segment_index is None:
+            self._read_segment_index = self._write_segment_index
+        if self._read_segment_index < self._write_segment_index:
+            self.logger.info('Resuming undelivered records from segment {} at offset {}'.format(
+                self._read_segment_index, self._read_offset))
+
+    def append(self, records):
+        with self._condition:
+            if self._closed:
+                raise ValueError('The write-ahead log is closed')
+            for record in records:
+                if self._write_segment_bytes >= self.segment_max_bytes:
+                    self._roll_segment()
+                line = record + b'\n'
+                self._writer.write(line)
+                self._write_segment_bytes += len(line)
+            self._writer.flush()
+            if self.fsync:
+                os.fsync(self._writer.fileno())
+            self._condition.notify_all()
+
+    def read(self, max_records, timeout=None):
+        """Returns up to max_records records after the read position and the position after them.
+
+        Waits up to timeout seconds for a record if there are none.
+        """
+        records = []
+        with self._condition:
+            while len(records) < max_records:
+                if self._reader is None:
+                    self._reader = open(self._segment_filename(self._read_segment_index), 'rb')
+                    self._reader.seek(self._read_offset)
+                line = self._reader.readline()
+                if line.endswith(b'\n'):
+                    records.append(line[:-1])
+                    self._read_offset += len(line)
+                    continue
+                if self._read_segment_index < self._write_segment_index:
+                    if line:
+                        self.logger.warning('Skipping a torn record at the end of segment {}'.format(
+                            self._read_segment_index))
+                    self._reader.close()
+                    self._reader = None
+                    self._read_segment_index += 1
+                    self._read_offset = 0
+                    continue
+                # records of the active segment are written as whole lines under the lock
+                self._reader.seek(self._read_offset)
+                if records or self._closed or not self._condition.wait(timeout):
+                    break
+            return records, (self._read_segment_index, self._read_offset)
+
+    def ack(self, position):
+        """Persists position returned by read, records before it are not read again."""
+        segment_index, offset = position
+        checkpoint_filename = os.path.join(self.dirname, CHECKPOINT_FILENAME)
+        temp_filename = checkpoint_filename + '.tmp'
+        with open(temp_filename, 'w') as checkpoint_file:
+            checkpoint_file.write('{} {}\n'.format(segment_index, offset))
+            if self.fsync:
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+        os.replace(temp_filename, checkpoint_filename)
+        self._delete_segments_before(segment_index)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def list_segment_indexes(self):
+        indexes = []
+        for filename in os.listdir(self.dirname):
+            match = SEGMENT_FILENAME_PATTERN.match(filename)
+            if match:
+                indexes.append(int(match.group(1)))
+        return sorted(indexes)
+
+    def _roll_segment(self):
+        self._writer.close()
+        self._open_segment(self._write_segment_index + 1)
+
+    def _open_segment(self, segment_index):
+        self._writer = open(self._segment_filename(segment_index), 'ab')
+        self._write_segment_index = segment_index
+        self._write_segment_bytes = self._writer.tell()
+
+    def _delete_segments_before(self, segment_index):
+        if segment_index is None:
+            return
+        for index in self.list_segment_indexes():
+            if index < segment_index:
+                os.remove(self._segment_filename(index))
+
+    def _segment_filename(self, segment_index):
+        return os.path.join(self.dirname, SEGMENT_FILENAME_FORMAT.format(segment_index))
+
+
+def read_checkpoint(filename):
+    if not os.path.isfile(filename):
+        return None
+    with open(filename) as checkpoint_file:
+        segment_index, offset = checkpoint_file.read().split()
+    return int(segment_index), int(offset)
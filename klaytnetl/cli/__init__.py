@@ -44,6 +44,11 @@ from klaytnetl.cli.filter_items import filter_items
 from klaytnetl.cli.get_block_range_for_date import get_block_range_for_date
 from klaytnetl.cli.get_block_range_for_timestamps import get_block_range_for_timestamps
 from klaytnetl.cli.get_keccak_hash import get_keccak_hash
+from klaytnetl.cli.lookup import lookup
+from klaytnetl.cli.plan_backfill import plan_backfill
+from klaytnetl.cli.run_coordinator import run_coordinator
+from klaytnetl.cli.stream import stream
+from klaytnetl.cli.train_dict import train_dict
 
 
 @click.group()
@@ -69,6 +74,12 @@ cli.add_command(extract_tokens, "extract_tokens")
 cli.add_command(export_block_group, "export_block_group")
 cli.add_command(export_trace_group, "export_trace_group")
 
+# streaming
+cli.add_command(stream, "stream")
+
+# coordination
+cli.add_command(run_coordinator, "run_coordinator")
+
 # utils
 cli.add_command(get_block_range_for_date, "get_block_range_for_date")
 cli.add_command(get_block_range_for_timestamps, "get_block_range_for_timestamps")
@@ -76,3 +87,6 @@ cli.add_command(get_keccak_hash, "get_keccak_hash")
 cli.add_command(extract_csv_column, "extract_csv_column")
 cli.add_command(filter_items, "filter_items")
 cli.add_command(extract_field, "extract_field")
+cli.add_command(plan_backfill, "plan_backfill")
+cli.add_command(train_dict, "train_dict")
+cli.add_command(lookup, "lookup")
@@ -36,12 +36,31 @@ from klaytnetl.jobs.exporters.raw_trace_group_item_exporter import (
 from klaytnetl.jobs.exporters.enrich_trace_group_item_exporter import (
     enrich_trace_group_item_exporter,
 )
+from klaytnetl.jobs.exporters.lookup_fields import LOOKUP_FIELD_MAPPING
+from blockchainetl.jobs.exporters.parquet_item_exporter import (
+    COLUMNAR_FILE_FORMATS,
+    DEFAULT_PARQUET_COMPRESSION,
+    DEFAULT_ROW_GROUP_SIZE,
+)
+from blockchainetl.jobs.exporters.partitioned_file_item_exporter import (
+    DEFAULT_BLOCK_RANGE_SIZE,
+    DEFAULT_MAX_OPEN_PARTITIONS,
+    PARTITION_BY_BLOCK_RANGE,
+    PARTITION_SCHEMES,
+)
+from blockchainetl.jobs.exporters.deduplicating_item_exporter import (
+    DeduplicatingItemExporter,
+    RecentKeyWindow,
+)
+from blockchainetl.jobs.exporters.sqlite_item_exporter import is_sqlite_output
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import is_rolling_output
+from blockchainetl.compression import DEFAULT_COMPRESS_THREADS, GZIP, ZSTD
 from blockchainetl.logging_utils import logging_basic_config
 from klaytnetl.providers.auto import get_provider_from_uri
 from klaytnetl.thread_local_proxy import ThreadLocalProxy
 from klaytnetl.utils import return_provider
-from klaytnetl.cli.s3_sync import get_path, sync_to_s3
-from klaytnetl.cli.gcs_sync import sync_to_gcs
+from klaytnetl.cli.object_store_sync import create_object_store_uploader, get_path
+from klaytnetl.streaming.item_id_calculator import KlaytnItemIdCalculator
 
 logging_basic_config()
 
@@ -85,6 +104,21 @@ logging_basic_config()
     type=int,
     help="The maximum number of workers.",
 )
+@click.option(
+    "--min-workers",
+    default=None,
+    type=int,
+    help="The minimum number of workers. If provided, the number of active workers "
+    "is tuned at runtime between --min-workers and --max-workers based on node latency and throughput. "
+    "Must be less than --max-workers.",
+)
+@click.option(
+    "--batch-deadline-multiplier",
+    default=None,
+    type=float,
+    help="If provided, a batch running longer than this multiple of the p95 batch latency before it exports "
+    "anything is abandoned and re-submitted to a fresh worker.",
+)
 @click.option(
     "-p",
     "--provider-uri",
@@ -120,7 +154,7 @@ logging_basic_config()
     default="json",
     show_default=True,
     type=str,
-    help='Export file format. "json" (default) or "csv".',
+    help='Export file format. "json" (default), "csv", "parquet" or "arrow" (Arrow IPC / Feather v2).',
 )
 @click.option(
     "--file-maxlines",
@@ -128,12 +162,112 @@ logging_basic_config()
     type=int,
     help="Limit max lines per single file. If not provided, output will be a single file.",
 )
+@click.option(
+    "--file-maxbytes",
+    default=None,
+    type=int,
+    help="Limit max bytes per single file, before compression for json and csv. "
+    "If provided, output will be a directory of files.",
+)
+@click.option(
+    "--file-maxseconds",
+    default=None,
+    type=int,
+    help="Limit seconds a single file is written to. If provided, output will be a directory of files.",
+)
+@click.option(
+    "--partition-by",
+    default=None,
+    type=click.Choice(PARTITION_SCHEMES),
+    help="Write outputs to Hive style partitions: date=YYYY-MM-DD, date=YYYY-MM-DD/hour=HH "
+    "(by block timestamp, requires --enrich) or start_block=N directories, padded to 12 digits. "
+    "If provided, output will be a directory of partitions.",
+)
+@click.option(
+    "--partition-block-range-size",
+    default=DEFAULT_BLOCK_RANGE_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of blocks in a partition of --partition-by block_range.",
+)
+@click.option(
+    "--max-open-partitions",
+    default=DEFAULT_MAX_OPEN_PARTITIONS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of partitions with an open file per output, the least recently used one is closed first.",
+)
+@click.option(
+    "--shard-size",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Write outputs as directories of part files, each written by one worker for a shard of that many blocks, "
+    "with a manifest.json listing the parts in block order. Workers never share a file.",
+)
+@click.option(
+    "--row-group-size",
+    default=DEFAULT_ROW_GROUP_SIZE,
+    show_default=True,
+    type=int,
+    help="The number of rows per row group of Parquet files, or record batch of Arrow files.",
+)
+@click.option(
+    "--parquet-compression",
+    default=DEFAULT_PARQUET_COMPRESSION,
+    show_default=True,
+    type=click.Choice(["none", "snappy", "gzip", "zstd", "lz4", "brotli"]),
+    help="The compression codec of Parquet files.",
+)
 @click.option(
     "--compress",
     is_flag=True,
     type=bool,
     help="Enable compress option using gzip. If not provided, the option will be disabled.",
 )
+@click.option(
+    "--compression",
+    default=None,
+    type=click.Choice([GZIP, ZSTD]),
+    help="Compression of outputs, implies --compress. "
+    'If not provided, "gzip" is used with --compress. "zstd" requires the zstandard package.',
+)
+@click.option(
+    "--compress-level",
+    default=None,
+    type=int,
+    help="Compression level of --compress, 1-9 for gzip and 1-22 for zstd. "
+    "If not provided, the default level of gzip (6) or zstd (3) is used.",
+)
+@click.option(
+    "--compress-threads",
+    default=DEFAULT_COMPRESS_THREADS,
+    type=int,
+    help="The number of background threads compressing outputs with --compress. "
+    "If not provided, the number of CPUs is used.",
+)
+@click.option(
+    "--zstd-dict-dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="The directory of zstd dictionaries trained with train_dict, one per item type. "
+    "Outputs of item types without a dictionary are compressed without one.",
+)
+@click.option(
+    "--frame-rows",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Compress outputs in independently decompressible frames of that many rows, with a sidecar .idx index "
+    "of the offset and block range of every frame, so that readers can seek to a block range. "
+    "Requires --compress or --compression.",
+)
+@click.option(
+    "--lookup-index",
+    is_flag=True,
+    default=False,
+    help="Write a sidecar .lookup index of the transaction hashes and addresses of every output file, "
+    "sorted for binary search, so that the lookup command reads only the matching rows. "
+    "Compressed outputs also require --frame-rows.",
+)
 @click.option(
     "--detailed-trace-log",
     is_flag=True,
@@ -153,6 +287,14 @@ logging_basic_config()
     type=int,
     help="How often to show log percentage step"
 )
+@click.option(
+    "--dedup-window",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="The number of idempotency keys of recently exported items remembered to drop items "
+    "exported again by retried batches. 0 disables deduplication.",
+)
 def export_trace_group(
     start_block,
     end_block,
@@ -161,6 +303,8 @@ def export_trace_group(
     contracts_output,
     tokens_output,
     max_workers,
+    min_workers,
+    batch_deadline_multiplier,
     provider_uri,
     timeout,
     enrich,
@@ -168,10 +312,25 @@ def export_trace_group(
     gcs_bucket,
     file_format,
     file_maxlines,
+    file_maxbytes,
+    file_maxseconds,
+    partition_by,
+    partition_block_range_size,
+    max_open_partitions,
+    shard_size,
+    row_group_size,
+    parquet_compression,
     compress,
+    compression,
+    compress_level,
+    compress_threads,
+    zstd_dict_dir,
+    frame_rows,
+    lookup_index,
     detailed_trace_log,
     network,
     log_percentage_step,
+    dedup_window,
 ):
     """Exports traces group from Klaytn node."""
     if network:
@@ -190,23 +349,78 @@ def export_trace_group(
             "Only one export option is allowed - S3 or GCS"
         )
 
-    if file_format not in {"json", "csv"}:
-        raise ValueError('"--file-format" option only supports "json" or "csv".')
+    if (s3_bucket or gcs_bucket) and is_sqlite_output(
+        traces_output, contracts_output, tokens_output
+    ):
+        raise ValueError("SQLite outputs can not be synced to S3 or GCS")
+
+    if file_format not in {"json", "csv", "parquet", "arrow"}:
+        raise ValueError(
+            '"--file-format" option only supports "json", "csv", "parquet" or "arrow".'
+        )
+
+    if partition_by is not None and file_format in COLUMNAR_FILE_FORMATS:
+        raise ValueError('"--partition-by" option only supports "json" or "csv" file formats.')
+
+    if frame_rows is not None and (
+        not (compress or compression is not None) or file_format in COLUMNAR_FILE_FORMATS
+    ):
+        raise ValueError(
+            '"--frame-rows" option requires "--compress" or "--compression" and "json" or "csv" file formats.'
+        )
+
+    if lookup_index and (
+        file_format in COLUMNAR_FILE_FORMATS
+        or (frame_rows is None and (compress or compression is not None))
+    ):
+        raise ValueError(
+            '"--lookup-index" option requires "json" or "csv" file formats and "--frame-rows" for compressed outputs.'
+        )
+
+    if partition_by not in (None, PARTITION_BY_BLOCK_RANGE) and not enrich:
+        raise ValueError(
+            '"--partition-by {}" requires block timestamps of items, add "--enrich".'.format(partition_by)
+        )
 
     if isinstance(file_maxlines, int) and file_maxlines <= 0:
         file_maxlines = None
 
+    if shard_size is not None and (
+        file_format in COLUMNAR_FILE_FORMATS
+        or partition_by is not None
+        or is_rolling_output(file_maxlines, file_maxbytes, file_maxseconds)
+    ):
+        raise ValueError(
+            '"--shard-size" option can not be combined with "--partition-by", "--file-max*" options, parquet or arrow.'
+        )
+
     exporter_options = {
         "file_format": file_format,
         "file_maxlines": file_maxlines,
-        "compress": compress,
+        "file_maxbytes": file_maxbytes,
+        "file_maxseconds": file_maxseconds,
+        "partition_by": partition_by,
+        "block_range_size": partition_block_range_size,
+        "max_open_partitions": max_open_partitions,
+        "shard_size": shard_size,
+        "row_group_size": row_group_size,
+        "parquet_compression": parquet_compression,
+        "compress": compress or compression is not None,
+        "compression": compression or GZIP,
+        "compress_level": compress_level,
+        "compress_threads": compress_threads,
+        "zstd_dict_dir": zstd_dict_dir,
+        "frame_rows": frame_rows,
+        "lookup_field_mapping": LOOKUP_FIELD_MAPPING if lookup_index else None,
     }
 
-    # s3 export
+    # s3 or gcs export: files are uploaded and deleted as soon as they are closed
     if s3_bucket or gcs_bucket:
         tmpdir = tempfile.mkdtemp()
     else:
         tmpdir = None
+    uploader = create_object_store_uploader(s3_bucket, gcs_bucket, tmpdir)
+    exporter_options["on_file_closed"] = uploader.submit if uploader else None
 
     # enrich option
     if enrich:
@@ -224,6 +438,13 @@ def export_trace_group(
             **exporter_options
         )
 
+    if dedup_window > 0:
+        exporter = DeduplicatingItemExporter(
+            exporter,
+            KlaytnItemIdCalculator().calculate_idempotency_key,
+            RecentKeyWindow(dedup_window),
+        )
+
     job = ExportTraceGroupJob(
         start_block=start_block,
         end_block=end_block,
@@ -233,6 +454,8 @@ def export_trace_group(
         ),
         web3=ThreadLocalProxy(lambda: web3),
         max_workers=max_workers,
+        min_workers=min_workers,
+        batch_deadline_multiplier=batch_deadline_multiplier,
         enrich=enrich,
         item_exporter=exporter,
         log_percentage_step=log_percentage_step,
@@ -242,22 +465,11 @@ def export_trace_group(
         export_tokens=tokens_output is not None,
     )
 
-    job.run()
-
-    if s3_bucket:
-        sync_to_s3(
-            s3_bucket,
-            tmpdir,
-            {traces_output, contracts_output, tokens_output},
-            file_maxlines is None,
-        )
-        shutil.rmtree(tmpdir, ignore_errors=True)
-
-    if gcs_bucket:
-        sync_to_gcs(
-            gcs_bucket,
-            tmpdir,
-            {traces_output, contracts_output, tokens_output},
-            file_maxlines is None,
-        )
-        shutil.rmtree(tmpdir, ignore_errors=True)
+    try:
+        job.run()
+    finally:
+        if uploader is not None:
+            try:
+                uploader.close()
+            finally:
+                shutil.rmtree(tmpdir, ignore_errors=True)
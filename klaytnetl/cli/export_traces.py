@@ -31,11 +31,13 @@ from klaytnetl.jobs.exporters.raw_traces_item_exporter import raw_traces_item_ex
 from klaytnetl.jobs.exporters.enrich_traces_item_exporter import (
     enrich_traces_item_exporter,
 )
+from klaytnetl.jobs.exporters.lookup_fields import LOOKUP_FIELD_MAPPING
+from blockchainetl.compression import DEFAULT_COMPRESS_THREADS, GZIP, ZSTD
 from blockchainetl.logging_utils import logging_basic_config
 from klaytnetl.providers.auto import get_provider_from_uri
 from klaytnetl.thread_local_proxy import ThreadLocalProxy
 from klaytnetl.utils import return_provider
-from klaytnetl.cli.s3_sync import get_path, sync_to_s3
+from klaytnetl.cli.object_store_sync import create_object_store_uploader, get_path
 
 logging_basic_config()
 
@@ -109,6 +111,19 @@ logging_basic_config()
     help="Limit max lines per single file. "
     "If not provided, output will be a single file.",
 )
+@click.option(
+    "--file-maxbytes",
+    default=None,
+    type=int,
+    help="Limit max bytes per single file, before compression. "
+    "If provided, output will be a directory of files.",
+)
+@click.option(
+    "--file-maxseconds",
+    default=None,
+    type=int,
+    help="Limit seconds a single file is written to. If provided, output will be a directory of files.",
+)
 @click.option(
     "--compress",
     is_flag=True,
@@ -116,6 +131,50 @@ logging_basic_config()
     help="Enable compress option using gzip. "
     "If not provided, the option will be disabled.",
 )
+@click.option(
+    "--compression",
+    default=None,
+    type=click.Choice([GZIP, ZSTD]),
+    help="Compression of outputs, implies --compress. "
+    'If not provided, "gzip" is used with --compress. "zstd" requires the zstandard package.',
+)
+@click.option(
+    "--compress-level",
+    default=None,
+    type=int,
+    help="Compression level of --compress, 1-9 for gzip and 1-22 for zstd. "
+    "If not provided, the default level of gzip (6) or zstd (3) is used.",
+)
+@click.option(
+    "--compress-threads",
+    default=DEFAULT_COMPRESS_THREADS,
+    type=int,
+    help="The number of background threads compressing outputs with --compress. "
+    "If not provided, the number of CPUs is used.",
+)
+@click.option(
+    "--zstd-dict-dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="The directory of zstd dictionaries trained with train_dict, one per item type. "
+    "Outputs of item types without a dictionary are compressed without one.",
+)
+@click.option(
+    "--frame-rows",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Compress outputs in independently decompressible frames of that many rows, with a sidecar .idx index "
+    "of the offset and block range of every frame, so that readers can seek to a block range. "
+    "Requires --compress or --compression.",
+)
+@click.option(
+    "--lookup-index",
+    is_flag=True,
+    default=False,
+    help="Write a sidecar .lookup index of the transaction hashes and addresses of every output file, "
+    "sorted for binary search, so that the lookup command reads only the matching rows. "
+    "Compressed outputs also require --frame-rows.",
+)
 @click.option(
     "--network",
     default=None,
@@ -135,7 +194,15 @@ def export_traces(
     s3_bucket,
     file_format,
     file_maxlines,
+    file_maxbytes,
+    file_maxseconds,
     compress,
+    compression,
+    compress_level,
+    compress_threads,
+    zstd_dict_dir,
+    frame_rows,
+    lookup_index,
     network,
 ):
     """Exports traces from Klaytn node."""
@@ -145,20 +212,36 @@ def export_traces(
     if file_format not in {"json", "csv"}:
         raise ValueError('"--file-format" option only supports "json" or "csv".')
 
+    if frame_rows is not None and not (compress or compression is not None):
+        raise ValueError('"--frame-rows" option requires "--compress" or "--compression".')
+
+    if lookup_index and frame_rows is None and (compress or compression is not None):
+        raise ValueError('"--lookup-index" option requires "--frame-rows" for compressed outputs.')
+
     if isinstance(file_maxlines, int) and file_maxlines <= 0:
         file_maxlines = None
 
     exporter_options = {
         "file_format": file_format,
         "file_maxlines": file_maxlines,
-        "compress": compress,
+        "file_maxbytes": file_maxbytes,
+        "file_maxseconds": file_maxseconds,
+        "compress": compress or compression is not None,
+        "compression": compression or GZIP,
+        "compress_level": compress_level,
+        "compress_threads": compress_threads,
+        "zstd_dict_dir": zstd_dict_dir,
+        "frame_rows": frame_rows,
+        "lookup_field_mapping": LOOKUP_FIELD_MAPPING if lookup_index else None,
     }
 
-    # s3 export
+    # s3 export: files are uploaded and deleted as soon as they are closed
     if s3_bucket is not None:
         tmpdir = tempfile.mkdtemp()
     else:
         tmpdir = None
+    uploader = create_object_store_uploader(s3_bucket, None, tmpdir)
+    exporter_options["on_file_closed"] = uploader.submit if uploader else None
 
     # enrich option
     if enrich:
@@ -182,8 +265,11 @@ def export_traces(
         item_exporter=exporter,
     )
 
-    job.run()
-
-    if s3_bucket is not None:
-        sync_to_s3(s3_bucket, tmpdir, {output}, file_maxlines is None)
-        shutil.rmtree(tmpdir, ignore_errors=True)
+    try:
+        job.run()
+    finally:
+        if uploader is not None:
+            try:
+                uploader.close()
+            finally:
+                shutil.rmtree(tmpdir, ignore_errors=True)
@@ -22,14 +22,14 @@
 # SOFTWARE.
 
 
-import csv
-import json
-
 import click
 from blockchainetl.csv_utils import set_max_field_size_limit
-from blockchainetl.file_utils import smart_open
 from klaytnetl.jobs.exporters.contracts_item_exporter import contracts_item_exporter
-from klaytnetl.jobs.extract_contracts_job import ExtractContractsJob
+from klaytnetl.jobs.extract_contracts_job import (
+    TRACE_FIELDS_TO_READ,
+    ExtractContractsJob,
+)
+from klaytnetl.misc_utils import get_item_iterable
 from blockchainetl.logging_utils import logging_basic_config
 
 logging_basic_config()
@@ -37,7 +37,11 @@ logging_basic_config()
 
 @click.command(context_settings=dict(help_option_names=["-h", "--help"]))
 @click.option(
-    "-t", "--traces", type=str, required=True, help="The CSV file containing traces."
+    "-t",
+    "--traces",
+    type=str,
+    required=True,
+    help="The CSV, JSON or Arrow file containing traces.",
 )
 @click.option(
     "-b",
@@ -56,16 +60,33 @@ logging_basic_config()
 @click.option(
     "-w", "--max-workers", default=5, type=int, help="The maximum number of workers."
 )
-def extract_contracts(traces, batch_size, output, max_workers):
+@click.option(
+    "-s",
+    "--start-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks from this one on. Compressed inputs with a frame index "
+    "are only decompressed from the frames of the block range.",
+)
+@click.option(
+    "-e",
+    "--end-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks up to this one, inclusive.",
+)
+def extract_contracts(traces, batch_size, output, max_workers, start_block, end_block):
     """Extracts contracts from traces file."""
 
     set_max_field_size_limit()
 
-    with smart_open(traces, "r") as traces_file:
-        if traces.endswith(".json"):
-            traces_iterable = (json.loads(line) for line in traces_file)
-        else:
-            traces_iterable = csv.DictReader(traces_file)
+    with get_item_iterable(
+        traces,
+        columns=TRACE_FIELDS_TO_READ,
+        default_format="csv",
+        start_block=start_block,
+        end_block=end_block,
+    ) as traces_iterable:
         job = ExtractContractsJob(
             traces_iterable=traces_iterable,
             batch_size=batch_size,
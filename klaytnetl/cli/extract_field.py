@@ -46,5 +46,5 @@ from klaytnetl import misc_utils
     "-f", "--field", required=True, type=str, help="The field name to extract."
 )
 def extract_field(input, output, field):
-    """Extracts field from given CSV or JSON newline-delimited file."""
+    """Extracts field from given CSV, JSON newline-delimited or Arrow file."""
     misc_utils.extract_field(input, output, field)
@@ -23,14 +23,15 @@
 
 
 import click
-import csv
-import json
 
-from blockchainetl.file_utils import smart_open
 from klaytnetl.jobs.exporters.token_transfers_item_exporter import (
     token_transfers_item_exporter,
 )
-from klaytnetl.jobs.extract_token_transfers_job import ExtractTokenTransfersJob
+from klaytnetl.jobs.extract_token_transfers_job import (
+    LOG_FIELDS_TO_READ,
+    ExtractTokenTransfersJob,
+)
+from klaytnetl.misc_utils import get_item_iterable
 from blockchainetl.logging_utils import logging_basic_config
 
 logging_basic_config()
@@ -38,7 +39,11 @@ logging_basic_config()
 
 @click.command(context_settings=dict(help_option_names=["-h", "--help"]))
 @click.option(
-    "-l", "--logs", type=str, required=True, help="The file containing receipt logs."
+    "-l",
+    "--logs",
+    type=str,
+    required=True,
+    help="The JSON, CSV or Arrow file containing receipt logs.",
 )
 @click.option(
     "-b",
@@ -57,13 +62,32 @@ logging_basic_config()
 @click.option(
     "-w", "--max-workers", default=5, type=int, help="The maximum number of workers."
 )
-def extract_token_transfers(logs, batch_size, output, max_workers):
+@click.option(
+    "-s",
+    "--start-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks from this one on. Compressed inputs with a frame index "
+    "are only decompressed from the frames of the block range.",
+)
+@click.option(
+    "-e",
+    "--end-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks up to this one, inclusive.",
+)
+def extract_token_transfers(
+    logs, batch_size, output, max_workers, start_block, end_block
+):
     """Extracts ERC20/ERC721/ERC1155 transfers from logs file."""
-    with smart_open(logs, "r") as logs_file:
-        if logs.endswith(".json"):
-            logs_reader = (json.loads(line) for line in logs_file)
-        else:
-            logs_reader = csv.DictReader(logs_file)
+    with get_item_iterable(
+        logs,
+        columns=LOG_FIELDS_TO_READ,
+        default_format="csv",
+        start_block=start_block,
+        end_block=end_block,
+    ) as logs_reader:
         job = ExtractTokenTransfersJob(
             logs_iterable=logs_reader,
             batch_size=batch_size,
@@ -22,14 +22,14 @@
 # SOFTWARE.
 
 
-import csv
-import json
-
 import click
 from blockchainetl.csv_utils import set_max_field_size_limit
-from blockchainetl.file_utils import smart_open
 from klaytnetl.jobs.exporters.tokens_item_exporter import tokens_item_exporter
-from klaytnetl.jobs.extract_tokens_job import ExtractTokensJob
+from klaytnetl.jobs.extract_tokens_job import (
+    CONTRACT_FIELDS_TO_READ,
+    ExtractTokensJob,
+)
+from klaytnetl.misc_utils import get_item_iterable
 from blockchainetl.logging_utils import logging_basic_config
 from klaytnetl.providers.auto import get_provider_from_uri
 from klaytnetl.thread_local_proxy import ThreadLocalProxy
@@ -47,7 +47,7 @@ logging_basic_config()
     "--contracts",
     type=str,
     required=True,
-    help="The JSON file containing contracts.",
+    help="The JSON, CSV or Arrow file containing contracts.",
 )
 @click.option(
     "-p",
@@ -80,7 +80,24 @@ logging_basic_config()
     help="Input either baobab or cypress to obtain public provider"
     "If not provided, the option will be disabled.",
 )
-def extract_tokens(contracts, provider_uri, output, max_workers, network):
+@click.option(
+    "-s",
+    "--start-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks from this one on. Compressed inputs with a frame index "
+    "are only decompressed from the frames of the block range.",
+)
+@click.option(
+    "-e",
+    "--end-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks up to this one, inclusive.",
+)
+def extract_tokens(
+    contracts, provider_uri, output, max_workers, network, start_block, end_block
+):
     """Extracts tokens from contracts file."""
     if network:
         provider_uri = return_provider(network)
@@ -90,11 +107,13 @@ def extract_tokens(contracts, provider_uri, output, max_workers, network):
     web3 = Web3(get_provider_from_uri(provider_uri))
     web3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
-    with smart_open(contracts, "r") as contracts_file:
-        if contracts.endswith(".json"):
-            contracts_iterable = (json.loads(line) for line in contracts_file)
-        else:
-            contracts_iterable = csv.DictReader(contracts_file)
+    with get_item_iterable(
+        contracts,
+        columns=CONTRACT_FIELDS_TO_READ,
+        default_format="csv",
+        start_block=start_block,
+        end_block=end_block,
+    ) as contracts_iterable:
         job = ExtractTokensJob(
             contracts_iterable=contracts_iterable,
             web3=ThreadLocalProxy(lambda: web3),
@@ -48,10 +48,27 @@ from klaytnetl import misc_utils
     type=str,
     help="Predicate in Python code e.g. \"item['is_erc20']\".",
 )
-def filter_items(input, output, predicate):
+@click.option(
+    "-s",
+    "--start-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks from this one on. Compressed inputs with a frame index "
+    "are only decompressed from the frames of the block range.",
+)
+@click.option(
+    "-e",
+    "--end-block",
+    default=None,
+    type=int,
+    help="Only read items of blocks up to this one, inclusive.",
+)
+def filter_items(input, output, predicate, start_block, end_block):
     """Filters rows in given CSV or JSON newline-delimited file."""
 
     def evaluated_predicate(item):
         return eval(predicate, globals(), {"item": item})
 
-    misc_utils.filter_items(input, output, evaluated_predicate)
+    misc_utils.filter_items(
+        input, output, evaluated_predicate, start_block=start_block, end_block=end_block
+    )
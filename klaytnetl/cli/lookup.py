@@ -0,0 +1,66 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+
+
+import click
+
+from blockchainetl.compression import load_zstd_dictionaries
+from klaytnetl import misc_utils
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option(
+    "-i",
+    "--input",
+    required=True,
+    multiple=True,
+    type=click.Path(exists=True),
+    help="An output written with --lookup-index: a file or a directory of files, e.g. rolled, sharded "
+    "or partitioned outputs. Can be given several times, e.g. once per item type.",
+)
+@click.option(
+    "-k",
+    "--key",
+    required=True,
+    type=str,
+    help="The transaction hash or address to look up.",
+)
+@click.option(
+    "-o",
+    "--output",
+    default="-",
+    type=str,
+    help="The output file. If not specified stdout is used.",
+)
+@click.option(
+    "--zstd-dict-dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="The directory of zstd dictionaries the inputs were compressed with.",
+)
+def lookup(input, key, output, zstd_dict_dir):
+    """Finds the items holding a transaction hash or address in outputs with lookup indexes."""
+    zstd_dicts = load_zstd_dictionaries(zstd_dict_dir) if zstd_dict_dir is not None else None
+    misc_utils.lookup_items(input, output, key, zstd_dicts)
@@ -23,43 +23,31 @@
 
 
 import os
-import glob
-import logging
-import shutil
 
-from google.cloud import storage
-from google.oauth2 import service_account
+from blockchainetl.jobs.exporters.sqlite_item_exporter import SQLITE_URL_PREFIX
+from blockchainetl.object_store import GcsObjectStore, ObjectStoreUploader, S3ObjectStore
 
 
 def get_path(tmpdir, path):
     if path is None:
         return None
+    elif path.startswith(SQLITE_URL_PREFIX):
+        return path
     elif tmpdir is None:
         return os.path.normpath(path)
-    else:
-        return os.path.normpath(os.path.join(tmpdir, path))
 
-
-def sync_to_gcs(bucket, tmpdir, outputs, is_single_file):
-    client = storage.Client()
-    bucket_name = client.get_bucket(bucket)
-
-    for output_path in filter(lambda o: o is not None, outputs):
-        temp_path = get_path(tmpdir, output_path)
-        for file in _get_files(temp_path, is_single_file):
-            out = os.path.join(os.path.normpath(output_path), os.path.basename(file))
-            logging.info(f"Transfer {file} --> gcs://{bucket}/{out}")
-            blob = bucket_name.blob(f'{bucket}/{out}')
-            blob.upload_from_filename(f'{file}')
-        shutil.rmtree(temp_path, ignore_errors=True)
-
-
-def _get_files(path, is_single_file):
-    import os, glob
-
-    if is_single_file:
-        path = os.path.normpath(path)
-    else:
-        path = os.path.join(os.path.normpath(path), "*")
-
-    return glob.glob(path)
+    # files are written to tmpdir under the output path, which names their objects, also if it is absolute
+    relative_path = os.path.normpath(path).lstrip(os.sep)
+    if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+        raise ValueError("Outputs uploaded to a bucket can not be outside of the current directory: " + path)
+    return os.path.join(tmpdir, relative_path)
+
+
+def create_object_store_uploader(s3_bucket, gcs_bucket, tmpdir):
+    """Returns an uploader of files written to tmpdir to the bucket, None if no bucket is given"""
+    if s3_bucket:
+        return ObjectStoreUploader(S3ObjectStore(s3_bucket), tmpdir)
+    if gcs_bucket:
+        # objects are named under the bucket name, like the ones synced to GCS before
+        return ObjectStoreUploader(GcsObjectStore(gcs_bucket), tmpdir, prefix=gcs_bucket)
+    return None
@@ -0,0 +1,270 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import click
+import json
+import logging
+import os
+
+from blockchainetl.compression import load_zstd_dictionaries
+from blockchainetl.file_utils import smart_open
+from blockchainetl.logging_utils import logging_basic_config
+from klaytnetl.cli.export_block_group import export_block_group
+from klaytnetl.coordinator.range_worker import get_chunk_output_path
+from klaytnetl.service.backfill_planner import BackfillPlanner
+
+logging_basic_config()
+
+# re-exports into directory outputs are always rolled into data-* files, which the planner scans
+DEFAULT_RUN_FILE_MAXLINES = 100000
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.pass_context
+@click.option(
+    "-s", "--start-block", default=0, show_default=True, type=int, help="Start block"
+)
+@click.option("-e", "--end-block", required=True, type=int, help="End block")
+@click.option(
+    "--blocks-output",
+    default=None,
+    type=str,
+    help="The existing output file or directory for blocks.",
+)
+@click.option(
+    "--transactions-output",
+    default=None,
+    type=str,
+    help="The existing output file or directory for transactions.",
+)
+@click.option(
+    "--receipts-output",
+    default=None,
+    type=str,
+    help="The existing output file or directory for receipts.",
+)
+@click.option(
+    "--logs-output",
+    default=None,
+    type=str,
+    help="The existing output file or directory for logs.",
+)
+@click.option(
+    "--token-transfers-output",
+    default=None,
+    type=str,
+    help="The existing output file or directory for token transfers.",
+)
+@click.option(
+    "--merge-distance",
+    default=0,
+    show_default=True,
+    type=int,
+    help="Merge planned ranges separated by at most this number of blocks, "
+    "which trades re-exported blocks for fewer jobs.",
+)
+@click.option(
+    "-o",
+    "--output",
+    default="-",
+    type=str,
+    help='The output file for planned ranges, one "start_block,end_block" per line. '
+    "If not specified stdout is used.",
+)
+@click.option(
+    "--report-output",
+    default=None,
+    type=str,
+    help="The output file for the detailed JSON report per item type.",
+)
+@click.option(
+    "--run",
+    is_flag=True,
+    type=bool,
+    help="Run export_block_group for every planned range. Outputs are written to "
+    "start_block=.../end_block=... partitions next to the existing outputs.",
+)
+@click.option(
+    "-p",
+    "--provider-uri",
+    default="https://cypress.fandom.finance/archive",
+    show_default=True,
+    type=str,
+    help="The URI of the web3 provider used with --run.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    default=100,
+    show_default=True,
+    type=int,
+    help="The number of blocks to export at a time with --run.",
+)
+@click.option(
+    "-w",
+    "--max-workers",
+    default=5,
+    show_default=True,
+    type=int,
+    help="The maximum number of workers with --run.",
+)
+@click.option(
+    "--enrich",
+    default=True,
+    show_default=True,
+    type=bool,
+    help="Enrich output files of block groups with --run",
+)
+@click.option(
+    "--file-format",
+    default="json",
+    type=str,
+    help='Export file format with --run. "json" (default) or "csv".',
+)
+@click.option(
+    "--file-maxlines",
+    default=None,
+    type=int,
+    help="Limit max lines per single file with --run. Re-exports into directory outputs are always "
+    "written as data-* files, {} lines per file by default.".format(DEFAULT_RUN_FILE_MAXLINES),
+)
+@click.option(
+    "--compress",
+    is_flag=True,
+    type=bool,
+    help="Enable compress option using gzip with --run.",
+)
+@click.option(
+    "--zstd-dict-dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="The directory of zstd dictionaries the outputs were compressed with.",
+)
+def plan_backfill(
+    ctx,
+    start_block,
+    end_block,
+    blocks_output,
+    transactions_output,
+    receipts_output,
+    logs_output,
+    token_transfers_output,
+    merge_distance,
+    output,
+    report_output,
+    run,
+    provider_uri,
+    batch_size,
+    max_workers,
+    enrich,
+    file_format,
+    file_maxlines,
+    compress,
+    zstd_dict_dir,
+):
+    """Finds missing, duplicated and truncated blocks in existing block group outputs
+    and plans the minimal ranges to re-export."""
+    outputs = {
+        "block": blocks_output,
+        "transaction": transactions_output,
+        "receipt": receipts_output,
+        "log": logs_output,
+        "token_transfer": token_transfers_output,
+    }
+    if all(path is None for path in outputs.values()):
+        raise ValueError(
+            "At least one of --blocks-output, --transactions-output, --receipts-output, --logs-output, "
+            "or --token-transfers-output options must be provided"
+        )
+
+    zstd_dicts = load_zstd_dictionaries(zstd_dict_dir) if zstd_dict_dir is not None else None
+    planner = BackfillPlanner(start_block, end_block, merge_distance=merge_distance, zstd_dicts=zstd_dicts)
+    # blocks go first, transaction counts of blocks are used to check transactions and receipts
+    for item_type, path in outputs.items():
+        if path is not None:
+            planner.scan(item_type, path)
+
+    plan = planner.plan()
+    for item_type, item_type_plan in plan["item_types"].items():
+        logging.info(
+            "{}: {} rows, {} missing blocks in {} ranges, {} duplicated ranges, {} truncated files.".format(
+                item_type,
+                item_type_plan["rows"],
+                item_type_plan["missing_blocks"],
+                len(item_type_plan["missing_ranges"]),
+                len(item_type_plan["duplicated_ranges"]),
+                len(item_type_plan["truncated_files"]),
+            )
+        )
+    logging.info("Planned {} ranges to re-export.".format(len(plan["ranges"])))
+
+    with smart_open(output, "w") as output_file:
+        for range_start_block, range_end_block in plan["ranges"]:
+            output_file.write("{},{}\n".format(range_start_block, range_end_block))
+
+    if report_output is not None:
+        with smart_open(report_output, "w") as report_file:
+            report_file.write(json.dumps(plan, indent=2) + "\n")
+
+    if not run:
+        return
+
+    # directory outputs get rolled files, file outputs a single file, which needs separate invocations
+    output_groups = [
+        (
+            {item_type: path if path is not None and os.path.isdir(path) else None for item_type, path in outputs.items()},
+            file_maxlines or DEFAULT_RUN_FILE_MAXLINES,
+            False,
+        ),
+        (
+            {item_type: path if path is not None and not os.path.isdir(path) else None for item_type, path in outputs.items()},
+            file_maxlines,
+            True,
+        ),
+    ]
+    for range_start_block, range_end_block in plan["ranges"]:
+        for group_outputs, group_file_maxlines, is_single_file in output_groups:
+            if all(path is None for path in group_outputs.values()):
+                continue
+            range_outputs = {
+                item_type: get_chunk_output_path(path, range_start_block, range_end_block, is_single_file)
+                for item_type, path in group_outputs.items()
+            }
+            ctx.invoke(
+                export_block_group,
+                start_block=range_start_block,
+                end_block=range_end_block,
+                batch_size=batch_size,
+                provider_uri=provider_uri,
+                max_workers=max_workers,
+                enrich=enrich,
+                blocks_output=range_outputs["block"],
+                transactions_output=range_outputs["transaction"],
+                receipts_output=range_outputs["receipt"],
+                logs_output=range_outputs["log"],
+                token_transfers_output=range_outputs["token_transfer"],
+                file_format=file_format,
+                file_maxlines=group_file_maxlines,
+                compress=compress,
+            )
@@ -0,0 +1,76 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import click
+import logging
+
+from blockchainetl.logging_utils import logging_basic_config
+from klaytnetl.coordinator.http_coordinator import build_coordinator_server
+from klaytnetl.coordinator.sqlite_coordinator import DEFAULT_MAX_ATTEMPTS, SqliteRangeCoordinator
+
+logging_basic_config()
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option(
+    "--host",
+    default="0.0.0.0",
+    show_default=True,
+    type=str,
+    help="The host to listen on.",
+)
+@click.option(
+    "--port",
+    default=8000,
+    show_default=True,
+    type=int,
+    help="The port to listen on.",
+)
+@click.option(
+    "--db",
+    default="coordinator.db",
+    show_default=True,
+    type=str,
+    help='The SQLite database keeping chunks and leases. Use ":memory:" to keep them in memory only.',
+)
+@click.option(
+    "--max-attempts",
+    default=DEFAULT_MAX_ATTEMPTS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of times a chunk is leased before it is failed and reported in the status.",
+)
+def run_coordinator(host, port, db, max_attempts):
+    """Runs a range coordinator for export_block_group --coordinator http://<host>:<port>."""
+    coordinator = SqliteRangeCoordinator(db, max_attempts=max_attempts)
+    server = build_coordinator_server(coordinator, host=host, port=port)
+
+    logging.info("Range coordinator is listening on {}:{}.".format(host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        coordinator.close()
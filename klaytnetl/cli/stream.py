@@ -0,0 +1,399 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import click
+
+from blockchainetl.jobs.exporters.deduplicating_item_exporter import (
+    DeduplicatingItemExporter,
+    RecentKeyWindow,
+)
+from blockchainetl.jobs.exporters.fan_out_item_exporter import (
+    DEFAULT_BATCH_SIZE as DEFAULT_FAN_OUT_BATCH_SIZE,
+    DEFAULT_QUEUE_SIZE as DEFAULT_FAN_OUT_QUEUE_SIZE,
+    FAILURE_POLICIES,
+)
+from blockchainetl.jobs.exporters.kafka_exporter import (
+    DEFAULT_COMPRESSION_TYPE,
+    PARTITION_KEY_BLOCK_NUMBER,
+    PARTITION_KEYS,
+)
+from blockchainetl.jobs.exporters.write_ahead_log_item_exporter import (
+    WriteAheadLogItemExporter,
+)
+from blockchainetl.logging_utils import logging_basic_config
+from blockchainetl.streaming.streamer import Streamer
+from blockchainetl.write_ahead_log import DEFAULT_SEGMENT_MAX_BYTES
+from klaytnetl.providers.auto import get_provider_from_uri
+from klaytnetl.streaming.item_exporter_creator import create_fan_out_item_exporter
+from klaytnetl.streaming.item_id_calculator import KlaytnItemIdCalculator
+from klaytnetl.streaming.klaytn_streamer_adapter import (
+    DEFAULT_REORG_WINDOW_SIZE,
+    EntityType,
+    KlaytnStreamerAdapter,
+)
+from klaytnetl.thread_local_proxy import ThreadLocalProxy
+from klaytnetl.utils import return_provider
+from klaytnetl.web3_utils import build_web3
+
+logging_basic_config()
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option(
+    "-l",
+    "--last-synced-block-file",
+    default="last_synced_block.txt",
+    show_default=True,
+    type=str,
+    help="The file with the last synced block number.",
+)
+@click.option(
+    "--lag",
+    default=0,
+    show_default=True,
+    type=int,
+    help="The number of blocks to lag behind the chain head, i.e. the confirmation depth.",
+)
+@click.option(
+    "-p",
+    "--provider-uri",
+    default="https://cypress.fandom.finance/archive",
+    show_default=True,
+    type=str,
+    help="The URI of the web3 provider e.g. "
+    "file://$HOME/var/kend/data/klay.ipc or https://cypress.fandom.finance/archive",
+)
+@click.option(
+    "-t",
+    "--timeout",
+    default=60,
+    show_default=True,
+    type=int,
+    help="The connection time out",
+)
+@click.option(
+    "-o",
+    "--output",
+    default=None,
+    type=str,
+    help="Either Google PubSub topic path e.g. projects/your-project/topics/klaytn; "
+    "or Kafka e.g. kafka/127.0.0.1:9092; or AWS Kinesis stream prefix e.g. kinesis://klaytn; "
+    "or GCS path e.g. gs://your-bucket/blocks; or a local directory e.g. file://output. "
+    "If not specified will print to console. "
+    "Separate several outputs with commas to stream to all of them in parallel.",
+)
+@click.option(
+    "--fan-out-failure-policy",
+    default=None,
+    type=str,
+    help="What to do with items of an output whose queue is full or which failed, with several outputs: "
+    "block waits for the output and fails streaming on errors, drop drops and counts the items, "
+    "spill appends them to a file in --fan-out-spill-dir. Either one policy or one policy per output. "
+    "By default file:// and console outputs block and remote outputs spill.",
+)
+@click.option(
+    "--fan-out-queue-size",
+    default=DEFAULT_FAN_OUT_QUEUE_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of items queued per output, with several outputs.",
+)
+@click.option(
+    "--fan-out-batch-size",
+    default=DEFAULT_FAN_OUT_BATCH_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The maximum number of items exported to an output at a time, with several outputs.",
+)
+@click.option(
+    "--fan-out-spill-dir",
+    default="spill",
+    show_default=True,
+    type=str,
+    help="The directory of spill files of outputs with the spill failure policy.",
+)
+@click.option(
+    "--wal-dir",
+    default=None,
+    type=str,
+    help="The directory of a local write-ahead log between streaming and the outputs. If provided, items are "
+    "appended to the log and delivered to the outputs in the background, undelivered items are resumed on restart.",
+)
+@click.option(
+    "--wal-segment-bytes",
+    default=DEFAULT_SEGMENT_MAX_BYTES,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The size of write-ahead log segments. Segments are deleted once all of their items are delivered.",
+)
+@click.option(
+    "--wal-fsync",
+    is_flag=True,
+    help="Sync the write-ahead log to disk on every append, so that items survive a crash of the machine.",
+)
+@click.option(
+    "--kafka-compression",
+    default=DEFAULT_COMPRESSION_TYPE,
+    show_default=True,
+    type=click.Choice(["none", "gzip", "snappy", "lz4", "zstd"]),
+    help="The compression of Kafka messages. lz4 and zstd require the lz4 and zstandard packages.",
+)
+@click.option(
+    "--kafka-partition-key",
+    default=PARTITION_KEY_BLOCK_NUMBER,
+    show_default=True,
+    type=click.Choice(PARTITION_KEYS),
+    help="The key of Kafka messages. Messages with the same key keep their order in a single partition.",
+)
+@click.option(
+    "--kinesis-region",
+    default=None,
+    type=str,
+    help="The AWS region of Kinesis streams. Defaults to the region of the AWS configuration or ap-northeast-2.",
+)
+@click.option(
+    "--kinesis-endpoint-url",
+    default=None,
+    type=str,
+    help="The Kinesis endpoint e.g. http://localhost:4567 for a local stand-in like kinesalite.",
+)
+@click.option(
+    "--kinesis-aggregate",
+    is_flag=True,
+    help="Pack Kinesis records into KPL aggregated records. Consumers have to deaggregate them e.g. with KCL.",
+)
+@click.option(
+    "--gcs-blocks-per-object",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="The number of consecutive blocks uploaded together as a GCS object.",
+)
+@click.option(
+    "--file-maxseconds",
+    default=3600,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Limit seconds a single file of a file:// output is written to.",
+)
+@click.option(
+    "-s",
+    "--start-block",
+    default=None,
+    type=int,
+    help="Start block. If not provided, streaming resumes after the block in --last-synced-block-file.",
+)
+@click.option(
+    "-e",
+    "--end-block",
+    default=None,
+    type=int,
+    help="End block. If not provided, the chain head is followed forever.",
+)
+@click.option(
+    "--entity-types",
+    default=",".join(EntityType.BLOCK_GROUP),
+    show_default=True,
+    type=str,
+    help="The list of entity types to export, any of "
+    + ",".join(EntityType.ALL_FOR_STREAMING)
+    + ". Traces, contracts and tokens require debug APIs of the node.",
+)
+@click.option(
+    "--period-seconds",
+    default=1,
+    show_default=True,
+    type=int,
+    help="How many seconds to sleep between syncs once the chain head is reached.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    default=10,
+    show_default=True,
+    type=int,
+    help="The number of blocks to request in a single JSON RPC batch.",
+)
+@click.option(
+    "-B",
+    "--block-batch-size",
+    default=10,
+    show_default=True,
+    type=int,
+    help="The maximum number of blocks to sync in a single cycle.",
+)
+@click.option(
+    "-w",
+    "--max-workers",
+    default=5,
+    show_default=True,
+    type=int,
+    help="The maximum number of workers.",
+)
+@click.option(
+    "--enrich",
+    default=True,
+    show_default=True,
+    type=bool,
+    help="Enrich streamed items",
+)
+@click.option(
+    "--reorg-window",
+    default=DEFAULT_REORG_WINDOW_SIZE,
+    show_default=True,
+    type=int,
+    help="The number of recent block hashes kept to detect chain reorganizations.",
+)
+@click.option(
+    "--dedup-window",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="The number of idempotency keys of recently streamed items remembered to drop items "
+    "streamed again by retried batches. 0 disables deduplication.",
+)
+@click.option(
+    "--network",
+    default=None,
+    type=str,
+    help="Input either baobab or cypress to obtain public provider"
+    "If not provided, the option will be disabled.",
+)
+@click.option("--pid-file", default=None, type=str, help="pid file")
+def stream(
+    last_synced_block_file,
+    lag,
+    provider_uri,
+    timeout,
+    output,
+    fan_out_failure_policy,
+    fan_out_queue_size,
+    fan_out_batch_size,
+    fan_out_spill_dir,
+    wal_dir,
+    wal_segment_bytes,
+    wal_fsync,
+    kafka_compression,
+    kafka_partition_key,
+    kinesis_region,
+    kinesis_endpoint_url,
+    kinesis_aggregate,
+    gcs_blocks_per_object,
+    file_maxseconds,
+    start_block,
+    end_block,
+    entity_types,
+    period_seconds,
+    batch_size,
+    block_batch_size,
+    max_workers,
+    enrich,
+    reorg_window,
+    dedup_window,
+    network,
+    pid_file,
+):
+    """Streams block groups and trace groups following the chain head."""
+    if network:
+        provider_uri = return_provider(network)
+
+    entity_types = [
+        entity_type.strip() for entity_type in entity_types.split(",") if entity_type.strip()
+    ]
+
+    failure_policies = (
+        tuple(policy.strip() for policy in fan_out_failure_policy.split(","))
+        if fan_out_failure_policy is not None
+        else None
+    )
+    if failure_policies is not None and any(
+        policy not in FAILURE_POLICIES for policy in failure_policies
+    ):
+        raise ValueError(
+            '"--fan-out-failure-policy" only supports {}.'.format(
+                ", ".join(FAILURE_POLICIES)
+            )
+        )
+
+    item_exporter = create_fan_out_item_exporter(
+        [item.strip() for item in output.split(",")] if output else [None],
+        failure_policies=failure_policies,
+        queue_size=fan_out_queue_size,
+        batch_size=fan_out_batch_size,
+        spill_dir=fan_out_spill_dir,
+        kafka_options={
+            "compression_type": (
+                None if kafka_compression == "none" else kafka_compression
+            ),
+            "partition_key": kafka_partition_key,
+        },
+        kinesis_options={
+            "region_name": kinesis_region,
+            "endpoint_url": kinesis_endpoint_url,
+            "aggregate": kinesis_aggregate,
+        },
+        gcs_options={"blocks_per_object": gcs_blocks_per_object},
+        file_options={"file_maxseconds": file_maxseconds},
+    )
+    if wal_dir is not None:
+        item_exporter = WriteAheadLogItemExporter(
+            item_exporter,
+            wal_dir,
+            segment_max_bytes=wal_segment_bytes,
+            fsync=wal_fsync,
+        )
+    if dedup_window > 0:
+        # blocks of a reorganization are streamed again after their retraction
+        item_exporter = DeduplicatingItemExporter(
+            item_exporter,
+            KlaytnItemIdCalculator().calculate_idempotency_key,
+            RecentKeyWindow(dedup_window),
+            reset_item_types=("retraction",),
+        )
+
+    streamer_adapter = KlaytnStreamerAdapter(
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_provider_from_uri(provider_uri, timeout=timeout, batch=True)
+        ),
+        web3=ThreadLocalProxy(
+            lambda: build_web3(get_provider_from_uri(provider_uri, timeout=timeout))
+        ),
+        item_exporter=item_exporter,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        entity_types=entity_types,
+        enrich=enrich,
+        reorg_window_size=reorg_window,
+    )
+    streamer = Streamer(
+        blockchain_streamer_adapter=streamer_adapter,
+        last_synced_block_file=last_synced_block_file,
+        lag=lag,
+        start_block=start_block,
+        end_block=end_block,
+        period_seconds=period_seconds,
+        block_batch_size=block_batch_size,
+        pid_file=pid_file,
+    )
+    streamer.stream()
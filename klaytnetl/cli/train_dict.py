@@ -0,0 +1,109 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import os
+import pathlib
+
+import click
+
+from blockchainetl.compression import (
+    DEFAULT_ZSTD_DICT_SIZE,
+    get_zstd_dictionary_path,
+    import_zstandard,
+    open_compressed,
+    train_zstd_dictionary,
+)
+from blockchainetl.logging_utils import logging_basic_config
+from klaytnetl.service.backfill_planner import list_output_files
+
+logging_basic_config()
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option(
+    "-t",
+    "--item-type",
+    required=True,
+    type=str,
+    help="The item type of the input, e.g. block, transaction, receipt, log or trace. "
+    "Outputs of this item type are compressed with the dictionary.",
+)
+@click.option(
+    "-i",
+    "--input",
+    required=True,
+    type=str,
+    help="An existing output of the item type: a single file or a directory written with --file-maxlines, "
+    "plain, gzipped or zstd compressed.",
+)
+@click.option(
+    "-d",
+    "--dict-dir",
+    required=True,
+    type=str,
+    help="The directory the dictionary is written to, pass it to --zstd-dict-dir of export commands.",
+)
+@click.option(
+    "--dict-size",
+    default=DEFAULT_ZSTD_DICT_SIZE,
+    show_default=True,
+    type=int,
+    help="The maximum size of the dictionary in bytes.",
+)
+@click.option(
+    "--max-samples",
+    default=100000,
+    show_default=True,
+    type=int,
+    help="The maximum number of lines of the input used as samples.",
+)
+def train_dict(item_type, input, dict_dir, dict_size, max_samples):
+    """Trains a zstd dictionary for outputs of an item type from a sample of an existing output."""
+    samples = []
+    for file in list_output_files(input):
+        with open_compressed(file, "rb") as fh:
+            for line in fh:
+                samples.append(line)
+                if len(samples) >= max_samples:
+                    break
+        if len(samples) >= max_samples:
+            break
+
+    if not samples:
+        raise ValueError("No samples found in {}".format(input))
+
+    dictionary = train_zstd_dictionary(samples, dict_size)
+
+    pathlib.Path(dict_dir).mkdir(parents=True, exist_ok=True)
+    path = get_zstd_dictionary_path(dict_dir, item_type)
+    with open(path, "wb") as file:
+        file.write(dictionary)
+
+    dict_id = import_zstandard().ZstdCompressionDict(dictionary).dict_id()
+    logging.info(
+        "Trained dictionary {} of {} bytes from {} samples, written to {}".format(
+            dict_id, len(dictionary), len(samples), os.path.abspath(path)
+        )
+    )
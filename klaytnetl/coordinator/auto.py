@@ -22,37 +22,19 @@
 # SOFTWARE.
 
 
-import os
-import logging
-import boto3
+from urllib.parse import urlparse
 
+from klaytnetl.coordinator.http_coordinator import HttpRangeCoordinator
+from klaytnetl.coordinator.sqlite_coordinator import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, SqliteRangeCoordinator
 
-def get_path(tmpdir, path):
-    if path is None:
-        return None
-    elif tmpdir is None:
-        return os.path.normpath(path)
-    else:
-        return os.path.normpath(os.path.join(tmpdir, path))
-
-
-def sync_to_s3(s3_bucket, tmpdir, outputs, is_single_file):
-    s3 = boto3.resource("s3")
-
-    for output_path in filter(lambda o: o is not None, outputs):
-        temp_path = get_path(tmpdir, output_path)
-        for file in _get_files(temp_path, is_single_file):
-            out = os.path.join(os.path.normpath(output_path), os.path.basename(file))
-            logging.info(f"Transfer {file} --> s3://{s3_bucket}/{out}")
-            s3.Object(s3_bucket, out).put(Body=open(file, "rb"))
 
-
-def _get_files(path, is_single_file):
-    import os, glob
-
-    if is_single_file:
-        path = os.path.normpath(path)
+def get_coordinator_from_uri(uri_string, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    uri = urlparse(uri_string)
+    if uri.scheme == "sqlite" or uri.scheme == "file":
+        # sqlite:///shared/coordinator.db is an absolute path, sqlite://coordinator.db a relative one
+        return SqliteRangeCoordinator(uri.netloc + uri.path, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    elif uri.scheme == "http" or uri.scheme == "https":
+        # max_attempts is configured on the coordinator server
+        return HttpRangeCoordinator(uri_string, lease_seconds=lease_seconds)
     else:
-        path = os.path.join(os.path.normpath(path), "*")
-
-    return glob.glob(path)
+        raise ValueError("Unknown coordinator uri scheme {}".format(uri_string))
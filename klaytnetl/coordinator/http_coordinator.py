@@ -0,0 +1,172 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from klaytnetl.coordinator.sqlite_coordinator import DEFAULT_LEASE_SECONDS, RangeLease
+
+DEFAULT_TIMEOUT = 60
+
+
+# Client side of the built-in coordinator server, exposes the same interface as SqliteRangeCoordinator.
+class HttpRangeCoordinator:
+    def __init__(self, url, lease_seconds=DEFAULT_LEASE_SECONDS, timeout=DEFAULT_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.lease_seconds = lease_seconds
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def init_range(self, start_block, end_block, chunk_size):
+        response = self._post(
+            "/ranges",
+            {"start_block": start_block, "end_block": end_block, "chunk_size": chunk_size},
+        )
+        return response["chunks"]
+
+    def acquire(self, worker_id, start_block, end_block, lease_seconds=None):
+        response = self._post(
+            "/leases",
+            {
+                "worker_id": worker_id,
+                "start_block": start_block,
+                "end_block": end_block,
+                "lease_seconds": lease_seconds or self.lease_seconds,
+            },
+        )
+        lease = response.get("lease")
+        return RangeLease.from_dict(lease) if lease is not None else None
+
+    def heartbeat(self, lease, lease_seconds=None):
+        response = self._post(
+            "/leases/heartbeat",
+            {"lease": lease.to_dict(), "lease_seconds": lease_seconds or self.lease_seconds},
+        )
+        if response["ok"]:
+            lease.expires_at = response["expires_at"]
+        return response["ok"]
+
+    def complete(self, lease):
+        return self._post("/leases/complete", {"lease": lease.to_dict()})["ok"]
+
+    def release(self, lease):
+        return self._post("/leases/release", {"lease": lease.to_dict()})["ok"]
+
+    def status(self, start_block=0, end_block=None):
+        params = {"start_block": start_block}
+        if end_block is not None:
+            params["end_block"] = end_block
+        response = self.session.get(self.url + "/status", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def is_done(self, start_block, end_block):
+        status = self.status(start_block, end_block)
+        return status["completed"] + status["failed"] == status["total"]
+
+    def close(self):
+        self.session.close()
+
+    def _post(self, path, body):
+        response = self.session.post(self.url + path, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class RangeCoordinatorRequestHandler(BaseHTTPRequestHandler):
+    # Set by build_coordinator_server
+    coordinator = None
+
+    def do_GET(self):
+        uri = urlparse(self.path)
+        if uri.path != "/status":
+            return self._send_json(404, {"error": "Not found: {}".format(uri.path)})
+
+        query = parse_qs(uri.query)
+        start_block = int(query.get("start_block", ["0"])[0])
+        end_block = int(query["end_block"][0]) if "end_block" in query else None
+        self._send_json(200, self.coordinator.status(start_block, end_block))
+
+    def do_POST(self):
+        handlers = {
+            "/ranges": self._init_range,
+            "/leases": self._acquire,
+            "/leases/heartbeat": self._heartbeat,
+            "/leases/complete": self._complete,
+            "/leases/release": self._release,
+        }
+        handler = handlers.get(urlparse(self.path).path)
+        if handler is None:
+            return self._send_json(404, {"error": "Not found: {}".format(self.path)})
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self._send_json(200, handler(body))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+
+    def _init_range(self, body):
+        chunks = self.coordinator.init_range(body["start_block"], body["end_block"], body["chunk_size"])
+        return {"chunks": chunks}
+
+    def _acquire(self, body):
+        lease = self.coordinator.acquire(
+            body["worker_id"], body["start_block"], body["end_block"], body.get("lease_seconds")
+        )
+        return {"lease": lease.to_dict() if lease is not None else None}
+
+    def _heartbeat(self, body):
+        lease = RangeLease.from_dict(body["lease"])
+        ok = self.coordinator.heartbeat(lease, body.get("lease_seconds"))
+        return {"ok": ok, "expires_at": lease.expires_at}
+
+    def _complete(self, body):
+        return {"ok": self.coordinator.complete(RangeLease.from_dict(body["lease"]))}
+
+    def _release(self, body):
+        return {"ok": self.coordinator.release(RangeLease.from_dict(body["lease"]))}
+
+    def _send_json(self, status_code, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.getLogger("RangeCoordinatorServer").debug(format % args)
+
+
+def build_coordinator_server(coordinator, host="0.0.0.0", port=8000):
+    handler = type(
+        "BoundRangeCoordinatorRequestHandler",
+        (RangeCoordinatorRequestHandler,),
+        {"coordinator": coordinator},
+    )
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,151 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from blockchainetl.jobs.exporters.sqlite_item_exporter import SQLITE_URL_PREFIX
+
+DEFAULT_POLL_SECONDS = 10
+
+
+def get_worker_id():
+    return "{}-{}-{}".format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+
+
+def get_chunk_output_path(path, start_block, end_block, is_single_file):
+    """Places the output of a chunk into its own start_block=.../end_block=... partition. Block numbers are padded
+    to 12 digits, like rolled files, so that partitions sort by block."""
+    if path is None:
+        return None
+    if path == "-":
+        raise ValueError("Outputs of chunks can not be written to stdout, provide a file or directory")
+    if path.startswith(SQLITE_URL_PREFIX):
+        # chunks are appended to the same database
+        return path
+
+    partition_dir = os.path.join(
+        "start_block={:012}".format(start_block),
+        "end_block={:012}".format(end_block),
+    )
+    if is_single_file:
+        return os.path.join(os.path.dirname(path), partition_dir, os.path.basename(path))
+    else:
+        return os.path.join(path, partition_dir)
+
+
+# Keeps pulling chunks of [start_block, end_block] from the coordinator until every chunk is completed or failed.
+class RangeLeaseWorker:
+    def __init__(self, coordinator, start_block, end_block, worker_id=None, poll_seconds=DEFAULT_POLL_SECONDS):
+        self.coordinator = coordinator
+        self.start_block = start_block
+        self.end_block = end_block
+        self.worker_id = worker_id or get_worker_id()
+        self.poll_seconds = poll_seconds
+        self.logger = logging.getLogger("RangeLeaseWorker")
+
+    def run(self, chunk_handler):
+        """Calls chunk_handler(start_block, end_block) for every leased chunk. Returns the number of chunks.
+        Raises once nothing is left to lease if any chunk failed in the coordinator."""
+        chunk_count = 0
+        while True:
+            lease = self.coordinator.acquire(self.worker_id, self.start_block, self.end_block)
+            if lease is None:
+                status = self.coordinator.status(self.start_block, self.end_block)
+                if status["completed"] + status["failed"] == status["total"]:
+                    break
+                # Other workers hold the remaining chunks, wait in case their leases expire
+                time.sleep(self.poll_seconds)
+                continue
+
+            self.logger.info(
+                "Worker {} leased blocks {}-{} (attempt {}).".format(
+                    self.worker_id, lease.start_block, lease.end_block, lease.attempts
+                )
+            )
+            heartbeat = LeaseHeartbeat(self.coordinator, lease)
+            heartbeat.start()
+            try:
+                chunk_handler(lease.start_block, lease.end_block)
+            except:
+                heartbeat.stop()
+                self.coordinator.release(lease)
+                raise
+            heartbeat.stop()
+
+            if self.coordinator.complete(lease):
+                chunk_count += 1
+                self.logger.info("Worker {} completed blocks {}-{}.".format(
+                    self.worker_id, lease.start_block, lease.end_block))
+            else:
+                self.logger.warning(
+                    "Lease for blocks {}-{} was lost while exporting, the chunk will be exported again.".format(
+                        lease.start_block, lease.end_block
+                    )
+                )
+
+        if status["failed_chunks"]:
+            raise RuntimeError(
+                "Chunks {} of blocks {}-{} failed to export too many times.".format(
+                    ", ".join(
+                        "{}-{}".format(chunk_start, chunk_end) for chunk_start, chunk_end in status["failed_chunks"]
+                    ),
+                    self.start_block,
+                    self.end_block,
+                )
+            )
+        self.logger.info("All chunks of blocks {}-{} are completed.".format(self.start_block, self.end_block))
+        return chunk_count
+
+
+class LeaseHeartbeat:
+    def __init__(self, coordinator, lease, interval_seconds=None):
+        self.coordinator = coordinator
+        self.lease = lease
+        self.interval_seconds = interval_seconds or coordinator.lease_seconds / 3
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.logger = logging.getLogger("LeaseHeartbeat")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            try:
+                if not self.coordinator.heartbeat(self.lease):
+                    self.logger.warning("Lease for blocks {}-{} was lost.".format(
+                        self.lease.start_block, self.lease.end_block))
+                    return
+            except Exception:
+                # The lease stays valid until it expires, next heartbeat may succeed
+                self.logger.exception("An exception occurred while sending lease heartbeat.")
@@ -0,0 +1,277 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from klaytnetl.utils import split_to_batches, validate_range
+
+DEFAULT_LEASE_SECONDS = 10 * 60
+DEFAULT_MAX_ATTEMPTS = 5
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_COMPLETED = "completed"
+# leased max_attempts times without being completed, the chunk is not leased again
+STATUS_FAILED = "failed"
+
+
+class RangeLease:
+    def __init__(self, start_block, end_block, token, worker_id, expires_at, attempts=1):
+        self.start_block = start_block
+        self.end_block = end_block
+        self.token = token
+        self.worker_id = worker_id
+        self.expires_at = expires_at
+        self.attempts = attempts
+
+    def to_dict(self):
+        return {
+            "start_block": self.start_block,
+            "end_block": self.end_block,
+            "token": self.token,
+            "worker_id": self.worker_id,
+            "expires_at": self.expires_at,
+            "attempts": self.attempts,
+        }
+
+    @classmethod
+    def from_dict(cls, lease_dict):
+        return cls(**lease_dict)
+
+
+# Leases block range chunks to workers through a SQLite database, e.g. a file on a shared disk.
+# Chunks are leased for lease_seconds and have to be extended with heartbeat() while being exported,
+# expired leases are re-assigned to the next worker asking for work. A chunk leased max_attempts times
+# without being completed is failed, so that a range which always fails to export doesn't stall the others.
+# Failed chunks are leased again once max_attempts is raised.
+class SqliteRangeCoordinator:
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS, clock=time.time):
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be greater than 0")
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "start_block INTEGER PRIMARY KEY, "
+            "end_block INTEGER NOT NULL, "
+            "status TEXT NOT NULL, "
+            "worker_id TEXT, "
+            "token TEXT, "
+            "expires_at REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "completed_at REAL, "
+            "chunk_size INTEGER)"
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(chunks)")]
+        if "chunk_size" not in columns:
+            # databases of earlier versions
+            self._connection.execute("ALTER TABLE chunks ADD COLUMN chunk_size INTEGER")
+
+        self.logger = logging.getLogger("SqliteRangeCoordinator")
+
+    def init_range(self, start_block, end_block, chunk_size):
+        """Registers chunks of the range. Already registered chunks are kept as is,
+        so every worker can call it with the same arguments. Raises ValueError if blocks of the range
+        were registered in other chunks, e.g. with another chunk_size."""
+        validate_range(start_block, end_block)
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than 0")
+
+        chunks = [
+            (chunk_start, chunk_end, STATUS_PENDING, chunk_size)
+            for chunk_start, chunk_end in split_to_batches(start_block, end_block, chunk_size)
+        ]
+        chunk_ranges = {(chunk_start, chunk_end) for chunk_start, chunk_end, _, _ in chunks}
+        with self._transaction() as cursor:
+            registered_chunks = cursor.execute(
+                "SELECT start_block, end_block, chunk_size FROM chunks WHERE start_block <= ? AND end_block >= ?",
+                (end_block, start_block),
+            ).fetchall()
+            for chunk_start, chunk_end, registered_chunk_size in registered_chunks:
+                # chunks of different chunkings would overlap, and blocks would be exported twice or not at all
+                if (chunk_start, chunk_end) not in chunk_ranges or registered_chunk_size not in (None, chunk_size):
+                    raise ValueError(
+                        "Blocks {}-{} are registered as a chunk of size {}, which doesn't match chunks of size {} "
+                        "of blocks {}-{}. Use the same range and chunk size or another coordinator database.".format(
+                            chunk_start, chunk_end, registered_chunk_size, chunk_size, start_block, end_block
+                        )
+                    )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO chunks (start_block, end_block, status, chunk_size) VALUES (?, ?, ?, ?)",
+                chunks,
+            )
+        return len(chunks)
+
+    def acquire(self, worker_id, start_block, end_block, lease_seconds=None):
+        """Returns a lease for the next chunk which is pending or whose lease has expired, None otherwise.
+        Such chunks leased max_attempts times already are failed instead."""
+        now = self.clock()
+        expires_at = now + (lease_seconds or self.lease_seconds)
+        token = uuid.uuid4().hex
+
+        with self._transaction() as cursor:
+            failed_chunks = cursor.execute(
+                "SELECT start_block, end_block, attempts FROM chunks "
+                "WHERE start_block >= ? AND end_block <= ? AND attempts >= ? "
+                "AND (status = ? OR (status = ? AND expires_at < ?))",
+                (start_block, end_block, self.max_attempts, STATUS_PENDING, STATUS_LEASED, now),
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE chunks SET status = ?, token = NULL, expires_at = NULL WHERE start_block = ?",
+                [(STATUS_FAILED, chunk_start) for chunk_start, _, _ in failed_chunks],
+            )
+
+            row = cursor.execute(
+                "SELECT start_block, end_block, status, worker_id, attempts FROM chunks "
+                "WHERE start_block >= ? AND end_block <= ? "
+                "AND (status = ? OR (status = ? AND expires_at < ?) OR (status = ? AND attempts < ?)) "
+                "ORDER BY start_block LIMIT 1",
+                (start_block, end_block, STATUS_PENDING, STATUS_LEASED, now, STATUS_FAILED, self.max_attempts),
+            ).fetchone()
+            if row is not None:
+                chunk_start, chunk_end, status, previous_worker_id, attempts = row
+                cursor.execute(
+                    "UPDATE chunks SET status = ?, worker_id = ?, token = ?, expires_at = ?, attempts = ? "
+                    "WHERE start_block = ?",
+                    (STATUS_LEASED, worker_id, token, expires_at, attempts + 1, chunk_start),
+                )
+
+        for failed_start, failed_end, failed_attempts in failed_chunks:
+            self.logger.error(
+                "Blocks {}-{} failed to export in {} attempts, the chunk is not leased again.".format(
+                    failed_start, failed_end, failed_attempts
+                )
+            )
+        if row is None:
+            return None
+        if status == STATUS_LEASED:
+            self.logger.warning(
+                "Re-assigning expired lease for blocks {}-{} of worker {} to worker {}.".format(
+                    chunk_start, chunk_end, previous_worker_id, worker_id
+                )
+            )
+        return RangeLease(chunk_start, chunk_end, token, worker_id, expires_at, attempts + 1)
+
+    def heartbeat(self, lease, lease_seconds=None):
+        """Extends the lease. Returns False if the lease was lost to another worker."""
+        expires_at = self.clock() + (lease_seconds or self.lease_seconds)
+        updated = self._update_leased_chunk(
+            "UPDATE chunks SET expires_at = ? WHERE start_block = ? AND token = ? AND status = ?",
+            (expires_at, lease.start_block, lease.token, STATUS_LEASED),
+        )
+        if updated:
+            lease.expires_at = expires_at
+        return updated
+
+    def complete(self, lease):
+        """Records the chunk as exported. Returns False if the lease was lost to another worker."""
+        return self._update_leased_chunk(
+            "UPDATE chunks SET status = ?, expires_at = NULL, completed_at = ? "
+            "WHERE start_block = ? AND token = ? AND status = ?",
+            (STATUS_COMPLETED, self.clock(), lease.start_block, lease.token, STATUS_LEASED),
+        )
+
+    def release(self, lease):
+        """Gives the chunk back so that it is picked up by the next worker right away."""
+        return self._update_leased_chunk(
+            "UPDATE chunks SET status = ?, token = NULL, expires_at = NULL "
+            "WHERE start_block = ? AND token = ? AND status = ?",
+            (STATUS_PENDING, lease.start_block, lease.token, STATUS_LEASED),
+        )
+
+    def status(self, start_block=0, end_block=None):
+        if end_block is None:
+            end_block = 2 ** 63 - 1
+        now = self.clock()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, expires_at < ?, COUNT(*) FROM chunks "
+                "WHERE start_block >= ? AND end_block <= ? GROUP BY 1, 2",
+                (now, start_block, end_block),
+            ).fetchall()
+            failed_chunks = self._connection.execute(
+                "SELECT start_block, end_block FROM chunks "
+                "WHERE start_block >= ? AND end_block <= ? AND status = ? ORDER BY start_block",
+                (start_block, end_block, STATUS_FAILED),
+            ).fetchall()
+
+        result = {STATUS_PENDING: 0, STATUS_LEASED: 0, "expired": 0, STATUS_COMPLETED: 0, STATUS_FAILED: 0}
+        for status, is_expired, count in rows:
+            if status == STATUS_LEASED and is_expired:
+                result["expired"] += count
+            else:
+                result[status] += count
+        result["total"] = sum(result.values())
+        result["failed_chunks"] = [[chunk_start, chunk_end] for chunk_start, chunk_end in failed_chunks]
+        return result
+
+    def is_done(self, start_block, end_block):
+        """Returns True once every chunk is completed or failed, i.e. nothing is left to lease."""
+        status = self.status(start_block, end_block)
+        return status[STATUS_COMPLETED] + status[STATUS_FAILED] == status["total"]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _update_leased_chunk(self, statement, parameters):
+        with self._transaction() as cursor:
+            return cursor.execute(statement, parameters).rowcount == 1
+
+    def _transaction(self):
+        return _SqliteTransaction(self._lock, self._connection)
+
+
+class _SqliteTransaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so that two processes sharing
+    # the database file can't lease the same chunk
+    def __init__(self, lock, connection):
+        self._lock = lock
+        self._connection = connection
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._connection.execute("BEGIN IMMEDIATE")
+        except:
+            self._lock.release()
+            raise
+        return self._connection.cursor()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._connection.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        finally:
+            self._lock.release()
@@ -23,13 +23,16 @@
 
 
 import logging
+import queue
 import time
 
 from requests.exceptions import Timeout as RequestsTimeout, HTTPError, TooManyRedirects
 from web3._utils.threads import Timeout as Web3Timeout
 
 from klaytnetl.executors.bounded_executor import BoundedExecutor
+from klaytnetl.executors.concurrency_controller import AdaptiveConcurrencyController
 from klaytnetl.executors.fail_safe_executor import FailSafeExecutor
+from klaytnetl.executors.stuck_batch_watchdog import BatchAbandonedError, StuckBatchWatchdog
 from klaytnetl.misc.retriable_value_error import RetriableValueError
 from klaytnetl.progress_logger import ProgressLogger
 from klaytnetl.trace_progress_logger import TraceProgressLogger
@@ -44,14 +47,33 @@ BATCH_CHANGE_COOLDOWN_PERIOD_SECONDS = 2 * 60
 # Executes the given work in batches, reducing the batch size exponentially in case of errors.
 class BatchWorkExecutor:
     def __init__(self, starting_batch_size, max_workers, log_percentage_step=10, detailed_trace_log=False,
-                 retry_exceptions=RETRY_EXCEPTIONS, max_retries=5):
+                 retry_exceptions=RETRY_EXCEPTIONS, max_retries=5, min_workers=None,
+                 batch_deadline_multiplier=None, watchdog=None):
+        if min_workers is not None and not 1 <= min_workers < max_workers:
+            raise ValueError('min_workers must be positive and less than max_workers')
+        if batch_deadline_multiplier is not None and batch_deadline_multiplier <= 0:
+            raise ValueError('batch_deadline_multiplier must be greater than 0')
         self.batch_size = starting_batch_size
         self.max_batch_size = starting_batch_size
         self.latest_batch_size_change_time = None
         self.max_workers = max_workers
+        self.min_workers = min_workers
+        # The number of active workers is tuned at runtime within [min_workers, max_workers] if min_workers is given
+        self.concurrency_controller = AdaptiveConcurrencyController(min_workers, max_workers) \
+            if min_workers is not None else None
         # Using bounded executor prevents unlimited queue growth
         # and allows monitoring in-progress futures and failing fast in case of errors.
-        self.executor = FailSafeExecutor(BoundedExecutor(1, self.max_workers))
+        self.bounded_executor = BoundedExecutor(1, self.max_workers, self.concurrency_controller)
+        self.executor = FailSafeExecutor(self.bounded_executor)
+        # If batch_deadline_multiplier is given, batches running that many times longer than usual and not
+        # exporting yet are abandoned and re-submitted, so that a worker stuck on a half-open connection
+        # doesn't pin its slot until the job ends.
+        if watchdog is None and batch_deadline_multiplier is not None:
+            watchdog = StuckBatchWatchdog(deadline_multiplier=batch_deadline_multiplier)
+        self.watchdog = watchdog
+        if self.watchdog is not None:
+            self.watchdog.on_stuck = self._on_stuck_batch
+        self._abandoned_batches = queue.Queue()
         self.detailed_trace_log = detailed_trace_log
         self.retry_exceptions = retry_exceptions
         self.max_retries = max_retries
@@ -62,16 +84,47 @@ class BatchWorkExecutor:
 
     def execute(self, work_iterable, work_handler, total_items=None):
         self.progress_logger.start(total_items=total_items)
+        if self.watchdog is not None:
+            self.watchdog.start()
         for batch in dynamic_batch_iterator(work_iterable, lambda: self.batch_size):
             self.executor.submit(self._fail_safe_execute, work_handler, batch)
+            self._resubmit_abandoned_batches()
 
-    def _fail_safe_execute(self, work_handler, batch):
+    def start_exporting(self):
+        """Called by work_handler before it exports the first item of its batch,
+        the batch is not abandoned by the watchdog afterwards."""
+        if self.watchdog is not None:
+            self.watchdog.start_exporting()
+
+    def check_abandoned(self):
+        """Called by work_handler between requests, raises if its batch was abandoned and re-submitted."""
+        if self.watchdog is not None:
+            self.watchdog.check_abandoned()
+
+    def _fail_safe_execute(self, work_handler, batch, attempt=0):
+        if self.watchdog is None:
+            self._execute_batch(work_handler, batch)
+            return
+        try:
+            watched_batch = self.watchdog.watch(batch, work_handler, attempt)
+            try:
+                self._execute_batch(work_handler, batch)
+            finally:
+                self.watchdog.unwatch(watched_batch)
+        except BatchAbandonedError:
+            self.logger.info('Abandoned batch of size {} was stopped, it was re-submitted.'.format(len(batch)))
+
+    def _execute_batch(self, work_handler, batch):
         trace_count = 0
         try:
+            start_time = time.time()
             trace_count = work_handler(batch)
+            self._track_latency(time.time() - start_time, len(batch))
             self._try_increase_batch_size(len(batch))
         except self.retry_exceptions:
             self.logger.exception('An exception occurred while executing work_handler.')
+            if self.concurrency_controller is not None:
+                self.concurrency_controller.on_error()
             self._try_decrease_batch_size(len(batch))
             self.logger.info('The batch of size {} will be retried one item at a time.'.format(len(batch)))
             for item in batch:
@@ -82,6 +135,14 @@ class BatchWorkExecutor:
         else:
             self.progress_logger.track(len(batch))
 
+    def _track_latency(self, latency, current_batch_size):
+        if self.watchdog is not None and current_batch_size > 0:
+            self.watchdog.on_sample(latency / current_batch_size)
+        if self.concurrency_controller is not None and current_batch_size > 0:
+            # Batch size changes over time, so latency is compared per item
+            self.concurrency_controller.on_sample(latency / current_batch_size, self.bounded_executor.in_flight,
+                                                  completed_items=current_batch_size)
+
     # Some acceptable race conditions are possible
     def _try_decrease_batch_size(self, current_batch_size):
         batch_size = self.batch_size
@@ -103,8 +164,35 @@ class BatchWorkExecutor:
                 self.batch_size = new_batch_size
                 self.latest_batch_size_change_time = current_time
 
+    def _on_stuck_batch(self, watched_batch):
+        # Called by the watchdog thread. The batch is queued before the slot is abandoned,
+        # so that it is either in flight or queued at any time.
+        self._abandoned_batches.put(watched_batch)
+        self.executor.abandon(watched_batch.thread_ident)
+
+    def _resubmit_abandoned_batches(self):
+        while True:
+            try:
+                watched_batch = self._abandoned_batches.get_nowait()
+            except queue.Empty:
+                return
+            self.logger.info('Re-submitting abandoned batch of size {}.'.format(len(watched_batch.batch)))
+            # A new worker thread of the fresh pool creates a fresh connection
+            self.executor.submit(self._fail_safe_execute, watched_batch.work_handler, watched_batch.batch,
+                                 watched_batch.attempt + 1)
+
     def shutdown(self):
+        if self.watchdog is not None:
+            try:
+                # Batches abandoned while waiting for the last ones are re-submitted as well
+                while not (self.executor.wait(timeout=self.watchdog.check_interval_seconds)
+                           and self._abandoned_batches.empty()):
+                    self._resubmit_abandoned_batches()
+            finally:
+                self.watchdog.stop()
         self.executor.shutdown()
+        if self.watchdog is not None and self.watchdog.stuck_count > 0:
+            self.logger.warning('{} stuck batches were detected.'.format(self.watchdog.stuck_count))
         self.progress_logger.finish()
 
 
@@ -22,8 +22,8 @@
 # SOFTWARE.
 
 
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from threading import BoundedSemaphore
 
 
 class BoundedExecutor:
@@ -32,26 +32,84 @@ class BoundedExecutor:
     execution.
     :param bound: Integer - the maximum number of items in the work queue
     :param max_workers: Integer - the size of the thread pool
+    :param concurrency_controller: Optional - an object with a "limit" property which
+    caps the number of active workers below max_workers, re-read on every submit()
     """
 
-    def __init__(self, bound, max_workers):
+    def __init__(self, bound, max_workers, concurrency_controller=None):
         self._delegate = ThreadPoolExecutor(max_workers=max_workers)
-        self._semaphore = BoundedSemaphore(bound + max_workers)
+        self._bound = bound
+        self._max_workers = max_workers
+        self._concurrency_controller = concurrency_controller
+        self._in_flight = 0
+        self._slots_by_thread = {}
+        self._condition = threading.Condition()
 
     """See concurrent.futures.Executor#submit"""
 
     def submit(self, fn, *args, **kwargs):
-        self._semaphore.acquire()
-        try:
-            future = self._delegate.submit(fn, *args, **kwargs)
-        except:
-            self._semaphore.release()
-            raise
-        else:
-            future.add_done_callback(lambda x: self._semaphore.release())
-            return future
+        with self._condition:
+            while self._in_flight >= self._bound + self._active_workers():
+                self._condition.wait()
+            self._in_flight += 1
+            slot = _Slot()
+            try:
+                slot.future = self._delegate.submit(self._run, slot, fn, *args, **kwargs)
+            except:
+                self._release(slot)
+                raise
+            else:
+                slot.future.add_done_callback(lambda x: self._release(slot))
+                return slot.future
 
     """See concurrent.futures.Executor#shutdown"""
 
     def shutdown(self, wait=True):
         self._delegate.shutdown(wait)
+
+    def abandon(self, thread_ident):
+        """Frees the slot of a stuck worker thread and returns the future of its work item.
+        The stuck thread can not be taken back, so new work items go to a fresh thread pool.
+        """
+        with self._condition:
+            slot = self._slots_by_thread.pop(thread_ident, None)
+            if slot is None or slot.released:
+                return None
+            self._release(slot)
+            self._delegate.shutdown(wait=False)
+            self._delegate = ThreadPoolExecutor(max_workers=self._max_workers)
+            return slot.future
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def _run(self, slot, fn, *args, **kwargs):
+        thread_ident = threading.get_ident()
+        with self._condition:
+            self._slots_by_thread[thread_ident] = slot
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._condition:
+                if self._slots_by_thread.get(thread_ident) is slot:
+                    del self._slots_by_thread[thread_ident]
+
+    def _active_workers(self):
+        if self._concurrency_controller is None:
+            return self._max_workers
+        return max(1, min(self._max_workers, self._concurrency_controller.limit))
+
+    def _release(self, slot):
+        with self._condition:
+            if slot.released:
+                return
+            slot.released = True
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+
+class _Slot:
+    def __init__(self):
+        self.future = None
+        self.released = False
@@ -0,0 +1,196 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import math
+import threading
+import time
+
+
+class AdaptiveConcurrencyController:
+    """AdaptiveConcurrencyController tunes the number of concurrent work items
+    at runtime based on observed latency (gradient algorithm, see
+    https://github.com/Netflix/concurrency-limits).
+    A short term latency sample is compared against a long term baseline. While the
+    node keeps up the limit grows by a queue allowance of sqrt(limit), once latency
+    rises above the baseline the limit shrinks proportionally.
+    If the caller reports the number of completed items with its samples, throughput (items/sec) is measured
+    over windows of throughput_window_seconds for every limit. The limit only grows once the throughput at the
+    current limit was measured and is higher than the best throughput at any lower limit by throughput_gain,
+    so workers are not added once the node is saturated, even if latency stays flat. Measurements expire after
+    throughput_max_age_seconds, so that higher limits are probed again.
+    :param min_limit: Integer - the lower bound for the concurrency limit
+    :param max_limit: Integer - the upper bound for the concurrency limit
+    :param initial_limit: Integer - the limit to start with, defaults to min_limit
+    :param smoothing: Float - how fast the limit moves towards a new estimate
+    :param long_window: Integer - the number of samples in the latency baseline
+    :param tolerance: Float - how much latency may exceed the baseline before shrinking
+    :param backoff_ratio: Float - the multiplier applied to the limit on errors
+    :param throughput_window_seconds: Float - the duration of a throughput measurement
+    :param throughput_gain: Float - the relative throughput gain required to grow beyond a lower limit
+    :param throughput_max_age_seconds: Float - how long a throughput measurement is used
+    """
+
+    def __init__(self, min_limit, max_limit, initial_limit=None, smoothing=0.2, long_window=100,
+                 tolerance=1.5, backoff_ratio=0.9, throughput_window_seconds=5.0, throughput_gain=0.05,
+                 throughput_max_age_seconds=300.0, logger=None, clock=time.monotonic):
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError("min_limit must be positive and less or equal to max_limit")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.long_window = long_window
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.throughput_window_seconds = throughput_window_seconds
+        self.throughput_gain = throughput_gain
+        self.throughput_max_age_seconds = throughput_max_age_seconds
+        self.clock = clock
+
+        self._limit = float(initial_limit if initial_limit is not None else min_limit)
+        self._limit = min(max(self._limit, min_limit), max_limit)
+        self._long_latency = None
+        self._sample_count = 0
+        # limit -> (items/sec, time of the measurement)
+        self._throughput_by_limit = {}
+        self._tracks_throughput = False
+        self._window_start = None
+        self._window_items = 0
+        self._lock = threading.Lock()
+
+        if logger is not None:
+            self.logger = logger
+        else:
+            self.logger = logging.getLogger("AdaptiveConcurrencyController")
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def baseline_latency(self):
+        return self._long_latency
+
+    def throughput(self, limit):
+        """Returns the throughput measured at the given limit in items/sec, None if it was not measured"""
+        with self._lock:
+            measurement = self._throughput_by_limit.get(limit)
+            return measurement[0] if measurement is not None else None
+
+    def on_sample(self, latency, in_flight, completed_items=0):
+        """Records the latency of a successful work item and the number of items it completed.
+        Latency should be normalized by the caller (e.g. per block) so that samples
+        for different batch sizes are comparable.
+        """
+        if latency <= 0:
+            return
+
+        with self._lock:
+            if completed_items > 0:
+                self._tracks_throughput = True
+                self._track_throughput(completed_items)
+
+            self._sample_count += 1
+            if self._long_latency is None:
+                self._long_latency = latency
+            else:
+                window = min(self._sample_count, self.long_window)
+                self._long_latency += (latency - self._long_latency) / window
+
+            # The baseline drifts towards recent latency when the node got faster
+            if self._long_latency / latency > 2:
+                self._long_latency *= 0.95
+
+            # Don't grow the limit when it is not used, e.g. at the end of a range
+            if in_flight < self._limit / 2:
+                return
+
+            gradient = max(0.5, min(1.0, self.tolerance * self._long_latency / latency))
+            new_limit = self._limit * gradient + math.sqrt(self._limit)
+            new_limit = self._limit * (1 - self.smoothing) + new_limit * self.smoothing
+
+            if new_limit > self._limit and not self._throughput_grows():
+                new_limit = self._limit
+
+            self._set_limit(new_limit, latency)
+
+    def on_error(self):
+        """Shrinks the limit multiplicatively, errors usually mean the node is overloaded."""
+        with self._lock:
+            self._set_limit(self._limit * self.backoff_ratio, None)
+
+    def _track_throughput(self, completed_items):
+        now = self.clock()
+        if self._window_start is None:
+            self._window_start = now
+        self._window_items += completed_items
+        elapsed = now - self._window_start
+        if elapsed < self.throughput_window_seconds:
+            return
+        throughput = self._window_items / elapsed
+        limit = int(self._limit)
+        previous = self._throughput_by_limit.get(limit)
+        if previous is not None:
+            throughput = previous[0] * (1 - self.smoothing) + throughput * self.smoothing
+        self._throughput_by_limit[limit] = (throughput, now)
+        self._start_throughput_window(now)
+
+    def _start_throughput_window(self, now):
+        self._window_start = now
+        self._window_items = 0
+
+    def _throughput_grows(self):
+        """Returns False if the throughput at the current limit was not measured yet or is not higher than
+        at a lower limit"""
+        if not self._tracks_throughput:
+            return True
+        now = self.clock()
+        self._throughput_by_limit = {
+            limit: measurement for limit, measurement in self._throughput_by_limit.items()
+            if now - measurement[1] <= self.throughput_max_age_seconds}
+        limit = int(self._limit)
+        measurement = self._throughput_by_limit.get(limit)
+        if measurement is None:
+            return False
+        lower_throughputs = [throughput for lower_limit, (throughput, _) in self._throughput_by_limit.items()
+                             if lower_limit < limit]
+        return not lower_throughputs or measurement[0] > max(lower_throughputs) * (1 + self.throughput_gain)
+
+    def _set_limit(self, new_limit, latency):
+        new_limit = min(max(new_limit, self.min_limit), self.max_limit)
+        old_limit = int(self._limit)
+        self._limit = new_limit
+
+        if int(new_limit) != old_limit:
+            # throughput is measured from scratch at the new limit
+            if self._tracks_throughput:
+                self._start_throughput_window(self.clock())
+            if latency is None:
+                reason = "an error occurred"
+            else:
+                reason = "latency {:.3f}s, baseline {:.3f}s".format(latency, self._long_latency)
+            self.logger.info(
+                "Changing concurrency limit from {} to {} ({}).".format(old_limit, int(new_limit), reason)
+            )
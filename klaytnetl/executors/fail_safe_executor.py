@@ -22,27 +22,55 @@
 # SOFTWARE.
 
 
+import threading
+from concurrent.futures import wait
+
+
 class FailSafeExecutor:
     def __init__(self, delegate):
         self._delegate = delegate
         self._futures = []
+        self._lock = threading.Lock()
 
     def submit(self, fn, *args, **kwargs):
         self._check_completed_futures()
         future = self._delegate.submit(fn, *args, **kwargs)
-        self._futures.append(future)
+        with self._lock:
+            self._futures.append(future)
+
+        return future
 
+    def abandon(self, thread_ident):
+        """Forgets the work item of a stuck worker thread, see BoundedExecutor#abandon"""
+        future = self._delegate.abandon(thread_ident)
+        if future is not None:
+            with self._lock:
+                if future in self._futures:
+                    self._futures.remove(future)
         return future
 
+    def wait(self, timeout=None):
+        """Waits for submitted work items, returns True if all of them completed"""
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout=timeout)
+        self._check_completed_futures()
+        return len(not_done) == 0
+
     def shutdown(self):
         self._delegate.shutdown(wait=True)
-        self._check_completed_futures()
+        # work items of thread pools retired by abandon() are not waited for by the delegate
+        self.wait()
         assert len(self._futures) == 0
 
     def _check_completed_futures(self):
         """Fail safe in this case means fail fast. TODO: Add retry logic"""
-        for future in self._futures.copy():
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
             if future.done():
                 # Will throw an exception here if the future failed
                 future.result()
-                self._futures.remove(future)
+                with self._lock:
+                    if future in self._futures:
+                        self._futures.remove(future)
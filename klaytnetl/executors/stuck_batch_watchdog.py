@@ -0,0 +1,219 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class BatchAbandonedError(BaseException):
+    """Raised by StuckBatchWatchdog#check_abandoned in a worker thread whose batch was abandoned.
+    Derives from BaseException, like asyncio.CancelledError, so that it is not swallowed by "except Exception".
+    """
+
+
+class WatchedBatch:
+    def __init__(self, batch, work_handler, thread_ident, start_time, deadline_seconds, attempt):
+        self.batch = batch
+        self.work_handler = work_handler
+        self.thread_ident = thread_ident
+        self.start_time = start_time
+        self.deadline_seconds = deadline_seconds
+        self.attempt = attempt
+        self.exporting = False
+
+
+class StuckBatchWatchdog:
+    """StuckBatchWatchdog detects batches which run far longer than batches usually do.
+    The deadline of a batch is a multiple of the learned p95 latency per item. Overdue
+    batches are logged with the stack of their worker and handed to on_stuck, which is
+    expected to abandon the worker slot and re-submit the batch. Python threads can not
+    be killed, and exceptions injected into them could fire while library code holds a
+    lock or a pooled connection, so the worker is flagged as abandoned instead: it raises
+    BatchAbandonedError once it calls check_abandoned or start_exporting, e.g. after its
+    request returned or timed out. Batches which started exporting are waited for, so
+    that their output is never written twice.
+    :param on_stuck: Callable - called with the WatchedBatch of every abandoned batch
+    (BatchWorkExecutor sets its own)
+    :param deadline_multiplier: Float - the deadline of a batch in multiples of p95 latency
+    :param min_deadline_seconds: Float - the lower bound for deadlines
+    :param initial_deadline_seconds: Float - the deadline used until enough latency is sampled
+    :param max_abandons: Integer - a batch abandoned this many times is waited for instead
+    :param latency_window: Integer - the number of latency samples p95 is computed over
+    :param min_samples: Integer - the number of samples needed to use p95
+    :param check_interval_seconds: Float - how often running batches are checked
+    """
+
+    def __init__(self, on_stuck=None, deadline_multiplier=10, min_deadline_seconds=60, initial_deadline_seconds=600,
+                 max_abandons=3, latency_window=1000, min_samples=20, check_interval_seconds=5,
+                 clock=time.time, logger=None):
+        self.on_stuck = on_stuck
+        self.deadline_multiplier = deadline_multiplier
+        self.min_deadline_seconds = min_deadline_seconds
+        self.initial_deadline_seconds = initial_deadline_seconds
+        self.max_abandons = max_abandons
+        self.min_samples = min_samples
+        self.check_interval_seconds = check_interval_seconds
+        self.clock = clock
+
+        self._latencies = deque(maxlen=latency_window)
+        self._watched = {}
+        # threads whose batch was abandoned, they stop at their next check_abandoned
+        self._abandoned_threads = set()
+        self._stuck_count = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        if logger is not None:
+            self.logger = logger
+        else:
+            self.logger = logging.getLogger("StuckBatchWatchdog")
+
+    @property
+    def stuck_count(self):
+        return self._stuck_count
+
+    def on_sample(self, latency):
+        """Records the latency per item of a completed batch."""
+        self._latencies.append(latency)
+
+    def p95(self):
+        if len(self._latencies) < self.min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(math.ceil(len(latencies) * 0.95)) - 1)]
+
+    def deadline(self, batch_size, attempt=0):
+        p95 = self.p95()
+        if p95 is None:
+            deadline_seconds = self.initial_deadline_seconds
+        else:
+            deadline_seconds = max(self.min_deadline_seconds, self.deadline_multiplier * p95 * batch_size)
+        # a re-submitted batch may just be slow, give it more time on every attempt
+        return deadline_seconds * 2 ** attempt
+
+    def watch(self, batch, work_handler=None, attempt=0):
+        """Starts watching the batch executed by the current thread."""
+        watched_batch = WatchedBatch(batch, work_handler, threading.get_ident(), self.clock(),
+                                     self.deadline(len(batch), attempt), attempt)
+        with self._lock:
+            self._abandoned_threads.discard(watched_batch.thread_ident)
+            self._watched[watched_batch.thread_ident] = watched_batch
+        return watched_batch
+
+    def check_abandoned(self):
+        """Raises BatchAbandonedError if the batch executed by the current thread was abandoned.
+        Called by workers between requests."""
+        with self._lock:
+            if threading.get_ident() in self._abandoned_threads:
+                raise BatchAbandonedError()
+
+    def start_exporting(self):
+        """Marks the batch executed by the current thread as exporting, it is not abandoned afterwards.
+        Raises BatchAbandonedError if the batch was abandoned already, before anything is exported."""
+        thread_ident = threading.get_ident()
+        with self._lock:
+            if thread_ident in self._abandoned_threads:
+                raise BatchAbandonedError()
+            watched_batch = self._watched.get(thread_ident)
+            if watched_batch is not None:
+                watched_batch.exporting = True
+
+    def unwatch(self, watched_batch):
+        """Stops watching the batch, returns False if it was abandoned in the meantime."""
+        with self._lock:
+            if self._watched.get(watched_batch.thread_ident) is not watched_batch:
+                return False
+            del self._watched[watched_batch.thread_ident]
+            return True
+
+    def check(self):
+        """Abandons overdue batches, returns the abandoned ones."""
+        now = self.clock()
+        abandoned = []
+        with self._lock:
+            for watched_batch in list(self._watched.values()):
+                elapsed = now - watched_batch.start_time
+                if elapsed <= watched_batch.deadline_seconds:
+                    continue
+
+                self._stuck_count += 1
+                self.logger.warning(
+                    "Batch of size {} starting with {} is running for {:.0f}s, deadline {:.0f}s. "
+                    "Stack of the worker:\n{}".format(
+                        len(watched_batch.batch), watched_batch.batch[0] if watched_batch.batch else None,
+                        elapsed, watched_batch.deadline_seconds, format_thread_stack(watched_batch.thread_ident)))
+
+                if watched_batch.exporting:
+                    self.logger.warning("The batch started exporting, waiting for it.")
+                    watched_batch.deadline_seconds = float("inf")
+                    continue
+
+                if watched_batch.attempt >= self.max_abandons:
+                    self.logger.warning("The batch was abandoned {} times already, waiting for it.".format(
+                        watched_batch.attempt))
+                    watched_batch.deadline_seconds = float("inf")
+                    continue
+
+                # The slot is freed and the batch re-submitted before the worker stops,
+                # so that the failed future of the worker is never seen by the executor.
+                del self._watched[watched_batch.thread_ident]
+                if self.on_stuck is not None:
+                    self.on_stuck(watched_batch)
+                self._abandoned_threads.add(watched_batch.thread_ident)
+                abandoned.append(watched_batch)
+        return abandoned
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="StuckBatchWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.check_interval_seconds):
+            try:
+                self.check()
+            except Exception:
+                self.logger.exception("An exception occurred while checking running batches.")
+
+
+def format_thread_stack(thread_ident):
+    frame = sys._current_frames().get(thread_ident)
+    if frame is None:
+        return "  <not available>"
+    return "".join(traceback.format_stack(frame))
+
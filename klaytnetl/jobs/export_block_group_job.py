@@ -60,6 +60,8 @@ class ExportBlockGroupJob(BaseJob):
         export_receipts=True,
         export_logs=True,
         export_token_transfers=True,
+        min_workers=None,
+        batch_deadline_multiplier=None,
     ):
         validate_range(start_block, end_block)
         self.start_block = start_block
@@ -67,7 +69,12 @@ class ExportBlockGroupJob(BaseJob):
 
         self.batch_web3_provider = batch_web3_provider
 
-        self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        self.batch_work_executor = BatchWorkExecutor(
+            batch_size,
+            max_workers,
+            min_workers=min_workers,
+            batch_deadline_multiplier=batch_deadline_multiplier,
+        )
         self.item_exporter = item_exporter
 
         self.enrich = enrich
@@ -173,30 +180,31 @@ class ExportBlockGroupJob(BaseJob):
             self.block_mapper.json_dict_to_block(result) for result in results
         ]
 
+        self.batch_work_executor.start_exporting()
         for block in blocks:
             self._export_block(block)
 
     def _export_block(self, block):
         if self.export_blocks:
-            self.item_exporter.export_item(self.block_mapper.block_to_dict(block))
+            self.item_exporter.export_item(self.block_mapper.block_to_row(block))
 
         if self._require_transaction:
             for tx in block.transactions:
                 if self.export_transactions:
                     self.item_exporter.export_item(
-                        self.transaction_mapper.transaction_to_dict(tx)
+                        self.transaction_mapper.transaction_to_row(tx)
                     )
         if self._require_receipt:
             for receipt in block.receipts:
                 if self.export_receipts:
                     self.item_exporter.export_item(
-                        self.receipt_mapper.receipt_to_dict(receipt)
+                        self.receipt_mapper.receipt_to_row(receipt)
                     )
                 if self._require_receipt_log:
                     for log in receipt.logs:
                         if self.export_logs:
                             self.item_exporter.export_item(
-                                self.receipt_log_mapper.receipt_log_to_dict(log)
+                                self.receipt_log_mapper.receipt_log_to_row(log)
                             )
                         if self.export_token_transfers:
                             token_transfer = (
@@ -206,7 +214,7 @@ class ExportBlockGroupJob(BaseJob):
                             )
                             if token_transfer is not None:
                                 self.item_exporter.export_item(
-                                    self.token_transfer_mapper.token_transfer_to_dict(
+                                    self.token_transfer_mapper.token_transfer_to_row(
                                         token_transfer
                                     )
                                 )
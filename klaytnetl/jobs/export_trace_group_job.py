@@ -68,6 +68,8 @@ class ExportTraceGroupJob(BaseJob):
         export_traces=True,
         export_contracts=True,
         export_tokens=True,
+        min_workers=None,
+        batch_deadline_multiplier=None,
     ):
         validate_range(start_block, end_block)
         self.start_block = start_block
@@ -76,7 +78,12 @@ class ExportTraceGroupJob(BaseJob):
         self.batch_web3_provider = batch_web3_provider
 
         self.batch_work_executor = BatchWorkExecutor(
-            batch_size, max_workers, log_percentage_step, detailed_trace_log
+            batch_size,
+            max_workers,
+            log_percentage_step,
+            detailed_trace_log,
+            min_workers=min_workers,
+            batch_deadline_multiplier=batch_deadline_multiplier,
         )
         self.item_exporter = item_exporter
 
@@ -180,6 +187,8 @@ class ExportTraceGroupJob(BaseJob):
         num = 0
         trace_blocks = []
         while num < len(trace_blocks_rpc):
+            # an abandoned batch was re-submitted, its worker stops between requests
+            self.batch_work_executor.check_abandoned()
             chunk = trace_blocks_rpc[num : num + 20]
             num = num + 20
             trace_blocks_response = self.batch_web3_provider.make_batch_request(
@@ -200,6 +209,7 @@ class ExportTraceGroupJob(BaseJob):
             )
             trace_blocks.extend(trace_blocks_chunk)
 
+        self.batch_work_executor.start_exporting()
         trace_count = 0
         for raw_trace_block in trace_blocks:
             block_number = raw_trace_block.get("block_number")
@@ -215,7 +225,7 @@ class ExportTraceGroupJob(BaseJob):
 
                 if self.export_traces:
                     self.item_exporter.export_item(
-                        self.trace_mapper.trace_to_dict(trace)
+                        self.trace_mapper.trace_to_row(trace)
                     )
 
                 if self._require_contract and is_contract_creation_trace(trace):
@@ -136,7 +136,7 @@ class ExportTracesJob(BaseJob):
             )
 
             for trace in self.trace_mapper.trace_block_to_trace(trace_block):
-                self.item_exporter.export_item(self.trace_mapper.trace_to_dict(trace))
+                self.item_exporter.export_item(self.trace_mapper.trace_to_row(trace))
 
     def _end(self):
         self.batch_work_executor.shutdown()
@@ -22,8 +22,22 @@
 # SOFTWARE.
 
 
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import (
+    ShardedFileItemExporter,
+)
 from blockchainetl.jobs.exporters.singlefile_item_exporter import SinglefileItemExporter
 from blockchainetl.jobs.exporters.multifile_item_exporter import MultifileItemExporter
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import is_rolling_output
+from blockchainetl.jobs.exporters.parquet_item_exporter import (
+    COLUMNAR_FILE_FORMATS,
+    ParquetItemExporter,
+)
+from blockchainetl.jobs.exporters.sqlite_item_exporter import (
+    SqliteItemExporter,
+    is_sqlite_output,
+)
+from klaytnetl.jobs.exporters.parquet_column_types import COLUMN_TYPE_MAPPING
+from klaytnetl.jobs.exporters.primary_keys import PRIMARY_KEY_MAPPING
 
 BLOCK_FIELDS_TO_EXPORT = [
     "number",
@@ -154,9 +168,73 @@ def enrich_block_group_item_exporter(
     token_transfers_output=None,
     **kwargs
 ):
-    maxlines = kwargs.get("file_maxlines", None)
+    if is_sqlite_output(
+        blocks_output,
+        transactions_output,
+        receipts_output,
+        logs_output,
+        token_transfers_output,
+    ):
+        return SqliteItemExporter(
+            output_mapping={
+                "block": blocks_output,
+                "transaction": transactions_output,
+                "receipt": receipts_output,
+                "log": logs_output,
+                "token_transfer": token_transfers_output,
+            },
+            field_mapping={
+                "block": BLOCK_FIELDS_TO_EXPORT,
+                "transaction": TRANSACTION_FIELDS_TO_EXPORT,
+                "receipt": RECEIPT_FIELDS_TO_EXPORT,
+                "log": LOG_FIELDS_TO_EXPORT,
+                "token_transfer": TOKEN_TRANSFER_FIELDS_TO_EXPORT,
+            },
+            column_type_mapping=COLUMN_TYPE_MAPPING,
+            primary_key_mapping=PRIMARY_KEY_MAPPING,
+            **kwargs
+        )
+
+    if kwargs.get("file_format") in COLUMNAR_FILE_FORMATS:
+        return ParquetItemExporter(
+            filename_mapping={
+                "block": blocks_output,
+                "transaction": transactions_output,
+                "receipt": receipts_output,
+                "log": logs_output,
+                "token_transfer": token_transfers_output,
+            },
+            field_mapping={
+                "block": BLOCK_FIELDS_TO_EXPORT,
+                "transaction": TRANSACTION_FIELDS_TO_EXPORT,
+                "receipt": RECEIPT_FIELDS_TO_EXPORT,
+                "log": LOG_FIELDS_TO_EXPORT,
+                "token_transfer": TOKEN_TRANSFER_FIELDS_TO_EXPORT,
+            },
+            column_type_mapping=COLUMN_TYPE_MAPPING,
+            **kwargs
+        )
+
+    if kwargs.get("shard_size"):
+        return ShardedFileItemExporter(
+            dirname_mapping={
+                "block": blocks_output,
+                "transaction": transactions_output,
+                "receipt": receipts_output,
+                "log": logs_output,
+                "token_transfer": token_transfers_output,
+            },
+            field_mapping={
+                "block": BLOCK_FIELDS_TO_EXPORT,
+                "transaction": TRANSACTION_FIELDS_TO_EXPORT,
+                "receipt": RECEIPT_FIELDS_TO_EXPORT,
+                "log": LOG_FIELDS_TO_EXPORT,
+                "token_transfer": TOKEN_TRANSFER_FIELDS_TO_EXPORT,
+            },
+            **kwargs
+        )
 
-    if maxlines is None or maxlines <= 0:
+    if not is_rolling_output(**kwargs):
         return SinglefileItemExporter(
             filename_mapping={
                 "block": blocks_output,
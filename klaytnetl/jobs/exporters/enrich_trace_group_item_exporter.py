@@ -22,8 +22,22 @@
 # SOFTWARE.
 
 
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import (
+    ShardedFileItemExporter,
+)
 from blockchainetl.jobs.exporters.singlefile_item_exporter import SinglefileItemExporter
 from blockchainetl.jobs.exporters.multifile_item_exporter import MultifileItemExporter
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import is_rolling_output
+from blockchainetl.jobs.exporters.parquet_item_exporter import (
+    COLUMNAR_FILE_FORMATS,
+    ParquetItemExporter,
+)
+from blockchainetl.jobs.exporters.sqlite_item_exporter import (
+    SqliteItemExporter,
+    is_sqlite_output,
+)
+from klaytnetl.jobs.exporters.parquet_column_types import COLUMN_TYPE_MAPPING
+from klaytnetl.jobs.exporters.primary_keys import PRIMARY_KEY_MAPPING
 
 TRACE_FIELDS_TO_EXPORT = [
     "block_number",
@@ -94,9 +108,55 @@ TOKEN_FIELDS_TO_EXPORT = [
 def enrich_trace_group_item_exporter(
     traces_output=None, contracts_output=None, tokens_output=None, **kwargs
 ):
-    maxlines = kwargs.get("file_maxlines", None)
+    if is_sqlite_output(traces_output, contracts_output, tokens_output):
+        return SqliteItemExporter(
+            output_mapping={
+                "trace": traces_output,
+                "contract": contracts_output,
+                "token": tokens_output,
+            },
+            field_mapping={
+                "trace": TRACE_FIELDS_TO_EXPORT,
+                "contract": CONTRACT_FIELDS_TO_EXPORT,
+                "token": TOKEN_FIELDS_TO_EXPORT,
+            },
+            column_type_mapping=COLUMN_TYPE_MAPPING,
+            primary_key_mapping=PRIMARY_KEY_MAPPING,
+            **kwargs
+        )
+
+    if kwargs.get("file_format") in COLUMNAR_FILE_FORMATS:
+        return ParquetItemExporter(
+            filename_mapping={
+                "trace": traces_output,
+                "contract": contracts_output,
+                "token": tokens_output,
+            },
+            field_mapping={
+                "trace": TRACE_FIELDS_TO_EXPORT,
+                "contract": CONTRACT_FIELDS_TO_EXPORT,
+                "token": TOKEN_FIELDS_TO_EXPORT,
+            },
+            column_type_mapping=COLUMN_TYPE_MAPPING,
+            **kwargs
+        )
+
+    if kwargs.get("shard_size"):
+        return ShardedFileItemExporter(
+            dirname_mapping={
+                "trace": traces_output,
+                "contract": contracts_output,
+                "token": tokens_output,
+            },
+            field_mapping={
+                "trace": TRACE_FIELDS_TO_EXPORT,
+                "contract": CONTRACT_FIELDS_TO_EXPORT,
+                "token": TOKEN_FIELDS_TO_EXPORT,
+            },
+            **kwargs
+        )
 
-    if maxlines is None or maxlines <= 0:
+    if not is_rolling_output(**kwargs):
         return SinglefileItemExporter(
             filename_mapping={
                 "trace": traces_output,
@@ -0,0 +1,230 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Column types of Parquet outputs, kept in line with schemas/*.py (see tests).
+
+BLOCK_COLUMN_TYPES = {
+    "number": "INT64",
+    "hash": "STRING",
+    "parent_hash": "STRING",
+    "logs_bloom": "STRING",
+    "transactions_root": "STRING",
+    "state_root": "STRING",
+    "receipts_root": "STRING",
+    "size": "INT64",
+    "extra_data": "STRING",
+    "gas_used": "DECIMAL",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "transaction_count": "INT64",
+    "block_score": "DECIMAL",
+    "total_block_score": "DECIMAL",
+    "governance_data": "STRING",
+    "vote_data": "STRING",
+    "committee": ["STRING"],
+    "proposer": "STRING",
+    "reward_address": "STRING",
+    "base_fee_per_gas": "DECIMAL",
+}
+
+TRANSACTION_COLUMN_TYPES = {
+    "hash": "STRING",
+    "nonce": "INT64",
+    "block_hash": "STRING",
+    "block_number": "INT64",
+    "transaction_index": "INT64",
+    "from_address": "STRING",
+    "to_address": "STRING",
+    "value": "DECIMAL",
+    "gas": "DECIMAL",
+    "gas_price": "DECIMAL",
+    "input": "STRING",
+    "fee_payer": "STRING",
+    "fee_payer_signatures": [{"V": "STRING", "R": "STRING", "S": "STRING"}],
+    "fee_ratio": "INT64",
+    "sender_tx_hash": "STRING",
+    "signatures": [{"V": "STRING", "R": "STRING", "S": "STRING"}],
+    "tx_type": "STRING",
+    "tx_type_int": "INT64",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "receipt_gas_used": "DECIMAL",
+    "receipt_contract_address": "STRING",
+    "receipt_status": "INT64",
+    "max_priority_fee_per_gas": "DECIMAL",
+    "max_fee_per_gas": "DECIMAL",
+    "access_list": [{"address": "STRING", "storage_keys": ["STRING"]}],
+}
+
+RECEIPT_COLUMN_TYPES = {
+    "transaction_hash": "STRING",
+    "transaction_index": "INT64",
+    "block_hash": "STRING",
+    "block_number": "INT64",
+    "gas": "DECIMAL",
+    "gas_price": "DECIMAL",
+    "gas_used": "DECIMAL",
+    "effective_gas_price": "DECIMAL",
+    "contract_address": "STRING",
+    "logs_bloom": "STRING",
+    "nonce": "INT64",
+    "fee_payer": "STRING",
+    "fee_payer_signatures": [{"V": "STRING", "R": "STRING", "S": "STRING"}],
+    "fee_ratio": "INT64",
+    "code_format": "STRING",
+    "human_readable": "BOOL",
+    "tx_error": "STRING",
+    "key": "STRING",
+    "input_data": "STRING",
+    "from_address": "STRING",
+    "to_address": "STRING",
+    "type_name": "STRING",
+    "type_int": "INT64",
+    "sender_tx_hash": "STRING",
+    "signatures": [{"V": "STRING", "R": "STRING", "S": "STRING"}],
+    "status": "INT64",
+    "value": "STRING",
+    "input_json": {
+        "blockCount": "INT64",
+        "blockHash": "STRING",
+        "blockNumber": "INT64",
+        "id": "STRING",
+        "parentHash": "STRING",
+        "receiptsRoot": "STRING",
+        "stateRoot": "STRING",
+        "transactionsRoot": "STRING",
+        "txCount": "INT64",
+    },
+    "access_list": [{"address": "STRING", "storage_keys": ["STRING"]}],
+    "chain_id": "INT64",
+    "max_priority_fee_per_gas": "DECIMAL",
+    "max_fee_per_gas": "DECIMAL",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+}
+
+LOG_COLUMN_TYPES = {
+    "block_number": "INT64",
+    "block_hash": "STRING",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "transaction_hash": "STRING",
+    "transaction_index": "INT64",
+    "transaction_receipt_status": "INT64",
+    "log_index": "INT64",
+    "address": "STRING",
+    "data": "STRING",
+    "topics": ["STRING"],
+}
+
+TOKEN_TRANSFER_COLUMN_TYPES = {
+    "token_address": "STRING",
+    "from_address": "STRING",
+    "to_address": "STRING",
+    "value": "STRING",
+    "block_hash": "STRING",
+    "block_number": "INT64",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "transaction_hash": "STRING",
+    "transaction_index": "INT64",
+    "transaction_receipt_status": "INT64",
+    "log_index": "INT64",
+}
+
+TRACE_COLUMN_TYPES = {
+    "block_number": "INT64",
+    "block_hash": "STRING",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "transaction_hash": "STRING",
+    "transaction_index": "INT64",
+    "transaction_receipt_status": "INT64",
+    "from_address": "STRING",
+    "to_address": "STRING",
+    "value": "DECIMAL",
+    "input": "STRING",
+    "output": "STRING",
+    "trace_type": "STRING",
+    "call_type": "STRING",
+    "gas": "DECIMAL",
+    "gas_used": "DECIMAL",
+    "subtraces": "INT64",
+    "trace_address": ["STRING"],
+    "error": "STRING",
+    "status": "INT64",
+    "trace_index": "INT64",
+}
+
+CONTRACT_COLUMN_TYPES = {
+    "address": "STRING",
+    "bytecode": "STRING",
+    "function_sighashes": ["STRING"],
+    "is_erc20": "BOOLEAN",
+    "is_erc721": "BOOLEAN",
+    "is_erc1155": "BOOLEAN",
+    "block_number": "INT64",
+    "block_hash": "STRING",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "transaction_hash": "STRING",
+    "transaction_index": "INT64",
+    "transaction_receipt_status": "INT64",
+    "trace_index": "INT64",
+    "trace_status": "INT64",
+    "creator_address": "STRING",
+}
+
+TOKEN_COLUMN_TYPES = {
+    "address": "STRING",
+    "symbol": "STRING",
+    "name": "STRING",
+    "decimals": "INT64",
+    "total_supply": "STRING",
+    "function_sighashes": ["STRING"],
+    "is_erc20": "BOOLEAN",
+    "is_erc721": "BOOLEAN",
+    "is_erc1155": "BOOLEAN",
+    "block_number": "INT64",
+    "block_hash": "STRING",
+    "block_timestamp": "TIMESTAMP",
+    "block_unix_timestamp": "FLOAT64",
+    "transaction_hash": "STRING",
+    "transaction_index": "INT64",
+    "transaction_receipt_status": "INT64",
+    "trace_index": "INT64",
+    "trace_status": "INT64",
+    "creator_address": "STRING",
+}
+
+COLUMN_TYPE_MAPPING = {
+    "block": BLOCK_COLUMN_TYPES,
+    "transaction": TRANSACTION_COLUMN_TYPES,
+    "receipt": RECEIPT_COLUMN_TYPES,
+    "log": LOG_COLUMN_TYPES,
+    "token_transfer": TOKEN_TRANSFER_COLUMN_TYPES,
+    "trace": TRACE_COLUMN_TYPES,
+    "contract": CONTRACT_COLUMN_TYPES,
+    "token": TOKEN_COLUMN_TYPES,
+}
@@ -24,6 +24,7 @@
 
 from blockchainetl.jobs.exporters.singlefile_item_exporter import SinglefileItemExporter
 from blockchainetl.jobs.exporters.multifile_item_exporter import MultifileItemExporter
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import is_rolling_output
 
 FIELDS_TO_EXPORT = [
     "block_number",
@@ -47,9 +48,7 @@ FIELDS_TO_EXPORT = [
 
 
 def raw_traces_item_exporter(traces_output, **kwargs):
-    maxlines = kwargs.get("file_maxlines", None)
-
-    if maxlines is None or maxlines <= 0:
+    if not is_rolling_output(**kwargs):
         return SinglefileItemExporter(
             filename_mapping={
                 "trace": traces_output,
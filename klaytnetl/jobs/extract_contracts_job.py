@@ -30,6 +30,9 @@ from klaytnetl.mappers.contract_mapper import KlaytnContractMapper
 from klaytnetl.service.klaytn_contract_service import KlaytnContractService
 from klaytnetl.utils import to_int_or_none
 
+# Fields of traces the job reads, the other columns of Arrow inputs are not read
+TRACE_FIELDS_TO_READ = ["block_number", "to_address", "output", "trace_type", "error"]
+
 
 # Extract contracts
 class ExtractContractsJob(BaseJob):
@@ -28,6 +28,19 @@ from klaytnetl.mappers.token_transfer_mapper import KlaytnTokenTransferMapper
 from klaytnetl.mappers.receipt_log_mapper import KlaytnReceiptLogMapper
 from klaytnetl.service.token_transfer_extractor import KlaytnTokenTransferExtractor
 
+# Fields of logs the job reads, the other columns of Arrow inputs are not read
+LOG_FIELDS_TO_READ = [
+    "log_index",
+    "transaction_hash",
+    "transaction_index",
+    "block_hash",
+    "block_number",
+    "address",
+    "data",
+    "topics",
+    "removed",
+]
+
 
 class ExtractTokenTransfersJob(BaseJob):
     def __init__(self, logs_iterable, batch_size, max_workers, item_exporter):
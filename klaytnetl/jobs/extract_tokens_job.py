@@ -24,6 +24,15 @@
 
 from klaytnetl.jobs.export_tokens_job import ExportTokensJob
 
+# Fields of contracts the job reads, the other columns of Arrow inputs are not read
+CONTRACT_FIELDS_TO_READ = [
+    "address",
+    "block_number",
+    "is_erc20",
+    "is_erc721",
+    "is_erc1155",
+]
+
 
 class ExtractTokensJob(ExportTokensJob):
     def __init__(self, web3, item_exporter, contracts_iterable, max_workers):
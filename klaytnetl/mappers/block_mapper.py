@@ -26,6 +26,7 @@ import logging
 
 from klaytnetl.domain.block import KlaytnBlock, KlaytnRawBlock
 
+from blockchainetl.row import row_type
 from klaytnetl.mappers.base import BaseMapper
 from klaytnetl.mixin.enrichable_mixin import EnrichableMixin
 from klaytnetl.mappers.transaction_mapper import KlaytnTransactionMapper
@@ -35,6 +36,35 @@ from klaytnetl.utils import hex_to_dec, is_full_block
 from typing import Union
 
 
+BlockRow = row_type(
+    "block",
+    [
+        "number",
+        "hash",
+        "parent_hash",
+        "logs_bloom",
+        "transactions_root",
+        "state_root",
+        "receipts_root",
+        "size",
+        "extra_data",
+        "gas_used",
+        "block_timestamp",
+        "block_unix_timestamp",
+        "transaction_count",
+        # Klaytn additional properties
+        "block_score",
+        "total_block_score",
+        "governance_data",
+        "vote_data",
+        "committee",
+        "proposer",
+        "reward_address",
+        "base_fee_per_gas",
+    ],
+)
+
+
 class KlaytnBlockMapper(BaseMapper, EnrichableMixin):
     def __init__(
         self,
@@ -141,35 +171,36 @@ class KlaytnBlockMapper(BaseMapper, EnrichableMixin):
 
         return _block if not self.enrich else KlaytnBlock.enrich(_block)
 
-    def block_to_dict(
+    def block_to_row(
         self, block: Union[KlaytnBlock, KlaytnRawBlock], serializable=True
-    ) -> dict:
-        block_dict = {
-            "type": "block",
-            "number": block.number,
-            "hash": block.hash,
-            "parent_hash": block.parent_hash,
-            "logs_bloom": block.logs_bloom,
-            "transactions_root": block.transactions_root,
-            "state_root": block.state_root,
-            "receipts_root": block.receipts_root,
-            "size": block.size,
-            "extra_data": block.extra_data,
-            "gas_used": int(block.gas_used) if serializable else block.gas_used,
-            "block_timestamp": block.timestamp.isoformat()
+    ) -> BlockRow:
+        return BlockRow(
+            number=block.number,
+            hash=block.hash,
+            parent_hash=block.parent_hash,
+            logs_bloom=block.logs_bloom,
+            transactions_root=block.transactions_root,
+            state_root=block.state_root,
+            receipts_root=block.receipts_root,
+            size=block.size,
+            extra_data=block.extra_data,
+            gas_used=int(block.gas_used) if serializable else block.gas_used,
+            block_timestamp=block.timestamp.isoformat()
             if serializable
             else block.timestamp,
-            "block_unix_timestamp": block.timestamp.timestamp(),
-            "transaction_count": block.transaction_count,
-            # Klaytn additional properties
-            "block_score": block.block_score,
-            "total_block_score": block.total_block_score,
-            "governance_data": block.governance_data,
-            "vote_data": block.vote_data,
-            "committee": block.committee,
-            "proposer": block.proposer,
-            "reward_address": block.reward_address,
-            "base_fee_per_gas": block.base_fee_per_gas,
-        }
-
-        return block_dict
+            block_unix_timestamp=block.timestamp.timestamp(),
+            transaction_count=block.transaction_count,
+            block_score=block.block_score,
+            total_block_score=block.total_block_score,
+            governance_data=block.governance_data,
+            vote_data=block.vote_data,
+            committee=block.committee,
+            proposer=block.proposer,
+            reward_address=block.reward_address,
+            base_fee_per_gas=block.base_fee_per_gas,
+        )
+
+    def block_to_dict(
+        self, block: Union[KlaytnBlock, KlaytnRawBlock], serializable=True
+    ) -> dict:
+        return self.block_to_row(block, serializable=serializable).to_dict()
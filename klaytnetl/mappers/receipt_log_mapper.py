@@ -23,6 +23,7 @@
 
 
 from klaytnetl.domain.receipt_log import KlaytnReceiptLog, KlaytnRawReceiptLog
+from blockchainetl.row import row_type
 from klaytnetl.mappers.base import BaseMapper
 from klaytnetl.mixin.enrichable_mixin import EnrichableMixin
 from klaytnetl.utils import hex_to_dec
@@ -31,6 +32,27 @@ from datetime import datetime
 from typing import Union
 
 
+LOG_ROW_FIELDS = [
+    "log_index",
+    "transaction_hash",
+    "transaction_index",
+    "block_hash",
+    "block_number",
+    "address",
+    "data",
+    "topics",
+    "removed",
+]
+
+LogRow = row_type("log", LOG_ROW_FIELDS)
+EnrichedLogRow = row_type(
+    "log",
+    LOG_ROW_FIELDS
+    + ["block_timestamp", "block_unix_timestamp", "transaction_receipt_status"],
+    name="EnrichedLogRow",
+)
+
+
 class KlaytnReceiptLogMapper(BaseMapper, EnrichableMixin):
     def __init__(self, enrich=False):
         super(KlaytnReceiptLogMapper, self).__init__(enrich=enrich)
@@ -65,36 +87,41 @@ class KlaytnReceiptLogMapper(BaseMapper, EnrichableMixin):
             )
         )
 
-    def receipt_log_to_dict(
+    def receipt_log_to_row(
         self,
         receipt_log: Union[KlaytnRawReceiptLog, KlaytnReceiptLog],
         serializable=True,
-    ) -> dict:
-        log_dict = {
-            "type": "log",
-            "log_index": receipt_log.log_index,
-            "transaction_hash": receipt_log.transaction_hash,
-            "transaction_index": receipt_log.transaction_index,
-            "block_hash": receipt_log.block_hash,
-            "block_number": receipt_log.block_number,
-            "address": receipt_log.address,
-            "data": receipt_log.data,
-            "topics": receipt_log.topics,
-            "removed": receipt_log.removed,
-        }
-
-        if self.enrich and isinstance(receipt_log, KlaytnReceiptLog):
-            log_dict["block_timestamp"] = (
+    ) -> Union[LogRow, EnrichedLogRow]:
+        enriched = self.enrich and isinstance(receipt_log, KlaytnReceiptLog)
+        row = (EnrichedLogRow if enriched else LogRow)(
+            log_index=receipt_log.log_index,
+            transaction_hash=receipt_log.transaction_hash,
+            transaction_index=receipt_log.transaction_index,
+            block_hash=receipt_log.block_hash,
+            block_number=receipt_log.block_number,
+            address=receipt_log.address,
+            data=receipt_log.data,
+            topics=receipt_log.topics,
+            removed=receipt_log.removed,
+        )
+
+        if enriched:
+            row.block_timestamp = (
                 receipt_log.block_timestamp.isoformat()
                 if serializable
                 else receipt_log.block_timestamp
             )
-            log_dict["block_unix_timestamp"] = receipt_log.block_timestamp.timestamp()
-            log_dict[
-                "transaction_receipt_status"
-            ] = receipt_log.transaction_receipt_status
+            row.block_unix_timestamp = receipt_log.block_timestamp.timestamp()
+            row.transaction_receipt_status = receipt_log.transaction_receipt_status
 
-        return log_dict
+        return row
+
+    def receipt_log_to_dict(
+        self,
+        receipt_log: Union[KlaytnRawReceiptLog, KlaytnReceiptLog],
+        serializable=True,
+    ) -> dict:
+        return self.receipt_log_to_row(receipt_log, serializable=serializable).to_dict()
 
     def web3_dict_to_receipt_log(
         self, dict
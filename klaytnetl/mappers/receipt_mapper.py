@@ -26,6 +26,7 @@ import logging
 
 from klaytnetl.domain.receipt import KlaytnRawReceipt, KlaytnReceipt
 
+from blockchainetl.row import row_type
 from klaytnetl.mappers.base import BaseMapper
 from klaytnetl.mixin.enrichable_mixin import EnrichableMixin
 from klaytnetl.mappers.receipt_log_mapper import KlaytnReceiptLogMapper
@@ -34,6 +35,49 @@ from klaytnetl.utils import hex_to_dec, to_normalized_address
 from typing import Union
 
 
+RECEIPT_ROW_FIELDS = [
+    "transaction_hash",
+    "transaction_index",
+    "block_hash",
+    "block_number",
+    "contract_address",
+    "status",
+    "gas",
+    "gas_price",
+    "gas_used",
+    "effective_gas_price",
+    "logs_bloom",
+    "nonce",
+    "fee_payer",
+    "fee_payer_signatures",
+    "fee_ratio",
+    "code_format",
+    "human_readable",
+    "tx_error",
+    "key",
+    "input_data",
+    "from_address",
+    "to_address",
+    "type_name",
+    "type_int",
+    "sender_tx_hash",
+    "signatures",
+    "value",
+    "input_json",
+    "access_list",
+    "chain_id",
+    "max_priority_fee_per_gas",
+    "max_fee_per_gas",
+]
+
+ReceiptRow = row_type("receipt", RECEIPT_ROW_FIELDS)
+EnrichedReceiptRow = row_type(
+    "receipt",
+    RECEIPT_ROW_FIELDS + ["block_unix_timestamp", "block_timestamp"],
+    name="EnrichedReceiptRow",
+)
+
+
 class KlaytnReceiptMapper(BaseMapper, EnrichableMixin):
     def __init__(self, receipt_log_mapper=None, enrich=False):
         super(KlaytnReceiptMapper, self).__init__(enrich=enrich)
@@ -116,49 +160,50 @@ class KlaytnReceiptMapper(BaseMapper, EnrichableMixin):
 
         return receipt
 
-    def receipt_to_dict(self, receipt: Union[KlaytnRawReceipt, KlaytnReceipt]) -> dict:
-        receipt_dict = {
-            "type": "receipt",
-            "transaction_hash": receipt.transaction_hash,
-            "transaction_index": receipt.transaction_index,
-            "block_hash": receipt.block_hash,
-            "block_number": receipt.block_number,
-            "contract_address": receipt.contract_address,
-            "status": receipt.status,
-            "gas": receipt.gas,
-            "gas_price": receipt.gas_price,
-            "gas_used": receipt.gas_used,
-            "effective_gas_price": receipt.effective_gas_price,
-            "logs_bloom": receipt.logs_bloom,
-            "nonce": receipt.nonce,
-            "fee_payer": receipt.fee_payer,
-            "fee_payer_signatures": receipt.fee_payer_signatures,
-            "fee_ratio": receipt.fee_ratio,
-            "code_format": receipt.code_format,
-            "human_readable": receipt.human_readable,
-            "tx_error": receipt.tx_error,
-            "key": receipt.key,
-            "input_data": receipt.input_data,
-            "from_address": receipt.from_address,
-            "to_address": receipt.to_address,
-            "type_name": receipt.type_name,
-            "type_int": receipt.type_int,
-            "sender_tx_hash": receipt.sender_tx_hash,
-            "signatures": receipt.signatures,
-            "value": receipt.value,
-            "input_json": receipt.input_json,
-            "access_list": receipt.access_list,
-            "chain_id": receipt.chain_id,
-            "max_priority_fee_per_gas": receipt.max_priority_fee_per_gas,
-            "max_fee_per_gas": receipt.max_fee_per_gas,
-        }
-
-        if self.enrich and isinstance(receipt, KlaytnReceipt):
-            receipt_dict["block_unix_timestamp"] = (
-                receipt.block_timestamp.timestamp()
-            )
-            receipt_dict["block_timestamp"] = (
-                receipt.block_timestamp.isoformat()
-            )
+    def receipt_to_row(
+        self, receipt: Union[KlaytnRawReceipt, KlaytnReceipt]
+    ) -> Union[ReceiptRow, EnrichedReceiptRow]:
+        enriched = self.enrich and isinstance(receipt, KlaytnReceipt)
+        row = (EnrichedReceiptRow if enriched else ReceiptRow)(
+            transaction_hash=receipt.transaction_hash,
+            transaction_index=receipt.transaction_index,
+            block_hash=receipt.block_hash,
+            block_number=receipt.block_number,
+            contract_address=receipt.contract_address,
+            status=receipt.status,
+            gas=receipt.gas,
+            gas_price=receipt.gas_price,
+            gas_used=receipt.gas_used,
+            effective_gas_price=receipt.effective_gas_price,
+            logs_bloom=receipt.logs_bloom,
+            nonce=receipt.nonce,
+            fee_payer=receipt.fee_payer,
+            fee_payer_signatures=receipt.fee_payer_signatures,
+            fee_ratio=receipt.fee_ratio,
+            code_format=receipt.code_format,
+            human_readable=receipt.human_readable,
+            tx_error=receipt.tx_error,
+            key=receipt.key,
+            input_data=receipt.input_data,
+            from_address=receipt.from_address,
+            to_address=receipt.to_address,
+            type_name=receipt.type_name,
+            type_int=receipt.type_int,
+            sender_tx_hash=receipt.sender_tx_hash,
+            signatures=receipt.signatures,
+            value=receipt.value,
+            input_json=receipt.input_json,
+            access_list=receipt.access_list,
+            chain_id=receipt.chain_id,
+            max_priority_fee_per_gas=receipt.max_priority_fee_per_gas,
+            max_fee_per_gas=receipt.max_fee_per_gas,
+        )
+
+        if enriched:
+            row.block_unix_timestamp = receipt.block_timestamp.timestamp()
+            row.block_timestamp = receipt.block_timestamp.isoformat()
 
-        return receipt_dict
+        return row
+
+    def receipt_to_dict(self, receipt: Union[KlaytnRawReceipt, KlaytnReceipt]) -> dict:
+        return self.receipt_to_row(receipt).to_dict()
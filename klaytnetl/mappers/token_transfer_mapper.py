@@ -23,11 +23,33 @@
 
 
 from klaytnetl.domain.token_transfer import KlaytnRawTokenTransfer, KlaytnTokenTransfer
+from blockchainetl.row import row_type
 from klaytnetl.mappers.base import BaseMapper
 from klaytnetl.mixin.enrichable_mixin import EnrichableMixin
 from typing import Union
 
 
+TOKEN_TRANSFER_ROW_FIELDS = [
+    "token_address",
+    "from_address",
+    "to_address",
+    "value",
+    "log_index",
+    "transaction_hash",
+    "transaction_index",
+    "block_hash",
+    "block_number",
+]
+
+TokenTransferRow = row_type("token_transfer", TOKEN_TRANSFER_ROW_FIELDS)
+EnrichedTokenTransferRow = row_type(
+    "token_transfer",
+    TOKEN_TRANSFER_ROW_FIELDS
+    + ["block_timestamp", "block_unix_timestamp", "transaction_receipt_status"],
+    name="EnrichedTokenTransferRow",
+)
+
+
 class KlaytnTokenTransferMapper(BaseMapper, EnrichableMixin):
     def __init__(self, enrich=False):
         super(KlaytnTokenTransferMapper, self).__init__(enrich=enrich)
@@ -35,37 +57,40 @@ class KlaytnTokenTransferMapper(BaseMapper, EnrichableMixin):
     def register(self):
         pass
 
-    def token_transfer_to_dict(
+    def token_transfer_to_row(
         self,
         token_transfer: Union[KlaytnRawTokenTransfer, KlaytnTokenTransfer],
         serializable=True,
-    ):
-        token_transfer_dict = {
-            "type": "token_transfer",
-            "token_address": token_transfer.token_address,
-            "from_address": token_transfer.from_address,
-            "to_address": token_transfer.to_address,
-            "value": int(token_transfer.value)
-            if serializable
-            else token_transfer.value,
-            "log_index": token_transfer.log_index,
-            "transaction_hash": token_transfer.transaction_hash,
-            "transaction_index": token_transfer.transaction_index,
-            "block_hash": token_transfer.block_hash,
-            "block_number": token_transfer.block_number,
-        }
+    ) -> Union[TokenTransferRow, EnrichedTokenTransferRow]:
+        enriched = self.enrich and isinstance(token_transfer, KlaytnTokenTransfer)
+        row = (EnrichedTokenTransferRow if enriched else TokenTransferRow)(
+            token_address=token_transfer.token_address,
+            from_address=token_transfer.from_address,
+            to_address=token_transfer.to_address,
+            value=int(token_transfer.value) if serializable else token_transfer.value,
+            log_index=token_transfer.log_index,
+            transaction_hash=token_transfer.transaction_hash,
+            transaction_index=token_transfer.transaction_index,
+            block_hash=token_transfer.block_hash,
+            block_number=token_transfer.block_number,
+        )
 
-        if self.enrich and isinstance(token_transfer, KlaytnTokenTransfer):
-            token_transfer_dict["block_timestamp"] = (
+        if enriched:
+            row.block_timestamp = (
                 token_transfer.block_timestamp.isoformat()
                 if serializable
                 else token_transfer.block_timestamp
             )
-            token_transfer_dict[
-                "block_unix_timestamp"
-            ] = token_transfer.block_timestamp.timestamp()
-            token_transfer_dict[
-                "transaction_receipt_status"
-            ] = token_transfer.transaction_receipt_status
+            row.block_unix_timestamp = token_transfer.block_timestamp.timestamp()
+            row.transaction_receipt_status = token_transfer.transaction_receipt_status
+
+        return row
 
-        return token_transfer_dict
+    def token_transfer_to_dict(
+        self,
+        token_transfer: Union[KlaytnRawTokenTransfer, KlaytnTokenTransfer],
+        serializable=True,
+    ):
+        return self.token_transfer_to_row(
+            token_transfer, serializable=serializable
+        ).to_dict()
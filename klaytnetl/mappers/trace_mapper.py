@@ -24,6 +24,7 @@
 
 from klaytnetl.domain.trace import KlaytnRawTrace, KlaytnTrace
 from klaytnetl.domain.trace_block import KlaytnRawTraceBlock, KlaytnTraceBlock
+from blockchainetl.row import row_type
 from klaytnetl.mappers.base import BaseMapper
 from klaytnetl.mixin.enrichable_mixin import EnrichableMixin
 from klaytnetl.utils import hex_to_dec, to_normalized_address
@@ -31,6 +32,40 @@ from klaytnetl.utils import hex_to_dec, to_normalized_address
 from typing import Union, List, Tuple
 
 
+TRACE_ROW_FIELDS = [
+    "block_number",
+    "transaction_hash",
+    "transaction_index",
+    "trace_index",
+    "from_address",
+    "to_address",
+    "value",
+    "input",
+    "output",
+    "trace_type",
+    "call_type",
+    "gas",
+    "gas_used",
+    "subtraces",
+    "trace_address",
+    "error",
+    "status",
+]
+
+TraceRow = row_type("trace", TRACE_ROW_FIELDS)
+EnrichedTraceRow = row_type(
+    "trace",
+    TRACE_ROW_FIELDS
+    + [
+        "block_hash",
+        "block_timestamp",
+        "block_unix_timestamp",
+        "transaction_receipt_status",
+    ],
+    name="EnrichedTraceRow",
+)
+
+
 class KlaytnTraceMapper(BaseMapper, EnrichableMixin):
     def __init__(self, enrich=True):
         super(KlaytnTraceMapper, self).__init__(enrich=enrich)
@@ -151,38 +186,43 @@ class KlaytnTraceMapper(BaseMapper, EnrichableMixin):
 
         return result, counter
 
-    def trace_to_dict(
+    def trace_to_row(
         self, trace: Union[KlaytnRawTrace, KlaytnTrace], serializable=True
-    ) -> dict:
-        trace_dict = {
-            "type": "trace",
-            "block_number": trace.block_number,
-            "transaction_hash": trace.transaction_hash,
-            "transaction_index": trace.transaction_index,
-            "trace_index": trace.trace_index,
-            "from_address": trace.from_address,
-            "to_address": trace.to_address,
-            "value": int(trace.value) if serializable else trace.value,
-            "input": trace.input,
-            "output": trace.output,
-            "trace_type": trace.trace_type,
-            "call_type": trace.call_type,
-            "gas": trace.gas,
-            "gas_used": trace.gas_used,
-            "subtraces": trace.subtraces,
-            "trace_address": trace.trace_address,
-            "error": trace.error,
-            "status": trace.status,
-        }
-
-        if self.enrich and isinstance(trace, KlaytnTrace):
-            trace_dict["block_hash"] = trace.block_hash
-            trace_dict["block_timestamp"] = (
+    ) -> Union[TraceRow, EnrichedTraceRow]:
+        enriched = self.enrich and isinstance(trace, KlaytnTrace)
+        row = (EnrichedTraceRow if enriched else TraceRow)(
+            block_number=trace.block_number,
+            transaction_hash=trace.transaction_hash,
+            transaction_index=trace.transaction_index,
+            trace_index=trace.trace_index,
+            from_address=trace.from_address,
+            to_address=trace.to_address,
+            value=int(trace.value) if serializable else trace.value,
+            input=trace.input,
+            output=trace.output,
+            trace_type=trace.trace_type,
+            call_type=trace.call_type,
+            gas=trace.gas,
+            gas_used=trace.gas_used,
+            subtraces=trace.subtraces,
+            trace_address=trace.trace_address,
+            error=trace.error,
+            status=trace.status,
+        )
+
+        if enriched:
+            row.block_hash = trace.block_hash
+            row.block_timestamp = (
                 trace.block_timestamp.isoformat()
                 if serializable
                 else trace.block_timestamp
             )
-            trace_dict["block_unix_timestamp"] = trace.block_timestamp.timestamp()
-            trace_dict["transaction_receipt_status"] = trace.transaction_receipt_status
+            row.block_unix_timestamp = trace.block_timestamp.timestamp()
+            row.transaction_receipt_status = trace.transaction_receipt_status
+
+        return row
 
-        return trace_dict
+    def trace_to_dict(
+        self, trace: Union[KlaytnRawTrace, KlaytnTrace], serializable=True
+    ) -> dict:
+        return self.trace_to_row(trace, serializable=serializable).to_dict()
@@ -24,6 +24,7 @@
 
 import logging
 
+from blockchainetl.row import row_type
 from klaytnetl.mappers.base import BaseMapper
 from klaytnetl.mixin.enrichable_mixin import EnrichableMixin
 from klaytnetl.mappers.receipt_log_mapper import KlaytnReceiptLogMapper
@@ -37,6 +38,46 @@ from klaytnetl.utils import (
 from typing import Union
 
 
+TRANSACTION_ROW_FIELDS = [
+    "hash",
+    "nonce",
+    "block_hash",
+    "block_number",
+    "transaction_index",
+    "from_address",
+    "to_address",
+    "value",
+    "gas",
+    "gas_price",
+    "input",
+    # Klaytn additional properties
+    "fee_payer",
+    "fee_payer_signatures",
+    "fee_ratio",
+    "sender_tx_hash",
+    "signatures",
+    "tx_type",
+    "tx_type_int",
+    "max_priority_fee_per_gas",
+    "max_fee_per_gas",
+    "access_list",
+]
+
+TransactionRow = row_type("transaction", TRANSACTION_ROW_FIELDS)
+EnrichedTransactionRow = row_type(
+    "transaction",
+    TRANSACTION_ROW_FIELDS
+    + [
+        "block_unix_timestamp",
+        "block_timestamp",
+        "receipt_gas_used",
+        "receipt_contract_address",
+        "receipt_status",
+    ],
+    name="EnrichedTransactionRow",
+)
+
+
 class KlaytnTransactionMapper(BaseMapper, EnrichableMixin):
     def __init__(
         self, receipt_log_mapper: KlaytnReceiptLogMapper = None, enrich: bool = False
@@ -131,52 +172,54 @@ class KlaytnTransactionMapper(BaseMapper, EnrichableMixin):
             )
         )
 
-    def transaction_to_dict(
+    def transaction_to_row(
         self,
         transaction: Union[KlaytnTransaction, KlaytnRawTransaction],
         serializable=True,
-    ) -> dict:
-        transaction_dict = {
-            "type": "transaction",
-            "hash": transaction.hash,
-            "nonce": transaction.nonce,
-            "block_hash": transaction.block_hash,
-            "block_number": transaction.block_number,
-            "transaction_index": transaction.transaction_index,
-            "from_address": transaction.from_address,
-            "to_address": transaction.to_address,
-            "value": int(transaction.value) if serializable else transaction.value,
-            "gas": transaction.gas,
-            "gas_price": int(transaction.gas_price)
+    ) -> Union[TransactionRow, EnrichedTransactionRow]:
+        enriched = self.enrich and isinstance(transaction, KlaytnTransaction)
+        row = (EnrichedTransactionRow if enriched else TransactionRow)(
+            hash=transaction.hash,
+            nonce=transaction.nonce,
+            block_hash=transaction.block_hash,
+            block_number=transaction.block_number,
+            transaction_index=transaction.transaction_index,
+            from_address=transaction.from_address,
+            to_address=transaction.to_address,
+            value=int(transaction.value) if serializable else transaction.value,
+            gas=transaction.gas,
+            gas_price=int(transaction.gas_price)
             if serializable
             else transaction.gas_price,
-            "input": transaction.input,
-            # Klaytn additional properties
-            "fee_payer": transaction.fee_payer,
-            "fee_payer_signatures": transaction.fee_payer_signatures,
-            "fee_ratio": transaction.fee_ratio,
-            "sender_tx_hash": transaction.sender_tx_hash,
-            "signatures": transaction.signatures,
-            "tx_type": transaction.tx_type,
-            "tx_type_int": transaction.tx_type_int,
-            "max_priority_fee_per_gas": transaction.max_priority_fee_per_gas,
-            "max_fee_per_gas": transaction.max_fee_per_gas,
-            "access_list": transaction.access_list,
-        }
-
-        if self.enrich and isinstance(transaction, KlaytnTransaction):
-            transaction_dict[
-                "block_unix_timestamp"
-            ] = transaction.block_timestamp.timestamp()
-            transaction_dict["block_timestamp"] = (
+            input=transaction.input,
+            fee_payer=transaction.fee_payer,
+            fee_payer_signatures=transaction.fee_payer_signatures,
+            fee_ratio=transaction.fee_ratio,
+            sender_tx_hash=transaction.sender_tx_hash,
+            signatures=transaction.signatures,
+            tx_type=transaction.tx_type,
+            tx_type_int=transaction.tx_type_int,
+            max_priority_fee_per_gas=transaction.max_priority_fee_per_gas,
+            max_fee_per_gas=transaction.max_fee_per_gas,
+            access_list=transaction.access_list,
+        )
+
+        if enriched:
+            row.block_unix_timestamp = transaction.block_timestamp.timestamp()
+            row.block_timestamp = (
                 transaction.block_timestamp.isoformat()
                 if serializable
                 else transaction.block_timestamp
             )
-            transaction_dict["receipt_gas_used"] = transaction.receipt_gas_used
-            transaction_dict[
-                "receipt_contract_address"
-            ] = transaction.receipt_contract_address
-            transaction_dict["receipt_status"] = transaction.receipt_status
+            row.receipt_gas_used = transaction.receipt_gas_used
+            row.receipt_contract_address = transaction.receipt_contract_address
+            row.receipt_status = transaction.receipt_status
 
-        return transaction_dict
+        return row
+
+    def transaction_to_dict(
+        self,
+        transaction: Union[KlaytnTransaction, KlaytnRawTransaction],
+        serializable=True,
+    ) -> dict:
+        return self.transaction_to_row(transaction, serializable=serializable).to_dict()
@@ -29,21 +29,58 @@ import json
 import six
 
 from klaytnetl.csv_utils import set_max_field_size_limit
+from blockchainetl.arrow_files import (
+    is_arrow_file,
+    iterate_arrow_column,
+    iterate_arrow_items,
+)
+from blockchainetl.compression import open_compressed
 from blockchainetl.file_utils import get_file_handle, smart_open
+from blockchainetl.frame_index import (
+    filter_block_range,
+    iterate_items_in_block_range,
+    read_frame_index,
+    strip_compression_extension,
+)
+from blockchainetl import lookup_index
 
 
 @contextlib.contextmanager
-def get_item_iterable(input_file):
-    fh = get_file_handle(input_file, "r")
+def get_item_iterable(
+    input_file, columns=None, default_format="json", start_block=None, end_block=None
+):
+    """Yields the items of a JSON lines, CSV or Arrow file. Files without a .json or .csv extension
+    are read as default_format. Only columns are read from Arrow files, if given.
+
+    If start_block or end_block is given, only items of that block range are yielded. Compressed files
+    with a frame index are read from the frames holding the range only."""
+    if is_arrow_file(input_file):
+        items = iterate_arrow_items(input_file, columns)
+        yield filter_block_range(items, start_block, end_block)
+        return
+
+    if (start_block is not None or end_block is not None) and read_frame_index(
+        input_file
+    ) is not None:
+        yield iterate_items_in_block_range(input_file, start_block, end_block)
+        return
+
+    file_name = strip_compression_extension(input_file)
+    if file_name != input_file:
+        fh = open_compressed(input_file, "rt")
+    else:
+        fh = get_file_handle(input_file, "r")
 
-    if input_file.endswith(".csv"):
+    if file_name.endswith(".csv") or (
+        default_format == "csv" and not file_name.endswith(".json")
+    ):
         set_max_field_size_limit()
         reader = csv.DictReader(fh)
     else:
         reader = (json.loads(line) for line in fh)
 
     try:
-        yield reader
+        yield filter_block_range(reader, start_block, end_block)
     finally:
         fh.close()
 
@@ -76,16 +113,33 @@ def get_item_sink(output_file):
         fh.close()
 
 
-def filter_items(input_file, output_file, predicate):
-    with get_item_iterable(input_file) as item_iterable, get_item_sink(
-        output_file
-    ) as sink:
+def filter_items(input_file, output_file, predicate, start_block=None, end_block=None):
+    with get_item_iterable(
+        input_file, start_block=start_block, end_block=end_block
+    ) as item_iterable, get_item_sink(output_file) as sink:
         for item in item_iterable:
             if predicate(item):
                 sink(item)
 
 
+def lookup_items(inputs, output_file, value, zstd_dicts=None):
+    """Writes the items of the indexed files in inputs holding value, a transaction hash or an address,
+    with the file they were found in"""
+    with get_item_sink(output_file) as sink:
+        for input in inputs:
+            for filename in lookup_index.list_indexed_files(input):
+                for item in lookup_index.lookup_items(filename, value, zstd_dicts):
+                    item["file"] = filename
+                    sink(item)
+
+
 def extract_field(input_file, output_file, field):
+    if is_arrow_file(input_file):
+        with smart_open(output_file, "w") as output:
+            for value in iterate_arrow_column(input_file, field):
+                output.write(("" if value is None else str(value)) + "\n")
+        return
+
     with get_item_iterable(input_file) as item_iterable, smart_open(
         output_file, "w"
     ) as output:
@@ -0,0 +1,302 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import csv
+import glob
+import json
+import logging
+import os
+import re
+from array import array
+
+from blockchainetl.compression import COMPRESSION_EXTENSIONS, get_decompression_errors, open_compressed
+from blockchainetl.frame_index import FRAME_INDEX_EXTENSION
+from blockchainetl.lookup_index import LOOKUP_INDEX_EXTENSION
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import MANIFEST_FILENAME, read_manifest
+from klaytnetl.csv_utils import set_max_field_size_limit
+from klaytnetl.utils import validate_range
+
+BLOCK_NUMBER_FIELDS = {"block": "number"}
+DEFAULT_BLOCK_NUMBER_FIELD = "block_number"
+
+# Item types whose rows per block are known from block.transaction_count
+TRANSACTION_COUNT_ITEM_TYPES = ("transaction", "receipt")
+
+
+def get_block_number_field(item_type):
+    return BLOCK_NUMBER_FIELDS.get(item_type, DEFAULT_BLOCK_NUMBER_FIELD)
+
+
+def list_output_files(path):
+    """Lists the files of a single file output or a directory written by MultifileItemExporter,
+    PartitionedFileItemExporter or ShardedFileItemExporter, including the start_block=.../end_block=...
+    partitions re-exported by plan_backfill --run"""
+    if os.path.isdir(path):
+        return list_output_directory(path)
+
+    # re-exports of a single file output are written to partitions next to it
+    files = [path] if os.path.isfile(path) else []
+    dirname, basename = os.path.split(path)
+    files.extend(sorted(glob.glob(os.path.join(
+        glob.escape(dirname), "start_block=*", "end_block=*", glob.escape(basename)))))
+    return files
+
+
+def list_output_directory(path):
+    files = []
+    for dirpath, dirnames, file_names in os.walk(path):
+        # hidden files and directories are incomplete outputs
+        dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith("."))
+        if MANIFEST_FILENAME in file_names:
+            files.extend(read_manifest(os.path.join(dirpath, MANIFEST_FILENAME)))
+            continue
+        files.extend(
+            os.path.join(dirpath, file_name)
+            for file_name in sorted(file_names)
+            if not file_name.startswith(".")
+            and not file_name.endswith((FRAME_INDEX_EXTENSION, LOOKUP_INDEX_EXTENSION))
+        )
+    return files
+
+
+def ranges_from_flags(flags, offset, merge_distance=0):
+    """Turns a sequence of truthy/falsy per-block flags into inclusive (start, end) ranges"""
+    ranges = []
+    for index, flag in enumerate(flags):
+        if not flag:
+            continue
+        block_number = offset + index
+        if ranges and block_number - ranges[-1][1] <= merge_distance + 1:
+            ranges[-1][1] = block_number
+        else:
+            ranges.append([block_number, block_number])
+    return [tuple(r) for r in ranges]
+
+
+def merge_ranges(ranges, merge_distance=0):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] <= merge_distance + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+class BlockCoverage:
+    """Counts rows per block of a single item type within [start_block, end_block]"""
+
+    def __init__(self, item_type, start_block, end_block):
+        self.item_type = item_type
+        self.start_block = start_block
+        self.end_block = end_block
+
+        size = end_block - start_block + 1
+        self.row_counts = array("I", bytes(4 * size))
+        self.suspect = bytearray(size)
+        self.truncated_files = []
+        self.rows = 0
+        self.rows_out_of_range = 0
+
+    def add(self, block_number):
+        self.rows += 1
+        if self.start_block <= block_number <= self.end_block:
+            self.row_counts[block_number - self.start_block] += 1
+        else:
+            self.rows_out_of_range += 1
+
+    def mark_suspect(self, start_block, end_block):
+        start_block = max(start_block, self.start_block)
+        end_block = min(end_block, self.end_block)
+        for block_number in range(start_block, end_block + 1):
+            self.suspect[block_number - self.start_block] = 1
+
+
+class BackfillPlanner:
+    """Scans existing outputs and plans the minimal block ranges to re-export.
+
+    Blocks are missing when there is no block row for them, duplicated when there is more
+    than one. Transactions and receipts are checked against block.transaction_count when
+    blocks are scanned too. Rows of truncated or corrupt files (e.g. a gzip stream that
+    ends early) can't be trusted, so every block seen in such a file is planned again.
+    """
+
+    def __init__(self, start_block, end_block, merge_distance=0, zstd_dicts=None):
+        validate_range(start_block, end_block)
+        self.start_block = start_block
+        self.end_block = end_block
+        self.merge_distance = merge_distance
+        # dictionaries of zstd outputs written with --zstd-dict-dir
+        self.zstd_dicts = zstd_dicts
+
+        self.coverages = {}
+        self.transaction_counts = None
+        self.logger = logging.getLogger("BackfillPlanner")
+
+    def scan(self, item_type, path):
+        coverage = self.coverages.get(item_type)
+        if coverage is None:
+            coverage = BlockCoverage(item_type, self.start_block, self.end_block)
+            self.coverages[item_type] = coverage
+
+        if item_type == "block" and self.transaction_counts is None:
+            self.transaction_counts = array("i", [-1]) * (self.end_block - self.start_block + 1)
+
+        files = list_output_files(path)
+        if not files:
+            self.logger.warning("No output files found for {} in {}.".format(item_type, path))
+
+        for file in files:
+            self._scan_file(coverage, file)
+        return coverage
+
+    def plan(self):
+        """Returns a dict with missing, duplicated and truncated ranges per item type
+        and the merged ranges to re-export."""
+        result = {"item_types": {}, "ranges": []}
+        all_ranges = []
+
+        for item_type, coverage in self.coverages.items():
+            missing = self._find_missing(item_type, coverage)
+            missing_ranges = ranges_from_flags(missing, self.start_block, self.merge_distance)
+            suspect_ranges = ranges_from_flags(coverage.suspect, self.start_block, self.merge_distance)
+            duplicated_ranges = (
+                ranges_from_flags((count > 1 for count in coverage.row_counts), self.start_block)
+                if item_type == "block"
+                else []
+            )
+            result["item_types"][item_type] = {
+                "rows": coverage.rows,
+                "rows_out_of_range": coverage.rows_out_of_range,
+                "missing_blocks": sum(1 for flag in missing if flag),
+                "missing_ranges": missing_ranges,
+                "duplicated_ranges": duplicated_ranges,
+                "truncated_files": coverage.truncated_files,
+                "truncated_ranges": suspect_ranges,
+            }
+            all_ranges.extend(missing_ranges)
+            all_ranges.extend(suspect_ranges)
+
+        result["ranges"] = merge_ranges(all_ranges, self.merge_distance)
+        return result
+
+    def _find_missing(self, item_type, coverage):
+        if item_type == "block":
+            return bytearray(1 if count == 0 else 0 for count in coverage.row_counts)
+
+        if item_type in TRANSACTION_COUNT_ITEM_TYPES and self.transaction_counts is not None:
+            return bytearray(
+                1 if expected >= 0 and count != expected else 0
+                for count, expected in zip(coverage.row_counts, self.transaction_counts)
+            )
+
+        # Blocks without rows of this type are indistinguishable from lost rows,
+        # only truncated files are reported for it
+        return bytearray(len(coverage.row_counts))
+
+    def _scan_file(self, coverage, file):
+        min_block = None
+        max_block = None
+        block_number_field = get_block_number_field(coverage.item_type)
+        is_block = coverage.item_type == "block"
+
+        try:
+            for block_number, transaction_count in iterate_block_numbers(
+                file, block_number_field, is_block, self.zstd_dicts
+            ):
+                coverage.add(block_number)
+                if is_block and self.start_block <= block_number <= self.end_block:
+                    self.transaction_counts[block_number - self.start_block] = transaction_count
+                min_block = block_number if min_block is None else min(min_block, block_number)
+                max_block = block_number if max_block is None else max(max_block, block_number)
+        except get_decompression_errors() as e:
+            self.logger.warning("Output file {} is truncated or corrupt: {}".format(file, e))
+            coverage.truncated_files.append(file)
+            if min_block is not None:
+                coverage.mark_suspect(min_block, max_block)
+
+
+def iterate_block_numbers(file, block_number_field, with_transaction_count=False, zstd_dicts=None):
+    """Streams (block_number, transaction_count) of every row in the file.
+    JSON lines are matched with a regular expression instead of being fully decoded."""
+    base_name = file
+    for extension in COMPRESSION_EXTENSIONS.values():
+        if file.endswith(extension):
+            base_name = file[: -len(extension)]
+
+    with open_compressed(file, "rt", zstd_dicts) as fh:
+        if base_name.endswith(".csv"):
+            set_max_field_size_limit()
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if header is None:
+                return
+            block_number_index = header.index(block_number_field)
+            transaction_count_index = header.index("transaction_count") if with_transaction_count else None
+            for row in reader:
+                if len(row) != len(header):
+                    raise ValueError("Unexpected number of columns in row {}".format(row))
+                yield (
+                    int(row[block_number_index]),
+                    int(row[transaction_count_index]) if transaction_count_index is not None else None,
+                )
+        else:
+            block_number_pattern = _field_pattern(block_number_field)
+            transaction_count_pattern = _field_pattern("transaction_count")
+            for line in fh:
+                if not line.endswith("\n"):
+                    raise ValueError("The last line is incomplete")
+                match = block_number_pattern.search(line)
+                if match is None:
+                    item = json.loads(line)
+                    block_number = item.get(block_number_field)
+                    transaction_count = item.get("transaction_count")
+                    # e.g. null or hex encoded numbers, the row can't be trusted
+                    if not _is_block_number(block_number) or not (
+                        transaction_count is None or _is_block_number(transaction_count)
+                    ):
+                        raise ValueError(
+                            "Unexpected {} {!r} or transaction_count {!r}".format(
+                                block_number_field, block_number, transaction_count
+                            )
+                        )
+                    yield block_number, transaction_count
+                    continue
+                transaction_count = None
+                if with_transaction_count:
+                    transaction_count_match = transaction_count_pattern.search(line)
+                    transaction_count = (
+                        int(transaction_count_match.group(1))
+                        if transaction_count_match is not None
+                        else json.loads(line).get("transaction_count")
+                    )
+                yield int(match.group(1)), transaction_count
+
+
+def _is_block_number(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _field_pattern(field):
+    return re.compile(r'"{}":\s*(\d+)'.format(re.escape(field)))
@@ -0,0 +1,211 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import re
+from urllib.parse import urlparse
+
+from blockchainetl.jobs.exporters.console_item_exporter import ConsoleItemExporter
+from blockchainetl.jobs.exporters.fan_out_item_exporter import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_QUEUE_SIZE,
+    FAILURE_POLICY_BLOCK,
+    FAILURE_POLICY_SPILL,
+    FanOutItemExporter,
+    FanOutSink,
+)
+from blockchainetl.jobs.exporters.multifile_item_exporter import MultifileItemExporter
+from klaytnetl.streaming.klaytn_streamer_adapter import EntityType
+
+# topics, streams and paths are named after item types in plural
+ITEM_TYPE_TO_SUFFIX = {
+    EntityType.BLOCK: "blocks",
+    EntityType.TRANSACTION: "transactions",
+    EntityType.RECEIPT: "receipts",
+    EntityType.LOG: "logs",
+    EntityType.TOKEN_TRANSFER: "token_transfers",
+    EntityType.TRACE: "traces",
+    EntityType.CONTRACT: "contracts",
+    EntityType.TOKEN: "tokens",
+    EntityType.RETRACTION: "retractions",
+}
+
+
+DATA_FILE_PATTERN = re.compile(r"^data-(\d+)\.")
+
+
+class ItemExporterType:
+    CONSOLE = "console"
+    PUBSUB = "pubsub"
+    KINESIS = "kinesis"
+    KAFKA = "kafka"
+    GCS = "gcs"
+    FILE = "file"
+    UNKNOWN = "unknown"
+
+
+def create_item_exporter(
+    output,
+    kafka_options=None,
+    kinesis_options=None,
+    gcs_options=None,
+    file_options=None,
+):
+    item_exporter_type = determine_item_exporter_type(output)
+
+    # exporters of external services are imported lazily, their dependencies are optional
+    if item_exporter_type == ItemExporterType.CONSOLE:
+        return ConsoleItemExporter()
+    elif item_exporter_type == ItemExporterType.PUBSUB:
+        from blockchainetl.jobs.exporters.google_pubsub_item_exporter import (
+            GooglePubSubItemExporter,
+        )
+
+        return GooglePubSubItemExporter(
+            item_type_to_topic_mapping=build_item_type_mapping(output + ".")
+        )
+    elif item_exporter_type == ItemExporterType.KINESIS:
+        from blockchainetl.jobs.exporters.aws_kinesis_item_exporter import (
+            AwsKinesisItemExporter,
+        )
+
+        stream_prefix = output[len("kinesis://") :]
+        return AwsKinesisItemExporter(
+            item_type_to_topic_mapping=build_item_type_mapping(stream_prefix + "_"),
+            **(kinesis_options or {})
+        )
+    elif item_exporter_type == ItemExporterType.KAFKA:
+        from blockchainetl.jobs.exporters.kafka_exporter import KafkaItemExporter
+
+        return KafkaItemExporter(
+            output,
+            item_type_to_topic_mapping=build_item_type_mapping(),
+            **(kafka_options or {})
+        )
+    elif item_exporter_type == ItemExporterType.GCS:
+        from blockchainetl.jobs.exporters.gcs_item_exporter import GcsItemExporter
+
+        uri = urlparse(output)
+        return GcsItemExporter(bucket=uri.netloc, path=uri.path, **(gcs_options or {}))
+    elif item_exporter_type == ItemExporterType.FILE:
+        # local files, a directory per item type
+        dirname = output[len("file://") :]
+        dirname_mapping = {
+            item_type: os.path.join(dirname, suffix)
+            for item_type, suffix in ITEM_TYPE_TO_SUFFIX.items()
+        }
+        return MultifileItemExporter(
+            dirname_mapping,
+            first_file_index=get_next_file_index(dirname_mapping.values()),
+            **(file_options or {})
+        )
+    else:
+        raise ValueError("Unable to determine item exporter type for output " + output)
+
+
+def create_fan_out_item_exporter(
+    outputs,
+    failure_policies=None,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    batch_size=DEFAULT_BATCH_SIZE,
+    spill_dir="spill",
+    **options
+):
+    """Creates an exporter for a single output, or a fan-out exporter writing to several outputs in parallel.
+
+    failure_policies has either one policy for all of the outputs or one policy per output. By default local
+    outputs block and remote ones spill, so that a slow or stalled remote output doesn't hold back local files.
+    """
+    if len(outputs) == 1:
+        return create_item_exporter(outputs[0], **options)
+
+    if failure_policies is None:
+        failure_policies = tuple(
+            get_default_failure_policy(output) for output in outputs
+        )
+    if len(failure_policies) == 1:
+        failure_policies = failure_policies * len(outputs)
+    if len(failure_policies) != len(outputs):
+        raise ValueError(
+            "Either one failure policy or one failure policy per output must be provided"
+        )
+
+    sinks = []
+    for index, (output, failure_policy) in enumerate(zip(outputs, failure_policies)):
+        name = "{}-{}".format(index, determine_item_exporter_type(output))
+        sinks.append(
+            FanOutSink(
+                create_item_exporter(output, **options),
+                name=name,
+                queue_size=queue_size,
+                batch_size=batch_size,
+                failure_policy=failure_policy,
+                spill_filename=os.path.join(spill_dir, name + ".json"),
+            )
+        )
+    return FanOutItemExporter(sinks)
+
+
+def get_default_failure_policy(output):
+    if determine_item_exporter_type(output) in (
+        ItemExporterType.CONSOLE,
+        ItemExporterType.FILE,
+    ):
+        return FAILURE_POLICY_BLOCK
+    return FAILURE_POLICY_SPILL
+
+
+def get_next_file_index(dirnames):
+    """Returns the index following the data files in dirnames, so that a restarted stream doesn't overwrite them."""
+    file_indexes = [
+        int(match.group(1))
+        for dirname in dirnames
+        if os.path.isdir(dirname)
+        for match in map(DATA_FILE_PATTERN.match, os.listdir(dirname))
+        if match is not None
+    ]
+    return max(file_indexes) + 1 if file_indexes else 0
+
+
+def build_item_type_mapping(prefix=""):
+    return {
+        item_type: prefix + suffix for item_type, suffix in ITEM_TYPE_TO_SUFFIX.items()
+    }
+
+
+def determine_item_exporter_type(output):
+    if output is None or output == "-":
+        return ItemExporterType.CONSOLE
+    elif output.startswith("projects"):
+        return ItemExporterType.PUBSUB
+    elif output.startswith("kinesis://"):
+        return ItemExporterType.KINESIS
+    elif output.startswith("kafka"):
+        return ItemExporterType.KAFKA
+    elif output.startswith("gs://"):
+        return ItemExporterType.GCS
+    elif output.startswith("file://"):
+        return ItemExporterType.FILE
+    else:
+        return ItemExporterType.UNKNOWN
@@ -0,0 +1,100 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+
+from blockchainetl.row import Row
+
+
+class KlaytnItemIdCalculator:
+    def __init__(self):
+        self.logger = logging.getLogger("KlaytnItemIdCalculator")
+
+    def calculate(self, item):
+        if item is None or not isinstance(item, (dict, Row)):
+            return None
+
+        item_type = item.get("type")
+
+        if item_type == "block" and item.get("hash") is not None:
+            return concat(item_type, item.get("hash"))
+        elif item_type == "transaction" and item.get("hash") is not None:
+            return concat(item_type, item.get("hash"))
+        elif item_type == "receipt" and item.get("transaction_hash") is not None:
+            return concat(item_type, item.get("transaction_hash"))
+        elif (
+            item_type in ("log", "token_transfer")
+            and item.get("transaction_hash") is not None
+            and item.get("log_index") is not None
+        ):
+            return concat(item_type, item.get("transaction_hash"), item.get("log_index"))
+        elif item_type == "trace" and item.get("trace_index") is not None:
+            return concat(item_type, item.get("block_number"), item.get("trace_index"))
+        elif item_type in ("contract", "token") and item.get("address") is not None:
+            return concat(item_type, item.get("block_number"), item.get("address"))
+        elif item_type == "retraction" and item.get("block_hash") is not None:
+            return concat(item_type, item.get("block_hash"))
+
+        self.logger.warning("item_id for item {} is None".format(repr(item)))
+
+        return None
+
+    def calculate_idempotency_key(self, item):
+        """Returns a key which is the same for every export of the same item.
+
+        The key is built from the hash (or number, if the hash is not part of the item) of the block
+        the item belongs to, the item type and the position of the item in the block, so that items
+        exported again by a retried batch can be recognized and dropped before reaching a sink.
+        """
+        if item is None or not isinstance(item, (dict, Row)):
+            return None
+
+        item_type = item.get("type")
+
+        if item_type == "block":
+            return concat(item_type, item.get("hash") or item.get("number"))
+
+        block_key = item.get("block_hash") or item.get("block_number")
+        if block_key is None:
+            return None
+
+        if item_type in ("transaction", "receipt"):
+            index = item.get("transaction_index")
+        elif item_type in ("log", "token_transfer"):
+            index = item.get("log_index")
+        elif item_type == "trace":
+            index = item.get("trace_index")
+        elif item_type in ("contract", "token"):
+            index = item.get("address")
+        else:
+            index = None
+
+        if index is None:
+            return None
+
+        return concat(block_key, item_type, index)
+
+
+def concat(*elements):
+    return "_".join([str(elem) for elem in elements])
@@ -0,0 +1,275 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import logging
+
+from blockchainetl.jobs.exporters.console_item_exporter import ConsoleItemExporter
+from blockchainetl.jobs.exporters.in_memory_item_exporter import InMemoryItemExporter
+from blockchainetl.row import to_dict
+from blockchainetl.streaming.block_hash_window import BlockHashWindow
+from klaytnetl.jobs.export_block_group_job import ExportBlockGroupJob
+from klaytnetl.jobs.export_trace_group_job import ExportTraceGroupJob
+from klaytnetl.json_rpc_requests import (
+    generate_get_block_by_number_json_rpc,
+    generate_json_rpc,
+)
+from klaytnetl.streaming.item_id_calculator import KlaytnItemIdCalculator
+from klaytnetl.utils import hex_to_dec, rpc_response_batch_to_results
+
+
+class EntityType:
+    BLOCK = "block"
+    TRANSACTION = "transaction"
+    RECEIPT = "receipt"
+    LOG = "log"
+    TOKEN_TRANSFER = "token_transfer"
+    TRACE = "trace"
+    CONTRACT = "contract"
+    TOKEN = "token"
+
+    # emitted for every previously streamed block which is not on the canonical chain anymore
+    RETRACTION = "retraction"
+
+    BLOCK_GROUP = [BLOCK, TRANSACTION, RECEIPT, LOG, TOKEN_TRANSFER]
+    TRACE_GROUP = [TRACE, CONTRACT, TOKEN]
+    ALL_FOR_STREAMING = BLOCK_GROUP + TRACE_GROUP
+
+
+DEFAULT_REORG_WINDOW_SIZE = 128
+
+
+class KlaytnStreamerAdapter:
+    def __init__(
+        self,
+        batch_web3_provider,
+        web3=None,
+        item_exporter=ConsoleItemExporter(),
+        batch_size=100,
+        max_workers=5,
+        entity_types=tuple(EntityType.ALL_FOR_STREAMING),
+        enrich=True,
+        reorg_window_size=DEFAULT_REORG_WINDOW_SIZE,
+    ):
+        unknown_entity_types = set(entity_types) - set(EntityType.ALL_FOR_STREAMING)
+        if unknown_entity_types:
+            raise ValueError(
+                "Unknown entity types: {}".format(", ".join(sorted(unknown_entity_types)))
+            )
+        if web3 is None and set(entity_types) & set(EntityType.TRACE_GROUP):
+            raise ValueError("web3 is required to stream traces, contracts or tokens")
+
+        self.batch_web3_provider = batch_web3_provider
+        self.web3 = web3
+        self.item_exporter = item_exporter
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.entity_types = entity_types
+        self.enrich = enrich
+        self.block_hash_window = BlockHashWindow(reorg_window_size)
+        self.item_id_calculator = KlaytnItemIdCalculator()
+
+        self.logger = logging.getLogger("KlaytnStreamerAdapter")
+
+    def open(self):
+        self.item_exporter.open()
+
+    def get_current_block_number(self):
+        response = self.batch_web3_provider.make_batch_request(
+            json.dumps([generate_json_rpc(method="klay_blockNumber", params=[])])
+        )
+        return hex_to_dec(next(rpc_response_batch_to_results(response)))
+
+    def export_all(self, start_block, end_block):
+        # blocks are always fetched, their hashes link the new range to the blocks streamed before
+        block_group_items = self._export_block_group(start_block, end_block)
+        blocks = sorted(
+            (item for item in block_group_items if item["type"] == EntityType.BLOCK),
+            key=lambda block: block["number"],
+        )
+        self._validate_blocks(start_block, end_block, blocks)
+
+        fork_block_number = self._find_fork_block_number(blocks[0])
+        if fork_block_number is not None:
+            self._retract_blocks_after(fork_block_number)
+            # the canonical chain replaced some of the streamed blocks, stream them again
+            self.export_all(fork_block_number + 1, end_block)
+            return
+
+        if self._should_export_trace_group():
+            trace_group_items = self._export_trace_group(start_block, end_block)
+        else:
+            trace_group_items = []
+
+        items = [
+            item
+            for item in block_group_items + trace_group_items
+            if item["type"] in self.entity_types
+        ]
+        items.sort(key=get_item_block_number)
+        self._export_items(items)
+
+        for block in blocks:
+            self.block_hash_window.add(block["number"], block["hash"])
+
+    def _export_block_group(self, start_block, end_block):
+        exporter = InMemoryItemExporter(item_types=EntityType.BLOCK_GROUP)
+        job = ExportBlockGroupJob(
+            start_block=start_block,
+            end_block=end_block,
+            batch_size=self.batch_size,
+            batch_web3_provider=self.batch_web3_provider,
+            max_workers=self.max_workers,
+            item_exporter=exporter,
+            enrich=self.enrich,
+            export_blocks=True,
+            export_transactions=EntityType.TRANSACTION in self.entity_types,
+            export_receipts=EntityType.RECEIPT in self.entity_types,
+            export_logs=EntityType.LOG in self.entity_types,
+            export_token_transfers=EntityType.TOKEN_TRANSFER in self.entity_types,
+        )
+        job.run()
+
+        # Jobs hand out rows, the streamer annotates items with ids
+        items = []
+        for item_type in EntityType.BLOCK_GROUP:
+            items.extend(to_dict(item) for item in exporter.get_items(item_type))
+        return items
+
+    def _export_trace_group(self, start_block, end_block):
+        exporter = InMemoryItemExporter(item_types=EntityType.TRACE_GROUP)
+        job = ExportTraceGroupJob(
+            start_block=start_block,
+            end_block=end_block,
+            batch_size=self.batch_size,
+            batch_web3_provider=self.batch_web3_provider,
+            web3=self.web3,
+            max_workers=self.max_workers,
+            enrich=self.enrich,
+            item_exporter=exporter,
+            export_traces=EntityType.TRACE in self.entity_types,
+            export_contracts=EntityType.CONTRACT in self.entity_types,
+            export_tokens=EntityType.TOKEN in self.entity_types,
+        )
+        job.run()
+
+        # Jobs hand out rows, the streamer annotates items with ids
+        items = []
+        for item_type in EntityType.TRACE_GROUP:
+            items.extend(to_dict(item) for item in exporter.get_items(item_type))
+        return items
+
+    def _should_export_trace_group(self):
+        return any(
+            entity_type in self.entity_types for entity_type in EntityType.TRACE_GROUP
+        )
+
+    def _validate_blocks(self, start_block, end_block, blocks):
+        block_numbers = [block["number"] for block in blocks]
+        if block_numbers != list(range(start_block, end_block + 1)):
+            raise ValueError(
+                "Blocks {}-{} are not complete, make sure Klaytn node is synced.".format(
+                    start_block, end_block
+                )
+            )
+
+        for parent, block in zip(blocks, blocks[1:]):
+            if block["parent_hash"] != parent["hash"]:
+                # the chain was reorganized while the range was fetched, the next sync cycle retries it
+                raise ValueError(
+                    "Block {} is not a child of block {}, chain was reorganized while exporting.".format(
+                        block["number"], parent["number"]
+                    )
+                )
+
+    def _find_fork_block_number(self, first_block):
+        parent_number = first_block["number"] - 1
+        parent_hash = self.block_hash_window.get(parent_number)
+        if parent_hash is None or parent_hash == first_block["parent_hash"]:
+            return None
+
+        self.logger.warning(
+            "Chain reorganization detected at block {}: parent hash {} was streamed as {}.".format(
+                first_block["number"], first_block["parent_hash"], parent_hash
+            )
+        )
+
+        block_numbers = [
+            block_number
+            for block_number in self.block_hash_window.block_numbers()
+            if block_number <= parent_number
+        ]
+        canonical_hashes = self._get_block_hashes(block_numbers)
+        for block_number in reversed(block_numbers):
+            if canonical_hashes.get(block_number) == self.block_hash_window.get(
+                block_number
+            ):
+                return block_number
+
+        raise ValueError(
+            "Chain reorganization at block {} is deeper than the {} recent blocks kept to detect it.".format(
+                first_block["number"], len(block_numbers)
+            )
+        )
+
+    def _get_block_hashes(self, block_numbers):
+        blocks_rpc = list(generate_get_block_by_number_json_rpc(block_numbers, False))
+        response = self.batch_web3_provider.make_batch_request(json.dumps(blocks_rpc))
+        return {
+            hex_to_dec(result.get("number")): result.get("hash")
+            for result in rpc_response_batch_to_results(response)
+        }
+
+    def _retract_blocks_after(self, fork_block_number):
+        retracted_blocks = self.block_hash_window.remove_after(fork_block_number)
+        self.logger.warning(
+            "Retracting {} blocks after fork block {}.".format(
+                len(retracted_blocks), fork_block_number
+            )
+        )
+        self._export_items(
+            [
+                {
+                    "type": EntityType.RETRACTION,
+                    "block_number": block_number,
+                    "block_hash": block_hash,
+                }
+                for block_number, block_hash in retracted_blocks
+            ]
+        )
+
+    def _export_items(self, items):
+        for item in items:
+            item["item_id"] = self.item_id_calculator.calculate(item)
+        self.item_exporter.export_items(items)
+
+    def close(self):
+        self.item_exporter.close()
+
+
+def get_item_block_number(item):
+    if item["type"] == EntityType.BLOCK:
+        return item["number"]
+    block_number = item.get("block_number")
+    return block_number if block_number is not None else -1
@@ -6,18 +6,18 @@ CREATE EXTERNAL TABLE IF NOT EXISTS parquet_blocks (
   transactions_root STRING,
   state_root STRING,
   receipts_root STRING,
-  block_score DECIMAL(38,0) ,
+  block_score DECIMAL(38,0),
   total_block_score DECIMAL(38,0),
   size BIGINT,
   extra_data STRING,
-  gas_used BIGINT ,
-  timestamp TIMESTAMP,
-  unix_timestamp DOUBLE,
+  gas_used DECIMAL(38,0),
+  block_timestamp TIMESTAMP,
+  block_unix_timestamp DOUBLE,
   transaction_count BIGINT,
   governance_data STRING,
   vote_data STRING,
   proposer STRING,
-  committee array<STRING>.
+  committee ARRAY<STRING>,
   reward_address STRING,
   base_fee_per_gas DECIMAL(38, 0)
 )
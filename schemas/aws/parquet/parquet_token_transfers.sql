@@ -2,7 +2,7 @@ CREATE EXTERNAL TABLE IF NOT EXISTS parquet_token_transfers (
   token_address STRING,
   from_address STRING,
   to_address STRING,
-  value DECIMAL(38, 0),
+  value STRING,
   transaction_hash STRING,
   transaction_index BIGINT,
   log_index BIGINT,
@@ -21,7 +21,7 @@ CREATE EXTERNAL TABLE IF NOT EXISTS parquet_transactions (
   max_fee_per_gas DECIMAL(38,0),
   block_timestamp TIMESTAMP,
   block_unix_timestamp DOUBLE,
-  receipt_gas_used BIGINT,
+  receipt_gas_used DECIMAL(38,0),
   receipt_contract_address STRING,
   receipt_status BIGINT
 )
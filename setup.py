@@ -42,6 +42,11 @@ setup(
     extras_require={
         'dev': [
             'pytest~=4.3.0'
+        ],
+        # idempotent producers of KafkaItemExporter, lz4 is its default compression
+        'kafka': [
+            'kafka-python>=2.1',
+            'lz4'
         ]
     },
     entry_points={
@@ -0,0 +1,213 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import threading
+
+import pytest
+
+from klaytnetl.coordinator.http_coordinator import HttpRangeCoordinator, build_coordinator_server
+from klaytnetl.coordinator.range_worker import RangeLeaseWorker, get_chunk_output_path
+from klaytnetl.coordinator.sqlite_coordinator import SqliteRangeCoordinator
+
+
+class ClockMock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sqlite_coordinator_leases_each_chunk_once():
+    coordinator = SqliteRangeCoordinator(":memory:", lease_seconds=60, clock=ClockMock())
+
+    assert coordinator.init_range(0, 249, 100) == 3
+    # init_range is idempotent, every worker calls it
+    assert coordinator.init_range(0, 249, 100) == 3
+
+    leases = [coordinator.acquire("worker-{}".format(i), 0, 249) for i in range(4)]
+
+    assert [(lease.start_block, lease.end_block) for lease in leases[:3]] == [(0, 99), (100, 199), (200, 249)]
+    assert leases[3] is None
+    assert coordinator.status(0, 249) == {
+        "pending": 0, "leased": 3, "expired": 0, "completed": 0, "failed": 0, "total": 3, "failed_chunks": []
+    }
+
+
+def test_sqlite_coordinator_rejects_other_chunkings():
+    coordinator = SqliteRangeCoordinator(":memory:", clock=ClockMock())
+    coordinator.init_range(0, 249, 100)
+
+    with pytest.raises(ValueError):
+        coordinator.init_range(0, 249, 50)
+    with pytest.raises(ValueError):
+        coordinator.init_range(50, 249, 100)
+    # chunks of a sub-range are the registered ones
+    assert coordinator.init_range(100, 199, 100) == 1
+    assert coordinator.init_range(300, 399, 50) == 2
+    assert coordinator.status()["total"] == 5
+
+
+def test_sqlite_coordinator_reassigns_expired_leases():
+    clock = ClockMock()
+    coordinator = SqliteRangeCoordinator(":memory:", lease_seconds=60, clock=clock)
+    coordinator.init_range(0, 99, 100)
+
+    lease = coordinator.acquire("worker-1", 0, 99)
+    clock.now += 30
+    assert coordinator.heartbeat(lease)
+    clock.now += 59
+    assert coordinator.acquire("worker-2", 0, 99) is None
+
+    clock.now += 2
+    new_lease = coordinator.acquire("worker-2", 0, 99)
+    assert new_lease.start_block == 0
+    assert new_lease.attempts == 2
+
+    # the first worker lost its lease
+    assert not coordinator.heartbeat(lease)
+    assert not coordinator.complete(lease)
+    assert coordinator.complete(new_lease)
+    assert coordinator.is_done(0, 99)
+
+
+def test_sqlite_coordinator_release_makes_chunk_available():
+    coordinator = SqliteRangeCoordinator(":memory:", clock=ClockMock())
+    coordinator.init_range(0, 99, 100)
+
+    lease = coordinator.acquire("worker-1", 0, 99)
+    assert coordinator.release(lease)
+    assert coordinator.acquire("worker-2", 0, 99).worker_id == "worker-2"
+
+
+def test_sqlite_coordinator_fails_chunks_after_max_attempts():
+    clock = ClockMock()
+    coordinator = SqliteRangeCoordinator(":memory:", lease_seconds=60, max_attempts=2, clock=clock)
+    coordinator.init_range(0, 199, 100)
+
+    assert coordinator.release(coordinator.acquire("worker-1", 0, 99))
+    coordinator.acquire("worker-1", 0, 99)
+    # the second lease expires as well, the chunk isn't leased a third time
+    clock.now += 61
+    assert coordinator.acquire("worker-2", 0, 99) is None
+
+    status = coordinator.status(0, 199)
+    assert (status["failed"], status["pending"], status["failed_chunks"]) == (1, 1, [[0, 99]])
+    assert not coordinator.is_done(0, 199)
+    assert coordinator.complete(coordinator.acquire("worker-2", 0, 199))
+    assert coordinator.is_done(0, 199)
+
+    # failed chunks are leased again once max_attempts is raised
+    coordinator.max_attempts = 3
+    lease = coordinator.acquire("worker-3", 0, 199)
+    assert (lease.start_block, lease.attempts) == (0, 3)
+    assert coordinator.complete(lease)
+    assert coordinator.status(0, 199)["failed_chunks"] == []
+
+
+def test_range_lease_worker_exports_whole_range(tmpdir):
+    coordinator = SqliteRangeCoordinator(str(tmpdir.join("coordinator.db")))
+    coordinator.init_range(10, 59, 20)
+
+    exported = []
+    chunk_count = RangeLeaseWorker(coordinator, 10, 59).run(
+        lambda start_block, end_block: exported.append((start_block, end_block))
+    )
+
+    assert chunk_count == 3
+    assert exported == [(10, 29), (30, 49), (50, 59)]
+    assert coordinator.is_done(10, 59)
+
+
+def test_range_lease_worker_releases_chunk_on_failure():
+    coordinator = SqliteRangeCoordinator(":memory:")
+    coordinator.init_range(0, 9, 10)
+
+    def failing_handler(start_block, end_block):
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        RangeLeaseWorker(coordinator, 0, 9).run(failing_handler)
+
+    assert coordinator.status(0, 9)["pending"] == 1
+
+
+def test_range_lease_worker_raises_for_failed_chunks():
+    coordinator = SqliteRangeCoordinator(":memory:", max_attempts=1)
+    coordinator.init_range(0, 29, 10)
+
+    def handler(start_block, end_block):
+        if start_block == 10:
+            raise ValueError("failed")
+        exported.append((start_block, end_block))
+
+    exported = []
+    with pytest.raises(ValueError):
+        RangeLeaseWorker(coordinator, 0, 29).run(handler)
+
+    # the chunk is failed instead of being leased again, the other chunks are still exported
+    with pytest.raises(RuntimeError, match="10-19"):
+        RangeLeaseWorker(coordinator, 0, 29).run(handler)
+    assert exported == [(0, 9), (20, 29)]
+
+
+def test_http_coordinator():
+    server = build_coordinator_server(SqliteRangeCoordinator(":memory:"), host="127.0.0.1", port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        coordinator = HttpRangeCoordinator("http://127.0.0.1:{}".format(server.server_address[1]))
+        assert coordinator.init_range(0, 199, 100) == 2
+
+        lease = coordinator.acquire("worker-1", 0, 199)
+        assert (lease.start_block, lease.end_block) == (0, 99)
+        assert coordinator.heartbeat(lease)
+        assert coordinator.complete(lease)
+        assert not coordinator.is_done(0, 199)
+
+        exported = []
+        RangeLeaseWorker(coordinator, 0, 199).run(lambda s, e: exported.append((s, e)))
+        assert exported == [(100, 199)]
+        assert coordinator.is_done(0, 199)
+        assert coordinator.status(0, 199)["failed_chunks"] == []
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize(
+    "path,is_single_file,expected",
+    [
+        ("output/blocks.json", True, "output/start_block=000000000100/end_block=000000000199/blocks.json"),
+        ("output/blocks", False, "output/blocks/start_block=000000000100/end_block=000000000199"),
+        (None, True, None),
+    ],
+)
+def test_get_chunk_output_path(path, is_single_file, expected):
+    assert get_chunk_output_path(path, 100, 199, is_single_file) == expected
+
+
+def test_get_chunk_output_path_rejects_stdout():
+    with pytest.raises(ValueError):
+        get_chunk_output_path("-", 100, 199, True)
@@ -0,0 +1,127 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import pytest
+
+from klaytnetl.executors.batch_work_executor import BatchWorkExecutor
+from klaytnetl.executors.concurrency_controller import AdaptiveConcurrencyController
+
+
+def test_concurrency_controller_grows_while_latency_is_stable():
+    logger_mock = LoggerMock()
+    controller = AdaptiveConcurrencyController(2, 10, logger=logger_mock)
+
+    for _ in range(100):
+        controller.on_sample(1.0, in_flight=controller.limit)
+
+    assert controller.limit == 10
+    assert logger_mock.logs[0].startswith("Changing concurrency limit from 2 to 3")
+
+
+def test_concurrency_controller_shrinks_when_latency_rises():
+    controller = AdaptiveConcurrencyController(2, 10, initial_limit=10)
+
+    for _ in range(100):
+        controller.on_sample(1.0, in_flight=controller.limit)
+    for _ in range(10):
+        controller.on_sample(10.0, in_flight=controller.limit)
+
+    assert 2 <= controller.limit < 10
+
+
+def test_concurrency_controller_does_not_grow_when_limit_is_unused():
+    controller = AdaptiveConcurrencyController(2, 10, initial_limit=4)
+
+    for _ in range(100):
+        controller.on_sample(1.0, in_flight=1)
+
+    assert controller.limit == 4
+
+
+def test_concurrency_controller_backs_off_on_error():
+    controller = AdaptiveConcurrencyController(2, 10, initial_limit=10)
+
+    for _ in range(100):
+        controller.on_error()
+
+    assert controller.limit == 2
+
+
+def test_concurrency_controller_validates_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyController(5, 2)
+
+
+def test_concurrency_controller_stops_growing_when_throughput_is_flat():
+    clock = ClockMock()
+    controller = AdaptiveConcurrencyController(
+        2, 10, throughput_window_seconds=1.0, clock=clock
+    )
+
+    # a saturated node completes 100 items/sec whatever the limit, at flat latency
+    for _ in range(1000):
+        clock.now += 0.01
+        controller.on_sample(1.0, in_flight=controller.limit, completed_items=1)
+
+    assert controller.limit == 3
+    assert controller.throughput(2) == pytest.approx(100, rel=0.05)
+    assert controller.throughput(3) == pytest.approx(100, rel=0.05)
+
+
+def test_concurrency_controller_grows_with_throughput():
+    clock = ClockMock()
+    controller = AdaptiveConcurrencyController(
+        2, 10, throughput_window_seconds=1.0, clock=clock
+    )
+
+    # throughput scales with the limit
+    for _ in range(1000):
+        clock.now += 0.01
+        controller.on_sample(
+            1.0, in_flight=controller.limit, completed_items=controller.limit
+        )
+
+    assert controller.limit == 10
+
+
+@pytest.mark.parametrize("min_workers", [0, 4, 5])
+def test_batch_work_executor_validates_min_workers(min_workers):
+    with pytest.raises(ValueError):
+        BatchWorkExecutor(1, 4, min_workers=min_workers)
+
+
+class ClockMock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LoggerMock:
+    def __init__(self):
+        self.logs = []
+
+    def info(self, message):
+        self.logs.append(message)
@@ -0,0 +1,173 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import threading
+import time
+
+import pytest
+
+from klaytnetl.executors.batch_work_executor import BatchWorkExecutor
+from klaytnetl.executors.stuck_batch_watchdog import BatchAbandonedError, StuckBatchWatchdog
+
+
+class LoggerMock:
+    def __init__(self):
+        self.logs = []
+
+    def warning(self, msg):
+        self.logs.append(msg)
+
+    def exception(self, msg):
+        self.logs.append(msg)
+
+
+def test_watchdog_deadline_follows_p95_latency():
+    watchdog = StuckBatchWatchdog(deadline_multiplier=10, min_deadline_seconds=1, initial_deadline_seconds=600,
+                                  min_samples=20)
+
+    assert watchdog.deadline(10) == 600
+
+    for i in range(100):
+        watchdog.on_sample(0.5 if i < 95 else 30.0)
+
+    assert watchdog.p95() == 0.5
+    assert watchdog.deadline(10) == 50
+    assert watchdog.deadline(10, attempt=2) == 200
+    assert watchdog.deadline(0) == 1
+
+
+def test_watchdog_waits_for_batches_abandoned_too_often():
+    clock = [1000.0]
+    abandoned = []
+    logger_mock = LoggerMock()
+    watchdog = StuckBatchWatchdog(abandoned.append, initial_deadline_seconds=10, max_abandons=1,
+                                  clock=lambda: clock[0], logger=logger_mock)
+
+    first = watchdog.watch([1, 2, 3])
+    clock[0] += 5
+    assert watchdog.check() == []
+
+    assert watchdog.unwatch(first)
+
+    # the batch is overdue but abandoning it again would interrupt the current thread
+    watched_batch = watchdog.watch([4, 5], attempt=1)
+    clock[0] += 30
+    assert watchdog.check() == []
+    assert watchdog.stuck_count == 1
+    assert "Stack of the worker" in logger_mock.logs[0]
+    assert abandoned == []
+    assert watchdog.unwatch(watched_batch)
+
+
+def test_watchdog_waits_for_exporting_batches():
+    clock = [1000.0]
+    abandoned = []
+    logger_mock = LoggerMock()
+    watchdog = StuckBatchWatchdog(abandoned.append, initial_deadline_seconds=10,
+                                  clock=lambda: clock[0], logger=logger_mock)
+
+    watched_batch = watchdog.watch([1, 2, 3])
+    watchdog.start_exporting()
+    clock[0] += 30
+    # abandoning the batch now would export its items twice
+    assert watchdog.check() == []
+    assert watchdog.stuck_count == 1
+    assert abandoned == []
+    assert watchdog.unwatch(watched_batch)
+
+
+def test_abandoned_worker_stops_before_exporting():
+    clock = [1000.0]
+    abandoned = []
+    watchdog = StuckBatchWatchdog(abandoned.append, initial_deadline_seconds=10,
+                                  clock=lambda: clock[0], logger=LoggerMock())
+
+    watched_batch = watchdog.watch([1, 2, 3])
+    watchdog.check_abandoned()
+    clock[0] += 30
+    assert watchdog.check() == [watched_batch]
+    assert abandoned == [watched_batch]
+    # the worker is not interrupted, it stops at its next check
+    with pytest.raises(BatchAbandonedError):
+        watchdog.check_abandoned()
+    with pytest.raises(BatchAbandonedError):
+        watchdog.start_exporting()
+    assert not watchdog.unwatch(watched_batch)
+
+    # a new batch of the thread runs on
+    watched_batch = watchdog.watch([4, 5])
+    watchdog.check_abandoned()
+    watchdog.start_exporting()
+    assert watchdog.unwatch(watched_batch)
+
+
+def test_batch_work_executor_resubmits_stuck_batch():
+    threads = {}
+    processed = []
+    lock = threading.Lock()
+    retried = threading.Event()
+
+    def work_handler(batch):
+        with lock:
+            first_attempt = tuple(batch) not in threads
+            threads.setdefault(tuple(batch), []).append(threading.get_ident())
+        if batch == [4, 5]:
+            if first_attempt:
+                try:
+                    # stuck worker, stopped between requests once the watchdog abandoned it
+                    while True:
+                        time.sleep(0.01)
+                        executor.check_abandoned()
+                finally:
+                    # the stopped thread is alive until the batch is retried, so its ident is not reused
+                    retried.wait(5)
+            retried.set()
+        executor.start_exporting()
+        with lock:
+            processed.extend(batch)
+
+    watchdog = StuckBatchWatchdog(initial_deadline_seconds=0.3, check_interval_seconds=0.05)
+    executor = BatchWorkExecutor(2, 2, watchdog=watchdog)
+    executor.execute(range(10), work_handler)
+    executor.shutdown()
+
+    assert sorted(processed) == list(range(10))
+    assert watchdog.stuck_count == 1
+    assert len(set(threads[(4, 5)])) == 2
+    assert executor.bounded_executor.in_flight == 0
+
+
+def test_batch_work_executor_without_watchdog():
+    executor = BatchWorkExecutor(2, 2)
+    processed = []
+
+    def work_handler(batch):
+        executor.start_exporting()
+        processed.extend(batch)
+
+    executor.execute(range(10), work_handler)
+    executor.shutdown()
+
+    assert executor.watchdog is None
+    assert sorted(processed) == list(range(10))
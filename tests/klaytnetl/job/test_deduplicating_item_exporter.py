@@ -0,0 +1,250 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.deduplicating_item_exporter import (
+    DeduplicatingItemExporter,
+    RecentKeyWindow,
+)
+from blockchainetl.jobs.exporters.fan_out_item_exporter import FanOutItemExporter
+from blockchainetl.jobs.exporters.in_memory_item_exporter import InMemoryItemExporter
+from klaytnetl.executors.batch_work_executor import BatchWorkExecutor
+from klaytnetl.streaming.item_id_calculator import KlaytnItemIdCalculator
+
+ITEM_TYPES = ["block", "transaction", "log", "retraction"]
+
+
+def block_items(block_number):
+    block_hash = "0x%064x" % block_number
+    items = [{"type": "block", "number": block_number, "hash": block_hash}]
+    for transaction_index in range(3):
+        items.append(
+            {
+                "type": "transaction",
+                "block_hash": block_hash,
+                "block_number": block_number,
+                "transaction_index": transaction_index,
+            }
+        )
+        items.append(
+            {
+                "type": "log",
+                "block_hash": block_hash,
+                "block_number": block_number,
+                "log_index": transaction_index,
+            }
+        )
+    return items
+
+
+def create_exporter(window_size=1000, **kwargs):
+    in_memory_exporter = InMemoryItemExporter(item_types=ITEM_TYPES)
+    exporter = DeduplicatingItemExporter(
+        in_memory_exporter,
+        KlaytnItemIdCalculator().calculate_idempotency_key,
+        RecentKeyWindow(window_size),
+        **kwargs
+    )
+    exporter.open()
+    return exporter, in_memory_exporter
+
+
+def test_idempotency_key():
+    calculator = KlaytnItemIdCalculator()
+    block, transaction, log = block_items(10)[:3]
+    assert calculator.calculate_idempotency_key(block) == "block_" + block["hash"]
+    assert (
+        calculator.calculate_idempotency_key(transaction)
+        == block["hash"] + "_transaction_0"
+    )
+    assert calculator.calculate_idempotency_key(log) == block["hash"] + "_log_0"
+    # raw traces do not carry the block hash
+    assert (
+        calculator.calculate_idempotency_key(
+            {"type": "trace", "block_number": 10, "trace_index": 4}
+        )
+        == "10_trace_4"
+    )
+    assert (
+        calculator.calculate_idempotency_key({"type": "trace", "block_number": 10})
+        is None
+    )
+
+
+def test_retried_batches_are_exported_once():
+    exporter, in_memory_exporter = create_exporter()
+    failed_blocks = set()
+    lock = threading.Lock()
+
+    def export_batch(block_numbers):
+        for block_number in block_numbers:
+            for index, item in enumerate(block_items(block_number)):
+                exporter.export_item(item)
+                with lock:
+                    fail = (
+                        block_number % 5 == 0
+                        and index == 3
+                        and block_number not in failed_blocks
+                    )
+                    if fail:
+                        failed_blocks.add(block_number)
+                if fail:
+                    raise OSError("connection reset")
+
+    executor = BatchWorkExecutor(starting_batch_size=4, max_workers=3)
+    executor.execute(range(40), export_batch, total_items=40)
+    executor.shutdown()
+    exporter.close()
+
+    assert len(failed_blocks) == 8
+    assert sorted(
+        item["number"] for item in in_memory_exporter.get_items("block")
+    ) == list(range(40))
+    transactions = in_memory_exporter.get_items("transaction")
+    assert len(transactions) == 40 * 3
+    assert (
+        len(
+            {(item["block_number"], item["transaction_index"]) for item in transactions}
+        )
+        == 40 * 3
+    )
+    assert exporter.duplicate_counter.get() > 0
+
+
+class FlakyItemExporter(InMemoryItemExporter):
+    def __init__(self, item_types, failures):
+        super().__init__(item_types)
+        self.failures = failures
+
+    def export_item(self, item):
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("broken pipe")
+        super().export_item(item)
+
+
+def test_failed_item_is_exported_on_retry():
+    flaky_exporter = FlakyItemExporter(ITEM_TYPES, failures=1)
+    exporter = DeduplicatingItemExporter(
+        flaky_exporter, KlaytnItemIdCalculator().calculate_idempotency_key
+    )
+    exporter.open()
+    item = block_items(1)[1]
+
+    with pytest.raises(OSError):
+        exporter.export_item(item)
+    exporter.export_item(item)
+    exporter.export_item(item)
+    assert flaky_exporter.get_items("transaction") == [item]
+
+
+class SlowItemExporter(InMemoryItemExporter):
+    def __init__(self, item_types):
+        super().__init__(item_types)
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def export_item(self, item):
+        self.started.set()
+        self.released.wait(timeout=5)
+        super().export_item(item)
+
+
+def test_concurrent_copies_are_exported_once():
+    slow_exporter = SlowItemExporter(ITEM_TYPES)
+    exporter = DeduplicatingItemExporter(
+        slow_exporter, KlaytnItemIdCalculator().calculate_idempotency_key
+    )
+    exporter.open()
+    item = block_items(1)[1]
+
+    thread = threading.Thread(target=exporter.export_item, args=(item,))
+    thread.start()
+    assert slow_exporter.started.wait(timeout=5)
+    # a copy exported by another thread while the first one is in flight is dropped
+    exporter.export_item(item)
+    slow_exporter.released.set()
+    thread.join()
+
+    assert slow_exporter.get_items("transaction") == [item]
+    assert exporter.duplicate_counter.get() == 1
+
+
+def test_window_is_bounded_and_reset():
+    exporter, in_memory_exporter = create_exporter(
+        window_size=7, reset_item_types=("retraction",)
+    )
+    exporter.export_items(block_items(1))
+    exporter.export_items(block_items(1))
+    assert len(in_memory_exporter.get_items("transaction")) == 3
+
+    # keys of block 1 are pushed out of the window by block 2
+    exporter.export_items(block_items(2))
+    exporter.export_items(block_items(1))
+    assert len(in_memory_exporter.get_items("transaction")) == 9
+    assert len(exporter.key_window) == 7
+
+    exporter.export_item(
+        {"type": "retraction", "block_number": 1, "block_hash": "0x%064x" % 1}
+    )
+    assert len(exporter.key_window) == 0
+    exporter.export_items(block_items(1))
+    assert len(in_memory_exporter.get_items("transaction")) == 12
+    assert len(in_memory_exporter.get_items("retraction")) == 1
+
+
+class FailingBatchItemExporter(InMemoryItemExporter):
+    def __init__(self, item_types, failures):
+        super().__init__(item_types)
+        self.failures = failures
+        self.batches = []
+
+    def export_items(self, items):
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("broken pipe")
+        self.batches.append(list(items))
+        for item in items:
+            self.export_item(item)
+
+
+def test_errors_of_fan_out_sinks_reach_the_caller():
+    sink = FailingBatchItemExporter(ITEM_TYPES, failures=1)
+    exporter = DeduplicatingItemExporter(
+        FanOutItemExporter([sink]), KlaytnItemIdCalculator().calculate_idempotency_key
+    )
+    exporter.open()
+
+    with pytest.raises(RuntimeError, match="broken pipe"):
+        exporter.export_items(block_items(1))
+    assert len(exporter.key_window) == 0
+
+    # the retry is delivered as one batch, its copies within the batch are dropped
+    exporter.export_items(block_items(1) + block_items(1))
+    exporter.close()
+    assert sink.batches == [block_items(1)]
+    assert exporter.duplicate_counter.get() == 7
@@ -0,0 +1,272 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+import tests.resources
+from blockchainetl.arrow_files import (
+    is_arrow_file,
+    iterate_arrow_column,
+    iterate_arrow_items,
+    list_arrow_files,
+)
+from klaytnetl.jobs.exporters.enrich_block_group_item_exporter import (
+    BLOCK_FIELDS_TO_EXPORT,
+    LOG_FIELDS_TO_EXPORT,
+    enrich_block_group_item_exporter,
+)
+from klaytnetl.jobs.exporters.parquet_column_types import COLUMN_TYPE_MAPPING
+from klaytnetl.jobs.exporters.token_transfers_item_exporter import (
+    token_transfers_item_exporter,
+)
+from klaytnetl.jobs.extract_token_transfers_job import (
+    LOG_FIELDS_TO_READ,
+    ExtractTokenTransfersJob,
+)
+from klaytnetl.misc_utils import extract_field, filter_items, get_item_iterable
+from schemas.blocks import BLOCKS_SCHEMA
+from schemas.contracts import CONTRACTS_SCHEMA
+from schemas.logs import LOGS_SCHEMA
+from schemas.receipts import RECEIPTS_SCHEMA
+from schemas.token_transfers import TOKEN_TRANSFERS_SCHEMA
+from schemas.tokens import TOKENS_SCHEMA
+from schemas.traces import TRACES_SCHEMA
+from schemas.transactions import TRANSACTIONS_SCHEMA
+from tests.helpers import compare_lines_ignore_order, read_file
+
+RESOURCE_GROUP = "test_export_block_groups_job"
+
+
+def read_items(item_type, file_name):
+    content = tests.resources.read_resource(
+        [RESOURCE_GROUP, "block_groups_enrich"], file_name
+    )
+    return [
+        dict(json.loads(line), type=item_type) for line in content.splitlines() if line
+    ]
+
+
+def to_column_types(schema):
+    column_types = {}
+    for column in schema:
+        column_type = (
+            to_column_types(column["fields"])
+            if column["type"] in ("RECORD", "STRUCT")
+            else column["type"]
+        )
+        if column.get("mode") == "REPEATED":
+            column_type = [column_type]
+        column_types[column["name"]] = column_type
+    return column_types
+
+
+@pytest.mark.parametrize(
+    "item_type,schema",
+    [
+        ("block", BLOCKS_SCHEMA),
+        ("transaction", TRANSACTIONS_SCHEMA),
+        ("receipt", RECEIPTS_SCHEMA),
+        ("log", LOGS_SCHEMA),
+        ("token_transfer", TOKEN_TRANSFERS_SCHEMA),
+        ("trace", TRACES_SCHEMA),
+        ("contract", CONTRACTS_SCHEMA),
+        ("token", TOKENS_SCHEMA),
+    ],
+)
+def test_column_types_follow_schemas(item_type, schema):
+    assert COLUMN_TYPE_MAPPING[item_type] == to_column_types(schema)
+
+
+def test_export_parquet(tmpdir):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    blocks_output_file = str(tmpdir.join("blocks.parquet"))
+    transactions_output_file = str(tmpdir.join("transactions.parquet"))
+
+    exporter = enrich_block_group_item_exporter(
+        blocks_output_file,
+        transactions_output_file,
+        None,
+        None,
+        None,
+        file_format="parquet",
+        row_group_size=30,
+    )
+    blocks = read_items("block", "expected_blocks.json")
+    transactions = read_items("transaction", "expected_transactions.json")
+    exporter.open()
+    exporter.export_items(blocks + transactions)
+    exporter.close()
+
+    block_table = pq.read_table(blocks_output_file)
+    assert str(block_table.schema.field("gas_used").type) == "decimal128(38, 0)"
+    assert (
+        str(block_table.schema.field("block_timestamp").type) == "timestamp[ms, tz=UTC]"
+    )
+    block = block_table.to_pylist()[0]
+    assert block["number"] == blocks[0]["number"]
+    assert block["gas_used"] == Decimal(blocks[0]["gas_used"])
+    assert block["block_timestamp"] == datetime.fromtimestamp(
+        blocks[0]["block_unix_timestamp"], tz=timezone.utc
+    )
+    assert block["committee"] == blocks[0]["committee"]
+
+    transaction_file = pq.ParquetFile(transactions_output_file)
+    assert transaction_file.metadata.num_rows == len(transactions)
+    assert transaction_file.metadata.num_row_groups == 4
+    transaction = transaction_file.read().to_pylist()[0]
+    assert transaction["hash"] == transactions[0]["hash"]
+    assert transaction["value"] == Decimal(transactions[0]["value"])
+    assert transaction["signatures"] == transactions[0]["signatures"]
+
+
+def test_export_parquet_with_file_maxlines(tmpdir):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    transactions_output_dir = str(tmpdir.join("transactions"))
+
+    exporter = enrich_block_group_item_exporter(
+        None,
+        transactions_output_dir,
+        None,
+        None,
+        None,
+        file_format="parquet",
+        file_maxlines=40,
+    )
+    transactions = read_items("transaction", "expected_transactions.json")
+    exporter.open()
+    exporter.export_items(transactions)
+    exporter.close()
+
+    assert sorted(os.listdir(transactions_output_dir)) == [
+        "data-000000000000.parquet",
+        "data-000000000001.parquet",
+        "data-000000000002.parquet",
+    ]
+    tables = [
+        pq.read_table(os.path.join(transactions_output_dir, file_name))
+        for file_name in sorted(os.listdir(transactions_output_dir))
+    ]
+    assert [table.num_rows for table in tables] == [40, 40, 21]
+    hashes = [row["hash"] for table in tables for row in table.to_pylist()]
+    assert hashes == [transaction["hash"] for transaction in transactions]
+
+
+def export_items(items, exporter):
+    exporter.open()
+    exporter.export_items(items)
+    exporter.close()
+
+
+def test_export_arrow_and_read_items(tmpdir):
+    pytest.importorskip("pyarrow")
+
+    blocks_output_file = str(tmpdir.join("blocks.arrow"))
+    logs_output_dir = str(tmpdir.join("logs"))
+
+    blocks = read_items("block", "expected_blocks.json")
+    logs = read_items("log", "expected_logs.json")
+    export_items(
+        blocks,
+        enrich_block_group_item_exporter(
+            blocks_output_file, None, None, None, None, file_format="arrow"
+        ),
+    )
+    export_items(
+        logs,
+        enrich_block_group_item_exporter(
+            None,
+            None,
+            None,
+            logs_output_dir,
+            None,
+            file_format="arrow",
+            row_group_size=7,
+            file_maxlines=40,
+        ),
+    )
+
+    assert is_arrow_file(blocks_output_file)
+    assert is_arrow_file(logs_output_dir)
+    assert len(list_arrow_files(logs_output_dir)) == (len(logs) + 39) // 40
+
+    # values are the ones of JSON lines outputs
+    expected_blocks = [
+        {field: block[field] for field in BLOCK_FIELDS_TO_EXPORT} for block in blocks
+    ]
+    assert list(iterate_arrow_items(blocks_output_file)) == expected_blocks
+
+    # only the fields to read which are exported, "removed" is not
+    fields = [field for field in LOG_FIELDS_TO_READ if field in LOG_FIELDS_TO_EXPORT]
+    expected_logs = [{field: log[field] for field in fields} for log in logs]
+    assert (
+        list(iterate_arrow_items(logs_output_dir, LOG_FIELDS_TO_READ)) == expected_logs
+    )
+    assert list(iterate_arrow_column(logs_output_dir, "transaction_hash")) == [
+        log["transaction_hash"] for log in logs
+    ]
+
+
+def test_extract_from_arrow(tmpdir):
+    pytest.importorskip("pyarrow")
+
+    logs_output_file = str(tmpdir.join("logs.arrow"))
+    logs = read_items("log", "expected_logs.json")
+    export_items(
+        logs,
+        enrich_block_group_item_exporter(
+            None, None, None, logs_output_file, None, file_format="arrow"
+        ),
+    )
+
+    def extract_token_transfers(logs_iterable, output_file):
+        ExtractTokenTransfersJob(
+            logs_iterable=logs_iterable,
+            batch_size=10,
+            item_exporter=token_transfers_item_exporter(output_file),
+            max_workers=2,
+        ).run()
+        return read_file(output_file)
+
+    with get_item_iterable(logs_output_file, columns=LOG_FIELDS_TO_READ) as items:
+        from_arrow = extract_token_transfers(items, str(tmpdir.join("from_arrow.csv")))
+    from_json = extract_token_transfers(logs, str(tmpdir.join("from_json.csv")))
+    compare_lines_ignore_order(from_json, from_arrow)
+
+    addresses_file = str(tmpdir.join("addresses.txt"))
+    filtered_file = str(tmpdir.join("filtered.json"))
+    extract_field(logs_output_file, addresses_file, "address")
+    assert read_file(addresses_file).splitlines() == [log["address"] for log in logs]
+    filter_items(logs_output_file, filtered_file, lambda item: item["log_index"] == 0)
+    assert [json.loads(line) for line in read_file(filtered_file).splitlines()] == [
+        {field: log[field] for field in LOG_FIELDS_TO_EXPORT}
+        for log in logs
+        if log["log_index"] == 0
+    ]
@@ -0,0 +1,139 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.partitioned_file_item_exporter import get_partition
+from klaytnetl.jobs.exporters.raw_traces_item_exporter import raw_traces_item_exporter
+
+# 2023-01-31 23:00:00 UTC
+TIMESTAMP = 1675206000
+
+
+def trace(block_number, hours=0):
+    return {
+        "type": "trace",
+        "block_number": block_number,
+        "trace_index": 0,
+        "block_unix_timestamp": TIMESTAMP + hours * 3600,
+    }
+
+
+def list_files(dirname):
+    return sorted(
+        os.path.relpath(os.path.join(root, file_name), dirname)
+        for root, _, file_names in os.walk(dirname)
+        for file_name in file_names
+    )
+
+
+def read_block_numbers(path):
+    with open(path) as file:
+        return [json.loads(line)["block_number"] for line in file]
+
+
+def test_partition_by_hour_with_lru_cap(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = raw_traces_item_exporter(
+        dirname, partition_by="hour", max_open_partitions=1
+    )
+    exporter.open()
+    # partitions are opened again once another one was opened in between
+    exporter.export_items([trace(1), trace(2, hours=1), trace(3), trace(4, hours=2)])
+    exporter.close()
+
+    assert list_files(dirname) == [
+        "date=2023-01-31/hour=23/data-000000000000.json",
+        "date=2023-01-31/hour=23/data-000000000001.json",
+        "date=2023-02-01/hour=00/data-000000000000.json",
+        "date=2023-02-01/hour=01/data-000000000000.json",
+    ]
+    assert read_block_numbers(
+        os.path.join(dirname, "date=2023-01-31/hour=23/data-000000000001.json")
+    ) == [3]
+
+
+def test_concurrent_writes_with_lru_cap(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = raw_traces_item_exporter(
+        dirname, partition_by="hour", max_open_partitions=1
+    )
+    exporter.open()
+
+    def export(offset):
+        for block_number in range(offset, 400, 4):
+            exporter.export_item(trace(block_number, hours=block_number % 3))
+
+    threads = [threading.Thread(target=export, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    exporter.close()
+
+    # evicted partitions are closed once their writes finished, no file index is used twice
+    block_numbers = [
+        block_number
+        for path in list_files(dirname)
+        for block_number in read_block_numbers(os.path.join(dirname, path))
+    ]
+    assert sorted(block_numbers) == list(range(400))
+
+
+def test_partition_by_block_range_with_rolling(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = raw_traces_item_exporter(
+        dirname, partition_by="block_range", block_range_size=10, file_maxlines=5
+    )
+    exporter.open()
+    exporter.export_items([trace(block_number) for block_number in range(5, 23)])
+    exporter.close()
+
+    assert list_files(dirname) == [
+        "start_block=000000000000/data-000000000000.json",
+        "start_block=000000000010/data-000000000000.json",
+        "start_block=000000000010/data-000000000001.json",
+        "start_block=000000000020/data-000000000000.json",
+    ]
+    assert read_block_numbers(
+        os.path.join(dirname, "start_block=000000000010/data-000000000001.json")
+    ) == list(range(15, 20))
+
+
+def test_get_partition():
+    assert get_partition({"type": "block", "number": 123456}, "block_range", 1000) == (
+        "start_block=000000123000"
+    )
+    assert get_partition({"block_timestamp": "2023-01-31T23:59:59+09:00"}, "date") == (
+        "date=2023-01-31"
+    )
+    assert get_partition({"block_timestamp": "2023-02-01T00:00:01+09:00"}, "date") == (
+        "date=2023-01-31"
+    )
+    with pytest.raises(ValueError, match="Block timestamp is required"):
+        get_partition({"type": "log", "block_number": 1}, "date")
@@ -0,0 +1,215 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import csv
+import decimal
+import io
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import Column, Integer, MetaData, String, Table  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from blockchainetl.jobs.exporters.postgres_item_exporter import (  # noqa: E402
+    PostgresItemExporter,
+    build_copy_statements,
+    encode_csv_row,
+)
+
+
+def test_encode_csv_row_keeps_nulls_apart_from_empty_strings():
+    row = encode_csv_row(
+        [None, "", 'say "hi",\n', 10**30, decimal.Decimal("1.5"), True, ["0x1", None]]
+    )
+
+    assert row == ',"","say ""hi"",\n",' + str(10**30) + ',1.5,t,"{""0x1"",NULL}"\n'
+    assert next(csv.reader(io.StringIO(row)))[1:3] == ["", 'say "hi",\n']
+
+
+def test_build_copy_statements():
+    statements = build_copy_statements(
+        "public.logs",
+        "staging_logs",
+        ["transaction_hash", "log_index", "data"],
+        ["transaction_hash", "log_index"],
+        upsert=True,
+    )
+
+    assert statements.create_staging_table == (
+        "CREATE TEMPORARY TABLE staging_logs (LIKE public.logs INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    assert statements.copy == (
+        "COPY staging_logs (transaction_hash, log_index, data) FROM STDIN WITH (FORMAT csv)"
+    )
+    assert statements.merge == (
+        "INSERT INTO public.logs (transaction_hash, log_index, data) "
+        "SELECT transaction_hash, log_index, data FROM staging_logs "
+        "ON CONFLICT (transaction_hash, log_index) DO UPDATE SET data = EXCLUDED.data"
+    )
+
+    statements = build_copy_statements(
+        "logs",
+        "staging_logs",
+        ["transaction_hash", "log_index"],
+        ["transaction_hash", "log_index"],
+    )
+    assert statements.merge.endswith(
+        "ON CONFLICT (transaction_hash, log_index) DO NOTHING"
+    )
+
+
+class MockCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql):
+        if self.connection.fail_on in sql:
+            raise RuntimeError("failed: " + sql)
+        self.connection.statements.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        self.connection.statements.append(sql)
+        self.connection.copied.append(buffer.read())
+
+    def close(self):
+        pass
+
+
+class MockConnection:
+    def __init__(self, fail_on):
+        self.fail_on = fail_on
+        self.statements = []
+        self.copied = []
+        self.committed = False
+        self.rolled_back = False
+        self.closed = False
+
+    def cursor(self):
+        return MockCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class MockEngine:
+    dialect = postgresql.dialect()
+
+    def __init__(self, fail_on="FAIL"):
+        self.fail_on = fail_on
+        self.connections = []
+
+    def raw_connection(self):
+        connection = MockConnection(self.fail_on)
+        self.connections.append(connection)
+        return connection
+
+    def dispose(self):
+        pass
+
+
+def create_exporter(monkeypatch, engine, **kwargs):
+    monkeypatch.setattr(PostgresItemExporter, "create_engine", lambda self: engine)
+    metadata = MetaData()
+    blocks = Table(
+        "blocks",
+        metadata,
+        Column("number", Integer, primary_key=True),
+        Column("hash", String),
+    )
+    logs = Table(
+        "logs",
+        metadata,
+        Column("transaction_hash", String, primary_key=True),
+        Column("log_index", Integer, primary_key=True),
+        Column("data", String),
+    )
+    return PostgresItemExporter(
+        "postgresql://",
+        {
+            "block": postgresql.insert(blocks),
+            "log": postgresql.insert(logs).on_conflict_do_update(
+                index_elements=["transaction_hash", "log_index"],
+                set_={"data": postgresql.insert(logs).excluded.data},
+            ),
+        },
+        print_sql=False,
+        **kwargs
+    )
+
+
+def test_copy_items_follows_conflict_action_of_insert_statements(monkeypatch):
+    engine = MockEngine()
+    exporter = create_exporter(monkeypatch, engine, max_workers=1)
+    exporter.open()
+    exporter.export_items(
+        [
+            {"type": "block", "number": 1, "hash": "0x1"},
+            {"type": "block", "number": 1, "hash": "0x1"},
+            {"type": "log", "transaction_hash": "0xa", "log_index": 0, "data": "0x"},
+            {"type": "log", "transaction_hash": "0xa", "log_index": 0, "data": "0x2"},
+        ]
+    )
+    exporter.close()
+
+    block_connection, log_connection = engine.connections
+    assert block_connection.statements == [
+        "CREATE TEMPORARY TABLE staging_blocks (LIKE blocks INCLUDING DEFAULTS) ON COMMIT DROP",
+        "COPY staging_blocks (number, hash) FROM STDIN WITH (FORMAT csv)",
+        "INSERT INTO blocks (number, hash) SELECT number, hash FROM staging_blocks "
+        "ON CONFLICT (number) DO NOTHING",
+    ]
+    assert block_connection.copied == ['1,"0x1"\n1,"0x1"\n']
+    assert log_connection.statements[-1].endswith(
+        "ON CONFLICT (transaction_hash, log_index) DO UPDATE SET data = EXCLUDED.data"
+    )
+    # rows updating the same key twice are merged, the last one wins
+    assert log_connection.copied == ['"0xa",0,"0x2"\n']
+    assert all(
+        connection.committed and connection.closed for connection in engine.connections
+    )
+
+
+def test_copy_items_rolls_back_failed_chunks(monkeypatch):
+    engine = MockEngine(fail_on="INSERT INTO blocks")
+    exporter = create_exporter(monkeypatch, engine, upsert=True, rows_per_transaction=2)
+    exporter.open()
+    with pytest.raises(RuntimeError):
+        exporter.export_items(
+            [{"type": "block", "number": number, "hash": "0x"} for number in range(3)]
+        )
+    exporter.close()
+
+    assert len(engine.connections) == 2
+    assert all(
+        connection.rolled_back and not connection.committed and connection.closed
+        for connection in engine.connections
+    )
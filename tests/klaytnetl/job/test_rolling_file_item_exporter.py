@@ -0,0 +1,132 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import json
+import os
+import threading
+
+from blockchainetl.jobs.exporters.rolling_file_item_exporter import (
+    RollingFileItemExporter,
+)
+from klaytnetl.jobs.exporters.raw_traces_item_exporter import raw_traces_item_exporter
+
+FIELDS = ["block_number", "trace_index"]
+
+
+def trace(block_number, trace_index=0):
+    return {"type": "trace", "block_number": block_number, "trace_index": trace_index}
+
+
+def read_lines(dirname, compress=False):
+    lines = []
+    for file_name in sorted(os.listdir(dirname)):
+        path = os.path.join(dirname, file_name)
+        with gzip.open(path, "rt") if compress else open(path) as file:
+            lines.append(file.read().splitlines())
+    return lines
+
+
+def test_rotate_by_lines(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = raw_traces_item_exporter(
+        dirname, file_format="csv", file_maxlines=2, compress=True
+    )
+    exporter.open()
+    exporter.export_items([trace(block_number) for block_number in range(5)])
+    exporter.close()
+
+    assert sorted(os.listdir(dirname)) == [
+        "data-000000000000.csv.gz",
+        "data-000000000001.csv.gz",
+        "data-000000000002.csv.gz",
+    ]
+    files = read_lines(dirname, compress=True)
+    assert all(lines[0].startswith("block_number,") for lines in files)
+    assert [len(lines) - 1 for lines in files] == [2, 2, 1]
+
+
+def test_rotate_by_bytes_and_seconds(tmpdir):
+    now = [0]
+    line_size = len(json.dumps({"block_number": 10, "trace_index": 0})) + 1
+
+    dirname = str(tmpdir.join("by_bytes"))
+    exporter = RollingFileItemExporter(dirname, FIELDS, file_maxbytes=3 * line_size)
+    for block_number in range(10, 17):
+        exporter.export_item(trace(block_number))
+    exporter.close()
+    assert [len(lines) for lines in read_lines(dirname)] == [3, 3, 1]
+
+    dirname = str(tmpdir.join("by_seconds"))
+    exporter = RollingFileItemExporter(
+        dirname, FIELDS, file_maxseconds=60, clock=lambda: now[0]
+    )
+    for now[0] in (0, 30, 59, 60, 90, 200):
+        exporter.export_item(trace(now[0]))
+    exporter.close()
+    assert [len(lines) for lines in read_lines(dirname)] == [3, 2, 1]
+
+
+def test_concurrent_writes(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = RollingFileItemExporter(dirname, FIELDS, file_maxlines=100)
+
+    def export(block_number):
+        for trace_index in range(250):
+            exporter.export_item(trace(block_number, trace_index))
+
+    threads = [
+        threading.Thread(target=export, args=(block_number,))
+        for block_number in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    exporter.close()
+
+    assert len(os.listdir(dirname)) == 20
+    items = [json.loads(line) for lines in read_lines(dirname) for line in lines]
+    assert sorted((item["block_number"], item["trace_index"]) for item in items) == [
+        (block_number, trace_index)
+        for block_number in range(8)
+        for trace_index in range(250)
+    ]
+
+
+def test_incomplete_file_is_hidden(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = RollingFileItemExporter(dirname, FIELDS, file_maxlines=2)
+    for block_number in range(3):
+        exporter.export_item(trace(block_number))
+
+    assert sorted(os.listdir(dirname)) == [
+        ".data-000000000001.json.tmp",
+        "data-000000000000.json",
+    ]
+    exporter.close()
+    assert sorted(os.listdir(dirname)) == [
+        "data-000000000000.json",
+        "data-000000000001.json",
+    ]
@@ -0,0 +1,119 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import read_manifest
+from klaytnetl.jobs.exporters.raw_block_group_item_exporter import (
+    raw_block_group_item_exporter,
+)
+from klaytnetl.service.backfill_planner import list_output_files
+
+
+def block_items(block_number):
+    yield {"type": "block", "number": block_number, "hash": "0x%064x" % block_number}
+    for transaction_index in range(2):
+        yield {
+            "type": "transaction",
+            "hash": "0x%032x%032x" % (block_number, transaction_index),
+            "block_number": block_number,
+            "transaction_index": transaction_index,
+        }
+
+
+def export(tmpdir, batch_size=10, **kwargs):
+    blocks_output = str(tmpdir.join("blocks"))
+    transactions_output = str(tmpdir.join("transactions"))
+    closed_files = []
+    exporter = raw_block_group_item_exporter(
+        blocks_output=blocks_output,
+        transactions_output=transactions_output,
+        on_file_closed=closed_files.append,
+        **kwargs
+    )
+    exporter.open()
+
+    def export_batch(start_block):
+        for block_number in range(start_block, start_block + batch_size):
+            exporter.export_items(block_items(block_number))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(export_batch, range(0, 200, batch_size)))
+    exporter.close()
+    return blocks_output, transactions_output, closed_files
+
+
+def read_json_lines(filename):
+    with (gzip.open if filename.endswith(".gz") else open)(filename, "rt") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_parts_are_listed_in_block_order(tmpdir):
+    blocks_output, transactions_output, closed_files = export(
+        tmpdir, shard_size=10, compress=True
+    )
+
+    with open(os.path.join(blocks_output, "manifest.json")) as manifest_file:
+        entries = json.load(manifest_file)["parts"]
+    # shards are aligned with batches of 10 blocks, so every batch has its own part
+    assert len(entries) == 20
+    assert [entry["start_block"] for entry in entries] == list(range(0, 200, 10))
+    assert all(entry["end_block"] == entry["start_block"] + 9 for entry in entries)
+    assert all(entry["item_count"] == 10 for entry in entries)
+
+    parts = read_manifest(os.path.join(blocks_output, "manifest.json"))
+    assert all(part.endswith(".json.gz") for part in parts)
+    blocks = [item for part in parts for item in read_json_lines(part)]
+    assert [block["number"] for block in blocks] == list(range(200))
+
+    assert list_output_files(transactions_output) == read_manifest(
+        os.path.join(transactions_output, "manifest.json")
+    )
+    transactions = [
+        item
+        for part in list_output_files(transactions_output)
+        for item in read_json_lines(part)
+    ]
+    assert len(transactions) == 400
+    assert [transaction["block_number"] for transaction in transactions][::2] == list(
+        range(200)
+    )
+
+    # parts are reported as they are completed, manifests last
+    assert sorted(closed_files[-2:]) == [
+        os.path.join(blocks_output, "manifest.json"),
+        os.path.join(transactions_output, "manifest.json"),
+    ]
+    assert len(closed_files) == 42
+    assert not [name for name in os.listdir(blocks_output) if name.startswith(".")]
+
+
+def test_csv_parts_have_headers(tmpdir):
+    blocks_output, _, _ = export(tmpdir, shard_size=100, file_format="csv")
+    for part in read_manifest(os.path.join(blocks_output, "manifest.json")):
+        with open(part) as part_file:
+            assert part_file.readline().startswith("number,hash,")
@@ -0,0 +1,110 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import sqlite3
+
+import pytest
+
+from klaytnetl.jobs.exporters.raw_block_group_item_exporter import (
+    raw_block_group_item_exporter,
+)
+
+
+def block(number):
+    return {
+        "type": "block",
+        "number": number,
+        "hash": "0x%064x" % number,
+        "gas_used": 2**70,
+        "committee": ["0x1", "0x2"],
+        "block_timestamp": "2023-01-31T23:00:00+00:00",
+    }
+
+
+def transaction(block_number, transaction_index):
+    return {
+        "type": "transaction",
+        "hash": "0x%032x%032x" % (block_number, transaction_index),
+        "block_number": block_number,
+        "transaction_index": transaction_index,
+        "from_address": "0xabc",
+        "value": "0x%x" % (10**20),
+    }
+
+
+def export(database, items):
+    exporter = raw_block_group_item_exporter(
+        blocks_output="sqlite://" + database,
+        transactions_output="sqlite://" + database,
+        batch_size=7,
+    )
+    exporter.open()
+    exporter.export_items(items)
+    exporter.close()
+
+
+def items(start_block, end_block):
+    for block_number in range(start_block, end_block + 1):
+        yield block(block_number)
+        for transaction_index in range(3):
+            yield transaction(block_number, transaction_index)
+
+
+def test_export_and_resume(tmpdir):
+    database = str(tmpdir.join("klaytn.db"))
+    export(database, items(0, 9))
+    # exporting an overlapping range again replaces the rows
+    export(database, items(5, 14))
+
+    connection = sqlite3.connect(database)
+    assert connection.execute("SELECT count(*) FROM blocks").fetchone() == (15,)
+    assert connection.execute("SELECT count(*) FROM transactions").fetchone() == (45,)
+    assert connection.execute(
+        "SELECT number, gas_used, committee, block_timestamp FROM blocks WHERE number = 3"
+    ).fetchone() == (3, str(2**70), '["0x1", "0x2"]', "2023-01-31T23:00:00+00:00")
+    assert connection.execute(
+        "SELECT value, typeof(block_number) FROM transactions LIMIT 1"
+    ).fetchone() == (str(10**20), "integer")
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    indexes = {
+        row[0]
+        for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        )
+    }
+    assert {
+        "blocks_hash_idx",
+        "transactions_block_number_idx",
+        "transactions_from_address_idx",
+    } <= indexes
+    assert "blocks_number_idx" not in indexes
+
+
+def test_mixed_outputs_are_rejected(tmpdir):
+    with pytest.raises(ValueError):
+        raw_block_group_item_exporter(
+            blocks_output="sqlite://" + str(tmpdir.join("klaytn.db")),
+            transactions_output=str(tmpdir.join("transactions.json")),
+        )
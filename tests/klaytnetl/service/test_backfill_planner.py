@@ -0,0 +1,202 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import json
+import os
+import sys
+
+from click.testing import CliRunner
+
+from klaytnetl.cli.plan_backfill import plan_backfill
+from klaytnetl.service.backfill_planner import BackfillPlanner, merge_ranges
+
+
+def write_json_lines(path, items, compress=False, truncate_bytes=0):
+    data = "".join(json.dumps(item) + "\n" for item in items).encode("utf-8")
+    if compress:
+        data = gzip.compress(data)
+    if truncate_bytes:
+        data = data[:-truncate_bytes]
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def block(number, transaction_count=1):
+    return {"type": "block", "number": number, "transaction_count": transaction_count}
+
+
+def transaction(block_number, index=0):
+    return {"type": "transaction", "block_number": block_number, "transaction_index": index}
+
+
+def test_backfill_planner_finds_missing_and_duplicated_blocks(tmpdir):
+    blocks_dir = tmpdir.mkdir("blocks")
+    write_json_lines(str(blocks_dir.join("data-000000000000.json")), [block(n) for n in range(100, 110)])
+    write_json_lines(str(blocks_dir.join("data-000000000001.json")), [block(n) for n in range(108, 115)])
+    write_json_lines(str(blocks_dir.join("data-000000000002.json")), [block(n) for n in range(120, 130)])
+
+    planner = BackfillPlanner(100, 129)
+    planner.scan("block", str(blocks_dir))
+    plan = planner.plan()
+
+    assert plan["item_types"]["block"]["missing_ranges"] == [(115, 119)]
+    assert plan["item_types"]["block"]["duplicated_ranges"] == [(108, 109)]
+    assert plan["ranges"] == [(115, 119)]
+
+
+def test_backfill_planner_checks_transactions_against_blocks(tmpdir):
+    blocks_file = str(tmpdir.join("blocks.json"))
+    transactions_file = str(tmpdir.join("transactions.csv"))
+    write_json_lines(blocks_file, [block(0, 0), block(1, 2), block(2, 1), block(3, 1)])
+    with open(transactions_file, "w") as file:
+        file.write("block_number,transaction_index\n1,0\n1,1\n3,0\n")
+
+    planner = BackfillPlanner(0, 3)
+    planner.scan("block", blocks_file)
+    planner.scan("transaction", transactions_file)
+    plan = planner.plan()
+
+    assert plan["item_types"]["transaction"]["missing_ranges"] == [(2, 2)]
+    assert plan["ranges"] == [(2, 2)]
+
+
+def test_backfill_planner_plans_blocks_of_truncated_files(tmpdir):
+    transactions_dir = tmpdir.mkdir("transactions")
+    write_json_lines(
+        str(transactions_dir.join("data-000000000000.json.gz")),
+        [transaction(n) for n in range(0, 1000)],
+        compress=True,
+        truncate_bytes=10,
+    )
+    write_json_lines(
+        str(transactions_dir.join("data-000000000001.json.gz")),
+        [transaction(n) for n in range(1000, 2000)],
+        compress=True,
+    )
+
+    planner = BackfillPlanner(0, 1999)
+    planner.scan("transaction", str(transactions_dir))
+    plan = planner.plan()
+
+    assert len(plan["item_types"]["transaction"]["truncated_files"]) == 1
+    assert plan["ranges"][0][0] == 0
+    assert plan["ranges"][0][1] < 1000
+
+
+def test_backfill_planner_scans_partitions(tmpdir):
+    blocks_dir = tmpdir.mkdir("blocks")
+    write_json_lines(
+        str(blocks_dir.mkdir("date=2020-01-01").join("data-000000000000.json")),
+        [block(n) for n in range(0, 50)],
+    )
+    write_json_lines(
+        str(blocks_dir.mkdir("date=2020-01-02").join("data-000000000000.json")),
+        [block(n) for n in range(60, 100)],
+    )
+    # re-exported by plan_backfill --run
+    write_json_lines(
+        str(
+            blocks_dir.mkdir("start_block=000000000050")
+            .mkdir("end_block=000000000059")
+            .join("data-000000000000.json")
+        ),
+        [block(n) for n in range(50, 60)],
+    )
+    write_json_lines(str(blocks_dir.mkdir(".tmp").join("data.json")), [block(0)])
+
+    blocks_file = str(tmpdir.join("blocks.json"))
+    write_json_lines(blocks_file, [block(n) for n in range(0, 90)])
+    write_json_lines(
+        str(
+            tmpdir.mkdir("start_block=000000000090")
+            .mkdir("end_block=000000000099")
+            .join("blocks.json")
+        ),
+        [block(n) for n in range(90, 100)],
+    )
+
+    for path in (str(blocks_dir), blocks_file):
+        planner = BackfillPlanner(0, 99)
+        planner.scan("block", path)
+        plan = planner.plan()
+        assert plan["item_types"]["block"]["rows"] == 100
+        assert plan["ranges"] == []
+
+
+def test_backfill_planner_plans_blocks_of_corrupt_rows(tmpdir):
+    transactions_file = str(tmpdir.join("transactions.json"))
+    write_json_lines(
+        transactions_file,
+        [transaction(n) for n in range(0, 10)]
+        + [{"type": "transaction", "block_number": "0xa"}]
+        + [transaction(n) for n in range(11, 20)],
+    )
+
+    planner = BackfillPlanner(0, 19)
+    planner.scan("transaction", transactions_file)
+    plan = planner.plan()
+
+    assert plan["item_types"]["transaction"]["truncated_files"] == [transactions_file]
+    assert plan["ranges"] == [(0, 9)]
+
+
+class FakeExportBlockGroupJob:
+    def __init__(self, start_block, end_block, item_exporter, **kwargs):
+        self.start_block = start_block
+        self.end_block = end_block
+        self.item_exporter = item_exporter
+
+    def run(self):
+        self.item_exporter.open()
+        for number in range(self.start_block, self.end_block + 1):
+            self.item_exporter.export_item(block(number, 0))
+        self.item_exporter.close()
+
+
+def test_plan_backfill_run_fills_planned_ranges(tmpdir, monkeypatch):
+    # the module is shadowed by the command of the same name in klaytnetl.cli
+    export_block_group_module = sys.modules["klaytnetl.cli.export_block_group"]
+    monkeypatch.setattr(export_block_group_module, "ExportBlockGroupJob", FakeExportBlockGroupJob)
+    blocks_dir = tmpdir.mkdir("blocks")
+    write_json_lines(str(blocks_dir.join("data-000000000000.json.gz")), [block(n, 0) for n in range(0, 50)], compress=True)
+    write_json_lines(str(blocks_dir.join("data-000000000001.json.gz")), [block(n, 0) for n in range(60, 100)], compress=True)
+    args = ["--end-block", "99", "--blocks-output", str(blocks_dir), "--output", str(tmpdir.join("plan.csv"))]
+
+    result = CliRunner().invoke(plan_backfill, args + ["--run", "--compress"], catch_exceptions=False)
+    assert result.exit_code == 0
+    assert tmpdir.join("plan.csv").read() == "50,59\n"
+    # re-exports are rolled files the planner scans
+    assert os.listdir(str(blocks_dir.join("start_block=000000000050", "end_block=000000000059"))) == [
+        "data-000000000000.json.gz"
+    ]
+
+    result = CliRunner().invoke(plan_backfill, args, catch_exceptions=False)
+    assert result.exit_code == 0
+    assert tmpdir.join("plan.csv").read() == ""
+
+
+def test_merge_ranges():
+    assert merge_ranges([(11, 20), (0, 5), (6, 8)]) == [(0, 8), (11, 20)]
+    assert merge_ranges([(11, 20), (0, 5), (7, 8)], merge_distance=1) == [(0, 8), (11, 20)]
@@ -0,0 +1,233 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+import json
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.aws_kinesis_item_exporter import (
+    MAX_RECORDS_PER_REQUEST,
+    MAX_REQUEST_SIZE,
+    AwsKinesisItemExporter,
+)
+from blockchainetl.jobs.exporters.kinesis_aggregation import (
+    aggregate_records,
+    deaggregate_record,
+)
+
+MAX_HASH_KEY = 2**128 - 1
+
+
+class MockKinesisClient:
+    """Stand-in of Kinesis with 4 open shards, throttling the first put of every other record"""
+
+    def __init__(self, throttle_always=False, shard_count=4):
+        step = (MAX_HASH_KEY + 1) // shard_count
+        self.shards = [
+            {
+                "ShardId": "shardId-closed",
+                "HashKeyRange": {
+                    "StartingHashKey": "0",
+                    "EndingHashKey": str(MAX_HASH_KEY),
+                },
+                "SequenceNumberRange": {"EndingSequenceNumber": "1"},
+            }
+        ] + [
+            {
+                "ShardId": "shardId-{}".format(index),
+                "HashKeyRange": {
+                    "StartingHashKey": str(index * step),
+                    "EndingHashKey": str((index + 1) * step - 1),
+                },
+                "SequenceNumberRange": {},
+            }
+            for index in range(shard_count)
+        ]
+        self.throttle_always = throttle_always
+        self.seen = set()
+        self.records = []
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def list_shards(self, StreamName=None, NextToken=None):
+        # two pages, the second one is requested by token only
+        if NextToken is None:
+            assert StreamName is not None
+            return {"Shards": self.shards[:2], "NextToken": "next"}
+        assert StreamName is None
+        return {"Shards": self.shards[2:]}
+
+    def put_records(self, Records, StreamName):
+        assert len(Records) <= MAX_RECORDS_PER_REQUEST
+        assert (
+            sum(len(r["Data"]) + len(r["PartitionKey"]) for r in Records)
+            <= MAX_REQUEST_SIZE
+        )
+        results = []
+        with self.lock:
+            self.requests.append((StreamName, len(Records)))
+            for record in Records:
+                key = (record["PartitionKey"], record["Data"])
+                first_put = key not in self.seen
+                self.seen.add(key)
+                if self.throttle_always or (first_put and len(self.seen) % 2 == 0):
+                    results.append(
+                        {"ErrorCode": "ProvisionedThroughputExceededException"}
+                    )
+                else:
+                    self.records.append((StreamName, record))
+                    results.append({"SequenceNumber": "1", "ShardId": "shardId-0"})
+        return {
+            "FailedRecordCount": sum("ErrorCode" in r for r in results),
+            "Records": results,
+        }
+
+
+def items(block_count=20):
+    for block_number in range(block_count):
+        yield {
+            "type": "block",
+            "number": block_number,
+            "item_id": "block_%d" % block_number,
+        }
+        for transaction_index in range(50):
+            yield {
+                "type": "transaction",
+                "block_number": block_number,
+                "transaction_index": transaction_index,
+                "input": "0x" + "ab" * 1000,
+                "item_id": "transaction_%d_%d" % (block_number, transaction_index),
+            }
+
+
+MAPPING = {"block": "klaytn_blocks", "transaction": "klaytn_transactions"}
+
+
+def put_items(client):
+    result = []
+    for stream_name, record in client.records:
+        for partition_key, data in deaggregate_record(
+            record["PartitionKey"], record["Data"]
+        ):
+            item = json.loads(data)
+            assert item["item_id"] == partition_key
+            assert MAPPING[item["type"]] == stream_name
+            result.append(item)
+    return result
+
+
+@pytest.mark.parametrize("aggregate", [False, True])
+def test_export_items_retries_throttled_entries(aggregate):
+    client = MockKinesisClient()
+    exporter = AwsKinesisItemExporter(
+        MAPPING, aggregate=aggregate, retry_backoff_seconds=0, client=client
+    )
+    exporter.open()
+    exporter.export_items(items())
+    exporter.close()
+
+    exported = put_items(client)
+    assert len(exported) == 20 * 51
+    assert len({item["item_id"] for item in exported}) == 20 * 51
+
+    counters = exporter.get_counters()
+    assert counters["items"] == 20 * 51
+    assert counters["records"] == len(client.records)
+    assert counters["throttled"] > 0
+    assert counters["retried"] >= counters["throttled"]
+    if aggregate:
+        assert counters["records"] < counters["items"] / 10
+
+
+def test_export_items_raises_after_retries():
+    client = MockKinesisClient(throttle_always=True)
+    exporter = AwsKinesisItemExporter(
+        MAPPING, max_retries=2, retry_backoff_seconds=0, client=client
+    )
+    with pytest.raises(RuntimeError, match="after 2 retries"):
+        exporter.export_items(items(block_count=1))
+    exporter.close()
+
+
+def test_records_are_grouped_by_shard():
+    client = MockKinesisClient()
+    exporter = AwsKinesisItemExporter(MAPPING, client=client)
+
+    for item in items(block_count=2):
+        partition_key = exporter.get_partition_key(item)
+        hash_key = int.from_bytes(hashlib.md5(partition_key.encode()).digest(), "big")
+        shard = exporter._get_shard("klaytn_transactions", partition_key)
+        assert shard == "shardId-{}".format(hash_key * 4 // (MAX_HASH_KEY + 1))
+
+
+def test_aggregate_records_within_size_limit():
+    records = [("key_%d" % (i % 7), b"x" * (i * 37 % 5000)) for i in range(3000)]
+    aggregated = list(aggregate_records(records, max_size=64 * 1024))
+
+    assert sum(count for _, _, count in aggregated) == len(records)
+    assert all(
+        len(data) + len(partition_key) <= 64 * 1024
+        for partition_key, data, _ in aggregated
+    )
+    deaggregated = [
+        record
+        for partition_key, data, _ in aggregated
+        for record in deaggregate_record(partition_key, data)
+    ]
+    assert deaggregated == records
+
+
+def test_deaggregate_record_checks_digest():
+    ((partition_key, data, count),) = aggregate_records([("a", b"1"), ("b", b"2")])
+    assert count == 2
+    assert deaggregate_record("a", b"plain") == [("a", b"plain")]
+    with pytest.raises(ValueError):
+        deaggregate_record(partition_key, data[:-1] + bytes([data[-1] ^ 1]))
+
+
+# AggregatedRecord as written by the KPL, with an explicit hash key table and tags, which are ignored
+KPL_AGGREGATED_RECORD = bytes.fromhex(
+    "f3899ac20a03706b310a03706b321204313233341a0b080010001a0568656c6c6f1a0e08011a05"
+    "776f726c6422030a016bfb6788a8bee9a04ce07c6e3822ff4a77"
+)
+
+
+def test_deaggregate_kpl_record():
+    assert deaggregate_record("pk1", KPL_AGGREGATED_RECORD) == [
+        ("pk1", b"hello"),
+        ("pk2", b"world"),
+    ]
+
+
+def test_aggregate_records_like_kpl():
+    ((partition_key, data, count),) = aggregate_records(
+        [("pk1", b"hello"), ("pk2", b"world")]
+    )
+    message = bytes.fromhex(
+        "0a03706b310a03706b32" "1a0908001a0568656c6c6f" "1a0908011a05776f726c64"
+    )
+    assert (partition_key, count) == ("pk1", 2)
+    assert data == b"\xf3\x89\x9a\xc2" + message + hashlib.md5(message).digest()
@@ -0,0 +1,207 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.fan_out_item_exporter import (
+    FAILURE_POLICY_DROP,
+    FAILURE_POLICY_SPILL,
+    FanOutItemExporter,
+    FanOutSink,
+)
+from klaytnetl.streaming.item_exporter_creator import (
+    create_fan_out_item_exporter,
+    get_default_failure_policy,
+)
+
+
+class RecordingItemExporter:
+    def __init__(self, gate=None, fail=False):
+        self.gate = gate
+        self.fail = fail
+        self.batches = []
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def export_items(self, items):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.fail:
+            raise OSError("connection refused")
+        self.batches.append(list(items))
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def items(self):
+        return [item for batch in self.batches for item in batch]
+
+
+def items(count, start=0):
+    return [
+        {"type": "block", "number": number} for number in range(start, start + count)
+    ]
+
+
+def test_slow_sink_does_not_hold_back_others():
+    gate = threading.Event()
+    fast_sink = RecordingItemExporter()
+    slow_sink = RecordingItemExporter(gate=gate)
+    exporter = FanOutItemExporter(
+        [
+            FanOutSink(fast_sink, batch_size=10),
+            FanOutSink(
+                slow_sink,
+                queue_size=5,
+                batch_size=10,
+                failure_policy=FAILURE_POLICY_DROP,
+            ),
+        ]
+    )
+    exporter.open()
+
+    # the slow sink is stuck on its first item, the rest of the items don't fit in its queue
+    exporter.export_items(items(100))
+    assert fast_sink.items == items(100)
+    assert all(len(batch) <= 10 for batch in fast_sink.batches)
+
+    gate.set()
+    exporter.close()
+    assert fast_sink.closed and slow_sink.closed
+    counters = exporter.sinks[1].get_counters()
+    assert counters["dropped"] > 0
+    assert counters["exported"] == len(slow_sink.items)
+    assert counters["exported"] + counters["dropped"] == 100
+
+
+def test_failed_sink_spills_items(tmpdir):
+    spill_filename = str(tmpdir.join("spill", "1-kafka.json"))
+    healthy_sink = RecordingItemExporter()
+    exporter = FanOutItemExporter(
+        [
+            healthy_sink,
+            FanOutSink(
+                RecordingItemExporter(fail=True),
+                failure_policy=FAILURE_POLICY_SPILL,
+                spill_filename=spill_filename,
+            ),
+        ]
+    )
+    exporter.open()
+    exporter.export_items(items(20))
+    exporter.export_items(items(5, start=20))
+    exporter.close()
+
+    assert healthy_sink.items == items(25)
+    with open(spill_filename) as spill_file:
+        spilled = [json.loads(line) for line in spill_file]
+    assert sorted(item["number"] for item in spilled) == list(range(25))
+    assert exporter.sinks[1].get_counters()["spilled"] == 25
+
+
+def test_failed_blocking_sink_fails_export():
+    healthy_sink = RecordingItemExporter()
+    failed_sink = RecordingItemExporter(fail=True)
+    exporter = FanOutItemExporter([healthy_sink, failed_sink])
+    exporter.open()
+    with pytest.raises(RuntimeError, match="connection refused"):
+        exporter.export_items(items(3))
+    with pytest.raises(RuntimeError, match="connection refused"):
+        exporter.export_items(items(3))
+    # the sink exports again once its error was raised, so retried items are delivered
+    failed_sink.fail = False
+    exporter.export_items(items(3))
+    assert failed_sink.items == items(3)
+    assert healthy_sink.items == items(3) * 3
+
+    failed_sink.fail = True
+    exporter.export_item(items(1)[0])
+    with pytest.raises(RuntimeError):
+        exporter.close()
+    assert healthy_sink.closed
+
+
+def test_close_drains_queued_items():
+    sinks = [RecordingItemExporter() for _ in range(3)]
+    exporter = FanOutItemExporter(sinks)
+    exporter.open()
+    for item in items(1000):
+        exporter.export_item(item)
+    exporter.close()
+    assert all(sink.items == items(1000) for sink in sinks)
+
+
+class MutatingItemExporter(RecordingItemExporter):
+    def export_items(self, items):
+        for item in items:
+            item["number"] = hex(item["number"])
+        super().export_items(items)
+
+
+def test_sinks_get_own_copies_of_items():
+    sinks = [MutatingItemExporter(), RecordingItemExporter()]
+    exporter = FanOutItemExporter(sinks)
+    exporter.open()
+    exporter.export_items(items(3))
+    exporter.close()
+    assert sinks[0].items == [{"type": "block", "number": hex(n)} for n in range(3)]
+    assert sinks[1].items == items(3)
+
+
+def test_fan_out_to_local_files(tmpdir):
+    dirname = str(tmpdir.join("output"))
+    for run in range(2):
+        exporter = create_fan_out_item_exporter(
+            ["file://" + dirname, "-"], file_options={"file_maxseconds": 3600}
+        )
+        assert [sink.failure_policy for sink in exporter.sinks] == ["block", "block"]
+        exporter.open()
+        exporter.export_items(items(3, start=run * 3))
+        exporter.close()
+
+    # a restart continues after the existing files
+    blocks_dirname = os.path.join(dirname, "blocks")
+    assert sorted(os.listdir(blocks_dirname)) == [
+        "data-000000000000.json",
+        "data-000000000001.json",
+    ]
+    numbers = []
+    for file_name in sorted(os.listdir(blocks_dirname)):
+        with open(os.path.join(blocks_dirname, file_name)) as file:
+            numbers.extend(json.loads(line)["number"] for line in file)
+    assert numbers == list(range(6))
+
+
+def test_remote_outputs_spill_by_default():
+    assert get_default_failure_policy("file://output") == "block"
+    assert get_default_failure_policy(None) == "block"
+    assert get_default_failure_policy("kafka/127.0.0.1:9092") == "spill"
+    assert get_default_failure_policy("kinesis://klaytn") == "spill"
@@ -0,0 +1,169 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.gcs_item_exporter import (
+    GcsItemExporter,
+    build_block_bundles,
+)
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class MockBlob:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def upload_from_string(self, data, content_type=None):
+        self.client.upload(self.name, data)
+
+
+class MockBucket:
+    def __init__(self, client):
+        self.client = client
+
+    def blob(self, name):
+        return MockBlob(self.client, name)
+
+
+class MockStorageClient:
+    """Stand-in of GCS failing the first upload of every third object"""
+
+    def __init__(self, fail_every=3):
+        self.fail_every = fail_every
+        self.objects = {}
+        self.attempts = {}
+        self.bucket_names = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.uploaded = threading.Event()
+
+    def bucket(self, name):
+        self.bucket_names.append(name)
+        return MockBucket(self)
+
+    def upload(self, name, data):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            attempt = self.attempts[name] = self.attempts.get(name, 0) + 1
+        try:
+            self.uploaded.wait(0.001)
+            if attempt == 1 and len(self.attempts) % self.fail_every == 0:
+                raise ServiceUnavailable("try again")
+            with self.lock:
+                self.objects[name] = data
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def items(start_block, end_block):
+    for block_number in range(start_block, end_block + 1):
+        yield {"type": "block", "number": block_number}
+        yield {"type": "transaction", "block_number": block_number, "hash": "0x1"}
+        yield {"type": "log", "block_number": block_number, "log_index": 0}
+        yield {"type": "receipt", "block_number": block_number}
+
+
+def test_build_block_bundles():
+    bundles = build_block_bundles(
+        list(items(3, 4)) + list(items(1, 1)) + [{"type": "trace", "block_number": 5}]
+    )
+
+    assert [bundle["block"]["number"] for bundle in bundles] == [1, 3, 4]
+    assert bundles[1] == {
+        "block": {"type": "block", "number": 3},
+        "transactions": [{"type": "transaction", "block_number": 3, "hash": "0x1"}],
+        "logs": [{"type": "log", "block_number": 3, "log_index": 0}],
+        "token_transfers": [],
+        "traces": [],
+    }
+
+    with pytest.raises(ValueError):
+        build_block_bundles(list(items(1, 1)) * 2)
+
+
+def test_export_items_uploads_in_parallel_with_retries():
+    client = MockStorageClient()
+    exporter = GcsItemExporter(
+        "bucket",
+        path="/blocks/",
+        max_workers=4,
+        max_in_flight=6,
+        retry_backoff_seconds=0,
+        storage_client=client,
+    )
+    exporter.open()
+    exporter.export_items(items(0, 99))
+    exporter.close()
+
+    assert client.bucket_names == ["bucket"]
+    assert sorted(client.objects) == sorted("blocks/%d.json" % n for n in range(100))
+    assert json.loads(client.objects["blocks/7.json"])["block"]["number"] == 7
+    assert max(client.attempts.values()) == 2
+    assert 1 < client.max_in_flight <= 4
+
+
+def test_export_items_bundles_consecutive_blocks():
+    client = MockStorageClient(fail_every=1)
+    exporter = GcsItemExporter(
+        "bucket", blocks_per_object=4, retry_backoff_seconds=0, storage_client=client
+    )
+    exporter.export_items(items(10, 19))
+    exporter.close()
+
+    assert sorted(client.objects) == [
+        "blocks/10-13.json",
+        "blocks/14-17.json",
+        "blocks/18-19.json",
+    ]
+    bundles = [
+        json.loads(line) for line in client.objects["blocks/14-17.json"].splitlines()
+    ]
+    assert [bundle["block"]["number"] for bundle in bundles] == [14, 15, 16, 17]
+
+
+def test_export_items_raises_after_retries():
+    class FailingStorageClient(MockStorageClient):
+        def upload(self, name, data):
+            raise ServiceUnavailable("down")
+
+    exporter = GcsItemExporter(
+        "bucket",
+        max_retries=2,
+        retry_backoff_seconds=0,
+        storage_client=FailingStorageClient(),
+    )
+    with pytest.raises(ServiceUnavailable):
+        exporter.export_items(items(0, 0))
+    exporter.close()
@@ -0,0 +1,177 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import queue
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.kafka_exporter import (
+    PARTITION_KEY_TRANSACTION_HASH,
+    KafkaItemExporter,
+)
+
+
+class MockFuture:
+    def __init__(self):
+        self.callbacks = []
+        self.errbacks = []
+
+    def add_callback(self, f, *args):
+        self.callbacks.append((f, args))
+
+    def add_errback(self, f, *args):
+        self.errbacks.append((f, args))
+
+    def succeed(self, value):
+        for f, args in self.callbacks:
+            f(*args, value)
+
+    def fail(self, exception):
+        for f, args in self.errbacks:
+            f(*args, exception)
+
+
+class MockKafkaProducer:
+    """Stand-in of a broker: messages are delivered by a background thread in the order they were sent"""
+
+    def __init__(self, failing_keys=()):
+        self.failing_keys = set(failing_keys)
+        self.messages = []
+        self.pending = queue.Queue()
+        self.pending_bytes = 0
+        self.max_pending_bytes = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self._deliver, daemon=True)
+        self.thread.start()
+
+    def send(self, topic, key=None, value=None):
+        future = MockFuture()
+        with self.lock:
+            self.pending_bytes += len(value)
+            self.max_pending_bytes = max(self.max_pending_bytes, self.pending_bytes)
+        self.pending.put((future, topic, key, value))
+        return future
+
+    def flush(self, timeout=None):
+        self.pending.join()
+
+    def close(self, timeout=None):
+        self.closed = True
+
+    def _deliver(self):
+        while True:
+            future, topic, key, value = self.pending.get()
+            with self.lock:
+                self.pending_bytes -= len(value)
+            if key in self.failing_keys:
+                future.fail(IOError("broker is not available"))
+            else:
+                self.messages.append((topic, key, json.loads(value)))
+                future.succeed(None)
+            self.pending.task_done()
+
+
+def items():
+    for block_number in range(20):
+        yield {
+            "type": "block",
+            "number": block_number,
+            "hash": "0x%064x" % block_number,
+        }
+        for transaction_index in range(5):
+            transaction_hash = "0x%064x" % (block_number * 100 + transaction_index)
+            yield {
+                "type": "transaction",
+                "hash": transaction_hash,
+                "block_number": block_number,
+            }
+            yield {
+                "type": "log",
+                "transaction_hash": transaction_hash,
+                "block_number": block_number,
+                "log_index": transaction_index,
+            }
+
+
+MAPPING = {"block": "blocks", "transaction": "transactions", "log": "logs"}
+
+
+def test_export_items_keyed_by_block_number():
+    producer = MockKafkaProducer()
+    exporter = KafkaItemExporter(
+        "kafka/127.0.0.1:9092",
+        MAPPING,
+        max_in_flight_bytes=1024,
+        producer=producer,
+    )
+    exporter.open()
+    exporter.export_items(items())
+
+    assert exporter.delivered_count == 220
+    assert producer.max_pending_bytes <= 1024
+    assert [key for topic, key, _ in producer.messages if topic == "blocks"] == [
+        str(block_number).encode() for block_number in range(20)
+    ]
+    assert all(
+        key == str(item.get("block_number", item.get("number"))).encode()
+        for _, key, item in producer.messages
+    )
+
+    exporter.close()
+    assert producer.closed
+
+
+def test_export_items_keyed_by_transaction_hash():
+    producer = MockKafkaProducer()
+    exporter = KafkaItemExporter(
+        "kafka/127.0.0.1:9092",
+        MAPPING,
+        partition_key=PARTITION_KEY_TRANSACTION_HASH,
+        producer=producer,
+    )
+    exporter.export_items(items())
+    exporter.close()
+
+    for topic, key, item in producer.messages:
+        if topic == "blocks":
+            assert key == str(item["number"]).encode()
+        elif topic == "transactions":
+            assert key == item["hash"].encode()
+        else:
+            assert key == item["transaction_hash"].encode()
+
+
+def test_export_items_raises_on_failed_delivery():
+    producer = MockKafkaProducer(failing_keys={b"7"})
+    exporter = KafkaItemExporter("kafka/127.0.0.1:9092", MAPPING, producer=producer)
+
+    with pytest.raises(RuntimeError, match="11 Kafka messages are not delivered"):
+        exporter.export_items(items())
+
+    # failures are reported once, the next batch is delivered
+    exporter.export_items([{"type": "block", "number": 20}])
+    exporter.close()
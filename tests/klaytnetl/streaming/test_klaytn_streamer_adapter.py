@@ -0,0 +1,158 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+
+from blockchainetl.jobs.exporters.in_memory_item_exporter import InMemoryItemExporter
+from blockchainetl.streaming.streamer import Streamer
+from klaytnetl.streaming.klaytn_streamer_adapter import EntityType, KlaytnStreamerAdapter
+
+
+class MockChainProvider:
+    def __init__(self, head, fork=None):
+        self.blocks = {}
+        self.extend(0, head, fork)
+
+    def extend(self, start_block, end_block, fork=None):
+        for number in range(start_block, end_block + 1):
+            self.blocks[number] = {
+                "number": hex(number),
+                "hash": "0x{}{:062x}".format(fork or "00", number),
+                "parentHash": self.blocks[number - 1]["hash"] if number > 0 else "0x" + "0" * 64,
+                "timestamp": hex(1600000000 + number),
+                "timestampFoS": "0x0",
+                "blockScore": "0x1",
+                "totalBlockScore": hex(number + 1),
+                "size": "0x100",
+                "gasUsed": "0x0",
+                "logsBloom": "0x" + "0" * 512,
+                "transactionsRoot": "0x" + "0" * 64,
+                "stateRoot": "0x" + "0" * 64,
+                "receiptsRoot": "0x" + "0" * 64,
+                "extraData": "0x",
+                "governanceData": "0x",
+                "voteData": "0x",
+                "committee": [],
+                "proposer": "0x" + "0" * 40,
+                "reward": "0x" + "0" * 40,
+                "baseFeePerGas": "0x0",
+                "transactions": [],
+            }
+
+    @property
+    def head(self):
+        return max(self.blocks)
+
+    def make_batch_request(self, text):
+        response = []
+        for request in json.loads(text):
+            if request["method"] == "klay_blockNumber":
+                result = hex(self.head)
+            else:
+                result = self.blocks.get(int(request["params"][0], 16))
+            response.append({"jsonrpc": "2.0", "id": request["id"], "result": result})
+        return response
+
+
+def build_streamer(provider, last_synced_block_file, exporter, start_block=None):
+    adapter = KlaytnStreamerAdapter(
+        batch_web3_provider=provider,
+        item_exporter=exporter,
+        batch_size=2,
+        max_workers=2,
+        entity_types=[EntityType.BLOCK],
+        reorg_window_size=8,
+    )
+    return Streamer(
+        blockchain_streamer_adapter=adapter,
+        last_synced_block_file=last_synced_block_file,
+        start_block=start_block,
+        end_block=provider.head,
+        period_seconds=0,
+        block_batch_size=4,
+        retry_errors=False,
+    )
+
+
+def streamed_items(exporter):
+    return [
+        (item["type"], item["number"], item["hash"])
+        if item["type"] == "block"
+        else (item["type"], item["block_number"], item["block_hash"])
+        for item in exporter.items
+    ]
+
+
+class ListItemExporter(InMemoryItemExporter):
+    def __init__(self):
+        super().__init__(item_types=[])
+        self.items = []
+
+    def open(self):
+        pass
+
+    def export_items(self, items):
+        self.items.extend(items)
+
+
+def test_stream_persists_last_synced_block(tmpdir):
+    last_synced_block_file = str(tmpdir.join("last_synced_block.txt"))
+    provider = MockChainProvider(head=9)
+
+    exporter = ListItemExporter()
+    build_streamer(provider, last_synced_block_file, exporter, start_block=3).stream()
+    assert [number for _, number, _ in streamed_items(exporter)] == list(range(3, 10))
+    assert open(last_synced_block_file).read().strip() == "9"
+    assert all(item["item_id"] == "block_" + item["hash"] for item in exporter.items)
+
+    # restarting resumes after the last synced block
+    provider.extend(10, 12)
+    exporter = ListItemExporter()
+    build_streamer(provider, last_synced_block_file, exporter).stream()
+    assert [number for _, number, _ in streamed_items(exporter)] == [10, 11, 12]
+
+
+def test_stream_retracts_reorganized_blocks(tmpdir):
+    last_synced_block_file = str(tmpdir.join("last_synced_block.txt"))
+    provider = MockChainProvider(head=7)
+    exporter = ListItemExporter()
+    streamer = build_streamer(provider, last_synced_block_file, exporter, start_block=0)
+    streamer.stream()
+    replaced_hashes = {number: provider.blocks[number]["hash"] for number in (6, 7)}
+
+    # blocks after 5 are replaced by a fork which is longer than the streamed chain
+    provider.extend(6, 9, fork="ff")
+    streamer.end_block = provider.head
+    exporter.items = []
+    streamer.stream()
+
+    assert streamed_items(exporter) == [
+        ("retraction", 6, replaced_hashes[6]),
+        ("retraction", 7, replaced_hashes[7]),
+        ("block", 6, provider.blocks[6]["hash"]),
+        ("block", 7, provider.blocks[7]["hash"]),
+        ("block", 8, provider.blocks[8]["hash"]),
+        ("block", 9, provider.blocks[9]["hash"]),
+    ]
+    assert streamer.blockchain_streamer_adapter.block_hash_window.get(7) == provider.blocks[7]["hash"]
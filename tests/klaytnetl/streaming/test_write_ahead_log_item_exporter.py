@@ -0,0 +1,156 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import threading
+
+import pytest
+
+from blockchainetl.jobs.exporters.fan_out_item_exporter import FanOutItemExporter
+from blockchainetl.jobs.exporters.write_ahead_log_item_exporter import (
+    WriteAheadLogItemExporter,
+)
+from blockchainetl.write_ahead_log import WriteAheadLog
+
+
+class FlakySink:
+    def __init__(self, failures=0, gate=None):
+        self.failures = failures
+        self.gate = gate
+        self.items = []
+        self.attempts = 0
+
+    def open(self):
+        pass
+
+    def export_items(self, items):
+        if self.gate is not None:
+            self.gate.wait()
+        self.attempts += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("stream is throttled")
+        self.items.extend(items)
+
+    def close(self):
+        pass
+
+
+def items(count, start=0):
+    return [
+        {"type": "transaction", "block_number": number, "hash": "0x%064x" % number}
+        for number in range(start, start + count)
+    ]
+
+
+def create_exporter(sink, dirname, **kwargs):
+    exporter = WriteAheadLogItemExporter(
+        sink,
+        dirname,
+        batch_size=7,
+        segment_max_bytes=1000,
+        retry_backoff_seconds=0.01,
+        **kwargs
+    )
+    exporter.open()
+    return exporter
+
+
+def test_items_are_delivered_in_order_after_retries(tmpdir):
+    sink = FlakySink(failures=3)
+    exporter = create_exporter(sink, str(tmpdir))
+    for start in range(0, 100, 10):
+        exporter.export_items(items(10, start=start))
+    exporter.close()
+
+    assert sink.items == items(100)
+    assert sink.attempts == 3 + 15
+    assert exporter.delivered_count == 100
+    # delivered segments are deleted, the last one is kept for the next start
+    assert len(WriteAheadLog(str(tmpdir)).list_segment_indexes()) == 1
+
+
+def test_undelivered_items_are_resumed(tmpdir):
+    gate = threading.Event()
+    stuck_sink = FlakySink(gate=gate)
+    exporter = create_exporter(stuck_sink, str(tmpdir), drain_timeout_seconds=0)
+    exporter.export_items(items(50))
+    gate.set()
+    # closing gives up on the log once the batch in flight is delivered
+    exporter.close()
+    assert len(stuck_sink.items) < 50
+
+    sink = FlakySink()
+    exporter = create_exporter(sink, str(tmpdir))
+    exporter.export_items(items(10, start=50))
+    exporter.close()
+
+    assert stuck_sink.items + sink.items == items(60)
+
+
+def test_items_are_delivered_through_failed_fan_out_sink(tmpdir):
+    sink = FlakySink(failures=2)
+    exporter = create_exporter(FanOutItemExporter([sink]), str(tmpdir))
+    exporter.export_items(items(20))
+    exporter.close()
+
+    assert sink.items == items(20)
+
+
+def test_stopped_drainer_fails_export_and_close(tmpdir, monkeypatch):
+    sink = FlakySink()
+    exporter = create_exporter(sink, str(tmpdir))
+    drained = threading.Event()
+
+    def read(batch_size, timeout):
+        drained.set()
+        raise OSError("disk is gone")
+
+    monkeypatch.setattr(exporter.write_ahead_log, "read", read)
+    drained.wait()
+    exporter._drainer.join()
+    with pytest.raises(RuntimeError, match="disk is gone"):
+        exporter.export_items(items(1))
+    with pytest.raises(RuntimeError, match="disk is gone"):
+        exporter.close()
+
+
+def test_torn_record_is_skipped(tmpdir):
+    wal = WriteAheadLog(str(tmpdir))
+    wal.open()
+    wal.append([b'{"a": 1}', b'{"a": 2}'])
+    wal.close()
+    segment_filename = os.path.join(str(tmpdir), "segment-000000000000.wal")
+    with open(segment_filename, "ab") as segment_file:
+        segment_file.write(b'{"a": ')
+
+    wal = WriteAheadLog(str(tmpdir))
+    wal.open()
+    wal.append([b'{"a": 3}'])
+    records, position = wal.read(10, timeout=0)
+    assert records == [b'{"a": 1}', b'{"a": 2}', b'{"a": 3}']
+    wal.ack(position)
+    assert wal.list_segment_indexes() == [1]
+    assert wal.read(10, timeout=0)[0] == []
+    wal.close()
@@ -0,0 +1,250 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+from blockchainetl.compression import (
+    ParallelCompressedFile,
+    get_compression_extension,
+    get_zstd_dictionary_path,
+    load_zstd_dictionaries,
+    open_compressed,
+    train_zstd_dictionary,
+)
+from blockchainetl.frame_index import (
+    get_frame_index_filename,
+    iterate_items_in_block_range,
+    read_frame_index,
+    read_frames,
+)
+from blockchainetl.jobs.exporters.singlefile_item_exporter import (
+    SinglefileItemExporter,
+)
+from klaytnetl.jobs.exporters.raw_traces_item_exporter import raw_traces_item_exporter
+from klaytnetl.misc_utils import get_item_iterable
+
+
+class UnclosedBytesIO(io.BytesIO):
+    def close(self):
+        pass
+
+
+def write_chunks(compression, chunks, chunk_size):
+    output = UnclosedBytesIO()
+    file = ParallelCompressedFile(
+        output, compression=compression, threads=4, chunk_size=chunk_size
+    )
+    for chunk in chunks:
+        file.write(chunk)
+    file.close()
+    return output.getvalue()
+
+
+CHUNKS = [b'{"number": %d, "hash": "0x%064x"}\n' % (i, i) for i in range(10000)]
+
+
+def test_gzip_members():
+    data = write_chunks("gzip", CHUNKS, chunk_size=4096)
+    assert data.count(b"\x1f\x8b\x08") > 100
+    assert gzip.decompress(data) == b"".join(CHUNKS)
+
+    assert gzip.decompress(write_chunks("gzip", [], chunk_size=4096)) == b""
+
+
+def test_zstd_frames():
+    zstandard = pytest.importorskip("zstandard")
+
+    data = write_chunks("zstd", CHUNKS, chunk_size=4096)
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        io.BytesIO(data), read_across_frames=True
+    )
+    assert reader.read() == b"".join(CHUNKS)
+
+
+def test_compressed_csv_output(tmpdir):
+    filename = str(tmpdir.join("blocks.csv.gz"))
+    exporter = SinglefileItemExporter(
+        {"block": filename},
+        {"block": ["number", "hash"]},
+        file_format="csv",
+        compress=True,
+        compress_level=1,
+    )
+    exporter.open()
+    exporter.export_items(
+        [{"type": "block", "number": i, "hash": "0x%064x" % i} for i in range(3)]
+    )
+    exporter.close()
+
+    with gzip.open(filename, "rt") as file:
+        lines = file.read().splitlines()
+    assert lines[0] == "number,hash"
+    assert lines[1:] == ["%d,0x%064x" % (i, i) for i in range(3)]
+
+
+def test_zstd_dictionary(tmpdir):
+    pytest.importorskip("zstandard")
+
+    traces = [
+        {
+            "type": "trace",
+            "block_number": i // 10,
+            "transaction_index": i % 10,
+            "from_address": "0x%040x" % (i % 7),
+            "to_address": "0x%040x" % (i % 13),
+            "value": i * 1000,
+            "trace_type": "call",
+            "status": 1,
+        }
+        for i in range(2000)
+    ]
+    samples = [
+        json.dumps({k: v for k, v in trace.items() if k != "type"}).encode()
+        for trace in traces
+    ]
+    dict_dir = str(tmpdir.join("dicts"))
+    os.makedirs(dict_dir)
+    with open(get_zstd_dictionary_path(dict_dir, "trace"), "wb") as file:
+        file.write(train_zstd_dictionary(samples, dict_size=4096))
+
+    dirname = str(tmpdir.join("traces"))
+    exporter = raw_traces_item_exporter(
+        dirname,
+        file_maxlines=1000,
+        compress=True,
+        compression="zstd",
+        zstd_dict_dir=dict_dir,
+    )
+    exporter.open()
+    exporter.export_items(traces)
+    exporter.close()
+
+    files = sorted(os.listdir(dirname))
+    assert files == ["data-000000000000.json.zst", "data-000000000001.json.zst"]
+
+    zstd_dicts = load_zstd_dictionaries(dict_dir)
+    items = []
+    for file_name in files:
+        with open_compressed(
+            os.path.join(dirname, file_name), "rt", zstd_dicts
+        ) as file:
+            items.extend(json.loads(line) for line in file)
+    assert [item["value"] for item in items] == [trace["value"] for trace in traces]
+
+    with pytest.raises(LookupError):
+        open_compressed(os.path.join(dirname, files[0]), "rt")
+
+
+def framed_traces(count):
+    return [
+        {
+            "type": "trace",
+            "block_number": i // 10,
+            "trace_index": i % 10,
+            "from_address": "0x%040x" % (i % 7),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "compression,file_format", [("gzip", "json"), ("gzip", "csv"), ("zstd", "csv")]
+)
+def test_framed_output_with_index(tmpdir, compression, file_format):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+
+    filename = str(
+        tmpdir.join("traces." + file_format + get_compression_extension(compression))
+    )
+    closed_files = []
+    exporter = SinglefileItemExporter(
+        {"trace": filename},
+        {"trace": ["block_number", "trace_index", "from_address"]},
+        file_format=file_format,
+        compress=True,
+        compression=compression,
+        frame_rows=100,
+        on_file_closed=closed_files.append,
+    )
+    traces = framed_traces(2000)
+    exporter.open()
+    exporter.export_items(traces)
+    exporter.close()
+
+    assert closed_files == [get_frame_index_filename(filename), filename]
+    frame_index = read_frame_index(filename)
+    frames = frame_index["frames"]
+    assert frame_index["compression"] == compression
+    # CSV headers are a frame of their own
+    assert [frame["rows"] for frame in frames] == (
+        [0] if file_format == "csv" else []
+    ) + [100] * 20
+    assert frames[-1]["start_block"] == 190 and frames[-1]["end_block"] == 199
+    assert frames[-1]["offset"] + frames[-1]["length"] == os.path.getsize(filename)
+
+    # still an ordinary compressed file
+    with open_compressed(filename) as file:
+        assert len(file.read().splitlines()) == 2000 + (file_format == "csv")
+
+    items = list(iterate_items_in_block_range(filename, 42, 57))
+    assert [
+        (int(item["block_number"]), int(item["trace_index"])) for item in items
+    ] == [
+        (trace["block_number"], trace["trace_index"])
+        for trace in traces
+        if 42 <= trace["block_number"] <= 57
+    ]
+    # only the frames of blocks 40-59 are decompressed
+    assert len(list(read_frames(filename, 42, 57))) == 2 + (file_format == "csv")
+
+    with get_item_iterable(filename, start_block=199) as item_iterable:
+        assert len(list(item_iterable)) == 10
+
+
+def test_framed_rolling_output(tmpdir):
+    dirname = str(tmpdir.join("traces"))
+    exporter = raw_traces_item_exporter(
+        dirname, file_maxlines=500, compress=True, frame_rows=64
+    )
+    exporter.open()
+    exporter.export_items(framed_traces(1000))
+    exporter.close()
+
+    assert sorted(os.listdir(dirname)) == [
+        "data-000000000000.json.gz",
+        "data-000000000000.json.gz.idx",
+        "data-000000000001.json.gz",
+        "data-000000000001.json.gz.idx",
+    ]
+    frames = read_frame_index(os.path.join(dirname, "data-000000000001.json.gz"))[
+        "frames"
+    ]
+    assert [frame["rows"] for frame in frames] == [64] * 7 + [52]
+    assert frames[0]["start_block"] == 50
@@ -0,0 +1,134 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import tests.resources
+from blockchainetl.exporters import CsvItemExporter, JsonLinesItemExporter
+from blockchainetl.row import row_type
+from klaytnetl.jobs.exporters.enrich_block_group_item_exporter import (
+    BLOCK_FIELDS_TO_EXPORT,
+    LOG_FIELDS_TO_EXPORT,
+    RECEIPT_FIELDS_TO_EXPORT,
+    TOKEN_TRANSFER_FIELDS_TO_EXPORT,
+    TRANSACTION_FIELDS_TO_EXPORT,
+)
+
+
+def read_items(file_name):
+    content = tests.resources.read_resource(
+        ["test_export_block_groups_job", "block_groups_enrich"], file_name
+    )
+    items = []
+    for line in content.splitlines():
+        item = json.loads(line)
+        # values of mapped items, that the JSON encoder doesn't handle by itself
+        if "block_timestamp" in item:
+            item["block_timestamp"] = datetime.fromisoformat(item["block_timestamp"])
+        if isinstance(item.get("value"), int) and item["value"] < 10**20:
+            item["value"] = Decimal(item["value"])
+        item.pop("gas_price", None)
+        item["missing"] = "not exported"
+        items.append(item)
+    return items
+
+
+def encode_json_item(exporter, item):
+    itemdict = dict(exporter._get_serialized_fields(item))
+    return (exporter.encoder.encode(itemdict) + "\n").encode("utf-8")
+
+
+def encode_csv_item(exporter, item):
+    fields = exporter._get_serialized_fields(item, default_value="", include_empty=True)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(list(exporter._build_row(x for _, x in fields)))
+    return buffer.getvalue().encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "file_name,fields",
+    [
+        ("expected_blocks.json", BLOCK_FIELDS_TO_EXPORT),
+        ("expected_transactions.json", TRANSACTION_FIELDS_TO_EXPORT),
+        ("expected_receipts.json", RECEIPT_FIELDS_TO_EXPORT),
+        ("expected_logs.json", LOG_FIELDS_TO_EXPORT),
+        ("expected_token_transfers.json", TOKEN_TRANSFER_FIELDS_TO_EXPORT),
+    ],
+)
+def test_compiled_encoders_are_byte_identical(file_name, fields):
+    items = read_items(file_name)
+
+    json_exporter = JsonLinesItemExporter(None, fields_to_export=fields)
+    csv_exporter = CsvItemExporter(None, fields_to_export=fields)
+    for item in items:
+        assert json_exporter.encode_item(item) == encode_json_item(json_exporter, item)
+        assert csv_exporter.encode_item(item) == encode_csv_item(csv_exporter, item)
+
+    file = io.BytesIO()
+    csv_exporter = CsvItemExporter(file, fields_to_export=fields)
+    for item in items:
+        csv_exporter.export_item(item)
+    csv_exporter.stream.flush()
+    expected_rows = [encode_csv_item(csv_exporter, item) for item in items]
+    assert file.getvalue() == b"".join(
+        [csv_exporter.encode_headers(items[0])] + expected_rows
+    )
+
+
+@pytest.mark.parametrize(
+    "file_name,fields",
+    [
+        ("expected_blocks.json", BLOCK_FIELDS_TO_EXPORT),
+        ("expected_transactions.json", TRANSACTION_FIELDS_TO_EXPORT),
+        ("expected_receipts.json", RECEIPT_FIELDS_TO_EXPORT),
+        ("expected_logs.json", LOG_FIELDS_TO_EXPORT),
+        ("expected_token_transfers.json", TOKEN_TRANSFER_FIELDS_TO_EXPORT),
+    ],
+)
+def test_rows_are_encoded_like_item_dicts(file_name, fields):
+    row_class = None
+    items, rows = [], []
+    for item in read_items(file_name):
+        if row_class is None:
+            row_class = row_type("item", list(item))
+        items.append({"type": "item", **item})
+        rows.append(row_class(**item))
+    assert rows == items
+    assert [row.to_dict() for row in rows] == items
+
+    for fields_to_export in (fields, None):
+        json_exporter = JsonLinesItemExporter(None, fields_to_export=fields_to_export)
+        csv_exporter = CsvItemExporter(None, fields_to_export=fields_to_export)
+        for row, item in zip(rows, items):
+            assert json_exporter.encode_item(row) == json_exporter.encode_item(item)
+            assert csv_exporter.encode_item(row) == csv_exporter.encode_item(item)
+        assert csv_exporter.encode_headers(rows[0]) == csv_exporter.encode_headers(
+            items[0]
+        )
@@ -0,0 +1,169 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+
+import pytest
+
+from blockchainetl.compression import get_compression_extension
+from blockchainetl.frame_index import get_frame_index_filename
+from blockchainetl.jobs.exporters.sharded_file_item_exporter import (
+    ShardedFileItemExporter,
+)
+from blockchainetl.jobs.exporters.singlefile_item_exporter import (
+    SinglefileItemExporter,
+)
+from blockchainetl.lookup_index import (
+    get_lookup_index_filename,
+    lookup_items,
+    lookup_positions,
+    to_lookup_key,
+)
+from klaytnetl import misc_utils
+from klaytnetl.jobs.exporters.lookup_fields import LOOKUP_FIELD_MAPPING
+from klaytnetl.jobs.exporters.raw_traces_item_exporter import raw_traces_item_exporter
+
+FIELDS = ["block_number", "trace_index", "transaction_hash", "from_address"]
+
+
+def traces(count):
+    return [
+        {
+            "type": "trace",
+            "block_number": i // 10,
+            "trace_index": i % 10,
+            "transaction_hash": "0x%064x" % (i // 3),
+            "from_address": "0x%038x%02x" % (0xAB, i % 7),
+        }
+        for i in range(count)
+    ]
+
+
+def test_lookup_keys():
+    assert to_lookup_key("0x" + "ab" * 20) == bytes(12) + b"\xab" * 20
+    assert to_lookup_key("0X" + "AB" * 32) == b"\xab" * 32
+    assert to_lookup_key("0x" + "ab" * 33) is None
+    assert to_lookup_key("0xzz") is None
+    assert to_lookup_key("0x") is None
+    assert to_lookup_key(None) is None
+
+
+@pytest.mark.parametrize(
+    "compression,file_format",
+    [(None, "json"), (None, "csv"), ("gzip", "csv"), ("zstd", "json")],
+)
+def test_singlefile_lookup(tmpdir, compression, file_format):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+
+    extension = get_compression_extension(compression) if compression else ""
+    filename = str(tmpdir.join("traces." + file_format + extension))
+    closed_files = []
+    exporter = SinglefileItemExporter(
+        {"trace": filename},
+        {"trace": FIELDS},
+        file_format=file_format,
+        compress=compression is not None,
+        compression=compression or "gzip",
+        frame_rows=50,
+        lookup_field_mapping=LOOKUP_FIELD_MAPPING,
+        on_file_closed=closed_files.append,
+    )
+    exporter.open()
+    exporter.export_items(traces(2000))
+    exporter.close()
+
+    index_filenames = [get_lookup_index_filename(filename)]
+    if compression is not None:
+        index_filenames.insert(0, get_frame_index_filename(filename))
+    assert closed_files == index_filenames + [filename]
+
+    address = "0x%038x%02x" % (0xAB, 3)
+    _, positions = lookup_positions(get_lookup_index_filename(filename), address)
+    # rows of plain files, frames of compressed ones
+    assert len(positions) == (286 if compression is None else 40)
+    assert positions == sorted(positions)
+
+    items = list(lookup_items(filename, address.upper()))
+    assert [int(item["trace_index"]) for item in items] == [
+        trace["trace_index"]
+        for trace in traces(2000)
+        if trace["from_address"] == address
+    ]
+
+    items = list(lookup_items(filename, "0x%064x" % 100))
+    assert [
+        (int(item["block_number"]), int(item["trace_index"])) for item in items
+    ] == [
+        (30, 0),
+        (30, 1),
+        (30, 2),
+    ]
+    assert list(lookup_items(filename, "0x%064x" % 5000)) == []
+
+
+def test_lookup_in_directories(tmpdir):
+    rolled_dirname = str(tmpdir.join("rolled"))
+    exporter = raw_traces_item_exporter(
+        rolled_dirname,
+        file_maxlines=300,
+        compress=True,
+        frame_rows=64,
+        lookup_field_mapping=LOOKUP_FIELD_MAPPING,
+    )
+    exporter.open()
+    exporter.export_items(traces(1000))
+    exporter.close()
+    assert sorted(os.listdir(rolled_dirname))[:3] == [
+        "data-000000000000.json.gz",
+        "data-000000000000.json.gz.idx",
+        "data-000000000000.json.gz.lookup",
+    ]
+
+    sharded_dirname = str(tmpdir.join("sharded"))
+    exporter = ShardedFileItemExporter(
+        {"trace": sharded_dirname},
+        {"trace": FIELDS},
+        shard_size=20,
+        file_format="csv",
+        lookup_field_mapping=LOOKUP_FIELD_MAPPING,
+    )
+    exporter.open()
+    exporter.export_items(traces(1000))
+    exporter.close()
+
+    output = str(tmpdir.join("found.json"))
+    transaction_hash = "0x%064x" % 200
+    misc_utils.lookup_items([rolled_dirname, sharded_dirname], output, transaction_hash)
+    with open(output) as file:
+        items = [json.loads(line) for line in file]
+    assert [(item["file"], int(item["trace_index"])) for item in items] == [
+        (os.path.join(rolled_dirname, "data-000000000002.json.gz"), 0),
+        (os.path.join(rolled_dirname, "data-000000000002.json.gz"), 1),
+        (os.path.join(rolled_dirname, "data-000000000002.json.gz"), 2),
+        (os.path.join(sharded_dirname, "part-000003.csv"), 0),
+        (os.path.join(sharded_dirname, "part-000003.csv"), 1),
+        (os.path.join(sharded_dirname, "part-000003.csv"), 2),
+    ]
@@ -0,0 +1,158 @@
+# MIT License
+#
+# Modifications Copyright (c) klaytn authors
+# Copyright (c) 2018 Evgeny Medvedev, evge.medvedev@gmail.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import base64
+import hashlib
+import os
+import threading
+
+import pytest
+
+from blockchainetl.object_store import ObjectStoreUploader, compute_s3_sha256_checksum
+from klaytnetl.cli.object_store_sync import get_path
+from klaytnetl.jobs.exporters.raw_traces_item_exporter import raw_traces_item_exporter
+
+
+class MockObjectStore:
+    def __init__(self, failing_keys=()):
+        self.failing_keys = set(failing_keys)
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def upload(self, filename, key):
+        if key in self.failing_keys:
+            raise IOError("checksum mismatch")
+        with open(filename, "rb") as file:
+            data = file.read()
+        with self.lock:
+            self.objects[key] = data
+
+    def get_url(self, key):
+        return "mock://" + key
+
+
+def trace(block_number):
+    return {"type": "trace", "block_number": block_number, "trace_index": 0}
+
+
+def test_rolled_files_are_uploaded_and_deleted(tmpdir):
+    store = MockObjectStore()
+    uploader = ObjectStoreUploader(store, str(tmpdir), prefix="bucket/")
+    exporter = raw_traces_item_exporter(
+        str(tmpdir.join("traces")), file_maxlines=2, on_file_closed=uploader.submit
+    )
+    exporter.open()
+    exporter.export_items([trace(block_number) for block_number in range(5)])
+    exporter.close()
+    uploader.close()
+
+    assert sorted(store.objects) == [
+        "bucket/traces/data-000000000000.json",
+        "bucket/traces/data-000000000001.json",
+        "bucket/traces/data-000000000002.json",
+    ]
+    assert store.objects["bucket/traces/data-000000000002.json"].count(b"\n") == 1
+    assert os.listdir(str(tmpdir.join("traces"))) == []
+    assert uploader.uploaded_count == 3
+
+
+def test_single_file_is_uploaded_on_close(tmpdir):
+    store = MockObjectStore()
+    uploader = ObjectStoreUploader(store, str(tmpdir), delete_uploaded=False)
+    exporter = raw_traces_item_exporter(
+        str(tmpdir.join("traces.json")), on_file_closed=uploader.submit
+    )
+    exporter.open()
+    exporter.export_items([trace(1)])
+    exporter.close()
+    uploader.close()
+
+    assert list(store.objects) == ["traces.json"]
+    assert tmpdir.join("traces.json").exists()
+
+
+def test_objects_are_named_after_absolute_output_paths(tmpdir):
+    store = MockObjectStore()
+    root = str(tmpdir.mkdir("root"))
+    uploader = ObjectStoreUploader(store, root, prefix="bucket")
+    for output in ("/data/traces.json", "/data/traces"):
+        exporter = raw_traces_item_exporter(
+            get_path(root, output),
+            file_maxlines=None if output.endswith(".json") else 1,
+            on_file_closed=uploader.submit,
+        )
+        exporter.open()
+        exporter.export_items([trace(1)])
+        exporter.close()
+    uploader.close()
+
+    assert sorted(store.objects) == [
+        "bucket/data/traces.json",
+        "bucket/data/traces/data-000000000000.json",
+    ]
+
+    with pytest.raises(ValueError):
+        get_path(root, "../traces.json")
+    with pytest.raises(ValueError, match="outside"):
+        uploader.submit(str(tmpdir.join("traces.json")))
+
+
+def test_failed_upload_is_raised_and_file_is_kept(tmpdir):
+    store = MockObjectStore(failing_keys={"traces/data-000000000000.json"})
+    uploader = ObjectStoreUploader(store, str(tmpdir))
+    exporter = raw_traces_item_exporter(
+        str(tmpdir.join("traces")), file_maxlines=1, on_file_closed=uploader.submit
+    )
+    exporter.open()
+    exporter.export_items([trace(1)])
+    exporter.close()
+
+    with pytest.raises(IOError, match="checksum mismatch"):
+        uploader.close()
+    assert os.listdir(str(tmpdir.join("traces"))) == ["data-000000000000.json"]
+
+
+def test_compute_s3_sha256_checksum(tmpdir):
+    path = str(tmpdir.join("data"))
+    data = os.urandom(3000)
+    with open(path, "wb") as file:
+        file.write(data)
+
+    assert (
+        compute_s3_sha256_checksum(path, 4096, 4096)
+        == base64.b64encode(hashlib.sha256(data).digest()).decode()
+    )
+
+    pytest.importorskip("s3transfer")
+    size = 5 * 1024 * 1024
+    with open(path, "wb") as file:
+        file.write(data * (2 * size // len(data) + 1))
+    with open(path, "rb") as file:
+        parts = [file.read(size), file.read(size), file.read()]
+    expected = base64.b64encode(
+        hashlib.sha256(
+            b"".join(hashlib.sha256(part).digest() for part in parts)
+        ).digest()
+    ).decode()
+    assert compute_s3_sha256_checksum(path, size, size) == expected + "-3"